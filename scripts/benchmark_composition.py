@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Per-image cost of the composition-balance score at typical analysis sizes.
+
+Compares the moment-based centroid used by the pipeline with the previous `np.indices`
+coordinate-grid version on synthetic 4:3 grayscale images.
+
+    uv run python scripts/benchmark_composition.py --sizes 1024 1280 --repeats 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from photo_curator.pipeline_v1.composition import composition_balance_score, saliency_centroid
+
+
+def _grid_centroid(gray: np.ndarray) -> tuple[float, float]:
+    """Previous implementation: two full-size float32 index grids per image."""
+    grad_x = cv2.Sobel(gray, cv2.CV_32F, 1, 0, ksize=3)
+    grad_y = cv2.Sobel(gray, cv2.CV_32F, 0, 1, ksize=3)
+    saliency = cv2.magnitude(grad_x, grad_y)
+    total = float(saliency.sum()) + 1e-6
+    yy, xx = np.indices(gray.shape, dtype=np.float32)
+    return float(np.sum(xx * saliency) / total), float(np.sum(yy * saliency) / total)
+
+
+def _per_image_ms(fn, gray: np.ndarray, repeats: int) -> float:
+    fn(gray)
+    started = time.perf_counter()
+    for _ in range(repeats):
+        fn(gray)
+    return (time.perf_counter() - started) / repeats * 1000.0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark composition-balance scoring.")
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1024, 1280], help="Long side in px"
+    )
+    parser.add_argument("--repeats", type=int, default=50, help="Timed calls per size")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(
+        f"{'size':>6} {'grid ms':>9} {'moments ms':>11} {'full score ms':>14} {'max |dx|,|dy|':>14}"
+    )
+    for side in args.sizes:
+        noise = rng.integers(0, 256, (side * 3 // 4, side), dtype=np.uint8)
+        gray = cv2.GaussianBlur(noise, (5, 5), 0)
+        grid_ms = _per_image_ms(_grid_centroid, gray, args.repeats)
+        moments_ms = _per_image_ms(saliency_centroid, gray, args.repeats)
+        score_ms = _per_image_ms(composition_balance_score, gray, args.repeats)
+        drift = max(
+            abs(a - b) for a, b in zip(_grid_centroid(gray), saliency_centroid(gray), strict=True)
+        )
+        print(f"{side:>6} {grid_ms:>9.2f} {moments_ms:>11.2f} {score_ms:>14.2f} {drift:>14.2e}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -469,10 +469,12 @@ app.get("/api/v1/photos/:id/image", async (req, res) => {
   res.setHeader("Content-Disposition", `${dispositionType}; filename=\"${safeName}\"`);
   if (size === "thumb") {
     const thumbDir = process.env.THUMBS_DIR || "/data/cache/thumbs";
-    const thumbPath = path.join(thumbDir, `${row.sha256}.jpg`);
-    if (fs.existsSync(thumbPath)) {
-      res.sendFile(thumbPath);
-      return;
+    for (const extension of ["jpg", "webp"]) {
+      const thumbPath = path.join(thumbDir, `${row.sha256}.${extension}`);
+      if (fs.existsSync(thumbPath)) {
+        res.sendFile(thumbPath);
+        return;
+      }
     }
   }
 
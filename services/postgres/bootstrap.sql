@@ -47,6 +47,13 @@ CREATE TABLE IF NOT EXISTS file_metrics (
    llm_aesthetic_score DOUBLE PRECISION,
    llm_wall_art_score DOUBLE PRECISION,
    clip_model_version TEXT,
+   clip_raw_score DOUBLE PRECISION,
+   composition_balance_score DOUBLE PRECISION,
+   scoring_gate TEXT,
+   nima_mean DOUBLE PRECISION,
+   nima_std DOUBLE PRECISION,
+   nima_model_version TEXT,
+   nima_updated_at TIMESTAMPTZ,
   advanced_metadata_updated_at TIMESTAMPTZ,
   created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
   updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
@@ -84,6 +91,7 @@ CREATE TABLE IF NOT EXISTS file_llm_results (
   aesthetic_score DOUBLE PRECISION,
   wall_art_score DOUBLE PRECISION,
   description_embedding VECTOR(384),
+  content_sha256 TEXT,
   processed_at TIMESTAMPTZ NOT NULL DEFAULT now(),
   created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
   updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
@@ -100,6 +108,8 @@ CREATE TABLE IF NOT EXISTS file_labels (
 CREATE INDEX IF NOT EXISTS idx_files_taken_at ON files(photo_taken_at);
 CREATE INDEX IF NOT EXISTS idx_files_camera_make ON files(camera_make);
 CREATE INDEX IF NOT EXISTS idx_files_camera_model ON files(camera_model);
+CREATE INDEX IF NOT EXISTS idx_files_sha256 ON files(sha256);
+CREATE INDEX IF NOT EXISTS idx_files_created_at ON files(created_at);
 
 CREATE INDEX IF NOT EXISTS idx_file_descriptions_tsv
 ON file_descriptions
@@ -126,6 +136,14 @@ ALTER TABLE file_metrics ADD COLUMN IF NOT EXISTS llm_aesthetic_score DOUBLE PRE
 ALTER TABLE file_metrics ADD COLUMN IF NOT EXISTS llm_wall_art_score DOUBLE PRECISION;
 ALTER TABLE file_metrics ADD COLUMN IF NOT EXISTS clip_model_version TEXT;
 ALTER TABLE file_metrics ADD COLUMN IF NOT EXISTS advanced_metadata_updated_at TIMESTAMPTZ;
+ALTER TABLE file_metrics ADD COLUMN IF NOT EXISTS clip_raw_score DOUBLE PRECISION;
+ALTER TABLE file_metrics ADD COLUMN IF NOT EXISTS composition_balance_score DOUBLE PRECISION;
+ALTER TABLE file_metrics ADD COLUMN IF NOT EXISTS scoring_gate TEXT;
+ALTER TABLE file_metrics ADD COLUMN IF NOT EXISTS nima_mean DOUBLE PRECISION;
+ALTER TABLE file_metrics ADD COLUMN IF NOT EXISTS nima_std DOUBLE PRECISION;
+ALTER TABLE file_metrics ADD COLUMN IF NOT EXISTS nima_model_version TEXT;
+ALTER TABLE file_metrics ADD COLUMN IF NOT EXISTS nima_updated_at TIMESTAMPTZ;
+ALTER TABLE file_llm_results ADD COLUMN IF NOT EXISTS content_sha256 TEXT;
 
 -- Migrate LLM scores from file_llm_results into file_metrics (normalize 0-100 to 0-1)
 UPDATE file_metrics fm
@@ -180,6 +198,9 @@ CREATE TABLE IF NOT EXISTS pipeline_runs (
    total_described INTEGER DEFAULT 0,
    total_skipped INTEGER DEFAULT 0,
    total_failed INTEGER DEFAULT 0,
+   total_gated INTEGER DEFAULT 0,
+   gated_seconds_saved DOUBLE PRECISION DEFAULT 0,
+   total_nima_scored INTEGER DEFAULT 0,
    blur_min DOUBLE PRECISION,
    blur_max DOUBLE PRECISION,
    blur_median DOUBLE PRECISION,
@@ -257,6 +278,20 @@ CREATE TABLE IF NOT EXISTS pipeline_runs (
    semantic_relevance_p75 DOUBLE PRECISION,
    semantic_relevance_p90 DOUBLE PRECISION,
    semantic_relevance_stddev DOUBLE PRECISION,
+   nima_mean_min DOUBLE PRECISION,
+   nima_mean_max DOUBLE PRECISION,
+   nima_mean_median DOUBLE PRECISION,
+   nima_mean_p25 DOUBLE PRECISION,
+   nima_mean_p75 DOUBLE PRECISION,
+   nima_mean_p90 DOUBLE PRECISION,
+   nima_mean_stddev DOUBLE PRECISION,
+   nima_std_min DOUBLE PRECISION,
+   nima_std_max DOUBLE PRECISION,
+   nima_std_median DOUBLE PRECISION,
+   nima_std_p25 DOUBLE PRECISION,
+   nima_std_p75 DOUBLE PRECISION,
+   nima_std_p90 DOUBLE PRECISION,
+   nima_std_stddev DOUBLE PRECISION,
    notes TEXT
 );
 
@@ -271,8 +306,88 @@ ALTER TABLE pipeline_runs ADD COLUMN IF NOT EXISTS total_clip_aesthetic_scored I
 ALTER TABLE pipeline_runs ADD COLUMN IF NOT EXISTS total_described INTEGER DEFAULT 0;
 ALTER TABLE pipeline_runs ADD COLUMN IF NOT EXISTS total_skipped INTEGER DEFAULT 0;
 ALTER TABLE pipeline_runs ADD COLUMN IF NOT EXISTS total_failed INTEGER DEFAULT 0;
+ALTER TABLE pipeline_runs ADD COLUMN IF NOT EXISTS total_gated INTEGER DEFAULT 0;
+ALTER TABLE pipeline_runs ADD COLUMN IF NOT EXISTS gated_seconds_saved DOUBLE PRECISION DEFAULT 0;
+ALTER TABLE pipeline_runs ADD COLUMN IF NOT EXISTS total_nima_scored INTEGER DEFAULT 0;
+ALTER TABLE pipeline_runs ADD COLUMN IF NOT EXISTS nima_mean_min DOUBLE PRECISION;
+ALTER TABLE pipeline_runs ADD COLUMN IF NOT EXISTS nima_mean_max DOUBLE PRECISION;
+ALTER TABLE pipeline_runs ADD COLUMN IF NOT EXISTS nima_mean_median DOUBLE PRECISION;
+ALTER TABLE pipeline_runs ADD COLUMN IF NOT EXISTS nima_mean_p25 DOUBLE PRECISION;
+ALTER TABLE pipeline_runs ADD COLUMN IF NOT EXISTS nima_mean_p75 DOUBLE PRECISION;
+ALTER TABLE pipeline_runs ADD COLUMN IF NOT EXISTS nima_mean_p90 DOUBLE PRECISION;
+ALTER TABLE pipeline_runs ADD COLUMN IF NOT EXISTS nima_mean_stddev DOUBLE PRECISION;
+ALTER TABLE pipeline_runs ADD COLUMN IF NOT EXISTS nima_std_min DOUBLE PRECISION;
+ALTER TABLE pipeline_runs ADD COLUMN IF NOT EXISTS nima_std_max DOUBLE PRECISION;
+ALTER TABLE pipeline_runs ADD COLUMN IF NOT EXISTS nima_std_median DOUBLE PRECISION;
+ALTER TABLE pipeline_runs ADD COLUMN IF NOT EXISTS nima_std_p25 DOUBLE PRECISION;
+ALTER TABLE pipeline_runs ADD COLUMN IF NOT EXISTS nima_std_p75 DOUBLE PRECISION;
+ALTER TABLE pipeline_runs ADD COLUMN IF NOT EXISTS nima_std_p90 DOUBLE PRECISION;
+ALTER TABLE pipeline_runs ADD COLUMN IF NOT EXISTS nima_std_stddev DOUBLE PRECISION;
 ALTER TABLE pipeline_runs ADD COLUMN IF NOT EXISTS notes TEXT;
 
 CREATE INDEX IF NOT EXISTS idx_pipeline_runs_started_at ON pipeline_runs(started_at DESC);
 CREATE INDEX IF NOT EXISTS idx_pipeline_runs_status ON pipeline_runs(status);
 CREATE UNIQUE INDEX IF NOT EXISTS idx_pipeline_runs_run_id ON pipeline_runs(run_id);
+
+-- Mergeable quantile sketches: per-run (scores written by that run) and library-wide per column.
+CREATE TABLE IF NOT EXISTS pipeline_run_sketches (
+  run_id TEXT NOT NULL REFERENCES pipeline_runs(run_id) ON DELETE CASCADE,
+  score_column TEXT NOT NULL,
+  sketch_mode TEXT NOT NULL,
+  scored_count INTEGER NOT NULL DEFAULT 0,
+  min_val DOUBLE PRECISION,
+  p25 DOUBLE PRECISION,
+  median DOUBLE PRECISION,
+  p75 DOUBLE PRECISION,
+  p90 DOUBLE PRECISION,
+  max_val DOUBLE PRECISION,
+  stddev DOUBLE PRECISION,
+  sketch JSONB NOT NULL,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  PRIMARY KEY (run_id, score_column)
+);
+
+CREATE TABLE IF NOT EXISTS score_sketches (
+  score_column TEXT PRIMARY KEY,
+  scored_count INTEGER NOT NULL DEFAULT 0,
+  sketch JSONB NOT NULL,
+  last_run_id TEXT,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Normalised CLIP image embeddings per file and model, so prompt/temperature/head changes can
+-- rescore from stored vectors instead of re-running the image encoder. Exactly one of the two
+-- columns is set depending on clip_embedding_precision.
+CREATE TABLE IF NOT EXISTS file_clip_embeddings (
+  file_id BIGINT NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+  clip_model_name TEXT NOT NULL,
+  embedding VECTOR,
+  embedding_half HALFVEC,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  PRIMARY KEY (file_id, clip_model_name),
+  CHECK (embedding IS NOT NULL OR embedding_half IS NOT NULL)
+);
+
+-- Lease-based work queue shared by metrics/CLIP/LLM workers on any host. Rows are claimed with
+-- FOR UPDATE SKIP LOCKED, deleted when done, and re-claimable once lease_expires_at passes.
+CREATE TABLE IF NOT EXISTS stage_work_queue (
+  stage TEXT NOT NULL,
+  file_id BIGINT NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+  leased_by TEXT,
+  lease_expires_at TIMESTAMPTZ,
+  attempts INTEGER NOT NULL DEFAULT 0,
+  enqueued_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  PRIMARY KEY (stage, file_id)
+);
+
+-- Files the LLM stage passed over (scoring gate, missing source) for one model, prompt and
+-- content, so incremental --limit runs move on instead of re-checking them every time.
+CREATE TABLE IF NOT EXISTS file_llm_skips (
+  file_id BIGINT PRIMARY KEY REFERENCES files(id) ON DELETE CASCADE,
+  vision_model_name TEXT NOT NULL,
+  prompt_version TEXT NOT NULL,
+  content_sha256 TEXT NOT NULL,
+  reason TEXT NOT NULL,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
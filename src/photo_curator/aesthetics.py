@@ -1,7 +1,9 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace
 from pathlib import Path
+import tempfile
+import time
 from typing import Any, Callable, Iterable
 
 from loguru import logger
@@ -12,7 +14,10 @@ from tqdm import tqdm
 import open_clip
 import torch
 
+from photo_curator.clip_cache import NO_PRETRAINED, ClipModelCache
+from photo_curator.clip_onnx import load_onnx_image_encoder
 from photo_curator.db import Database
+from photo_curator.image_tensors import TensorPreprocess
 from photo_curator.pipeline_run import _compute_distribution
 
 
@@ -53,6 +58,40 @@ class AestheticStats:
     failed: int = 0
 
 
+CLIP_PRECISIONS = ("fp32", "bf16")
+CLIP_BACKENDS = ("torch", "onnx")
+CLIP_PREPROCESSORS = ("pil", "tensor")
+
+
+@dataclass(frozen=True)
+class ClipRuntimeOptions:
+    """Execution knobs for the image encoder; the defaults reproduce plain fp32 inference.
+
+    Thread counts of 0 leave torch's defaults alone. `backend="onnx"` runs the image tower
+    under ONNX Runtime (CPU) from an export cached in `onnx_dir`, optionally int8-quantised;
+    precision, channels_last and compile only apply to the torch backend.
+
+    `preprocess="tensor"` replaces open_clip's PIL transforms with a cv2 resize/crop per image
+    and one batched normalisation per encode call (see `TensorPreprocess`); inputs differ from
+    the PIL path by resampling rounding only.
+    """
+
+    precision: str = "fp32"
+    channels_last: bool = False
+    intra_op_threads: int = 0
+    inter_op_threads: int = 0
+    compile: bool = False
+    backend: str = "torch"
+    onnx_quantize: bool = False
+    onnx_dir: str = ""
+    preprocess: str = "pil"
+
+
+def _cpu_supports_bf16() -> bool:
+    checks = ("_is_avx512_bf16_supported", "_is_amx_tile_supported")
+    return any(getattr(torch.cpu, name, lambda: False)() for name in checks)
+
+
 @dataclass
 class ClipAestheticScorer:
     model: torch.nn.Module
@@ -60,22 +99,141 @@ class ClipAestheticScorer:
     pos_mean: torch.Tensor
     neg_mean: torch.Tensor
     device: str
+    # `<architecture>/<pretrained tag>`; keys stored embeddings.
+    embedding_model: str = ""
+    runtime: ClipRuntimeOptions = field(default_factory=ClipRuntimeOptions)
+    _encode_image: Callable[[torch.Tensor], torch.Tensor] | None = field(default=None, repr=False)
+    _tensor_preprocess: TensorPreprocess | None = field(default=None, repr=False)
+
+    def configure_runtime(self, options: ClipRuntimeOptions) -> None:
+        """Apply `options` to the loaded model; may be called again to switch modes."""
+        if options.intra_op_threads > 0:
+            torch.set_num_threads(options.intra_op_threads)
+        if (
+            options.inter_op_threads > 0
+            and options.inter_op_threads != torch.get_num_interop_threads()
+        ):
+            try:
+                torch.set_num_interop_threads(options.inter_op_threads)
+            except RuntimeError as exc:
+                # Only settable before the first parallel op in the process.
+                logger.warning("Could not set CLIP inter-op threads: {error}", error=exc)
+
+        precision = options.precision
+        device_type = torch.device(self.device).type
+        backend = options.backend
+        if backend == "onnx" and device_type != "cpu":
+            logger.warning(
+                "clip_backend=onnx runs on CPU only; using torch on {device}", device=self.device
+            )
+            backend = "torch"
+        if backend == "onnx":
+            # Autocast does not reach the ONNX session.
+            precision = "fp32"
+        if precision == "bf16" and device_type == "cpu" and not _cpu_supports_bf16():
+            logger.warning(
+                "bf16 autocast requested but this CPU has no native bf16 support; using fp32"
+            )
+            precision = "fp32"
+
+        memory_format = torch.channels_last if options.channels_last else torch.contiguous_format
+        self.model.visual.to(memory_format=memory_format)
+
+        if backend == "onnx":
+            self._encode_image = load_onnx_image_encoder(
+                self.model,
+                self.embedding_model or "clip",
+                self.input_size,
+                options.onnx_dir or Path(tempfile.gettempdir()) / "photo_curator_clip_onnx",
+                quantize=options.onnx_quantize,
+                intra_op_threads=options.intra_op_threads,
+            )
+        elif options.compile:
+            self._encode_image = torch.compile(self.model.encode_image)
+        else:
+            self._encode_image = self.model.encode_image
+        self._tensor_preprocess = (
+            _tensor_preprocess_for(self.model) if options.preprocess == "tensor" else None
+        )
+        preprocess = "tensor" if self._tensor_preprocess is not None else "pil"
+        self.runtime = replace(options, precision=precision, backend=backend, preprocess=preprocess)
+        logger.info(
+            "CLIP runtime: device={device} backend={backend} precision={precision} channels_last={channels_last} threads={intra}/{inter} compile={compile} preprocess={preprocess}",
+            device=self.device,
+            backend=backend + ("-int8" if backend == "onnx" and options.onnx_quantize else ""),
+            precision=precision,
+            channels_last=options.channels_last,
+            intra=torch.get_num_threads(),
+            inter=torch.get_num_interop_threads(),
+            compile=options.compile,
+            preprocess=preprocess,
+        )
+        if options.compile and backend == "torch":
+            started = time.perf_counter()
+            self.embed_tensors([torch.zeros(3, self.input_size, self.input_size)])
+            logger.info(
+                "CLIP torch.compile warm-up: {elapsed:.1f}s", elapsed=time.perf_counter() - started
+            )
 
-    def score_pil_images(self, images: list[Image.Image]) -> list[float]:
-        if not images:
-            return []
-        image_tensors = [self.preprocess(image.convert("RGB")) for image in images]
+    @property
+    def input_size(self) -> int:
+        image_size = getattr(self.model.visual, "image_size", 224)
+        if isinstance(image_size, (tuple, list)):
+            return int(image_size[0])
+        return int(image_size)
+
+    def preprocess_rgb(self, rgb: np.ndarray) -> torch.Tensor:
+        """Model input tensor for one uint8 RGB array (safe to call from worker threads).
+
+        With the tensor preprocessor this is the resized, cropped uint8 image; `embed_tensors`
+        normalises the whole batch at once.
+        """
+        if self._tensor_preprocess is not None:
+            return self._tensor_preprocess.to_uint8(rgb)
+        return self.preprocess(Image.fromarray(rgb))
+
+    def embed_tensors(self, image_tensors: list[torch.Tensor]) -> torch.Tensor:
+        """L2-normalised image embeddings for preprocessed images, one `encode_image` pass."""
         image_tensor = torch.stack(image_tensors).to(self.device)
-        with torch.no_grad():
-            image_emb = self.model.encode_image(image_tensor)
-            image_emb = image_emb / image_emb.norm(dim=-1, keepdim=True)
-            pos_scores = image_emb @ self.pos_mean
-            neg_scores = image_emb @ self.neg_mean
+        if self._tensor_preprocess is not None and image_tensor.dtype == torch.uint8:
+            image_tensor = self._tensor_preprocess.normalize(image_tensor)
+        if self.runtime.channels_last and self.runtime.backend == "torch":
+            image_tensor = image_tensor.contiguous(memory_format=torch.channels_last)
+        encode_image = self._encode_image or self.model.encode_image
+        with (
+            torch.inference_mode(),
+            torch.autocast(
+                torch.device(self.device).type,
+                dtype=torch.bfloat16,
+                enabled=self.runtime.precision == "bf16",
+            ),
+        ):
+            image_emb = encode_image(image_tensor).float()
+        return image_emb / image_emb.norm(dim=-1, keepdim=True)
+
+    def score_embeddings(self, embeddings: torch.Tensor) -> list[float]:
+        """Prompt-differential aesthetic score for image embeddings (fresh or stored)."""
+        embeddings = embeddings.to(device=self.device, dtype=self.pos_mean.dtype)
+        # Stored float16 vectors are only approximately unit length; renormalising is a no-op
+        # for freshly encoded ones.
+        embeddings = embeddings / embeddings.norm(dim=-1, keepdim=True)
+        with torch.inference_mode():
+            pos_scores = embeddings @ self.pos_mean
+            neg_scores = embeddings @ self.neg_mean
         # Apply temperature scaling before sigmoid to sharpen distribution.
         # Without temperature: scores cluster tightly (stddev ~0.07 on real data).
         # With t=0.1: same relative differences are amplified, producing wider spread.
-        raw_diffs = (pos_scores - neg_scores) / AESTHETIC_TEMPERATURE
-        return [_sigmoid(float(raw_diffs[i].item())) for i in range(len(images))]
+        raw_diffs = ((pos_scores - neg_scores) / AESTHETIC_TEMPERATURE).float().cpu().tolist()
+        return [_sigmoid(value) for value in raw_diffs]
+
+    def score_tensors(self, image_tensors: list[torch.Tensor]) -> list[float]:
+        """Score preprocessed images with a single `encode_image` forward pass."""
+        if not image_tensors:
+            return []
+        return self.score_embeddings(self.embed_tensors(image_tensors))
+
+    def score_pil_images(self, images: list[Image.Image]) -> list[float]:
+        return self.score_tensors([self.preprocess(image.convert("RGB")) for image in images])
 
 
 POSITIVE_PROMPTS = [
@@ -105,9 +263,7 @@ def _iter_batches(items: list[tuple[Any, ...]], batch_size: int) -> Iterable[lis
         yield items[idx : idx + batch_size]
 
 
-def _resolve_clip(model_name: str, device: str) -> ClipAestheticScorer:
-    resolved_device = _device_from_setting(device)
-
+def _resolve_pretrained_tag(model_name: str) -> str:
     # Prefer LAION-Aesthetic v2 pretrained weights when available.
     # These are purpose-built for photo aesthetics (0-10 regression target),
     # not general text-image matching like the "openai" tag.
@@ -116,19 +272,53 @@ def _resolve_clip(model_name: str, device: str) -> ClipAestheticScorer:
     # Check for aesthetic-specific pretrained weights first.
     # LAION-Aesthetic v2 weights are typically named with "aesthetic" or "laion_aesthetic".
     # Also check for the dedicated ViT-H-14 aesthetic model if available.
-    aesthetic_tag = None
     for tag in available_pretrained:
         lower_tag = tag.lower()
         if "aesthetic" in lower_tag or "laion_aesthetic" in lower_tag:
-            aesthetic_tag = tag
-            break
+            return tag
 
     # If no aesthetic-specific weights found, prefer the largest model variant.
     # For ViT-H-14 this is typically "openai"; for other models it may vary.
-    pretrained_tag = aesthetic_tag if aesthetic_tag else None
-    if pretrained_tag is None and "openai" in available_pretrained:
-        pretrained_tag = "openai"
+    if "openai" in available_pretrained:
+        return "openai"
+    return NO_PRETRAINED
+
+
+def _preprocess_for(model: torch.nn.Module) -> Callable[[Image.Image], torch.Tensor]:
+    cfg = open_clip.get_model_preprocess_cfg(model)
+    return open_clip.image_transform(
+        cfg["size"],
+        is_train=False,
+        mean=cfg.get("mean"),
+        std=cfg.get("std"),
+        resize_mode=cfg.get("resize_mode"),
+        interpolation=cfg.get("interpolation"),
+        fill_color=cfg.get("fill_color", 0),
+    )
+
+
+def _tensor_preprocess_for(model: torch.nn.Module) -> TensorPreprocess | None:
+    """PIL-free equivalent of `_preprocess_for`, or None for transforms it does not cover."""
+    cfg = open_clip.get_model_preprocess_cfg(model)
+    size = cfg.get("size", 224)
+    size = int(size[0] if isinstance(size, (tuple, list)) else size)
+    resize_mode = cfg.get("resize_mode", "shortest")
+    if resize_mode != "shortest" or cfg.get("mode", "RGB") != "RGB":
+        logger.warning(
+            "CLIP tensor preprocessing does not cover resize_mode={mode}; using PIL transforms",
+            mode=resize_mode,
+        )
+        return None
+    return TensorPreprocess(
+        size=size,
+        mean=tuple(cfg.get("mean") or open_clip.OPENAI_DATASET_MEAN),
+        std=tuple(cfg.get("std") or open_clip.OPENAI_DATASET_STD),
+    )
 
+
+def _create_clip_model(
+    model_name: str, pretrained_tag: str
+) -> tuple[torch.nn.Module, Callable[[Image.Image], torch.Tensor]]:
     if pretrained_tag:
         logger.info(
             "Loading CLIP model with pretrained weights: model={model} pretrained={pretrained}",
@@ -150,35 +340,102 @@ def _resolve_clip(model_name: str, device: str) -> ClipAestheticScorer:
             model=model_name,
         )
         model, _, preprocess = open_clip.create_model_and_transforms(model_name, pretrained=None)
+    return model, preprocess
+
+
+def _resolve_clip(
+    model_name: str, device: str, model_cache: ClipModelCache | None = None
+) -> ClipAestheticScorer:
+    resolved_device = _device_from_setting(device)
+    timings: dict[str, float] = {}
+    started = time.perf_counter()
+
+    pretrained_tag = model_cache.pretrained_tag(model_name) if model_cache else None
+    if pretrained_tag is None:
+        pretrained_tag = _resolve_pretrained_tag(model_name)
+        if model_cache is not None:
+            model_cache.save_pretrained_tag(model_name, pretrained_tag)
+    timings["resolve"] = time.perf_counter() - started
+
+    # Random-init models are never cached: there is nothing worth reusing.
+    use_cache = model_cache is not None and bool(pretrained_tag)
+    mark = time.perf_counter()
+    model = model_cache.load_model(model_name, pretrained_tag) if use_cache else None
+    model_source = "cache" if model is not None else "open_clip"
+    if model is None:
+        model, preprocess = _create_clip_model(model_name, pretrained_tag)
+        if use_cache:
+            model_cache.save_model(model_name, pretrained_tag, model)
+    else:
+        preprocess = _preprocess_for(model)
+    timings["model"] = time.perf_counter() - mark
 
+    mark = time.perf_counter()
     model.to(resolved_device)
     model.eval()
+    timings["to_device"] = time.perf_counter() - mark
 
-    tokenizer = open_clip.get_tokenizer(model_name)
-    with torch.no_grad():
-        pos_tokens = tokenizer(POSITIVE_PROMPTS).to(resolved_device)
-        neg_tokens = tokenizer(NEGATIVE_PROMPTS).to(resolved_device)
-        pos_emb = model.encode_text(pos_tokens)
-        neg_emb = model.encode_text(neg_tokens)
-        pos_emb = pos_emb / pos_emb.norm(dim=-1, keepdim=True)
-        neg_emb = neg_emb / neg_emb.norm(dim=-1, keepdim=True)
+    mark = time.perf_counter()
+    digest = ClipModelCache.prompts_digest(POSITIVE_PROMPTS, NEGATIVE_PROMPTS)
+    prompt_means = (
+        model_cache.load_prompt_means(model_name, pretrained_tag, digest) if use_cache else None
+    )
+    prompts_source = "cache" if prompt_means is not None else "encoded"
+    if prompt_means is None:
+        tokenizer = open_clip.get_tokenizer(model_name)
+        with torch.no_grad():
+            pos_tokens = tokenizer(POSITIVE_PROMPTS).to(resolved_device)
+            neg_tokens = tokenizer(NEGATIVE_PROMPTS).to(resolved_device)
+            pos_emb = model.encode_text(pos_tokens)
+            neg_emb = model.encode_text(neg_tokens)
+            pos_emb = pos_emb / pos_emb.norm(dim=-1, keepdim=True)
+            neg_emb = neg_emb / neg_emb.norm(dim=-1, keepdim=True)
+        prompt_means = (pos_emb.mean(dim=0), neg_emb.mean(dim=0))
+        if use_cache:
+            model_cache.save_prompt_means(model_name, pretrained_tag, digest, *prompt_means)
+    pos_mean, neg_mean = (tensor.to(resolved_device) for tensor in prompt_means)
+    timings["prompts"] = time.perf_counter() - mark
 
+    logger.info(
+        "CLIP startup: model={model} pretrained={pretrained} device={device} resolve={resolve:.2f}s model={model_s:.2f}s ({model_source}) to_device={to_device:.2f}s prompts={prompts:.2f}s ({prompts_source}) total={total:.2f}s",
+        model=model_name,
+        pretrained=pretrained_tag or "none",
+        device=resolved_device,
+        resolve=timings["resolve"],
+        model_s=timings["model"],
+        model_source=model_source,
+        to_device=timings["to_device"],
+        prompts=timings["prompts"],
+        prompts_source=prompts_source,
+        total=time.perf_counter() - started,
+    )
     return ClipAestheticScorer(
         model=model,
         preprocess=preprocess,
-        pos_mean=pos_emb.mean(dim=0),
-        neg_mean=neg_emb.mean(dim=0),
+        pos_mean=pos_mean,
+        neg_mean=neg_mean,
         device=resolved_device,
+        embedding_model=f"{model_name}/{pretrained_tag or 'random-init'}",
     )
 
 
 def load_clip_aesthetic_scorer(
-    model_name: str | None = None, device: str = "auto"
+    model_name: str | None = None,
+    device: str = "auto",
+    model_cache: ClipModelCache | None = None,
+    runtime: ClipRuntimeOptions | None = None,
 ) -> ClipAestheticScorer:
-    """Load a CLIP aesthetic scorer, defaulting to ViT-H-14 with LAION-Aesthetic v2 weights."""
+    """Load a CLIP aesthetic scorer, defaulting to ViT-H-14 with LAION-Aesthetic v2 weights.
+
+    With `model_cache`, the resolved tag, model and prompt embeddings come from local disk
+    after the first run. `runtime` selects the encoder execution mode (see `ClipRuntimeOptions`).
+    """
     if model_name is None:
         model_name = DEFAULT_CLIP_MODEL
-    return _resolve_clip(model_name, device)
+    scorer = _resolve_clip(model_name, device, model_cache)
+    if runtime is not None:
+        scorer.configure_runtime(runtime)
+    return scorer
 
 
 def score_aesthetic(
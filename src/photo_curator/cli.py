@@ -1,11 +1,15 @@
 from __future__ import annotations
 
+from dataclasses import replace
+from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
 import typer
 from loguru import logger
 
+from photo_curator.aesthetics import ClipRuntimeOptions
+from photo_curator.clip_cache import ClipModelCache
 from photo_curator.config import Settings, ensure_dirs, load_settings
 from photo_curator.db import Database
 from photo_curator.pipeline_run import PipelineRun, write_run_artifact
@@ -13,11 +17,32 @@ from photo_curator.pipeline_v1 import (
     DescriptionOptions,
     describe_images,
     discover_files,
+    generate_thumbnails,
+    recompute_scores,
+    rescore_clip_from_embeddings,
     run_advanced_runners,
     run_llm_descriptions,
     score_clip_aesthetic,
     score_metrics,
+    score_nima,
 )
+from photo_curator.pipeline_v1.clip_benchmark import (
+    benchmark_clip_runtime,
+    log_clip_benchmark_report,
+)
+from photo_curator.pipeline_v1.clip_cascade import ClipCascadeOptions
+from photo_curator.pipeline_v1.gating import ScoringGates
+from photo_curator.pipeline_v1.llm_image import LlmImageOptions
+from photo_curator.pipeline_v1.lmstudio_client import LmStudioConcurrency
+from photo_curator.pipeline_v1.nima_stage import NimaOptions
+from photo_curator.pipeline_v1.proxy_cache import ProxyCache
+from photo_curator.pipeline_v1.recompute_stage import load_score_components
+from photo_curator.pipeline_v1.what_if import (
+    evaluate_weights,
+    log_what_if_report,
+    parse_weight_overrides,
+)
+from photo_curator.pipeline_v1.work_queue import WorkQueueOptions
 from photo_curator.utils.logging import configure_logging
 
 app = typer.Typer(help="Photo curation ingestion and enrichment pipeline")
@@ -37,6 +62,88 @@ def _close_db(db: Database) -> None:
     db.close()
 
 
+def _proxy_cache(settings: Settings) -> ProxyCache | None:
+    if not settings.proxy_cache_enabled:
+        return None
+    return ProxyCache(settings.cache_dir)
+
+
+def _clip_model_cache(settings: Settings) -> ClipModelCache | None:
+    if not settings.clip_model_cache_enabled:
+        return None
+    return ClipModelCache(settings.cache_dir, mmap=settings.clip_model_cache_mmap)
+
+
+def _clip_runtime(settings: Settings) -> ClipRuntimeOptions:
+    return ClipRuntimeOptions(
+        precision=settings.clip_precision,
+        channels_last=settings.clip_channels_last,
+        intra_op_threads=settings.clip_intra_op_threads,
+        inter_op_threads=settings.clip_inter_op_threads,
+        compile=settings.clip_compile,
+        backend=settings.clip_backend,
+        onnx_quantize=settings.clip_onnx_quantize,
+        onnx_dir=str(Path(settings.cache_dir) / "clip"),
+        preprocess=settings.clip_preprocess,
+    )
+
+
+def _clip_cascade(settings: Settings) -> ClipCascadeOptions | None:
+    if not settings.clip_cascade_enabled:
+        return None
+    return ClipCascadeOptions(
+        small_model=settings.clip_cascade_small_model,
+        top_fraction=settings.clip_cascade_top_fraction,
+        margin=settings.clip_cascade_margin,
+    )
+
+
+def _scoring_gates(settings: Settings) -> ScoringGates:
+    return ScoringGates(
+        min_technical_quality=settings.scoring_gate_min_technical_quality,
+        min_brightness=settings.scoring_gate_min_brightness,
+        max_blur=settings.scoring_gate_max_blur,
+    )
+
+
+def _work_queue(settings: Settings) -> WorkQueueOptions | None:
+    if not settings.work_queue_enabled:
+        return None
+    options = WorkQueueOptions(
+        lease_seconds=settings.work_queue_lease_seconds,
+        claim_size=settings.work_queue_claim_size,
+    )
+    if settings.work_queue_worker_id:
+        options = replace(options, worker_id=settings.work_queue_worker_id)
+    return options
+
+
+def _nima(settings: Settings) -> NimaOptions:
+    return NimaOptions(
+        precision=settings.nima_precision,
+        mmap=settings.nima_weights_mmap,
+        heuristic_fallback=settings.nima_heuristic_fallback,
+    )
+
+
+def _lmstudio_concurrency(settings: Settings) -> LmStudioConcurrency:
+    return LmStudioConcurrency(
+        max_in_flight=settings.lmstudio_max_in_flight,
+        latency_tolerance=settings.lmstudio_latency_tolerance,
+        stage_deadline_seconds=settings.lmstudio_stage_deadline_seconds or None,
+    )
+
+
+def _llm_image(settings: Settings) -> LlmImageOptions:
+    return LlmImageOptions(
+        max_side=settings.lmstudio_image_max_side,
+        jpeg_quality=settings.lmstudio_image_quality,
+        proxy_cache=_proxy_cache(settings),
+        thumbs_dir=settings.thumbs_dir,
+        thumbnail_format=settings.thumbnail_format,
+    )
+
+
 @app.command("discover")
 def discover_cmd(
     roots: list[Path] = typer.Option([], "--roots", help="Root folders to scan"),
@@ -82,8 +189,18 @@ def score_metrics_cmd(
     try:
         run_tracker.start(clip_model_version="clip_aesthetic_v1")
 
-        metrics_stats = score_metrics(db, max_size=max_size)
-        run_tracker.update_stage(metrics_scored=metrics_stats.processed)
+        metrics_stats = score_metrics(
+            db,
+            max_size=max_size,
+            proxy_cache=_proxy_cache(settings),
+            log_distribution=False,
+            work_queue=_work_queue(settings),
+        )
+        run_tracker.update_stage(
+            metrics_scored=metrics_stats.processed,
+            sketches=metrics_stats.sketches,
+            sketch_mode=metrics_stats.sketch_mode,
+        )
 
         run_id = run_tracker.complete()
         write_run_artifact(db, run_id, report_dir=settings.report_dir)
@@ -95,6 +212,35 @@ def score_metrics_cmd(
         _close_db(db)
 
 
+@app.command("thumbnails")
+def thumbnails_cmd(
+    size: Optional[int] = typer.Option(None, "--size", help="Max side length in pixels"),
+    thumbnail_format: Optional[str] = typer.Option(None, "--format", help="jpeg or webp"),
+    workers: Optional[int] = typer.Option(None, "--workers", min=1),
+    force: bool = typer.Option(False, "--force", help="Regenerate thumbnails that already exist."),
+    config: Optional[str] = typer.Option(None, "--config"),
+) -> None:
+    db, settings = _init_db(config)
+    try:
+        stats = generate_thumbnails(
+            db,
+            thumbs_dir=settings.thumbs_dir,
+            size=size or settings.thumbnail_size,
+            thumbnail_format=(thumbnail_format or settings.thumbnail_format).strip().lower(),
+            quality=settings.thumbnail_quality,
+            workers=workers or settings.thumbnail_workers,
+            force=force,
+        )
+        logger.info(
+            "Thumbnails complete: generated={generated} skipped_existing={skipped} failed={failed}",
+            generated=stats.generated,
+            skipped=stats.skipped_existing,
+            failed=stats.failed,
+        )
+    finally:
+        _close_db(db)
+
+
 @app.command("describe")
 def describe_cmd(
     model_name: str = typer.Option("basic-caption-v1", "--model-name"),
@@ -116,6 +262,8 @@ def describe_cmd(
                     if lmstudio_timeout_seconds is not None
                     else settings.lmstudio_timeout_seconds
                 ),
+                concurrency=_lmstudio_concurrency(settings),
+                image=_llm_image(settings),
             ),
         )
     finally:
@@ -130,6 +278,9 @@ def pipeline_cmd(
     model_name: str = typer.Option("basic-caption-v1", "--model-name"),
     description_provider: Optional[str] = typer.Option(None, "--description-provider"),
     lmstudio_timeout_seconds: Optional[float] = typer.Option(None, "--lmstudio-timeout-seconds"),
+    thumbnails: bool = typer.Option(
+        False, "--thumbnails/--skip-thumbnails", help="Generate grid thumbnails after discovery."
+    ),
     config: Optional[str] = typer.Option(None, "--config"),
 ) -> None:
     db, settings = _init_db(config)
@@ -155,8 +306,30 @@ def pipeline_cmd(
             files_ingested=discover_stats.upserted, skipped=discover_stats.skipped
         )
 
-        metrics_stats = score_metrics(db, max_size=max_size)
-        run_tracker.update_stage(metrics_scored=metrics_stats.processed)
+        proxy_cache = _proxy_cache(settings)
+        thumbnail_stats = None
+        if thumbnails:
+            thumbnail_stats = generate_thumbnails(
+                db,
+                thumbs_dir=settings.thumbs_dir,
+                size=settings.thumbnail_size,
+                thumbnail_format=settings.thumbnail_format,
+                quality=settings.thumbnail_quality,
+                workers=settings.thumbnail_workers,
+            )
+
+        metrics_stats = score_metrics(
+            db,
+            max_size=max_size,
+            proxy_cache=proxy_cache,
+            log_distribution=False,
+            work_queue=_work_queue(settings),
+        )
+        run_tracker.update_stage(
+            metrics_scored=metrics_stats.processed,
+            sketches=metrics_stats.sketches,
+            sketch_mode=metrics_stats.sketch_mode,
+        )
 
         advanced_stats = run_advanced_runners(
             db,
@@ -171,13 +344,33 @@ def pipeline_cmd(
                     if lmstudio_timeout_seconds is not None
                     else settings.lmstudio_timeout_seconds
                 ),
+                concurrency=_lmstudio_concurrency(settings),
+                image=_llm_image(settings),
             ),
+            inference_batch_size=settings.clip_inference_batch_size,
+            prefetch_workers=settings.clip_prefetch_workers,
+            prefetch_depth=settings.clip_prefetch_depth,
+            clip_model_cache=_clip_model_cache(settings),
+            clip_runtime=_clip_runtime(settings),
+            cascade=_clip_cascade(settings),
+            gates=_scoring_gates(settings),
+            work_queue=_work_queue(settings),
+            nima=_nima(settings) if settings.nima_enabled else None,
+            store_embeddings=settings.clip_store_embeddings,
+            embedding_precision=settings.clip_embedding_precision,
             clip_model=settings.clip_model,
             clip_device=settings.embedding_device,
+            proxy_cache=proxy_cache,
+            log_distribution=False,
         )
         run_tracker.update_stage(
             clip_aesthetic_scored=advanced_stats.clip_processed,
             described=advanced_stats.described_processed,
+            gated=advanced_stats.clip_gated,
+            gated_seconds_saved=advanced_stats.clip_gated_seconds_saved,
+            nima_scored=advanced_stats.nima_processed,
+            sketches=advanced_stats.clip_sketches,
+            sketch_mode=advanced_stats.clip_sketch_mode,
         )
 
         # Complete the run with score distributions stored in DB + artifact file
@@ -200,8 +393,24 @@ def pipeline_cmd(
                 db_fail=discover_stats.failed_db,
                 proc_fail=discover_stats.failed_processing,
             )
+        if thumbnail_stats is not None:
+            logger.info(
+                "  Thumbnails: generated={generated} skipped_existing={skipped} failed={failed} saved_mb={saved_mb:.1f}",
+                generated=thumbnail_stats.generated,
+                skipped=thumbnail_stats.skipped_existing,
+                failed=thumbnail_stats.failed,
+                saved_mb=thumbnail_stats.bytes_saved / 1_048_576,
+            )
         logger.info("  Metrics scored: {count}", count=metrics_stats.processed)
         logger.info("  CLIP aesthetic scores generated: {clip}", clip=advanced_stats.clip_processed)
+        if advanced_stats.nima_processed:
+            logger.info("  NIMA scores generated: {nima}", nima=advanced_stats.nima_processed)
+        if advanced_stats.clip_gated:
+            logger.info(
+                "  CLIP gated (fallback score): {gated} est. time saved={saved:.1f}s",
+                gated=advanced_stats.clip_gated,
+                saved=advanced_stats.clip_gated_seconds_saved,
+            )
         logger.info("  Descriptions generated: {desc}", desc=advanced_stats.described_processed)
         logger.info("=" * 60)
 
@@ -237,8 +446,18 @@ def base_ingest_cmd(
             files_ingested=discover_stats.upserted, skipped=discover_stats.skipped
         )
 
-        metrics_stats = score_metrics(db, max_size=max_size)
-        run_tracker.update_stage(metrics_scored=metrics_stats.processed)
+        metrics_stats = score_metrics(
+            db,
+            max_size=max_size,
+            proxy_cache=_proxy_cache(settings),
+            log_distribution=False,
+            work_queue=_work_queue(settings),
+        )
+        run_tracker.update_stage(
+            metrics_scored=metrics_stats.processed,
+            sketches=metrics_stats.sketches,
+            sketch_mode=metrics_stats.sketch_mode,
+        )
 
         run_id = run_tracker.complete()
         write_run_artifact(db, run_id, report_dir=settings.report_dir)
@@ -256,13 +475,19 @@ def base_ingest_cmd(
 @app.command("score-clip-aesthetic")
 def score_clip_aesthetic_cmd(
     batch_size: int = typer.Option(500, "--batch-size", min=1),
+    inference_batch_size: Optional[int] = typer.Option(
+        None,
+        "--inference-batch-size",
+        min=1,
+        help="Images per CLIP encode call (defaults to clip_inference_batch_size).",
+    ),
     force_rescore_all: bool = typer.Option(
         False, "--force-rescore-all", help="Rescore every image instead of only stale/missing rows."
     ),
     defer_apply_until_complete: bool = typer.Option(
         False,
         "--defer-apply-until-complete",
-        help="Compute scores first and write updates only after scoring pass finishes.",
+        help="Spill scores to a temp file and merge them in one transaction after the scoring pass.",
     ),
     config: Optional[str] = typer.Option(None, "--config"),
 ) -> None:
@@ -274,37 +499,273 @@ def score_clip_aesthetic_cmd(
         stats = score_clip_aesthetic(
             db,
             batch_size=batch_size,
+            inference_batch_size=inference_batch_size or settings.clip_inference_batch_size,
+            prefetch_workers=settings.clip_prefetch_workers,
+            prefetch_depth=settings.clip_prefetch_depth,
+            clip_model_cache=_clip_model_cache(settings),
+            clip_runtime=_clip_runtime(settings),
+            cascade=_clip_cascade(settings),
+            gates=_scoring_gates(settings),
+            work_queue=_work_queue(settings),
+            nima=_nima(settings) if settings.nima_enabled else None,
+            store_embeddings=settings.clip_store_embeddings,
+            embedding_precision=settings.clip_embedding_precision,
             clip_model=settings.clip_model,
             clip_device=settings.embedding_device,
             force_rescore_all=force_rescore_all,
             defer_apply_until_complete=defer_apply_until_complete,
+            proxy_cache=_proxy_cache(settings),
+        )
+        run_tracker.update_stage(
+            clip_aesthetic_scored=stats.processed,
+            gated=stats.gated,
+            gated_seconds_saved=stats.gated_seconds_saved,
+            nima_scored=stats.nima_processed,
+            sketches=stats.sketches,
+            sketch_mode=stats.sketch_mode,
         )
-        run_tracker.update_stage(clip_aesthetic_scored=stats.processed)
 
         run_id = run_tracker.complete()
         write_run_artifact(db, run_id, report_dir=settings.report_dir)
 
         logger.info(
-            "CLIP aesthetic runner complete: processed={processed} (run: {run_id})",
+            "CLIP aesthetic runner complete: processed={processed} nima={nima} (run: {run_id})",
             processed=stats.processed,
+            nima=stats.nima_processed,
+            run_id=run_id,
+        )
+    finally:
+        _close_db(db)
+
+
+@app.command("score-nima")
+def score_nima_cmd(
+    batch_size: int = typer.Option(500, "--batch-size", min=1),
+    inference_batch_size: Optional[int] = typer.Option(
+        None,
+        "--inference-batch-size",
+        min=1,
+        help="Images per NIMA forward pass (defaults to nima_inference_batch_size).",
+    ),
+    force_rescore_all: bool = typer.Option(
+        False, "--force-rescore-all", help="Rescore every image instead of only missing rows."
+    ),
+    config: Optional[str] = typer.Option(None, "--config"),
+) -> None:
+    db, settings = _init_db(config)
+    run_tracker = PipelineRun(db)
+    try:
+        run_tracker.start()
+
+        stats = score_nima(
+            db,
+            batch_size=batch_size,
+            inference_batch_size=inference_batch_size or settings.nima_inference_batch_size,
+            prefetch_workers=settings.clip_prefetch_workers,
+            prefetch_depth=settings.clip_prefetch_depth,
+            force_rescore_all=force_rescore_all,
+            proxy_cache=_proxy_cache(settings),
+            options=_nima(settings),
+        )
+        run_tracker.update_stage(
+            nima_scored=stats.processed, sketches=stats.sketches, sketch_mode=stats.sketch_mode
+        )
+
+        run_id = run_tracker.complete()
+        write_run_artifact(db, run_id, report_dir=settings.report_dir)
+
+        logger.info(
+            "NIMA runner complete: processed={processed} (run: {run_id})",
+            processed=stats.processed,
+            run_id=run_id,
+        )
+    finally:
+        _close_db(db)
+
+
+@app.command("recompute-scores")
+def recompute_scores_cmd(
+    chunk_size: int = typer.Option(
+        50_000, "--chunk-size", min=1, help="Rows per bulk UPDATE statement."
+    ),
+    config: Optional[str] = typer.Option(None, "--config"),
+) -> None:
+    """Re-derive composite scores from stored components using the current scoring weights."""
+    db, settings = _init_db(config)
+    run_tracker = PipelineRun(db)
+    try:
+        run_tracker.start(clip_model_version="clip_aesthetic_v1")
+
+        stats = recompute_scores(db, chunk_size=chunk_size)
+        run_tracker.update_stage(sketches=stats.sketches, sketch_mode=stats.sketch_mode)
+
+        run_id = run_tracker.complete()
+        write_run_artifact(db, run_id, report_dir=settings.report_dir)
+
+        logger.info(
+            "Score recompute complete: updated={updated} (run: {run_id})",
+            updated=stats.processed,
             run_id=run_id,
         )
     finally:
         _close_db(db)
 
 
+@app.command("rescore-clip-embeddings")
+def rescore_clip_embeddings_cmd(
+    page_size: int = typer.Option(
+        5000, "--page-size", min=1, help="Stored embeddings scored per query/UPDATE."
+    ),
+    config: Optional[str] = typer.Option(None, "--config"),
+) -> None:
+    """Rescore CLIP aesthetics from stored image embeddings with the current prompts."""
+    db, settings = _init_db(config)
+    run_tracker = PipelineRun(db)
+    try:
+        run_tracker.start(clip_model_version="clip_aesthetic_v1")
+
+        stats = rescore_clip_from_embeddings(
+            db,
+            clip_model=settings.clip_model,
+            clip_device=settings.embedding_device,
+            page_size=page_size,
+            clip_model_cache=_clip_model_cache(settings),
+        )
+        run_tracker.update_stage(
+            clip_aesthetic_scored=stats.processed,
+            sketches=stats.sketches,
+            sketch_mode=stats.sketch_mode,
+        )
+
+        run_id = run_tracker.complete()
+        write_run_artifact(db, run_id, report_dir=settings.report_dir)
+
+        logger.info(
+            "CLIP rescore from embeddings complete: rescored={count} (run: {run_id})",
+            count=stats.processed,
+            run_id=run_id,
+        )
+    finally:
+        _close_db(db)
+
+
+@app.command("clip-benchmark")
+def clip_benchmark_cmd(
+    sample_size: int = typer.Option(64, "--sample-size", min=1, help="Library images to score."),
+    inference_batch_size: Optional[int] = typer.Option(
+        None,
+        "--inference-batch-size",
+        min=1,
+        help="Images per CLIP encode call (defaults to clip_inference_batch_size).",
+    ),
+    all_backends: bool = typer.Option(
+        False,
+        "--all-backends",
+        help="Also measure the ONNX fp32 and ONNX int8 backends next to the configured runtime.",
+    ),
+    max_drift: float = typer.Option(
+        0.01,
+        "--max-drift",
+        min=0.0,
+        help="Fail if the configured runtime moves any score by more than this versus fp32.",
+    ),
+    config: Optional[str] = typer.Option(None, "--config"),
+) -> None:
+    """Compare CLIP runtimes/backends against plain torch fp32: throughput and score drift."""
+    db, settings = _init_db(config)
+    configured = _clip_runtime(settings)
+    runtimes = [configured]
+    if all_backends:
+        for quantize in (False, True):
+            extra = replace(configured, backend="onnx", onnx_quantize=quantize)
+            if extra not in runtimes:
+                runtimes.append(extra)
+    try:
+        report = benchmark_clip_runtime(
+            db,
+            runtimes=runtimes,
+            clip_model=settings.clip_model,
+            clip_device=settings.embedding_device,
+            sample_size=sample_size,
+            inference_batch_size=inference_batch_size or settings.clip_inference_batch_size,
+            proxy_cache=_proxy_cache(settings),
+            clip_model_cache=_clip_model_cache(settings),
+        )
+    finally:
+        _close_db(db)
+    log_clip_benchmark_report(report)
+    configured_result = report.candidates[0]
+    if configured_result.max_abs_drift > max_drift:
+        logger.error(
+            "Configured CLIP runtime {label} drifts {drift:.5f} from fp32 (> --max-drift {limit})",
+            label=configured_result.run.label,
+            drift=configured_result.max_abs_drift,
+            limit=max_drift,
+        )
+        raise typer.Exit(code=1)
+
+
+@app.command("what-if")
+def what_if_cmd(
+    overrides: list[str] = typer.Option(
+        [],
+        "--set",
+        help="Scoring weight override NAME=VALUE (ScoringWeights field), repeatable.",
+    ),
+    metric: str = typer.Option("curation", "--metric", help="Composite score to compare."),
+    top_n: int = typer.Option(1000, "--top-n", min=1, help="Size of the top set for churn."),
+    interactive: bool = typer.Option(
+        False,
+        "--interactive",
+        help="Keep components loaded and prompt for further override sets.",
+    ),
+    config: Optional[str] = typer.Option(None, "--config"),
+) -> None:
+    """Evaluate alternative scoring weights against current scores without writing anything."""
+    db, _settings = _init_db(config)
+    try:
+        components = load_score_components(db)
+    finally:
+        _close_db(db)
+    logger.info("Loaded scoring components for {count} files", count=len(components))
+
+    pending: list[str] | None = overrides
+    while pending is not None:
+        try:
+            weights = parse_weight_overrides(pending)
+            report = evaluate_weights(components, weights, metric=metric, top_n=top_n)
+        except ValueError as exc:
+            if not interactive:
+                raise typer.BadParameter(str(exc)) from exc
+            logger.error("{error}", error=str(exc))
+        else:
+            log_what_if_report(report)
+        if not interactive:
+            break
+        line = typer.prompt(
+            "Overrides (NAME=VALUE ..., empty to quit)", default="", show_default=False
+        )
+        pending = line.split() if line.strip() else None
+
+
 @app.command("advanced-runner")
 def advanced_runner_cmd(
     run_descriptions: bool = typer.Option(True, "--run-descriptions/--skip-descriptions"),
     model_name: str = typer.Option("basic-caption-v1", "--model-name"),
     batch_size: int = typer.Option(500, "--batch-size", min=1),
+    inference_batch_size: Optional[int] = typer.Option(
+        None,
+        "--inference-batch-size",
+        min=1,
+        help="Images per CLIP encode call (defaults to clip_inference_batch_size).",
+    ),
     force_rescore_all: bool = typer.Option(
         False, "--force-rescore-all", help="Rescore every image instead of only stale/missing rows."
     ),
     defer_apply_until_complete: bool = typer.Option(
         False,
         "--defer-apply-until-complete",
-        help="Compute advanced scores first and write updates only after scoring pass finishes.",
+        help="Spill advanced scores to a temp file and merge them in one transaction after the scoring pass.",
     ),
     description_provider: Optional[str] = typer.Option(None, "--description-provider"),
     lmstudio_timeout_seconds: Optional[float] = typer.Option(None, "--lmstudio-timeout-seconds"),
@@ -333,23 +794,45 @@ def advanced_runner_cmd(
                     if lmstudio_timeout_seconds is not None
                     else settings.lmstudio_timeout_seconds
                 ),
+                concurrency=_lmstudio_concurrency(settings),
+                image=_llm_image(settings),
             ),
             batch_size=batch_size,
+            inference_batch_size=inference_batch_size or settings.clip_inference_batch_size,
+            prefetch_workers=settings.clip_prefetch_workers,
+            prefetch_depth=settings.clip_prefetch_depth,
+            clip_model_cache=_clip_model_cache(settings),
+            clip_runtime=_clip_runtime(settings),
+            cascade=_clip_cascade(settings),
+            gates=_scoring_gates(settings),
+            work_queue=_work_queue(settings),
+            nima=_nima(settings) if settings.nima_enabled else None,
+            store_embeddings=settings.clip_store_embeddings,
+            embedding_precision=settings.clip_embedding_precision,
             clip_model=settings.clip_model,
             clip_device=settings.embedding_device,
             force_rescore_all=force_rescore_all,
             defer_apply_until_complete=defer_apply_until_complete,
+            proxy_cache=_proxy_cache(settings),
+            log_distribution=False,
         )
         run_tracker.update_stage(
-            clip_aesthetic_scored=stats.clip_processed, described=stats.described_processed
+            clip_aesthetic_scored=stats.clip_processed,
+            described=stats.described_processed,
+            gated=stats.clip_gated,
+            gated_seconds_saved=stats.clip_gated_seconds_saved,
+            nima_scored=stats.nima_processed,
+            sketches=stats.clip_sketches,
+            sketch_mode=stats.clip_sketch_mode,
         )
 
         run_id = run_tracker.complete()
         write_run_artifact(db, run_id, report_dir=settings.report_dir)
 
         logger.info(
-            "Advanced runner complete: clip={clip} descriptions={desc} (run: {run_id})",
+            "Advanced runner complete: clip={clip} nima={nima} descriptions={desc} (run: {run_id})",
             clip=stats.clip_processed,
+            nima=stats.nima_processed,
             desc=stats.described_processed,
             run_id=run_id,
         )
@@ -362,6 +845,17 @@ def llm_runner_cmd(
     lmstudio_base_url: Optional[str] = typer.Option(None, "--lmstudio-base-url"),
     lmstudio_model: Optional[str] = typer.Option(None, "--lmstudio-model"),
     lmstudio_timeout_seconds: Optional[float] = typer.Option(None, "--lmstudio-timeout-seconds"),
+    force_rescore_all: bool = typer.Option(
+        False,
+        "--force-rescore-all",
+        help="Describe every image instead of only those without a current result.",
+    ),
+    limit: Optional[int] = typer.Option(
+        None, "--limit", min=1, help="Consider at most this many files (lowest ids first)."
+    ),
+    since: Optional[datetime] = typer.Option(
+        None, "--since", help="Only files first discovered at or after this date/time."
+    ),
     config: Optional[str] = typer.Option(None, "--config"),
 ) -> None:
     db, settings = _init_db(config)
@@ -377,9 +871,21 @@ def llm_runner_cmd(
                     if lmstudio_timeout_seconds is not None
                     else settings.lmstudio_timeout_seconds
                 ),
+                concurrency=_lmstudio_concurrency(settings),
+                image=_llm_image(settings),
             ),
+            gates=_scoring_gates(settings),
+            work_queue=_work_queue(settings),
+            force_rescore_all=force_rescore_all,
+            limit=limit,
+            since=since,
+        )
+        logger.info(
+            "LLM runner complete: processed={processed} gated={gated} est. time saved={saved:.1f}s",
+            processed=stats.processed,
+            gated=stats.gated,
+            saved=stats.gated_seconds_saved,
         )
-        logger.info("LLM runner complete: processed={processed}", processed=stats.processed)
     finally:
         _close_db(db)
 
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+import open_clip
+import torch
+from loguru import logger
+
+# Sentinel stored in the tag index for architectures without published weights.
+NO_PRETRAINED = ""
+
+
+class ClipModelCache:
+    """Local cache of CLIP start-up artifacts under `<cache_dir>/clip`.
+
+    - `pretrained_tags.json`: architecture -> resolved pretrained tag, so start-up does not
+      walk `open_clip.list_pretrained()`.
+    - `<arch>--<tag>.model.pt`: the whole instantiated model, saved with `torch.save` and
+      reloaded with `torch.load(mmap=True)`; no random init followed by a weight copy.
+    - `<arch>--<tag>.prompts-<digest>.pt`: mean positive/negative prompt embeddings for one
+      prompt list, so the tokenizer and text tower are not run on every invocation.
+
+    Every artifact is keyed by the installed open_clip and torch versions. The model files are
+    pickled modules, so the cache directory must be as trusted as the code itself.
+    """
+
+    def __init__(self, cache_dir: str | Path, *, mmap: bool = True) -> None:
+        self.root = Path(cache_dir) / "clip"
+        self.mmap = mmap
+        self._versions = f"open_clip={open_clip.__version__},torch={torch.__version__}"
+
+    def _artifact(self, model_name: str, pretrained_tag: str, kind: str) -> Path:
+        return self.root / f"{model_name}--{pretrained_tag}.{kind}.pt"
+
+    def _save(self, obj: object, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            torch.save({"versions": self._versions, "payload": obj}, tmp_path)
+            os.replace(tmp_path, path)
+        except (OSError, RuntimeError) as exc:
+            tmp_path.unlink(missing_ok=True)
+            logger.warning("Could not write CLIP cache {path}: {error}", path=path, error=exc)
+
+    def _load(self, path: Path, *, mmap: bool = False) -> object | None:
+        if not path.exists():
+            return None
+        try:
+            stored = torch.load(path, map_location="cpu", mmap=mmap, weights_only=False)
+        except Exception as exc:  # noqa: BLE001 - any unreadable artifact is just a miss
+            logger.warning("Discarding unreadable CLIP cache {path}: {error}", path=path, error=exc)
+            path.unlink(missing_ok=True)
+            return None
+        if not isinstance(stored, dict) or stored.get("versions") != self._versions:
+            logger.info("CLIP cache {path} was written by other library versions", path=path)
+            return None
+        return stored["payload"]
+
+    def _tags_path(self) -> Path:
+        return self.root / "pretrained_tags.json"
+
+    def _read_tags(self) -> dict[str, str]:
+        try:
+            stored = json.loads(self._tags_path().read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if stored.get("versions") != self._versions:
+            return {}
+        return dict(stored.get("tags", {}))
+
+    def pretrained_tag(self, model_name: str) -> str | None:
+        """Cached tag for `model_name`, `NO_PRETRAINED` if it has none, None if unknown."""
+        return self._read_tags().get(model_name)
+
+    def save_pretrained_tag(self, model_name: str, pretrained_tag: str) -> None:
+        tags = self._read_tags()
+        tags[model_name] = pretrained_tag
+        path = self._tags_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        try:
+            tmp_path.write_text(
+                json.dumps({"versions": self._versions, "tags": tags}, indent=2), encoding="utf-8"
+            )
+            os.replace(tmp_path, path)
+        except OSError as exc:
+            tmp_path.unlink(missing_ok=True)
+            logger.warning("Could not write CLIP cache {path}: {error}", path=path, error=exc)
+
+    def load_model(self, model_name: str, pretrained_tag: str) -> torch.nn.Module | None:
+        model = self._load(self._artifact(model_name, pretrained_tag, "model"), mmap=self.mmap)
+        return model if isinstance(model, torch.nn.Module) else None
+
+    def save_model(self, model_name: str, pretrained_tag: str, model: torch.nn.Module) -> None:
+        self._save(model, self._artifact(model_name, pretrained_tag, "model"))
+
+    @staticmethod
+    def prompts_digest(positive: list[str], negative: list[str]) -> str:
+        encoded = json.dumps({"positive": positive, "negative": negative}, sort_keys=True)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16]
+
+    def load_prompt_means(
+        self, model_name: str, pretrained_tag: str, digest: str
+    ) -> tuple[torch.Tensor, torch.Tensor] | None:
+        stored = self._load(self._artifact(model_name, pretrained_tag, f"prompts-{digest}"))
+        if not isinstance(stored, dict):
+            return None
+        return stored["pos_mean"], stored["neg_mean"]
+
+    def save_prompt_means(
+        self,
+        model_name: str,
+        pretrained_tag: str,
+        digest: str,
+        pos_mean: torch.Tensor,
+        neg_mean: torch.Tensor,
+    ) -> None:
+        self._save(
+            {"pos_mean": pos_mean.detach().cpu(), "neg_mean": neg_mean.detach().cpu()},
+            self._artifact(model_name, pretrained_tag, f"prompts-{digest}"),
+        )
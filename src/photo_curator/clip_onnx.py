@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import open_clip
+import torch
+from loguru import logger
+
+ONNX_OPSET = 17
+# Quantised models above this size keep their weights in a separate data file: ViT-H-14 is
+# larger than the 2 GB protobuf limit.
+_EXTERNAL_DATA_BYTES = 1_500_000_000
+
+
+def _require_onnxruntime():
+    # The one guarded import in the package: onnxruntime comes from the optional `onnx` extra
+    # (pyproject.toml), and only `clip_backend=onnx` needs it, so a missing install must fail
+    # with the install hint instead of at module import.
+    try:
+        import onnxruntime
+    except ImportError as exc:
+        raise RuntimeError(
+            "clip_backend=onnx needs the optional ONNX dependencies: "
+            "uv sync --extra onnx (or pip install 'photo-curator[onnx]')"
+        ) from exc
+    return onnxruntime
+
+
+class _ImageTower(torch.nn.Module):
+    def __init__(self, model: torch.nn.Module) -> None:
+        super().__init__()
+        self.model = model
+
+    def forward(self, images: torch.Tensor) -> torch.Tensor:
+        return self.model.encode_image(images)
+
+
+def onnx_encoder_path(onnx_dir: str | Path, embedding_model: str, quantize: bool) -> Path:
+    """Cache path for one exported image tower; keyed by model, open_clip version and dtype."""
+    slug = embedding_model.replace("/", "--")
+    kind = "int8" if quantize else "fp32"
+    return Path(onnx_dir) / f"{slug}--open_clip-{open_clip.__version__}.image.{kind}.onnx"
+
+
+def _tmp_path(path: Path) -> Path:
+    return path.with_name(f".{path.stem}.{os.getpid()}.{threading.get_ident()}.tmp.onnx")
+
+
+def export_image_encoder(model: torch.nn.Module, input_size: int, path: Path) -> None:
+    """Export `model.encode_image` to ONNX with a dynamic batch axis (fp32, CPU)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = _tmp_path(path)
+    tower = _ImageTower(model).eval().to("cpu")
+    started = time.perf_counter()
+    # The fused nn.MultiheadAttention fast path has no ONNX symbolic; trace the plain ops.
+    fastpath = torch.backends.mha.get_fastpath_enabled()
+    torch.backends.mha.set_fastpath_enabled(False)
+    try:
+        torch.onnx.export(
+            tower,
+            (torch.zeros(2, 3, input_size, input_size),),
+            str(tmp_path),
+            input_names=["image"],
+            output_names=["embedding"],
+            dynamic_axes={"image": {0: "batch"}, "embedding": {0: "batch"}},
+            opset_version=ONNX_OPSET,
+            dynamo=False,
+        )
+    finally:
+        torch.backends.mha.set_fastpath_enabled(fastpath)
+    os.replace(tmp_path, path)
+    logger.info(
+        "Exported CLIP image tower to ONNX: {path} in {elapsed:.1f}s",
+        path=path,
+        elapsed=time.perf_counter() - started,
+    )
+
+
+def quantize_image_encoder(source: Path, path: Path) -> None:
+    """Dynamic int8 weight quantisation of an exported image tower."""
+    _require_onnxruntime()
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    # With external data the model refers to its data file by name, so both are written under
+    # their final names in a private directory, then moved into place model-last.
+    tmp_dir = path.with_name(f".{path.stem}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    started = time.perf_counter()
+    try:
+        quantize_dynamic(
+            str(source),
+            str(tmp_dir / path.name),
+            weight_type=QuantType.QInt8,
+            use_external_data_format=source.stat().st_size > _EXTERNAL_DATA_BYTES,
+        )
+        for produced in sorted(tmp_dir.iterdir(), key=lambda item: item.name == path.name):
+            os.replace(produced, path.parent / produced.name)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    logger.info(
+        "Quantised CLIP image tower to int8: {path} in {elapsed:.1f}s",
+        path=path,
+        elapsed=time.perf_counter() - started,
+    )
+
+
+class OnnxImageEncoder:
+    """Drop-in for `model.encode_image` backed by an ONNX Runtime CPU session."""
+
+    def __init__(self, path: Path, intra_op_threads: int = 0) -> None:
+        ort = _require_onnxruntime()
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads > 0:
+            options.intra_op_num_threads = intra_op_threads
+        self.path = path
+        self.session = ort.InferenceSession(str(path), options, providers=["CPUExecutionProvider"])
+
+    def __call__(self, images: torch.Tensor) -> torch.Tensor:
+        batch = np.ascontiguousarray(images.detach().to("cpu", torch.float32).numpy())
+        (embeddings,) = self.session.run(["embedding"], {"image": batch})
+        return torch.from_numpy(embeddings)
+
+
+def load_onnx_image_encoder(
+    model: torch.nn.Module,
+    embedding_model: str,
+    input_size: int,
+    onnx_dir: str | Path,
+    *,
+    quantize: bool = False,
+    intra_op_threads: int = 0,
+) -> OnnxImageEncoder:
+    """Open the cached ONNX image tower, exporting/quantising it on first use."""
+    _require_onnxruntime()
+    fp32_path = onnx_encoder_path(onnx_dir, embedding_model, quantize=False)
+    if not fp32_path.exists():
+        export_image_encoder(model, input_size, fp32_path)
+    path = fp32_path
+    if quantize:
+        path = onnx_encoder_path(onnx_dir, embedding_model, quantize=True)
+        if not path.exists():
+            quantize_image_encoder(fp32_path, path)
+    return OnnxImageEncoder(path, intra_op_threads)
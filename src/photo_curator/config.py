@@ -39,6 +39,10 @@ class Settings(BaseSettings):
     default_roots: Annotated[list[str], NoDecode] = []
     extensions: list[str] = ["jpg", "jpeg", "png", "webp"]
     thumbnail_size: int = 512
+    thumbnail_format: str = "jpeg"
+    thumbnail_quality: int = 85
+    thumbnail_workers: int = 4
+    proxy_cache_enabled: bool = False
     batch_size: int = 32
     ingest_limit: int = 200
     ingest_selection_strategy: str = "random"
@@ -46,11 +50,49 @@ class Settings(BaseSettings):
     duplicate_cap_per_filename_or_sha: int = 2
     clip_model: str | None = None
     clip_weights_path: str = ""
+    clip_inference_batch_size: int = 16
+    clip_prefetch_workers: int = 4
+    clip_prefetch_depth: int = 64
+    clip_store_embeddings: bool = True
+    clip_embedding_precision: str = "float16"
+    clip_model_cache_enabled: bool = True
+    clip_model_cache_mmap: bool = True
+    clip_precision: str = "fp32"
+    clip_channels_last: bool = False
+    clip_intra_op_threads: int = 0
+    clip_inter_op_threads: int = 0
+    clip_compile: bool = False
+    clip_backend: str = "torch"
+    clip_onnx_quantize: bool = False
+    clip_preprocess: str = "pil"
+    clip_cascade_enabled: bool = False
+    clip_cascade_small_model: str = "ViT-B-32"
+    clip_cascade_top_fraction: float = 0.2
+    clip_cascade_margin: float = 0.05
+    scoring_gate_min_technical_quality: float = 0.0
+    scoring_gate_min_brightness: float = 0.0
+    scoring_gate_max_blur: float = 1.0
+    work_queue_enabled: bool = False
+    work_queue_worker_id: str | None = None
+    work_queue_lease_seconds: int = 900
+    work_queue_claim_size: int = 64
+    nima_enabled: bool = False
+    nima_inference_batch_size: int = 16
+    nima_precision: str = "fp32"
+    nima_weights_mmap: bool = True
+    nima_heuristic_fallback: bool = True
     embedding_device: str = "auto"
     description_provider: str = "basic"
     lmstudio_base_url: str = "http://localhost:1234/v1"
     lmstudio_model: str = "qwen2.5-vl-7b-instruct"
     lmstudio_timeout_seconds: float = 60.0
+    lmstudio_max_in_flight: int = 4
+    lmstudio_latency_tolerance: float = 2.0
+    # 0 disables the stage deadline.
+    lmstudio_stage_deadline_seconds: float = 0.0
+    # Long side of the image sent to LM Studio; 0 sends the original file.
+    lmstudio_image_max_side: int = 1280
+    lmstudio_image_quality: int = 85
 
     aesthetics_method: str = "aesthetic_v0"
 
@@ -72,6 +114,124 @@ class Settings(BaseSettings):
             return "first"
         return normalized
 
+    @field_validator("thumbnail_format")
+    @classmethod
+    def _validate_thumbnail_format(cls, value: str) -> str:
+        normalized = (value or "jpeg").strip().lower()
+        if normalized == "jpg":
+            return "jpeg"
+        if normalized not in {"jpeg", "webp"}:
+            return "jpeg"
+        return normalized
+
+    @field_validator("thumbnail_quality", "lmstudio_image_quality")
+    @classmethod
+    def _validate_thumbnail_quality(cls, value: int) -> int:
+        return max(1, min(95, int(value)))
+
+    @field_validator("thumbnail_workers")
+    @classmethod
+    def _validate_thumbnail_workers(cls, value: int) -> int:
+        return max(1, int(value))
+
+    @field_validator("clip_inference_batch_size", "nima_inference_batch_size")
+    @classmethod
+    def _validate_inference_batch_size(cls, value: int) -> int:
+        return max(1, int(value))
+
+    @field_validator("clip_prefetch_workers", "clip_prefetch_depth")
+    @classmethod
+    def _validate_clip_prefetch(cls, value: int) -> int:
+        return max(1, int(value))
+
+    @field_validator("clip_embedding_precision")
+    @classmethod
+    def _validate_clip_embedding_precision(cls, value: str) -> str:
+        normalized = (value or "float16").strip().lower()
+        if normalized not in {"float16", "float32"}:
+            return "float16"
+        return normalized
+
+    @field_validator("clip_precision")
+    @classmethod
+    def _validate_clip_precision(cls, value: str) -> str:
+        normalized = (value or "fp32").strip().lower()
+        if normalized not in {"fp32", "bf16"}:
+            return "fp32"
+        return normalized
+
+    @field_validator("clip_backend")
+    @classmethod
+    def _validate_clip_backend(cls, value: str) -> str:
+        normalized = (value or "torch").strip().lower()
+        if normalized not in {"torch", "onnx"}:
+            return "torch"
+        return normalized
+
+    @field_validator("clip_preprocess")
+    @classmethod
+    def _validate_clip_preprocess(cls, value: str) -> str:
+        normalized = (value or "pil").strip().lower()
+        if normalized not in {"pil", "tensor"}:
+            return "pil"
+        return normalized
+
+    @field_validator("nima_precision")
+    @classmethod
+    def _validate_nima_precision(cls, value: str) -> str:
+        normalized = (value or "fp32").strip().lower()
+        if normalized not in {"fp32", "bf16"}:
+            return "fp32"
+        return normalized
+
+    @field_validator("clip_cascade_top_fraction")
+    @classmethod
+    def _validate_clip_cascade_top_fraction(cls, value: float) -> float:
+        return min(1.0, max(0.0, float(value)))
+
+    @field_validator("clip_cascade_margin")
+    @classmethod
+    def _validate_clip_cascade_margin(cls, value: float) -> float:
+        return max(0.0, float(value))
+
+    @field_validator(
+        "scoring_gate_min_technical_quality", "scoring_gate_min_brightness", "scoring_gate_max_blur"
+    )
+    @classmethod
+    def _validate_scoring_gate(cls, value: float) -> float:
+        return min(1.0, max(0.0, float(value)))
+
+    @field_validator("work_queue_lease_seconds", "work_queue_claim_size")
+    @classmethod
+    def _validate_work_queue_size(cls, value: int) -> int:
+        return max(1, int(value))
+
+    @field_validator("clip_intra_op_threads", "clip_inter_op_threads")
+    @classmethod
+    def _validate_clip_threads(cls, value: int) -> int:
+        return max(0, int(value))
+
+    @field_validator("lmstudio_max_in_flight")
+    @classmethod
+    def _validate_lmstudio_max_in_flight(cls, value: int) -> int:
+        return max(1, int(value))
+
+    @field_validator("lmstudio_latency_tolerance")
+    @classmethod
+    def _validate_lmstudio_latency_tolerance(cls, value: float) -> float:
+        value = float(value)
+        return value if value > 1.0 else 2.0
+
+    @field_validator("lmstudio_image_max_side")
+    @classmethod
+    def _validate_lmstudio_image_max_side(cls, value: int) -> int:
+        return max(0, int(value))
+
+    @field_validator("lmstudio_stage_deadline_seconds")
+    @classmethod
+    def _validate_lmstudio_stage_deadline(cls, value: float) -> float:
+        return max(0.0, float(value))
+
     @field_validator("duplicate_cap_per_filename_or_sha")
     @classmethod
     def _validate_duplicate_cap(cls, value: int) -> int:
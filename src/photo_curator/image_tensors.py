@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import cv2
+import numpy as np
+import torch
+
+RESIZE_MODES = ("shortest", "squash")
+
+
+def resize_for_model(rgb: np.ndarray, size: int, resize_mode: str = "shortest") -> np.ndarray:
+    """uint8 `size` x `size` model input from an HxWx3 uint8 array, without PIL.
+
+    `shortest` resizes the short side to `size` and center-crops (open_clip's eval transform);
+    `squash` resizes straight to `size` x `size` (torchvision `Resize((size, size))`).
+    Downscaling uses `INTER_AREA`, which like PIL's antialiased resize averages every source
+    pixel; upscaling uses bicubic.
+    """
+    height, width = rgb.shape[:2]
+    if resize_mode == "squash":
+        new_width, new_height = size, size
+    elif width <= height:
+        new_width, new_height = size, int(size * height / width)
+    else:
+        new_width, new_height = int(size * width / height), size
+    if (new_width, new_height) != (width, height):
+        shrinking = new_width < width or new_height < height
+        rgb = cv2.resize(
+            rgb,
+            (new_width, new_height),
+            interpolation=cv2.INTER_AREA if shrinking else cv2.INTER_CUBIC,
+        )
+    top = round((new_height - size) / 2.0)
+    left = round((new_width - size) / 2.0)
+    return rgb[top : top + size, left : left + size]
+
+
+@dataclass(frozen=True)
+class TensorPreprocess:
+    """uint8 array -> normalised float tensor preprocessing without PIL round-trips.
+
+    Per image, `to_uint8` only resizes and crops (cheap, runs on prefetch threads, and keeps
+    in-flight images at a quarter of the float size). `normalize` converts a stacked uint8
+    batch to float and applies mean/std in one batched op just before the encoder.
+    """
+
+    size: int
+    mean: tuple[float, float, float]
+    std: tuple[float, float, float]
+    resize_mode: str = "shortest"
+
+    def to_uint8(self, image: np.ndarray, *, bgr: bool = False) -> torch.Tensor:
+        """3 x size x size uint8 tensor for one HxWx3 uint8 array (RGB, or BGR with `bgr`)."""
+        resized = resize_for_model(image, self.size, self.resize_mode)
+        if bgr:
+            resized = resized[:, :, ::-1]
+        return torch.from_numpy(np.ascontiguousarray(resized)).permute(2, 0, 1)
+
+    def normalize(self, batch: torch.Tensor) -> torch.Tensor:
+        """(B, 3, H, W) uint8 -> float32 `(x / 255 - mean) / std`."""
+        mean = torch.tensor(self.mean, dtype=torch.float32, device=batch.device).view(1, 3, 1, 1)
+        std = torch.tensor(self.std, dtype=torch.float32, device=batch.device).view(1, 3, 1, 1)
+        return batch.to(torch.float32).div_(255.0).sub_(mean).div_(std)
+
+    def batch(self, images: list[np.ndarray], *, bgr: bool = False) -> torch.Tensor:
+        """Normalised (B, 3, size, size) float tensor for a list of uint8 arrays."""
+        return self.normalize(torch.stack([self.to_uint8(image, bgr=bgr) for image in images]))
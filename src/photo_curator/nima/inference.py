@@ -9,19 +9,22 @@ Weights are downloaded from Google Drive on first use if not already cached.
 
 from __future__ import annotations
 
+from functools import lru_cache
+import hashlib
 import os
 import sys
 from pathlib import Path
 import tempfile
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
 import numpy as np
 import torch
 import torchvision.models as models
-import torchvision.transforms as transforms
-from PIL import Image
 
-from photo_curator.pipeline_v1.scoring import compute_clip_aesthetic
+from photo_curator.pipeline_v1.scoring import DEFAULT_WEIGHTS, ScoringWeights
+
+if TYPE_CHECKING:
+    from photo_curator.image_tensors import TensorPreprocess
 
 try:
     import cv2  # noqa: F401
@@ -160,52 +163,160 @@ def _ensure_weights(weights_path: Path) -> Optional[Path]:
 _IMAGENET_MEAN = [0.485, 0.456, 0.406]
 _IMAGENET_STD = [0.229, 0.224, 0.225]
 
-# Pre-composed transform: resize to 224x224 -> tensor -> normalize.
-_preprocess_transform = transforms.Compose(
-    [
-        transforms.Resize((224, 224)),
-        transforms.ToTensor(),
-        transforms.Normalize(mean=_IMAGENET_MEAN, std=_IMAGENET_STD),
-    ]
-)
+_INPUT_SIZE = 224
+
+
+@lru_cache(maxsize=1)
+def _input_preprocess() -> TensorPreprocess:
+    from photo_curator.image_tensors import TensorPreprocess
+
+    return TensorPreprocess(
+        size=_INPUT_SIZE, mean=tuple(_IMAGENET_MEAN), std=tuple(_IMAGENET_STD), resize_mode="squash"
+    )
+
+
+def nima_input(image_np: np.ndarray) -> torch.Tensor:
+    """3 x 224 x 224 uint8 model input for one BGR/BGRA/grayscale uint8 array, without PIL.
+
+    Squash-resizes like the original `Resize((224, 224))`; `score_inputs` normalises the
+    whole batch at once. Cheap enough to run on prefetch threads.
+    """
+    if image_np.ndim == 2:
+        image_np = np.repeat(image_np[:, :, None], 3, axis=2)
+    elif image_np.shape[2] >= 3:
+        image_np = image_np[:, :, 2::-1]
+    return _input_preprocess().to_uint8(image_np)
+
+
+def distribution_stats(distributions: torch.Tensor) -> tuple[np.ndarray, np.ndarray]:
+    """Per-row (mean / 10, std) of (B, 10) score distributions over classes 1..10.
+
+    Vectorised over the batch, with a single device-to-host copy.
+    """
+    dists = distributions.float().view(-1, 10)
+    classes = torch.arange(1, 11, dtype=dists.dtype, device=dists.device)
+    means = dists @ classes
+    stds = torch.sqrt((dists * (classes.unsqueeze(0) - means.unsqueeze(1)) ** 2).sum(dim=1))
+    stats = torch.stack([means / 10.0, stds]).cpu().numpy().astype(np.float64)
+    return stats[0], stats[1]
+
+
+def score_inputs(
+    model: torch.nn.Module, inputs: list[torch.Tensor]
+) -> tuple[np.ndarray, np.ndarray]:
+    """(means, stds) for `nima_input` tensors: one host-to-device copy and one forward pass."""
+    weight = next(model.parameters())
+    batch = torch.stack(inputs).to(weight.device, non_blocking=True)
+    with torch.inference_mode():
+        distributions = model(_input_preprocess().normalize(batch).to(weight.dtype))
+    return distribution_stats(distributions)
+
+
+NIMA_PRECISIONS = ("fp32", "bf16")
+
+_PRECISION_DTYPES = {"fp32": torch.float32, "bf16": torch.bfloat16}
+_model_precision: Optional[str] = None
 
 
-def _load_model(weights_path: Path) -> object:
+def _weights_cache_path(weights_path: Path, precision: str) -> Path:
+    """Converted-weights cache entry, keyed by the source file's path, size and mtime."""
+    stat = weights_path.stat()
+    key = f"{weights_path.resolve()}:{stat.st_size}:{stat.st_mtime_ns}:torch={torch.__version__}"
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:12]
+    return _get_weights_dir() / f"nima-{precision}-{digest}.pt"
+
+
+def _load_state_dict(weights_path: Path, precision: str, *, mmap: bool) -> dict[str, torch.Tensor]:
+    """State dict in the target dtype, memory-mapped from a converted cache file when possible.
+
+    The first load converts the source checkpoint (any format, any dtype) to `precision` and
+    writes it with `torch.save` next to the other NIMA cache files. Later loads `mmap` that
+    file: tensors are backed by the page cache, so start-up reads nothing eagerly and every
+    process on the host maps the same physical pages.
+    """
+    cache_path = _weights_cache_path(weights_path, precision)
+    if cache_path.is_file():
+        try:
+            return torch.load(cache_path, map_location="cpu", mmap=mmap, weights_only=True)
+        except Exception as exc:  # noqa: BLE001 - an unreadable cache entry is just a miss
+            print(f"Warning: discarding NIMA weights cache {cache_path}: {exc}", file=sys.stderr)  # noqa: T201
+            cache_path.unlink(missing_ok=True)
+
+    dtype = _PRECISION_DTYPES[precision]
+    state_dict = torch.load(weights_path, map_location="cpu", weights_only=True)
+    state_dict = {
+        name: tensor.to(dtype) if tensor.is_floating_point() else tensor
+        for name, tensor in state_dict.items()
+    }
+    tmp_path = cache_path.with_name(f".{cache_path.name}.{os.getpid()}.tmp")
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        torch.save(state_dict, tmp_path)
+        os.replace(tmp_path, cache_path)
+    except (OSError, RuntimeError) as exc:
+        tmp_path.unlink(missing_ok=True)
+        print(f"Warning: could not write NIMA weights cache {cache_path}: {exc}", file=sys.stderr)  # noqa: T201
+        return state_dict
+    return torch.load(cache_path, map_location="cpu", mmap=mmap, weights_only=True)
+
+
+def _load_model(weights_path: Path, precision: str = "fp32", *, mmap: bool = True) -> object:
     """Load the NIMA model from pretrained weights.
 
-    Returns a torch.nn.Module ready for inference (eval mode).
-    Downloads ImageNet VGG-16 weights automatically via torchvision.
+    Returns a torch.nn.Module ready for inference (eval mode). The module is built on the
+    meta device from an uninitialised VGG-16 (the checkpoint carries every weight NIMA uses),
+    then the checkpoint tensors are assigned in place, so nothing is randomly initialised,
+    downloaded or copied on CPU.
     """
     # Import the vendored model class.
     from photo_curator.nima.model import NIMA  # noqa: F811
 
     device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
-    # Load ImageNet-pretrained VGG-16 (downloads automatically on first use).
-    base_model = models.vgg16(pretrained=True)
-    model = NIMA(base_model, num_classes=10)
-
-    state_dict = torch.load(weights_path, map_location=device, weights_only=True)
-    model.load_state_dict(state_dict)
+    with torch.device("meta"):
+        model = NIMA(models.vgg16(weights=None), num_classes=10)
+    state_dict = _load_state_dict(weights_path, precision, mmap=mmap)
+    model.load_state_dict(state_dict, assign=True)
     model = model.to(device)
     model.eval()
 
-    print(f"NIMA loaded on {device}")  # noqa: T201
+    print(f"NIMA loaded on {device} precision={precision} mmap={mmap}")  # noqa: T201
     return model
 
 
-def get_model(weights_path: Optional[Path] = None) -> object:
+def _resolve_precision(precision: str) -> str:
+    if precision not in NIMA_PRECISIONS:
+        return "fp32"
+    if precision == "bf16" and not torch.cuda.is_available():
+        from photo_curator.aesthetics import _cpu_supports_bf16
+
+        if not _cpu_supports_bf16():
+            print(
+                "Warning: NIMA bf16 requested but this CPU has no native bf16 support; using fp32",
+                file=sys.stderr,
+            )  # noqa: T201
+            return "fp32"
+    return precision
+
+
+def get_model(
+    weights_path: Optional[Path] = None, *, precision: str = "fp32", mmap: bool = True
+) -> object:
     """Get or create the singleton NIMA inference model.
 
     Args:
         weights_path: optional path to pretrained weights (auto-detected if omitted).
+        precision: "fp32" or "bf16" weights and activations (bf16 needs CUDA or a CPU with
+            native bf16; otherwise fp32 is used).
+        mmap: memory-map the converted weights cache instead of reading it into memory.
 
     Returns:
         torch.nn.Module in eval mode, ready for inference, or None if weights unavailable.
     """
-    global _model_instance, _model_init_error
+    global _model_instance, _model_init_error, _model_precision
 
-    if _model_instance is not None:
+    precision = _resolve_precision(precision)
+    if _model_instance is not None and _model_precision == precision:
         return _model_instance
 
     if _model_init_error is not None:
@@ -220,6 +331,8 @@ def get_model(weights_path: Optional[Path] = None) -> object:
     elif wp is None:
         wp = weights_path or _weights_path()
         wp = _ensure_weights(wp)
+        if wp is None:
+            return None
 
     if not wp.is_file():
         _model_init_error = RuntimeError(
@@ -231,7 +344,8 @@ def get_model(weights_path: Optional[Path] = None) -> object:
         raise _model_init_error
 
     try:
-        _model_instance = _load_model(wp)
+        _model_instance = _load_model(wp, precision, mmap=mmap)
+        _model_precision = precision
     except Exception as exc:  # noqa: BLE001
         _model_init_error = RuntimeError(
             f"Failed to initialize NIMA model from weights at {wp}: {exc}"
@@ -241,66 +355,58 @@ def get_model(weights_path: Optional[Path] = None) -> object:
     return _model_instance
 
 
-def heuristic_score(image_np: np.ndarray) -> tuple[float, float]:
-    """Heuristic aesthetic score when NIMA weights are unavailable.
+def heuristic_scores(
+    technical_quality: np.ndarray,
+    composition_balance: np.ndarray,
+    weights: ScoringWeights = DEFAULT_WEIGHTS,
+) -> tuple[np.ndarray, np.ndarray]:
+    """(means, stds) stand-in for NIMA from already-computed metrics, for a whole batch.
 
-    Uses the shared CLIP-aesthetic scoring math but takes a raw image
-    and returns (mean_normalized_to_0_1, std) matching assess_quality's output signature.
+    The mean is the CLIP-aesthetic blend with technical quality in place of the CLIP score
+    (see `compute_clip_aesthetic`); the std shrinks as the mean grows.
+    """
+    means = np.clip(
+        weights.clip_aesthetic * np.asarray(technical_quality, dtype=np.float64)
+        + weights.composition_balance * np.asarray(composition_balance, dtype=np.float64),
+        0.0,
+        1.0,
+    )
+    return means, 0.1 + (1.0 - means) * 0.05
 
-    This is a drop-in replacement for assess_quality() — same function signature, same return type.
+
+def heuristic_inputs(image_np: np.ndarray) -> tuple[float, float]:
+    """(technical_quality_score, composition_balance_score) for one BGR analysis image.
+
+    The same values the metrics and CLIP stages store in `file_metrics`, so callers that
+    already have them should pass those to `heuristic_scores` instead.
     """
     if cv2 is None:
         raise RuntimeError("cv2 (opencv-python-headless) required for heuristic scoring")
+    from photo_curator.pipeline_v1.composition import composition_balance_score
+    from photo_curator.pipeline_v1.metrics_stage import _compute_metrics
 
-    gray = cv2.cvtColor(image_np, cv2.COLOR_BGR2GRAY) if image_np.ndim == 3 else image_np
-    height, width = gray.shape[:2]
-    if height == 0 or width == 0:
-        return (0.5, 0.1)
-
-    # Blur score: Laplacian variance
-    laplacian = cv2.Laplacian(gray, cv2.CV_64F)
-    blur_score = float(laplacian.var()) / (width * height + 1e-6)
-
-    # Contrast score: std of intensity normalized to [0, 1]
-    contrast_score = float(gray.std()) / 255.0
+    if image_np.ndim == 2:
+        image_np = cv2.cvtColor(image_np, cv2.COLOR_GRAY2BGR)
+    elif image_np.shape[2] == 4:
+        image_np = cv2.cvtColor(image_np, cv2.COLOR_BGRA2BGR)
+    technical_quality_score = _compute_metrics(image_np)[5]
+    gray = cv2.cvtColor(image_np, cv2.COLOR_BGR2GRAY)
+    return technical_quality_score, composition_balance_score(gray)
 
-    # Entropy score: histogram entropy normalized to [0, 1]
-    hist = cv2.calcHist([gray], [0], None, [256], [0, 256])
-    hist = hist / hist.sum()
-    entropy_score = float(-np.sum(hist * np.log2(hist + 1e-6))) / 8.0
 
-    # Technical quality: weighted combination of blur, contrast, brightness
-    technical_quality_score = max(
-        0.0, min(1.0, (1.0 - blur_score) * 0.4 + contrast_score * 0.3 + entropy_score * 0.3)
-    )
+def heuristic_score(image_np: np.ndarray) -> tuple[float, float]:
+    """Heuristic aesthetic score when NIMA weights are unavailable.
 
-    # Composition balance via gradient-based saliency centering
-    grad_x = cv2.Sobel(gray, cv2.CV_32F, 1, 0, ksize=3)
-    grad_y = cv2.Sobel(gray, cv2.CV_32F, 0, 1, ksize=3)
-    saliency = cv2.magnitude(grad_x, grad_y)
-    total = float(saliency.sum()) + 1e-6
-    yy, xx = np.indices(gray.shape, dtype=np.float32)
-    cx = float(np.sum(xx * saliency) / total)
-    cy = float(np.sum(yy * saliency) / total)
-    thirds = [
-        (width / 3.0, height / 3.0),
-        (2.0 * width / 3.0, height / 3.0),
-        (width / 3.0, 2.0 * height / 3.0),
-        (2.0 * width / 3.0, 2.0 * height / 3.0),
-    ]
-    min_distance = min(np.hypot(cx - tx, cy - ty) for tx, ty in thirds)
-    max_distance = float(np.hypot(width, height))
-    composition_balance_score = max(0.0, min(1.0, 1.0 - (min_distance / (max_distance + 1e-6))))
-
-    clip_aesthetic_score, _aesthetic_spread, _keep_spread = compute_clip_aesthetic(
-        technical_quality_score,
-        composition_balance_score,
-        blur_score,
-        technical_quality_score,
+    This is a drop-in replacement for assess_quality() — same function signature, same return type.
+    """
+    height, width = image_np.shape[:2]
+    if height == 0 or width == 0:
+        return (0.5, 0.1)
+    technical_quality_score, composition_balance_score = heuristic_inputs(image_np)
+    means, stds = heuristic_scores(
+        np.array([technical_quality_score]), np.array([composition_balance_score])
     )
-
-    # Return mean and std matching CLIP aesthetic output format
-    return (clip_aesthetic_score, 0.1 + (1.0 - clip_aesthetic_score) * 0.05)
+    return float(means[0]), float(stds[0])
 
 
 def assess_quality(image_np: np.ndarray) -> tuple[float, float]:
@@ -317,76 +423,30 @@ def assess_quality(image_np: np.ndarray) -> tuple[float, float]:
     if model is None:
         raise RuntimeError("NIMA weights unavailable — call heuristic_score() instead")
 
-    # Convert BGR -> RGB for PIL.
-    if image_np.shape[2] == 3:
-        pil_image = Image.fromarray(image_np[:, :, ::-1]).convert("RGB")
-    else:
-        pil_image = Image.fromarray(image_np).convert("RGB")
+    means, stds = score_inputs(model, [nima_input(image_np)])
+    return float(means[0]), float(stds[0])
 
-    tensor = _preprocess_transform(pil_image).unsqueeze(0)
 
-    device = next(model.parameters()).device
-    tensor = tensor.to(device)
-
-    with torch.no_grad():
-        distribution = model(tensor)  # shape: (1, 10), softmax probabilities
-
-    dist = distribution.view(10, 1)
-
-    # Compute mean and std of the quality distribution.
-    # Classes are 1-indexed (1=worst, 10=best).
-    indices = torch.arange(1, 11, dtype=distribution.dtype, device=distribution.device)
-    predicted_mean = torch.sum(indices * dist)  # scalar in [1, 10]
-
-    predicted_std = torch.sqrt(torch.sum(dist * (indices - predicted_mean) ** 2))
-
-    # Normalize mean to [0, 1].
-    normalized_mean = float(predicted_mean.cpu().numpy()) / 10.0
-    std_val = float(predicted_std.cpu().numpy())
-
-    return normalized_mean, std_val
-
-
-def assess_quality_batch(images: list[np.ndarray]) -> list[tuple[float, float]]:
+def assess_quality_batch(
+    images: list[np.ndarray], batch_size: int = 16
+) -> list[tuple[float, float]]:
     """Assess aesthetic quality of a batch of images using the NIMA model.
 
     Args:
         images: list of numpy arrays in BGR format (OpenCV), uint8, HxWx3.
+        batch_size: images per forward pass.
 
     Returns:
         List of (mean_score_normalized, std_score) tuples.
     """
     model = get_model()
+    if model is None:
+        raise RuntimeError("NIMA weights unavailable — call heuristic_score() instead")
 
-    device = next(model.parameters()).device
     results: list[tuple[float, float]] = []
-
-    # Process in small batches to manage memory.
-    batch_size = 8
-    for i in range(0, len(images), batch_size):
-        batch_images = images[i : i + batch_size]  # noqa: E203
-        tensors = []
-        for img_np in batch_images:
-            if img_np.shape[2] == 3:
-                pil_image = Image.fromarray(img_np[:, :, ::-1]).convert("RGB")
-            else:
-                pil_image = Image.fromarray(img_np).convert("RGB")
-            tensor = _preprocess_transform(pil_image).unsqueeze(0)
-            tensors.append(tensor.to(device))
-
-        batch_tensor = torch.cat(tensors, dim=0)  # shape: (B, 3, 224, 224)
-
-        with torch.no_grad():
-            distributions = model(batch_tensor)  # shape: (B, 10)
-
-        dists = distributions.view(-1, 10)
-
-        indices = torch.arange(1, 11, dtype=distributions.dtype, device=distributions.device)
-        means = torch.sum(indices * dists.T, dim=1) / 10.0  # normalize to [0, 1]
-        centered = indices.unsqueeze(0) - (means * 10.0).unsqueeze(1)
-        stds = torch.sqrt(torch.sum(dists * centered**2, dim=1))
-
-        for j in range(len(batch_images)):
-            results.append((float(means[j].cpu().numpy()), float(stds[j].cpu().numpy())))
-
+    batch_size = max(1, batch_size)
+    for start in range(0, len(images), batch_size):
+        inputs = [nima_input(image_np) for image_np in images[start : start + batch_size]]
+        means, stds = score_inputs(model, inputs)
+        results.extend(zip(means.tolist(), stds.tolist(), strict=True))
     return results
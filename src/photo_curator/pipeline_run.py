@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import json
 import math
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
@@ -10,6 +11,7 @@ import numpy as np
 from loguru import logger
 
 from photo_curator.db import Database
+from photo_curator.quantile_sketch import QuantileSketch
 
 
 @dataclass
@@ -43,6 +45,9 @@ class PipelineRunStats:
     total_described: int = 0
     total_skipped: int = 0
     total_failed: int = 0
+    total_gated: int = 0
+    gated_seconds_saved: float = 0.0
+    total_nima_scored: int = 0
 
     score_distributions: dict[str, ScoreDistribution] = field(default_factory=dict)
 
@@ -83,6 +88,129 @@ def _compute_distribution(values: list[float]) -> ScoreDistribution:
     )
 
 
+# file_metrics score column -> field name used for pipeline_runs columns and run artifacts.
+SCORE_FIELD_NAMES: dict[str, str] = {
+    "blur_score": "blur",
+    "brightness_score": "brightness",
+    "contrast_score": "contrast",
+    "entropy_score": "entropy",
+    "noise_score": "noise",
+    "technical_quality_score": "technical_quality",
+    "clip_aesthetic_score": "clip_aesthetic",
+    "aesthetic_score": "aesthetic",
+    "keep_score": "keep",
+    "curation_score": "curation",
+    "semantic_relevance_score": "semantic_relevance",
+    "nima_mean": "nima_mean",
+    "nima_std": "nima_std",
+}
+
+# Columns whose library-wide distribution is maintained incrementally from stage sketches
+# (metrics, CLIP and NIMA stages). Description-stage columns still use the SQL aggregate.
+SKETCH_COLUMNS: tuple[str, ...] = (
+    "blur_score",
+    "brightness_score",
+    "contrast_score",
+    "entropy_score",
+    "noise_score",
+    "technical_quality_score",
+    "clip_aesthetic_score",
+    "aesthetic_score",
+    "keep_score",
+    "nima_mean",
+    "nima_std",
+)
+
+# How a stage's sketch relates to the library-wide one:
+# - merge: every value was scored for the first time, so it can be merged in.
+# - replace: the stage rescored every file, so its sketch is the new library distribution.
+# - rebuild: existing values were overwritten; rebuild the library sketch with one streaming scan.
+SKETCH_MODES = ("merge", "replace", "rebuild")
+
+
+def _score_distribution_sql(columns: list[str]) -> str:
+    """Build one aggregate query returning 6 stats per column over file_metrics."""
+    selects = [
+        f"count({col}), min({col}), max({col}), "
+        f"percentile_cont(ARRAY[0.25, 0.5, 0.75, 0.9]) WITHIN GROUP (ORDER BY {col}), "
+        f"stddev_samp({col}), count(*) FILTER (WHERE {col} IS NULL)"
+        for col in columns
+    ]
+    return "SELECT " + ",\n       ".join(selects) + "\nFROM file_metrics"
+
+
+def _parse_distribution_row(
+    row: tuple[Any, ...], columns: list[str]
+) -> tuple[dict[str, ScoreDistribution], dict[str, int]]:
+    """Split an aggregate row from `_score_distribution_sql` into distributions and NULL counts."""
+    distributions: dict[str, ScoreDistribution] = {}
+    null_counts: dict[str, int] = {}
+    for idx, col in enumerate(columns):
+        count, min_val, max_val, percentiles, stddev, null_count = row[idx * 6 : idx * 6 + 6]
+        null_counts[col] = int(null_count or 0)
+        if not count:
+            distributions[col] = ScoreDistribution()
+            continue
+        p25, median, p75, p90 = (float(value) for value in percentiles)
+        distributions[col] = ScoreDistribution(
+            min_val=float(min_val),
+            max_val=float(max_val),
+            median=median,
+            p25=p25,
+            p75=p75,
+            p90=p90,
+            stddev=float(stddev) if stddev is not None else 0.0,
+            count=int(count),
+        )
+    return distributions, null_counts
+
+
+def fetch_score_distributions(
+    db: Database, columns: list[str]
+) -> tuple[dict[str, ScoreDistribution], dict[str, int]]:
+    """Compute distributions and NULL counts for score columns in a single set-based query."""
+    rows = db.fetchall(_score_distribution_sql(columns))
+    if not rows:
+        return {col: ScoreDistribution() for col in columns}, {col: 0 for col in columns}
+    return _parse_distribution_row(rows[0], columns)
+
+
+def _sketch_distribution(sketch: QuantileSketch) -> ScoreDistribution:
+    if not sketch.count:
+        return ScoreDistribution()
+    return ScoreDistribution(
+        min_val=sketch.min_val,
+        max_val=sketch.max_val,
+        median=sketch.quantile(0.5),
+        p25=sketch.quantile(0.25),
+        p75=sketch.quantile(0.75),
+        p90=sketch.quantile(0.9),
+        stddev=sketch.stddev,
+        count=sketch.count,
+    )
+
+
+def _scan_sketches(db: Database, columns: list[str]) -> dict[str, QuantileSketch]:
+    """Rebuild sketches for `columns` with one server-side cursor pass over file_metrics."""
+    sketches = {col: QuantileSketch() for col in columns}
+    with db.connection() as conn, conn.cursor(name="score_sketch_rebuild") as cur:
+        cur.itersize = 10_000
+        cur.execute(f"SELECT {', '.join(columns)} FROM file_metrics")
+        for row in cur:
+            for col, value in zip(columns, row, strict=True):
+                if value is not None:
+                    sketches[col].update(value)
+    return sketches
+
+
+def _log_null_counts(null_counts: dict[str, int], display_names: dict[str, str]) -> None:
+    nonzero = {display_names[col]: count for col, count in null_counts.items() if count > 0}
+    if nonzero:
+        logger.info(
+            "  NULL counts: {nulls}", nulls=", ".join(f"{n}={c}" for n, c in nonzero.items())
+        )
+
+
 def _score_field_name(field: str) -> tuple[str, str]:
     """Map a score field name to (db_column_prefix, display_name)."""
     mapping = {
@@ -97,6 +225,8 @@ def _score_field_name(field: str) -> tuple[str, str]:
         "keep": ("keep", "Keep Score"),
         "curation": ("curation", "Curation Score"),
         "semantic_relevance": ("semantic_relevance", "Semantic Relevance"),
+        "nima_mean": ("nima_mean", "NIMA Mean"),
+        "nima_std": ("nima_std", "NIMA Std"),
     }
     return mapping.get(field, (field, field))
 
@@ -104,7 +234,7 @@ def _score_field_name(field: str) -> tuple[str, str]:
 def _log_distribution(name: str, dist: ScoreDistribution) -> None:
     """Log a score distribution to console in a human-readable format."""
     if dist.count == 0:
-        logger.info("  %-25s  (no data)", name=name)
+        logger.info("  {name}  (no data)", name=name)
         return
 
     logger.info(
@@ -128,6 +258,9 @@ class PipelineRun:
         self.db = db
         self.stats = PipelineRunStats()
         self._run_id: str | None = None
+        self._null_counts: dict[str, int] = {}
+        self._run_sketches: dict[str, QuantileSketch] = {}
+        self._sketch_modes: dict[str, str] = {}
 
     @property
     def run_id(self) -> str:
@@ -184,8 +317,13 @@ class PipelineRun:
         described: int | None = None,
         skipped: int | None = None,
         failed: int | None = None,
+        gated: int | None = None,
+        gated_seconds_saved: float | None = None,
+        nima_scored: int | None = None,
+        sketches: dict[str, QuantileSketch] | None = None,
+        sketch_mode: str = "merge",
     ) -> None:
-        """Update accumulated stage counts for the current run."""
+        """Update accumulated stage counts and score sketches for the current run."""
         if files_ingested is not None:
             self.stats.total_files_ingested += files_ingested
         if metrics_scored is not None:
@@ -198,43 +336,131 @@ class PipelineRun:
             self.stats.total_skipped += skipped
         if failed is not None:
             self.stats.total_failed += failed
+        if gated is not None:
+            self.stats.total_gated += gated
+        if gated_seconds_saved is not None:
+            self.stats.gated_seconds_saved += gated_seconds_saved
+        if nima_scored is not None:
+            self.stats.total_nima_scored += nima_scored
+        if sketch_mode not in SKETCH_MODES:
+            raise ValueError(f"sketch_mode must be one of {SKETCH_MODES}")
+        for col, sketch in (sketches or {}).items():
+            if col in self._run_sketches:
+                # Same column scored twice in one run: keep the union, rebuild library-wide.
+                self._run_sketches[col].merge(sketch)
+                self._sketch_modes[col] = "rebuild"
+            else:
+                self._run_sketches[col] = sketch
+                self._sketch_modes[col] = sketch_mode
+
+    def _store_run_sketches(self) -> None:
+        """Persist this run's per-column sketches and the percentiles of its newly scored photos."""
+        for col, sketch in self._run_sketches.items():
+            dist = _sketch_distribution(sketch)
+            self.db.execute(
+                """
+                INSERT INTO pipeline_run_sketches (
+                  run_id, score_column, sketch_mode, scored_count,
+                  min_val, p25, median, p75, p90, max_val, stddev, sketch
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s::jsonb)
+                ON CONFLICT (run_id, score_column) DO UPDATE SET
+                  sketch_mode = EXCLUDED.sketch_mode,
+                  scored_count = EXCLUDED.scored_count,
+                  min_val = EXCLUDED.min_val,
+                  p25 = EXCLUDED.p25,
+                  median = EXCLUDED.median,
+                  p75 = EXCLUDED.p75,
+                  p90 = EXCLUDED.p90,
+                  max_val = EXCLUDED.max_val,
+                  stddev = EXCLUDED.stddev,
+                  sketch = EXCLUDED.sketch
+                """,
+                (
+                    self.run_id,
+                    col,
+                    self._sketch_modes[col],
+                    dist.count,
+                    dist.min_val if dist.count else None,
+                    dist.p25 if dist.count else None,
+                    dist.median if dist.count else None,
+                    dist.p75 if dist.count else None,
+                    dist.p90 if dist.count else None,
+                    dist.max_val if dist.count else None,
+                    dist.stddev if dist.count else None,
+                    json.dumps(sketch.to_dict()),
+                ),
+            )
 
-    def compute_and_store_score_distributions(self) -> dict[str, ScoreDistribution]:
-        """Query file_metrics for score distributions and store them in the run record."""
-        # Collect raw values from DB for each score field
-        fields = [
-            "blur_score",
-            "brightness_score",
-            "contrast_score",
-            "entropy_score",
-            "noise_score",
-            "technical_quality_score",
-            "clip_aesthetic_score",
-            "aesthetic_score",
-            "keep_score",
-            "curation_score",
-            "semantic_relevance_score",
-        ]
-
-        field_names = {
-            "blur_score": "blur",
-            "brightness_score": "brightness",
-            "contrast_score": "contrast",
-            "entropy_score": "entropy",
-            "noise_score": "noise",
-            "technical_quality_score": "technical_quality",
-            "clip_aesthetic_score": "clip_aesthetic",
-            "aesthetic_score": "aesthetic",
-            "keep_score": "keep",
-            "curation_score": "curation",
-            "semantic_relevance_score": "semantic_relevance",
+    def _update_library_sketches(self) -> dict[str, QuantileSketch]:
+        """Fold this run's sketches into the library-wide ones stored in `score_sketches`."""
+        stored = {
+            str(col): QuantileSketch.from_dict(payload)
+            for col, payload in self.db.fetchall("SELECT score_column, sketch FROM score_sketches")
         }
+        library: dict[str, QuantileSketch] = {}
+        rebuild: list[str] = []
+        for col in SKETCH_COLUMNS:
+            run_sketch = self._run_sketches.get(col)
+            mode = self._sketch_modes.get(col)
+            if run_sketch is None:
+                if col in stored:
+                    library[col] = stored[col]
+                else:
+                    rebuild.append(col)
+            elif mode == "replace":
+                library[col] = run_sketch
+            elif mode == "merge" and col in stored:
+                stored[col].merge(run_sketch)
+                library[col] = stored[col]
+            else:
+                rebuild.append(col)
+
+        if rebuild:
+            logger.info(
+                "Rebuilding library score sketches with one scan: {columns}",
+                columns=", ".join(rebuild),
+            )
+            library.update(_scan_sketches(self.db, rebuild))
 
-        for col in fields:
-            rows = self.db.fetchall(f"SELECT {col} FROM file_metrics WHERE {col} IS NOT NULL")
-            values = [float(r[0]) for r in rows if r[0] is not None]
-            dist = _compute_distribution(values)
-            self.stats.score_distributions[field_names[col]] = dist
+        for col, sketch in library.items():
+            if col not in self._run_sketches and col not in rebuild:
+                continue
+            self.db.execute(
+                """
+                INSERT INTO score_sketches (score_column, scored_count, sketch, last_run_id, updated_at)
+                VALUES (%s, %s, %s::jsonb, %s, now())
+                ON CONFLICT (score_column) DO UPDATE SET
+                  scored_count = EXCLUDED.scored_count,
+                  sketch = EXCLUDED.sketch,
+                  last_run_id = EXCLUDED.last_run_id,
+                  updated_at = now()
+                """,
+                (col, sketch.count, json.dumps(sketch.to_dict()), self.run_id),
+            )
+        return library
+
+    def compute_and_store_score_distributions(self) -> dict[str, ScoreDistribution]:
+        """Compute score distributions with one aggregate query and store them in the run record."""
+        self._store_run_sketches()
+        library = self._update_library_sketches()
+
+        # Sketched columns come straight from the library sketches; only the remaining columns
+        # (and the row count used for NULL counts) need to touch file_metrics.
+        fallback_columns = [col for col in SCORE_FIELD_NAMES if col not in library]
+        distributions: dict[str, ScoreDistribution] = {}
+        self._null_counts = {}
+        if fallback_columns:
+            distributions, self._null_counts = fetch_score_distributions(self.db, fallback_columns)
+        if library:
+            rows = self.db.fetchall("SELECT COUNT(*) FROM file_metrics")
+            total_rows = int(rows[0][0]) if rows else 0
+            for col, sketch in library.items():
+                distributions[col] = _sketch_distribution(sketch)
+                self._null_counts[col] = max(0, total_rows - sketch.count)
+
+        self.stats.score_distributions = {
+            name: distributions[col] for col, name in SCORE_FIELD_NAMES.items()
+        }
 
         # Log distributions to console
         logger.info("=" * 80)
@@ -254,6 +480,19 @@ class PipelineRun:
                     stddev=dist.stddev,
                 )
 
+        _log_null_counts(
+            self._null_counts,
+            {col: _score_field_name(name)[1] for col, name in SCORE_FIELD_NAMES.items()},
+        )
+
+        if self._run_sketches:
+            logger.info("-" * 80)
+            logger.info("Scores written by this run")
+            for col, sketch in self._run_sketches.items():
+                _log_distribution(
+                    _score_field_name(SCORE_FIELD_NAMES[col])[1], _sketch_distribution(sketch)
+                )
+
         # Store distributions in the database
         self._store_distributions()
 
@@ -282,6 +521,9 @@ class PipelineRun:
             ("total_described", self.stats.total_described),
             ("total_skipped", self.stats.total_skipped),
             ("total_failed", self.stats.total_failed),
+            ("total_gated", self.stats.total_gated),
+            ("gated_seconds_saved", self.stats.gated_seconds_saved),
+            ("total_nima_scored", self.stats.total_nima_scored),
         ]:
             update_fields.append(f"{count_field[0]} = %s")
             params.append(count_field[1])
@@ -296,18 +538,17 @@ class PipelineRun:
         if low_spread:
             notes_parts.append(f"LOW_SPREAD: {', '.join(low_spread)}")
 
-        # Count files with NULL scores for each field
-        null_counts = {}
-        for col in [
-            "clip_aesthetic_score",
-            "aesthetic_score",
-            "keep_score",
-            "curation_score",
-            "semantic_relevance_score",
-        ]:
-            row = self.db.fetchall(f"SELECT COUNT(*) FROM file_metrics WHERE {col} IS NULL")
-            if row:
-                null_counts[col] = int(row[0][0])
+        # NULL counts come from the same aggregate query as the distributions.
+        null_counts = {
+            col: self._null_counts.get(col, 0)
+            for col in [
+                "clip_aesthetic_score",
+                "aesthetic_score",
+                "keep_score",
+                "curation_score",
+                "semantic_relevance_score",
+            ]
+        }
 
         if null_counts:
             notes_parts.append(
@@ -347,6 +588,9 @@ class PipelineRun:
             ("total_described", self.stats.total_described),
             ("total_skipped", self.stats.total_skipped),
             ("total_failed", self.stats.total_failed),
+            ("total_gated", self.stats.total_gated),
+            ("gated_seconds_saved", self.stats.gated_seconds_saved),
+            ("total_nima_scored", self.stats.total_nima_scored),
         ]:
             update_fields.append(f"{count_field[0]} = %s")
             params.append(count_field[1])
@@ -373,7 +617,7 @@ def get_latest_run(db: Database) -> dict[str, Any] | None:
         SELECT id, run_id, started_at, completed_at, status, clip_model_version,
                description_provider, total_files_ingested, total_metrics_scored,
                total_clip_aesthetic_scored, total_described, total_skipped, total_failed,
-               notes
+               notes, total_gated, gated_seconds_saved, total_nima_scored
         FROM pipeline_runs
         ORDER BY id DESC LIMIT 1
         """
@@ -397,6 +641,9 @@ def get_latest_run(db: Database) -> dict[str, Any] | None:
         "total_skipped": int(row[11]) if row[11] else 0,
         "total_failed": int(row[12]) if row[12] else 0,
         "notes": str(row[13]) if row[13] else None,
+        "total_gated": int(row[14]) if row[14] else 0,
+        "gated_seconds_saved": float(row[15]) if row[15] else 0.0,
+        "total_nima_scored": int(row[16]) if row[16] else 0,
     }
 
 
@@ -517,7 +764,9 @@ def write_run_artifact(
                keep_min, keep_max, keep_median, keep_p25, keep_p75, keep_stddev,
                curation_min, curation_max, curation_median, curation_p25, curation_p75, curation_stddev,
                semantic_relevance_min, semantic_relevance_max, semantic_relevance_median,
-               semantic_relevance_p25, semantic_relevance_p75, semantic_relevance_stddev
+               semantic_relevance_p25, semantic_relevance_p75, semantic_relevance_stddev,
+               nima_mean_min, nima_mean_max, nima_mean_median, nima_mean_p25, nima_mean_p75, nima_mean_stddev,
+               nima_std_min, nima_std_max, nima_std_median, nima_std_p25, nima_std_p75, nima_std_stddev
         FROM pipeline_runs WHERE run_id = %s ORDER BY id DESC LIMIT 1
         """,
         (run_id,),
@@ -541,6 +790,9 @@ def write_run_artifact(
         "total_described": stats["total_described"],
         "total_skipped": stats["total_skipped"],
         "total_failed": stats["total_failed"],
+        "total_gated": stats["total_gated"],
+        "gated_seconds_saved": stats["gated_seconds_saved"],
+        "total_nima_scored": stats["total_nima_scored"],
         "score_distributions": {
             "blur": _row_to_dist(row, 0),
             "brightness": _row_to_dist(row, 6),
@@ -553,6 +805,29 @@ def write_run_artifact(
             "keep": _row_to_dist(row, 48),
             "curation": _row_to_dist(row, 54),
             "semantic_relevance": _row_to_dist(row, 60),
+            "nima_mean": _row_to_dist(row, 66),
+            "nima_std": _row_to_dist(row, 72),
+        },
+        "run_scored_distributions": {
+            SCORE_FIELD_NAMES.get(str(col), str(col)): {
+                "mode": mode,
+                "count": int(count),
+                "min": min_val,
+                "p25": p25,
+                "median": median,
+                "p75": p75,
+                "p90": p90,
+                "max": max_val,
+                "stddev": stddev,
+            }
+            for col, mode, count, min_val, p25, median, p75, p90, max_val, stddev in db.fetchall(
+                """
+                SELECT score_column, sketch_mode, scored_count, min_val, p25, median, p75, p90,
+                       max_val, stddev
+                FROM pipeline_run_sketches WHERE run_id = %s ORDER BY score_column
+                """,
+                (run_id,),
+            )
         },
         "notes": stats["notes"],
     }
@@ -563,8 +838,6 @@ def write_run_artifact(
     timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
     artifact_path = artifact_dir / f"run_{timestamp}_{run_id[:8]}.json"
 
-    import json
-
     with artifact_path.open("w", encoding="utf-8") as f:
         json.dump(artifact, f, indent=2, default=str)
 
@@ -4,31 +4,78 @@ from pathlib import Path
 from typing import TYPE_CHECKING
 
 from photo_curator.pipeline_v1.common import _iter_files
+from photo_curator.pipeline_v1.models import DescriptionOptions
 from photo_curator.pipeline_v1.selection import (
     _select_discovery_candidates,
     _should_skip_due_to_duplicate_cap,
 )
-from photo_curator.pipeline_v1.models import DescriptionOptions
 
 if TYPE_CHECKING:
+    from datetime import datetime
+
+    from photo_curator.aesthetics import ClipRuntimeOptions
+    from photo_curator.clip_cache import ClipModelCache
     from photo_curator.config import Settings
     from photo_curator.db import Database
+    from photo_curator.pipeline_v1.clip_cascade import ClipCascadeOptions
+    from photo_curator.pipeline_v1.gating import ScoringGates
+    from photo_curator.pipeline_v1.nima_stage import NimaOptions
+    from photo_curator.pipeline_v1.proxy_cache import ProxyCache
+    from photo_curator.pipeline_v1.scoring import ScoringWeights
+    from photo_curator.pipeline_v1.work_queue import WorkQueueOptions
 
 
-def discover_files(db: "Database", settings: "Settings", roots: list[Path], extensions: list[str]):
+def discover_files(db: Database, settings: Settings, roots: list[Path], extensions: list[str]):
     from photo_curator.pipeline_v1.discovery import discover_files as _discover_files
 
     return _discover_files(db, settings, roots, extensions)
 
 
-def score_metrics(db: "Database", max_size: int = 1024):
+def score_metrics(
+    db: Database,
+    max_size: int = 1024,
+    proxy_cache: ProxyCache | None = None,
+    log_distribution: bool = True,
+    work_queue: WorkQueueOptions | None = None,
+):
     from photo_curator.pipeline_v1.metrics_stage import score_metrics as _score_metrics
 
-    return _score_metrics(db, max_size=max_size)
+    return _score_metrics(
+        db,
+        max_size=max_size,
+        proxy_cache=proxy_cache,
+        log_distribution=log_distribution,
+        work_queue=work_queue,
+    )
+
+
+def generate_thumbnails(
+    db: Database,
+    *,
+    thumbs_dir: str,
+    size: int = 512,
+    thumbnail_format: str = "jpeg",
+    quality: int = 85,
+    workers: int = 4,
+    force: bool = False,
+):
+    from photo_curator.pipeline_v1.thumbnail_stage import (
+        generate_thumbnails as _generate_thumbnails,
+    )
+
+    return _generate_thumbnails(
+        db,
+        thumbs_dir=thumbs_dir,
+        size=size,
+        thumbnail_format=thumbnail_format,
+        quality=quality,
+        workers=workers,
+        force=force,
+    )
 
 
 def describe_images(
-    db: "Database", model_name: str = "basic-caption-v1", options: DescriptionOptions | None = None
+    db: Database, model_name: str = "basic-caption-v1", options: DescriptionOptions | None = None
 ):
     from photo_curator.pipeline_v1.description_stage import describe_images as _describe_images
 
@@ -36,32 +83,105 @@ def describe_images(
 
 
 def score_clip_aesthetic(
-    db: "Database",
+    db: Database,
     *,
     max_size: int = 1024,
+    batch_size: int = 500,
+    inference_batch_size: int = 16,
+    prefetch_workers: int = 4,
+    prefetch_depth: int = 64,
     clip_model: str | None = None,
     clip_device: str = "auto",
+    force_rescore_all: bool = False,
+    defer_apply_until_complete: bool = False,
+    proxy_cache: ProxyCache | None = None,
+    clip_model_cache: ClipModelCache | None = None,
+    clip_runtime: ClipRuntimeOptions | None = None,
+    store_embeddings: bool = True,
+    embedding_precision: str = "float16",
+    cascade: ClipCascadeOptions | None = None,
+    gates: ScoringGates | None = None,
+    work_queue: WorkQueueOptions | None = None,
+    nima: NimaOptions | None = None,
 ):
     from photo_curator.pipeline_v1.advanced_stage import (
         score_clip_aesthetic as _score_clip_aesthetic,
     )
 
     return _score_clip_aesthetic(
-        db, max_size=max_size, clip_model=clip_model, clip_device=clip_device
+        db,
+        max_size=max_size,
+        batch_size=batch_size,
+        inference_batch_size=inference_batch_size,
+        prefetch_workers=prefetch_workers,
+        prefetch_depth=prefetch_depth,
+        clip_model=clip_model,
+        clip_device=clip_device,
+        force_rescore_all=force_rescore_all,
+        defer_apply_until_complete=defer_apply_until_complete,
+        proxy_cache=proxy_cache,
+        clip_model_cache=clip_model_cache,
+        clip_runtime=clip_runtime,
+        store_embeddings=store_embeddings,
+        embedding_precision=embedding_precision,
+        cascade=cascade,
+        gates=gates,
+        work_queue=work_queue,
+        nima=nima,
+    )
+
+
+def score_nima(
+    db: Database,
+    *,
+    max_size: int = 1024,
+    batch_size: int = 500,
+    inference_batch_size: int = 16,
+    prefetch_workers: int = 4,
+    prefetch_depth: int = 64,
+    force_rescore_all: bool = False,
+    proxy_cache: ProxyCache | None = None,
+    options: NimaOptions | None = None,
+):
+    from photo_curator.pipeline_v1.nima_stage import score_nima as _score_nima
+
+    return _score_nima(
+        db,
+        max_size=max_size,
+        batch_size=batch_size,
+        inference_batch_size=inference_batch_size,
+        prefetch_workers=prefetch_workers,
+        prefetch_depth=prefetch_depth,
+        force_rescore_all=force_rescore_all,
+        proxy_cache=proxy_cache,
+        options=options,
     )
 
 
 def run_advanced_runners(
-    db: "Database",
+    db: Database,
     *,
     run_descriptions: bool = True,
     description_model_name: str = "basic-caption-v1",
     description_options: DescriptionOptions | None = None,
     batch_size: int = 500,
+    inference_batch_size: int = 16,
+    prefetch_workers: int = 4,
+    prefetch_depth: int = 64,
     clip_model: str | None = None,
     clip_device: str = "auto",
     force_rescore_all: bool = False,
     defer_apply_until_complete: bool = False,
+    proxy_cache: ProxyCache | None = None,
+    clip_model_cache: ClipModelCache | None = None,
+    clip_runtime: ClipRuntimeOptions | None = None,
+    store_embeddings: bool = True,
+    embedding_precision: str = "float16",
+    cascade: ClipCascadeOptions | None = None,
+    gates: ScoringGates | None = None,
+    work_queue: WorkQueueOptions | None = None,
+    nima: NimaOptions | None = None,
+    log_distribution: bool = True,
 ):
     from photo_curator.pipeline_v1.advanced_stage import (
         run_advanced_runners as _run_advanced_runners,
@@ -73,32 +193,98 @@ def run_advanced_runners(
         description_model_name=description_model_name,
         description_options=description_options,
         batch_size=batch_size,
+        inference_batch_size=inference_batch_size,
+        prefetch_workers=prefetch_workers,
+        prefetch_depth=prefetch_depth,
         clip_model=clip_model,
         clip_device=clip_device,
         force_rescore_all=force_rescore_all,
         defer_apply_until_complete=defer_apply_until_complete,
+        proxy_cache=proxy_cache,
+        clip_model_cache=clip_model_cache,
+        clip_runtime=clip_runtime,
+        store_embeddings=store_embeddings,
+        embedding_precision=embedding_precision,
+        cascade=cascade,
+        gates=gates,
+        work_queue=work_queue,
+        nima=nima,
+        log_distribution=log_distribution,
     )
 
 
 def run_llm_descriptions(
-    db: "Database",
+    db: Database,
     *,
     options: DescriptionOptions | None = None,
+    gates: ScoringGates | None = None,
+    work_queue: WorkQueueOptions | None = None,
+    force_rescore_all: bool = False,
+    limit: int | None = None,
+    since: datetime | None = None,
 ):
     from photo_curator.pipeline_v1.llm_stage import run_llm_descriptions as _run_llm_descriptions
 
-    return _run_llm_descriptions(db, options=options or DescriptionOptions())
+    return _run_llm_descriptions(
+        db,
+        options=options or DescriptionOptions(),
+        gates=gates,
+        work_queue=work_queue,
+        force_rescore_all=force_rescore_all,
+        limit=limit,
+        since=since,
+    )
+
+
+def recompute_scores(
+    db: Database,
+    *,
+    weights: ScoringWeights | None = None,
+    chunk_size: int = 50_000,
+):
+    from photo_curator.pipeline_v1.recompute_stage import recompute_scores as _recompute_scores
+    from photo_curator.pipeline_v1.scoring import DEFAULT_WEIGHTS
+
+    return _recompute_scores(db, weights=weights or DEFAULT_WEIGHTS, chunk_size=chunk_size)
+
+
+def rescore_clip_from_embeddings(
+    db: Database,
+    *,
+    clip_model: str | None = None,
+    clip_device: str = "auto",
+    page_size: int = 5000,
+    weights: ScoringWeights | None = None,
+    clip_model_cache: ClipModelCache | None = None,
+):
+    from photo_curator.pipeline_v1.clip_embeddings import (
+        rescore_clip_from_embeddings as _rescore_clip_from_embeddings,
+    )
+    from photo_curator.pipeline_v1.scoring import DEFAULT_WEIGHTS
+
+    return _rescore_clip_from_embeddings(
+        db,
+        clip_model=clip_model,
+        clip_device=clip_device,
+        page_size=page_size,
+        weights=weights or DEFAULT_WEIGHTS,
+        clip_model_cache=clip_model_cache,
+    )
 
 
 __all__ = [
     "DescriptionOptions",
+    "_iter_files",
+    "_select_discovery_candidates",
+    "_should_skip_due_to_duplicate_cap",
     "describe_images",
     "discover_files",
+    "generate_thumbnails",
+    "recompute_scores",
+    "rescore_clip_from_embeddings",
     "run_advanced_runners",
     "run_llm_descriptions",
-    "score_metrics",
     "score_clip_aesthetic",
-    "_iter_files",
-    "_select_discovery_candidates",
-    "_should_skip_due_to_duplicate_cap",
+    "score_metrics",
+    "score_nima",
 ]
@@ -1,47 +1,59 @@
 from __future__ import annotations
 
+from dataclasses import dataclass, replace
+from functools import partial
 from pathlib import Path
+import time
+from typing import Any
 
 import cv2
 from loguru import logger
 import numpy as np
-from PIL import Image
+import torch
 from tqdm import tqdm
 
-from photo_curator.aesthetics import load_clip_aesthetic_scorer
+from photo_curator.aesthetics import (
+    ClipAestheticScorer,
+    ClipRuntimeOptions,
+    load_clip_aesthetic_scorer,
+)
+from photo_curator.clip_cache import ClipModelCache
 from photo_curator.db import Database
-from photo_curator.pipeline_run import _compute_distribution
+from photo_curator.nima.inference import nima_input, score_inputs
+from photo_curator.pipeline_run import _log_null_counts, fetch_score_distributions
 
-from photo_curator.pipeline_v1.common import _load_image
+from photo_curator.pipeline_v1.clip_cascade import (
+    ClipCascadeOptions,
+    ClipCascadeReport,
+    calibration_offset,
+    log_clip_cascade_report,
+    select_cascade_candidates,
+    summarize_cascade,
+)
+from photo_curator.pipeline_v1.clip_embeddings import store_clip_embeddings
+from photo_curator.pipeline_v1.composition import (
+    composition_balance_score as _composition_balance,
+)
+from photo_curator.pipeline_v1.content_dedupe import ContentGroups, copy_file_results
+from photo_curator.pipeline_v1.deferred_apply import DeferredClipUpdates
 from photo_curator.pipeline_v1.description_stage import describe_images
+from photo_curator.pipeline_v1.gating import GateTally, ScoringGates
 from photo_curator.pipeline_v1.metrics_stage import _compute_metrics
 from photo_curator.pipeline_v1.models import AdvancedRunnerStats, DescriptionOptions, StageStats
+from photo_curator.pipeline_v1.nima_stage import (
+    NIMA_RESULT_COLUMNS,
+    NimaOptions,
+    load_nima_model,
+    store_heuristic_scores,
+    store_nima_scores,
+)
+from photo_curator.pipeline_v1.prefetch import PrefetchLoader
+from photo_curator.pipeline_v1.proxy_cache import ProxyCache, load_analysis_image
 from photo_curator.pipeline_v1.scoring import compute_clip_aesthetic
+from photo_curator.pipeline_v1.work_queue import StageWorkQueue, WorkQueueOptions
+from photo_curator.quantile_sketch import QuantileSketch
 
-
-def _composition_balance_score(gray) -> float:
-    height, width = gray.shape[:2]
-    if height == 0 or width == 0:
-        return 0.0
-
-    grad_x = cv2.Sobel(gray, cv2.CV_32F, 1, 0, ksize=3)
-    grad_y = cv2.Sobel(gray, cv2.CV_32F, 0, 1, ksize=3)
-    saliency = cv2.magnitude(grad_x, grad_y)
-    total = float(saliency.sum()) + 1e-6
-
-    yy, xx = np.indices(gray.shape, dtype=np.float32)
-    cx = float(np.sum(xx * saliency) / total)
-    cy = float(np.sum(yy * saliency) / total)
-
-    thirds = [
-        (width / 3.0, height / 3.0),
-        (2.0 * width / 3.0, height / 3.0),
-        (width / 3.0, 2.0 * height / 3.0),
-        (2.0 * width / 3.0, 2.0 * height / 3.0),
-    ]
-    min_distance = min(np.hypot(cx - tx, cy - ty) for tx, ty in thirds)
-    max_distance = float(np.hypot(width, height))
-    return max(0.0, min(1.0, 1.0 - (min_distance / (max_distance + 1e-6))))
+CLIP_SCORE_COLUMNS = ("clip_aesthetic_score", "aesthetic_score", "keep_score")
 
 
 def _resolve_or_compute_metrics(
@@ -95,168 +107,906 @@ def _count_clip_candidates(
     return int(rows[0][0])
 
 
+def _clip_sketch_mode(db: Database, *, force_rescore_all: bool, clip_model_version: str) -> str:
+    """Whether this CLIP pass only fills NULL scores (merge) or overwrites existing ones."""
+    if force_rescore_all:
+        return "replace"
+    rows = db.fetchall(
+        """
+        SELECT EXISTS (
+          SELECT 1 FROM file_metrics
+          WHERE clip_aesthetic_score IS NOT NULL AND clip_model_version != %s
+        )
+        """,
+        (clip_model_version,),
+    )
+    return "rebuild" if rows and rows[0][0] else "merge"
+
+
+_CLIP_UPSERT_SQL = """
+INSERT INTO file_metrics (
+  file_id, clip_aesthetic_score, aesthetic_score, keep_score,
+  clip_model_version, clip_raw_score, composition_balance_score,
+  advanced_metadata_updated_at
+) VALUES (%s, %s, %s, %s, %s, %s, %s, now())
+ON CONFLICT (file_id) DO UPDATE SET
+  clip_aesthetic_score = EXCLUDED.clip_aesthetic_score,
+  aesthetic_score = EXCLUDED.aesthetic_score,
+  keep_score = EXCLUDED.keep_score,
+  clip_model_version = EXCLUDED.clip_model_version,
+  clip_raw_score = EXCLUDED.clip_raw_score,
+  composition_balance_score = EXCLUDED.composition_balance_score,
+  scoring_gate = NULL,
+  advanced_metadata_updated_at = now(),
+  updated_at = now()
+"""
+
+# Gated files: fallback composites from stored metrics only (no decode, no CLIP). clip_raw_score
+# and composition_balance_score stay NULL so recompute-scores keeps the fallback values.
+_CLIP_GATED_UPSERT_SQL = """
+INSERT INTO file_metrics (
+  file_id, clip_aesthetic_score, aesthetic_score, keep_score,
+  clip_model_version, scoring_gate, advanced_metadata_updated_at
+) VALUES (%s, %s, %s, %s, %s, %s, now())
+ON CONFLICT (file_id) DO UPDATE SET
+  clip_aesthetic_score = EXCLUDED.clip_aesthetic_score,
+  aesthetic_score = EXCLUDED.aesthetic_score,
+  keep_score = EXCLUDED.keep_score,
+  clip_model_version = EXCLUDED.clip_model_version,
+  clip_raw_score = NULL,
+  composition_balance_score = NULL,
+  scoring_gate = EXCLUDED.scoring_gate,
+  advanced_metadata_updated_at = now(),
+  updated_at = now()
+"""
+
+
+@dataclass
+class _ClipCandidate:
+    """One decoded, preprocessed image waiting for its CLIP inference mini-batch.
+
+    Gated files carry `scoring_gate` and no image; they take the fallback path instead.
+    `nima_tensor` is the NIMA input cut from the same decode when NIMA shares the pass.
+    """
+
+    file_id: int
+    blur_score: float
+    technical_quality_score: float
+    composition_balance_score: float
+    image_tensor: Any
+    scoring_gate: str | None = None
+    nima_tensor: Any = None
+
+
+def _prepare_clip_candidate(
+    row: tuple[Any, ...],
+    *,
+    clip_scorer: ClipAestheticScorer,
+    max_size: int,
+    proxy_cache: ProxyCache | None,
+    gates: ScoringGates | None = None,
+    with_nima: bool = False,
+) -> _ClipCandidate | None:
+    (
+        file_id,
+        source_root,
+        relative_path,
+        sha256,
+        blur_score,
+        brightness_score,
+        contrast_score,
+        entropy_score,
+        technical_quality_score,
+    ) = row
+    if gates is not None and blur_score is not None and technical_quality_score is not None:
+        gate = gates.reason(
+            blur_score=float(blur_score),
+            brightness_score=None if brightness_score is None else float(brightness_score),
+            technical_quality_score=float(technical_quality_score),
+        )
+        if gate is not None:
+            return _ClipCandidate(
+                file_id=int(file_id),
+                blur_score=float(blur_score),
+                technical_quality_score=float(technical_quality_score),
+                composition_balance_score=0.0,
+                image_tensor=None,
+                scoring_gate=gate,
+            )
+    path = Path(source_root) / Path(relative_path)
+    image = load_analysis_image(path, str(sha256), max_size, proxy_cache)
+    if image is None:
+        logger.warning("Could not load image for CLIP aesthetic score, skipping: {path}", path=path)
+        return None
+
+    (
+        blur_score,
+        _brightness_score,
+        _contrast_score,
+        _entropy_score,
+        technical_quality_score,
+    ) = _resolve_or_compute_metrics(
+        (blur_score, brightness_score, contrast_score, entropy_score, technical_quality_score),
+        image,
+    )
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    composition_balance_score = _composition_balance(gray)
+
+    if proxy_cache is not None:
+        rgb_image = proxy_cache.clip_input(str(sha256), image, clip_scorer.input_size)
+    else:
+        rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    return _ClipCandidate(
+        file_id=int(file_id),
+        blur_score=blur_score,
+        technical_quality_score=technical_quality_score,
+        composition_balance_score=composition_balance_score,
+        image_tensor=clip_scorer.preprocess_rgb(rgb_image),
+        nima_tensor=nima_input(image) if with_nima else None,
+    )
+
+
+def _score_clip_batch(
+    clip_scorer: ClipAestheticScorer, batch: list[_ClipCandidate], batch_number: int
+) -> tuple[list[float], np.ndarray]:
+    started = time.perf_counter()
+    embeddings = clip_scorer.embed_tensors([candidate.image_tensor for candidate in batch])
+    scores = clip_scorer.score_embeddings(embeddings)
+    elapsed = time.perf_counter() - started
+    logger.info(
+        "CLIP inference batch {number}: images={count} encode={elapsed:.3f}s ({rate:.1f} img/s)",
+        number=batch_number,
+        count=len(batch),
+        elapsed=elapsed,
+        rate=len(batch) / elapsed if elapsed > 0 else 0.0,
+    )
+    return scores, embeddings.float().cpu().numpy()
+
+
+_CLIP_ROWS_BY_ID_SQL = """
+SELECT f.id, f.source_root, f.relative_path, f.sha256,
+       fm.blur_score, fm.brightness_score, fm.contrast_score, fm.entropy_score, fm.technical_quality_score
+FROM files f
+LEFT JOIN file_metrics fm ON fm.file_id = f.id
+WHERE f.id = ANY(%s)
+ORDER BY f.id ASC
+"""
+
+
+# Everything the CLIP stage writes for a file; copied verbatim to files with the same sha256.
+_CLIP_RESULT_COLUMNS = (
+    "clip_aesthetic_score",
+    "aesthetic_score",
+    "keep_score",
+    "clip_model_version",
+    "clip_raw_score",
+    "composition_balance_score",
+    "scoring_gate",
+    "advanced_metadata_updated_at",
+)
+
+_STALE_WITH_SCORED_TWIN_SQL = """
+SELECT file_id, source_id
+FROM (
+  SELECT f.id AS file_id, (
+    SELECT s.id
+    FROM files s
+    JOIN file_metrics sm ON sm.file_id = s.id
+    WHERE s.sha256 = f.sha256
+      AND s.id <> f.id
+      AND sm.clip_aesthetic_score IS NOT NULL
+      AND sm.clip_model_version = %s
+    ORDER BY s.id
+    LIMIT 1
+  ) AS source_id
+  FROM files f
+  LEFT JOIN file_metrics fm ON fm.file_id = f.id
+  WHERE fm.clip_aesthetic_score IS NULL OR fm.clip_model_version != %s
+) stale
+WHERE source_id IS NOT NULL
+"""
+
+
+def _copy_clip_results(
+    db: Database,
+    twin_ids: list[int],
+    source_ids: list[int],
+    stats: StageStats,
+    *,
+    store_embeddings: bool,
+) -> int:
+    """Copy CLIP scores (and stored embeddings) from scored files to same-content twins."""
+    copied = copy_file_results(
+        db,
+        "file_metrics",
+        _CLIP_RESULT_COLUMNS,
+        twin_ids,
+        source_ids,
+        returning=CLIP_SCORE_COLUMNS,
+    )
+    for values in copied:
+        for col, value in zip(CLIP_SCORE_COLUMNS, values, strict=True):
+            if value is not None:
+                stats.sketches[col].update(value)
+    if store_embeddings:
+        copy_file_results(
+            db,
+            "file_clip_embeddings",
+            ("clip_model_name", "embedding", "embedding_half"),
+            twin_ids,
+            source_ids,
+            conflict_columns=("file_id", "clip_model_name"),
+            touch_column="created_at",
+        )
+    stats.processed += len(copied)
+    return len(copied)
+
+
+def _keep_for(candidate: _ClipCandidate, raw_score: float) -> float:
+    clip_score = max(0.0, min(1.0, float(raw_score)))
+    return compute_clip_aesthetic(
+        clip_score,
+        candidate.composition_balance_score,
+        candidate.blur_score,
+        candidate.technical_quality_score,
+    )[2]
+
+
+_CLIP_STALE_SQL = "(fm.clip_aesthetic_score IS NULL OR fm.clip_model_version != %s)"
+
+
+class _ClipPages:
+    """`fetch_page` for the CLIP stage's `PrefetchLoader`.
+
+    Without a work queue, pages come from a keyset scan over `files`; with one, each page is
+    a leased claim, re-checked for staleness. Rows whose content is already queued this run
+    are dropped (`groups`), so twins wait for their representative's result. Runs on the
+    prefetch producer thread, so the next page is queried while the current one is scored.
+    """
+
+    def __init__(
+        self,
+        db: Database,
+        *,
+        queue: StageWorkQueue | None,
+        groups: ContentGroups,
+        force_rescore_all: bool,
+        clip_model_version: str,
+        batch_size: int,
+        total_batches: int,
+    ) -> None:
+        self.db = db
+        self.queue = queue
+        self.groups = groups
+        self.force_rescore_all = force_rescore_all
+        self.clip_model_version = clip_model_version
+        self.batch_size = batch_size
+        self.total_batches = total_batches
+        self.last_id = 0
+        self.batch_index = 0
+
+    def __call__(self) -> list[tuple[Any, ...]]:
+        while True:
+            claimed: list[int] = []
+            if self.queue is not None:
+                # Claim no more than one page: claimed ids the LIMIT cut off would be completed
+                # below without ever being scored.
+                claimed = self.queue.claim(limit=self.batch_size)
+                if not claimed:
+                    return []
+                where_clause = "f.id = ANY(%s)"
+                where_params: tuple[object, ...] = (claimed,)
+            else:
+                where_clause = "f.id > %s"
+                where_params = (self.last_id,)
+            if not self.force_rescore_all:
+                where_clause = f"{_CLIP_STALE_SQL} AND {where_clause}"
+                where_params = (self.clip_model_version, *where_params)
+
+            rows = self.db.fetchall(
+                f"""
+                SELECT f.id, f.source_root, f.relative_path, f.sha256,
+                       fm.blur_score, fm.brightness_score, fm.contrast_score, fm.entropy_score, fm.technical_quality_score
+                FROM files f
+                LEFT JOIN file_metrics fm ON fm.file_id = f.id
+                WHERE {where_clause}
+                ORDER BY f.id ASC
+                LIMIT %s
+                """,
+                (*where_params, self.batch_size),
+            )
+            if self.queue is not None:
+                # Claimed files that are no longer stale were scored elsewhere meanwhile.
+                self.queue.complete(set(claimed) - {int(row[0]) for row in rows})
+                if not rows:
+                    continue
+            if not rows:
+                return rows
+            self.batch_index += 1
+            self.last_id = int(rows[-1][0])
+            logger.info(
+                "CLIP aesthetic batch {batch_index}/{total_batches}: batch_size={batch_size} up_to_file_id={last_id}",
+                batch_index=self.batch_index,
+                total_batches=(self.total_batches or "?"),
+                batch_size=len(rows),
+                last_id=self.last_id,
+            )
+            unique_rows = [row for row in rows if self.groups.claim(row[0], row[3])]
+            if unique_rows:
+                return unique_rows
+
+
+class _ClipSink:
+    """Where CLIP results go: one upsert per file, or `DeferredClipUpdates` until `close`.
+
+    Every result also feeds the stage's score sketches. With a work queue, immediate writes
+    hand finished files back as they go, so a crash only re-queues the files still in flight;
+    deferred writes are released by `StageWorkQueue.finish` once they are applied.
+    """
+
+    def __init__(
+        self,
+        db: Database,
+        stats: StageStats,
+        *,
+        clip_model_version: str,
+        deferred: bool,
+        queue: StageWorkQueue | None,
+        gate_tally: GateTally,
+    ) -> None:
+        self.db = db
+        self.stats = stats
+        self.clip_model_version = clip_model_version
+        self.deferred = DeferredClipUpdates() if deferred else None
+        self.queue = queue
+        self.gate_tally = gate_tally
+        self.scored_ids: set[int] = set()
+        self._finished: list[int] = []
+
+    def gated(self, candidate: _ClipCandidate) -> None:
+        """Write the fallback composites of a file a scoring gate stopped."""
+        clip_aesthetic_score, aesthetic_spread, keep_spread = compute_clip_aesthetic(
+            0.0, 0.0, candidate.blur_score, candidate.technical_quality_score
+        )
+        self._sketch((clip_aesthetic_score, aesthetic_spread, keep_spread))
+        if self.deferred is not None:
+            self.deferred.append(
+                candidate.file_id,
+                clip_aesthetic_score,
+                aesthetic_spread,
+                keep_spread,
+                self.clip_model_version,
+                None,
+                None,
+                candidate.scoring_gate,
+            )
+        else:
+            self.db.execute(
+                _CLIP_GATED_UPSERT_SQL,
+                (
+                    candidate.file_id,
+                    clip_aesthetic_score,
+                    aesthetic_spread,
+                    keep_spread,
+                    self.clip_model_version,
+                    candidate.scoring_gate,
+                ),
+            )
+        self.gate_tally.by_reason[candidate.scoring_gate] += 1
+        self._finish(candidate.file_id)
+
+    def scored(self, candidate: _ClipCandidate, raw_score: float) -> None:
+        """Write the composites for `candidate` from its raw CLIP score."""
+        clip_score = max(0.0, min(1.0, float(raw_score)))
+        clip_aesthetic_score, aesthetic_spread, keep_spread = compute_clip_aesthetic(
+            clip_score,
+            candidate.composition_balance_score,
+            candidate.blur_score,
+            candidate.technical_quality_score,
+        )
+        self._sketch((clip_aesthetic_score, aesthetic_spread, keep_spread))
+        update_payload = (
+            candidate.file_id,
+            clip_aesthetic_score,
+            aesthetic_spread,
+            keep_spread,
+            self.clip_model_version,
+            clip_score,
+            candidate.composition_balance_score,
+        )
+        if self.deferred is not None:
+            self.deferred.append(*update_payload, None)
+        else:
+            self.db.execute(_CLIP_UPSERT_SQL, update_payload)
+        self._finish(candidate.file_id)
+
+    def close(self) -> None:
+        """Apply the deferred results in one transaction (no-op for immediate writes)."""
+        if self.deferred is None:
+            return
+        if self.queue is not None:
+            self.queue.renew()
+        apply_started = time.perf_counter()
+        merged = self.deferred.apply(self.db)
+        self.deferred.close()
+        logger.info(
+            "Applied deferred CLIP aesthetic updates: count={count} seconds={seconds:.2f}",
+            count=merged,
+            seconds=time.perf_counter() - apply_started,
+        )
+
+    def _sketch(self, values: tuple[float, float, float]) -> None:
+        for col, value in zip(CLIP_SCORE_COLUMNS, values, strict=True):
+            self.stats.sketches[col].update(value)
+
+    def _finish(self, file_id: int) -> None:
+        self.scored_ids.add(file_id)
+        self.stats.processed += 1
+        if self.queue is None or self.deferred is not None:
+            return
+        self._finished.append(file_id)
+        if len(self._finished) >= self.queue.options.claim_size:
+            self.queue.complete(self._finished)
+            self._finished.clear()
+
+
+class _ClipInference:
+    """Runs CLIP mini-batches, timing them and storing each batch's embeddings."""
+
+    def __init__(self, db: Database, *, store_embeddings: bool, embedding_precision: str) -> None:
+        self.db = db
+        self.store_embeddings = store_embeddings
+        self.embedding_precision = embedding_precision
+        self.batches = 0
+        self.seconds = 0.0
+
+    def score(self, batch: list[_ClipCandidate], scorer: ClipAestheticScorer) -> list[float]:
+        self.batches += 1
+        started = time.perf_counter()
+        scores, embeddings = _score_clip_batch(scorer, batch, self.batches)
+        self.seconds += time.perf_counter() - started
+        if self.store_embeddings:
+            store_clip_embeddings(
+                self.db,
+                scorer.embedding_model,
+                [candidate.file_id for candidate in batch],
+                embeddings,
+                self.embedding_precision,
+            )
+        return scores
+
+
+class _ClipNima:
+    """NIMA scores for the files of each CLIP mini-batch, from the same decode.
+
+    With weights, the batch's `nima_tensor`s go through one forward pass; without them (and
+    with the heuristic fallback) the metrics the CLIP pass resolved give heuristic scores.
+    """
+
+    def __init__(
+        self,
+        db: Database,
+        stats: StageStats,
+        model: torch.nn.Module | None,
+        *,
+        heuristic: bool,
+    ) -> None:
+        self.db = db
+        self.stats = stats
+        self.model = model
+        self.heuristic = heuristic
+        self.scored_ids: set[int] = set()
+        self.seconds = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.model is not None or self.heuristic
+
+    def score(self, batch: list[_ClipCandidate]) -> None:
+        if not self.enabled:
+            return
+        file_ids = [candidate.file_id for candidate in batch]
+        if self.model is not None:
+            started = time.perf_counter()
+            means, stds = score_inputs(self.model, [candidate.nima_tensor for candidate in batch])
+            self.seconds += time.perf_counter() - started
+            self.stats.nima_processed += store_nima_scores(
+                self.db, file_ids, means, stds, self.stats.sketches
+            )
+        else:
+            self.stats.nima_processed += store_heuristic_scores(
+                self.db,
+                file_ids,
+                [candidate.technical_quality_score for candidate in batch],
+                [candidate.composition_balance_score for candidate in batch],
+                self.stats.sketches,
+            )
+        self.scored_ids.update(file_ids)
+
+    def copy_to_twins(self, groups: ContentGroups) -> None:
+        if not self.enabled:
+            return
+        twin_ids, source_ids = groups.pairs(self.scored_ids)
+        copied = copy_file_results(
+            self.db,
+            "file_metrics",
+            NIMA_RESULT_COLUMNS,
+            twin_ids,
+            source_ids,
+            returning=("file_id",),
+        )
+        self.stats.nima_processed += len(copied)
+        logger.info(
+            "NIMA scored alongside CLIP: processed={processed} heuristic={heuristic} inference_seconds={seconds:.1f}",
+            processed=self.stats.nima_processed,
+            heuristic=self.heuristic,
+            seconds=self.seconds,
+        )
+
+
+def _consume_clip_batch(
+    batch: list[_ClipCandidate],
+    *,
+    scorer: ClipAestheticScorer,
+    inference: _ClipInference,
+    nima: _ClipNima,
+    sink: _ClipSink,
+    tier_one: list[tuple[_ClipCandidate, float]] | None,
+) -> None:
+    """Score one mini-batch; write it, or hold it in `tier_one` when a cascade follows."""
+    scores = inference.score(batch, scorer)
+    nima.score(batch)
+    if tier_one is None:
+        for candidate, raw_score in zip(batch, scores, strict=True):
+            sink.scored(candidate, raw_score)
+        return
+    # Cascade tier one: small-model raw scores, tensors dropped, waiting for escalation.
+    tier_one.extend(
+        (replace(candidate, image_tensor=None, nima_tensor=None), float(raw_score))
+        for candidate, raw_score in zip(batch, scores, strict=True)
+    )
+
+
+def _run_clip_cascade(
+    db: Database,
+    tier_one: list[tuple[_ClipCandidate, float]],
+    *,
+    cascade: ClipCascadeOptions,
+    small_scorer: ClipAestheticScorer,
+    clip_scorer: ClipAestheticScorer,
+    inference: _ClipInference,
+    sink: _ClipSink,
+    queue: StageWorkQueue | None,
+    batch_size: int,
+    inference_batch_size: int,
+    max_size: int,
+    proxy_cache: ProxyCache | None,
+    prefetch_workers: int,
+    prefetch_depth: int,
+) -> None:
+    """Re-score the files `select_cascade_candidates` picks with `clip_scorer`, then write all.
+
+    Files that are not escalated keep their small-model score, shifted by the median
+    large-minus-small offset measured on the escalated ones.
+    """
+    small_seconds = inference.seconds
+    small_keep = np.asarray([_keep_for(c, raw) for c, raw in tier_one], dtype=np.float64)
+    escalate, keep_cutoff = select_cascade_candidates(
+        small_keep, top_fraction=cascade.top_fraction, margin=cascade.margin
+    )
+    escalated_ids = [c.file_id for (c, _raw), hit in zip(tier_one, escalate) if hit]
+    id_pages = [
+        escalated_ids[start : start + batch_size]
+        for start in range(0, len(escalated_ids), batch_size)
+    ]
+
+    def fetch_escalated_page() -> list[tuple[Any, ...]]:
+        if not id_pages:
+            return []
+        if queue is not None:
+            # No claims happen during escalation; keep the tier-one leases alive.
+            queue.renew()
+        return db.fetchall(_CLIP_ROWS_BY_ID_SQL, (id_pages.pop(0),))
+
+    large_raw: dict[int, float] = {}
+    batch: list[_ClipCandidate] = []
+    with PrefetchLoader(
+        fetch_escalated_page,
+        partial(
+            _prepare_clip_candidate,
+            clip_scorer=clip_scorer,
+            max_size=max_size,
+            proxy_cache=proxy_cache,
+        ),
+        workers=prefetch_workers,
+        depth=prefetch_depth,
+    ) as loader:
+        for candidate in tqdm(loader, total=len(escalated_ids), desc="CLIP cascade"):
+            batch.append(candidate)
+            if len(batch) >= inference_batch_size:
+                for item, raw_score in zip(batch, inference.score(batch, clip_scorer), strict=True):
+                    large_raw[item.file_id] = float(raw_score)
+                batch = []
+    if batch:
+        for item, raw_score in zip(batch, inference.score(batch, clip_scorer), strict=True):
+            large_raw[item.file_id] = float(raw_score)
+    loader.log_summary("clip_cascade")
+
+    paired = [(raw, large_raw[c.file_id]) for c, raw in tier_one if c.file_id in large_raw]
+    offset = calibration_offset(
+        np.asarray([small for small, _large in paired]),
+        np.asarray([large for _small, large in paired]),
+    )
+    final_keep = np.empty_like(small_keep)
+    for index, (candidate, raw_score) in enumerate(tier_one):
+        final_raw = large_raw.get(candidate.file_id, raw_score + offset)
+        final_keep[index] = _keep_for(candidate, final_raw)
+        sink.scored(candidate, final_raw)
+    spearman, top_n, churn = summarize_cascade(
+        small_keep, final_keep, top_fraction=cascade.top_fraction
+    )
+    log_clip_cascade_report(
+        ClipCascadeReport(
+            small_model=small_scorer.embedding_model,
+            large_model=clip_scorer.embedding_model,
+            candidates=len(tier_one),
+            escalated=len(large_raw),
+            keep_cutoff=keep_cutoff,
+            calibration_offset=offset,
+            small_seconds=small_seconds,
+            large_seconds=inference.seconds - small_seconds,
+            spearman=spearman,
+            top_n=top_n,
+            top_n_churn=churn,
+        )
+    )
+
+
 def score_clip_aesthetic(
     db: Database,
     *,
     max_size: int = 1024,
     batch_size: int = 500,
+    inference_batch_size: int = 16,
+    prefetch_workers: int = 4,
+    prefetch_depth: int = 64,
     clip_model: str | None = None,
     clip_device: str = "auto",
     force_rescore_all: bool = False,
     defer_apply_until_complete: bool = False,
+    proxy_cache: ProxyCache | None = None,
+    clip_model_cache: ClipModelCache | None = None,
+    clip_runtime: ClipRuntimeOptions | None = None,
+    store_embeddings: bool = True,
+    embedding_precision: str = "float16",
+    cascade: ClipCascadeOptions | None = None,
+    gates: ScoringGates | None = None,
+    work_queue: WorkQueueOptions | None = None,
+    nima: NimaOptions | None = None,
 ) -> StageStats:
+    """Score CLIP aesthetics for stale/missing rows.
+
+    `batch_size` is the keyset page size for `files`; `inference_batch_size` is how many
+    preprocessed images go through each `encode_image` call. Mini-batches span page boundaries.
+    Pages are fetched and images decoded/preprocessed ahead of inference by `prefetch_workers`
+    threads, with at most `prefetch_depth` images in flight. With `store_embeddings`, each
+    batch's normalised image embeddings are upserted into `file_clip_embeddings` straight away
+    (also in deferred mode; they are not user-visible) so `rescore-clip-embeddings` can rescore
+    later without the image encoder.
+
+    With `cascade`, `cascade.small_model` scores every candidate first and only the files
+    `select_cascade_candidates` picks (top fraction plus a margin below its keep cutoff) are
+    decoded again and scored by the configured model. The other files keep their small-model
+    score, shifted by the median large-minus-small offset measured on the escalated files.
+    All writes then happen after both passes.
+
+    Files are grouped by `sha256`: stale files whose content already has a current score are
+    copied from it up front, and within the run only the first file per hash is decoded and
+    scored; its result is copied to the others at the end.
+
+    With `gates`, files whose stored metrics fail a gate are neither decoded nor encoded: they
+    get fallback composites from a zero CLIP score and zero composition balance, and
+    `file_metrics.scoring_gate` records which gate stopped them.
+
+    With `work_queue`, pages come from leased claims on `stage_work_queue` instead of the
+    keyset scan, so several workers can drain one pass. Each worker sees only part of the
+    library, so cascade cutoffs are per worker and the score sketches are rebuilt.
+
+    With `nima`, every decoded image also yields a NIMA input and each CLIP mini-batch is
+    followed by a NIMA forward pass on the same files (see `score_nima`), so running both
+    scorers costs one decode. NIMA results are written per batch even in deferred mode; files
+    this pass does not decode are left to `score_nima`. Without NIMA weights the batch gets
+    heuristic scores from the technical quality and composition balance already resolved here.
+    """
     clip_model_version = "clip_aesthetic_v1"
+    inference_batch_size = max(1, inference_batch_size)
 
-    stats = StageStats()
-    clip_scorer = load_clip_aesthetic_scorer(clip_model, clip_device)
-    pending_updates: list[tuple[int, float, float, float, str]] = []
-    total_candidates = _count_clip_candidates(
-        db, force_rescore_all=force_rescore_all, clip_model_version=clip_model_version
+    queue = StageWorkQueue(db, "clip_aesthetic", work_queue) if work_queue is not None else None
+    stats = StageStats(
+        sketches={col: QuantileSketch() for col in CLIP_SCORE_COLUMNS},
+        sketch_mode=_clip_sketch_mode(
+            db, force_rescore_all=force_rescore_all, clip_model_version=clip_model_version
+        )
+        if queue is None
+        else "rebuild",
     )
+    clip_scorer = load_clip_aesthetic_scorer(
+        clip_model, clip_device, clip_model_cache, clip_runtime
+    )
+    small_scorer: ClipAestheticScorer | None = None
+    if cascade is not None:
+        small_scorer = load_clip_aesthetic_scorer(
+            cascade.small_model, clip_device, clip_model_cache, clip_runtime
+        )
+        if small_scorer.embedding_model == clip_scorer.embedding_model:
+            logger.warning(
+                "CLIP cascade small model {model} is the configured model; scoring in one pass",
+                model=small_scorer.embedding_model,
+            )
+            small_scorer = None
+    first_scorer = small_scorer or clip_scorer
+    nima_model = load_nima_model(nima) if nima is not None else None
+    # Without weights, NIMA falls back to a heuristic over the metrics this pass resolves anyway.
+    nima_heuristic = nima is not None and nima_model is None and nima.heuristic_fallback
+    pre_copied = 0
+    if not force_rescore_all:
+        twin_rows = db.fetchall(
+            _STALE_WITH_SCORED_TWIN_SQL, (clip_model_version, clip_model_version)
+        )
+        pre_copied = _copy_clip_results(
+            db,
+            [int(row[0]) for row in twin_rows],
+            [int(row[1]) for row in twin_rows],
+            stats,
+            store_embeddings=store_embeddings,
+        )
+        if pre_copied:
+            logger.info(
+                "CLIP scores copied from already-scored identical files: {count}",
+                count=pre_copied,
+            )
+    if queue is not None:
+        if force_rescore_all:
+            queue.enqueue("SELECT id FROM files")
+        else:
+            queue.enqueue(
+                """
+                SELECT f.id
+                FROM files f
+                LEFT JOIN file_metrics fm ON fm.file_id = f.id
+                WHERE fm.clip_aesthetic_score IS NULL OR fm.clip_model_version != %s
+                """,
+                (clip_model_version,),
+            )
+        total_candidates = queue.pending()
+    else:
+        total_candidates = _count_clip_candidates(
+            db, force_rescore_all=force_rescore_all, clip_model_version=clip_model_version
+        )
     total_batches = (total_candidates + batch_size - 1) // batch_size if total_candidates else 0
     logger.info(
-        "CLIP aesthetic stage starting: total_candidates={total} batch_size={batch_size} batches={batches} deferred_apply={deferred}",
+        "CLIP aesthetic stage starting: total_candidates={total} batch_size={batch_size} batches={batches} inference_batch_size={inference_batch_size} deferred_apply={deferred} embeddings={embeddings}",
         total=total_candidates,
         batch_size=batch_size,
         batches=total_batches,
+        inference_batch_size=inference_batch_size,
         deferred=defer_apply_until_complete,
+        embeddings=f"{clip_scorer.embedding_model}:{embedding_precision}"
+        if store_embeddings
+        else "off",
     )
-
-    last_id = 0
-    batch_index = 0
-    while True:
-        if force_rescore_all:
-            where_clause = "f.id > %s"
-            where_params: tuple[object, ...] = (last_id,)
-        else:
-            where_clause = "(fm.clip_aesthetic_score IS NULL OR fm.clip_model_version != %s) AND f.id > %s"
-            where_params = (clip_model_version, last_id)
-
-        rows = db.fetchall(
-            f"""
-            SELECT f.id, f.source_root, f.relative_path,
-                   fm.blur_score, fm.brightness_score, fm.contrast_score, fm.entropy_score, fm.technical_quality_score
-            FROM files f
-            LEFT JOIN file_metrics fm ON fm.file_id = f.id
-            WHERE {where_clause}
-            ORDER BY f.id ASC
-            LIMIT %s
-            """,
-            (*where_params, batch_size),
+    if small_scorer is not None:
+        logger.info(
+            "CLIP cascade: {small} scores all candidates, {large} re-scores top_fraction={fraction} margin={margin}",
+            small=small_scorer.embedding_model,
+            large=clip_scorer.embedding_model,
+            fraction=cascade.top_fraction,
+            margin=cascade.margin,
         )
 
-        if not rows:
-            break
+    groups = ContentGroups()
+    gate_tally = GateTally()
+    pages = _ClipPages(
+        db,
+        queue=queue,
+        groups=groups,
+        force_rescore_all=force_rescore_all,
+        clip_model_version=clip_model_version,
+        batch_size=batch_size,
+        total_batches=total_batches,
+    )
+    sink = _ClipSink(
+        db,
+        stats,
+        clip_model_version=clip_model_version,
+        deferred=defer_apply_until_complete,
+        queue=queue,
+        gate_tally=gate_tally,
+    )
+    inference = _ClipInference(
+        db, store_embeddings=store_embeddings, embedding_precision=embedding_precision
+    )
+    nima_pass = _ClipNima(db, stats, nima_model, heuristic=nima_heuristic)
+    tier_one: list[tuple[_ClipCandidate, float]] = []
+    consume = partial(
+        _consume_clip_batch,
+        scorer=first_scorer,
+        inference=inference,
+        nima=nima_pass,
+        sink=sink,
+        tier_one=tier_one if small_scorer is not None else None,
+    )
+    prepare = partial(
+        _prepare_clip_candidate,
+        clip_scorer=first_scorer,
+        max_size=max_size,
+        proxy_cache=proxy_cache,
+        gates=gates if gates is not None and gates.enabled else None,
+        with_nima=nima_model is not None,
+    )
 
-        batch_index += 1
-        last_id = int(rows[-1][0])
-        logger.info(
-            "CLIP aesthetic batch {batch_index}/{total_batches}: batch_size={batch_size} up_to_file_id={last_id}",
-            batch_index=batch_index,
-            total_batches=(total_batches or "?"),
-            batch_size=len(rows),
-            last_id=last_id,
-        )
-        for row in tqdm(rows, desc=f"CLIP batch {batch_index}"):
-            (
-                file_id,
-                source_root,
-                relative_path,
-                blur_score,
-                brightness_score,
-                contrast_score,
-                entropy_score,
-                technical_quality_score,
-            ) = row
-            path = Path(source_root) / Path(relative_path)
-            image = _load_image(path, max_size=max_size)
-            if image is None:
-                logger.warning(
-                    "Could not load image for CLIP aesthetic score, skipping: {path}", path=path
-                )
+    batch: list[_ClipCandidate] = []
+    loop_started = time.perf_counter()
+    with PrefetchLoader(pages, prepare, workers=prefetch_workers, depth=prefetch_depth) as loader:
+        for candidate in tqdm(loader, total=total_candidates, desc="CLIP aesthetic"):
+            if candidate.scoring_gate is not None:
+                sink.gated(candidate)
                 continue
+            batch.append(candidate)
+            if len(batch) >= inference_batch_size:
+                consume(batch)
+                batch = []
+    if batch:
+        consume(batch)
+    loader.log_summary("clip_aesthetic")
 
-            (
-                blur_score,
-                brightness_score,
-                contrast_score,
-                entropy_score,
-                technical_quality_score,
-            ) = _resolve_or_compute_metrics(
-                (
-                    blur_score,
-                    brightness_score,
-                    contrast_score,
-                    entropy_score,
-                    technical_quality_score,
-                ),
-                image,
-            )
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            composition_balance_score = _composition_balance_score(gray)
+    if small_scorer is not None and tier_one:
+        _run_clip_cascade(
+            db,
+            tier_one,
+            cascade=cascade,
+            small_scorer=small_scorer,
+            clip_scorer=clip_scorer,
+            inference=inference,
+            sink=sink,
+            queue=queue,
+            batch_size=batch_size,
+            inference_batch_size=inference_batch_size,
+            max_size=max_size,
+            proxy_cache=proxy_cache,
+            prefetch_workers=prefetch_workers,
+            prefetch_depth=prefetch_depth,
+        )
+    sink.close()
 
-            # Use CLIP aesthetics as the primary advanced-stage quality signal.
-            rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-            clip_score = max(
-                0.0, min(1.0, float(clip_scorer.score_pil_images([Image.fromarray(rgb_image)])[0]))
-            )
-            clip_aesthetic_score, aesthetic_spread, keep_spread = compute_clip_aesthetic(
-                clip_score, composition_balance_score, blur_score, technical_quality_score
-            )
+    twin_ids, source_ids = groups.pairs(sink.scored_ids)
+    copied = _copy_clip_results(db, twin_ids, source_ids, stats, store_embeddings=store_embeddings)
+    groups.log_summary("clip_aesthetic", copied)
+    nima_pass.copy_to_twins(groups)
+    if queue is not None:
+        queue.finish()
 
-            update_payload = (
-                file_id,
-                clip_aesthetic_score,
-                aesthetic_spread,
-                keep_spread,
-                clip_model_version,
-            )
-            if defer_apply_until_complete:
-                pending_updates.append(update_payload)
-            else:
-                db.execute(
-                    """
-                INSERT INTO file_metrics (
-                  file_id, clip_aesthetic_score, aesthetic_score, keep_score,
-                  clip_model_version, advanced_metadata_updated_at
-                ) VALUES (%s, %s, %s, %s, %s, now())
-                ON CONFLICT (file_id) DO UPDATE SET
-                  clip_aesthetic_score = EXCLUDED.clip_aesthetic_score,
-                  aesthetic_score = EXCLUDED.aesthetic_score,
-                  keep_score = EXCLUDED.keep_score,
-                  clip_model_version = EXCLUDED.clip_model_version,
-                  advanced_metadata_updated_at = now(),
-                  updated_at = now()
-                """,
-                    update_payload,
-                )
-            stats.processed += 1
+    if proxy_cache is not None:
+        proxy_cache.log_summary("clip_aesthetic")
 
-    if defer_apply_until_complete and pending_updates:
-        logger.info(
-            "Applying deferred CLIP aesthetic updates: count={count}", count=len(pending_updates)
-        )
-        for update_payload in tqdm(pending_updates, desc="Apply CLIP updates"):
-            db.execute(
-                """
-            INSERT INTO file_metrics (
-              file_id, clip_aesthetic_score, aesthetic_score, keep_score,
-              clip_model_version, advanced_metadata_updated_at
-            ) VALUES (%s, %s, %s, %s, %s, now())
-            ON CONFLICT (file_id) DO UPDATE SET
-              clip_aesthetic_score = EXCLUDED.clip_aesthetic_score,
-              aesthetic_score = EXCLUDED.aesthetic_score,
-              keep_score = EXCLUDED.keep_score,
-              clip_model_version = EXCLUDED.clip_model_version,
-              advanced_metadata_updated_at = now(),
-              updated_at = now()
-            """,
-                update_payload,
-            )
+    gate_tally.scored = stats.processed - gate_tally.gated - pre_copied - copied
+    gate_tally.scored_seconds = time.perf_counter() - loop_started
+    gate_tally.log_summary("clip_aesthetic")
+    stats.gated = gate_tally.gated
+    stats.gated_seconds_saved = gate_tally.seconds_saved
+    if stats.sketch_mode == "replace" and (
+        stats.processed < total_candidates
+        or (nima_pass.enabled and stats.nima_processed < total_candidates)
+    ):
+        # Files this pass could not load (or gated before NIMA) keep their old scores, which
+        # the run's sketches do not contain.
+        stats.sketch_mode = "rebuild"
 
     logger.info(
-        "CLIP aesthetic stage complete: processed={processed}",
+        "CLIP aesthetic stage complete: processed={processed} inference_batches={batches} inference_seconds={seconds:.1f}",
         processed=stats.processed,
+        batches=inference.batches,
+        seconds=inference.seconds,
     )
     return stats
 
@@ -268,18 +1018,43 @@ def run_advanced_runners(
     description_model_name: str = "basic-caption-v1",
     description_options: DescriptionOptions | None = None,
     batch_size: int = 500,
+    inference_batch_size: int = 16,
+    prefetch_workers: int = 4,
+    prefetch_depth: int = 64,
     clip_model: str | None = None,
     clip_device: str = "auto",
     force_rescore_all: bool = False,
     defer_apply_until_complete: bool = False,
+    proxy_cache: ProxyCache | None = None,
+    clip_model_cache: ClipModelCache | None = None,
+    clip_runtime: ClipRuntimeOptions | None = None,
+    store_embeddings: bool = True,
+    embedding_precision: str = "float16",
+    cascade: ClipCascadeOptions | None = None,
+    gates: ScoringGates | None = None,
+    work_queue: WorkQueueOptions | None = None,
+    nima: NimaOptions | None = None,
+    log_distribution: bool = True,
 ) -> AdvancedRunnerStats:
     clip_stats = score_clip_aesthetic(
         db,
         batch_size=batch_size,
+        inference_batch_size=inference_batch_size,
+        prefetch_workers=prefetch_workers,
+        prefetch_depth=prefetch_depth,
         clip_model=clip_model,
         clip_device=clip_device,
         force_rescore_all=force_rescore_all,
         defer_apply_until_complete=defer_apply_until_complete,
+        proxy_cache=proxy_cache,
+        clip_model_cache=clip_model_cache,
+        clip_runtime=clip_runtime,
+        store_embeddings=store_embeddings,
+        embedding_precision=embedding_precision,
+        cascade=cascade,
+        gates=gates,
+        work_queue=work_queue,
+        nima=nima,
     )
     describe_stats = StageStats()
     if run_descriptions:
@@ -290,11 +1065,17 @@ def run_advanced_runners(
         )
 
     # Log advanced score distributions after all stages complete
-    _log_advanced_distribution(db)
+    if log_distribution:
+        _log_advanced_distribution(db)
 
     return AdvancedRunnerStats(
         clip_processed=clip_stats.processed,
         described_processed=describe_stats.processed,
+        clip_sketches=clip_stats.sketches,
+        clip_sketch_mode=clip_stats.sketch_mode,
+        clip_gated=clip_stats.gated,
+        clip_gated_seconds_saved=clip_stats.gated_seconds_saved,
+        nima_processed=clip_stats.nima_processed,
     )
 
 
@@ -312,10 +1093,9 @@ def _log_advanced_distribution(db: Database) -> None:
     logger.info("Advanced score distribution")
     logger.info("-" * 80)
 
+    distributions, null_counts = fetch_score_distributions(db, [col for col, _ in fields])
     for col, name in fields:
-        rows = db.fetchall(f"SELECT {col} FROM file_metrics WHERE {col} IS NOT NULL")
-        values = [float(r[0]) for r in rows if r[0] is not None]
-        dist = _compute_distribution(values)
+        dist = distributions[col]
 
         logger.info(
             "  {name}  n={count}  min={min_val:.4f}  p25={p25:.4f}  median={median:.4f}  p75={p75:.4f}  p90={p90:.4f}  max={max_val:.4f}  stddev={stddev:.4f}",
@@ -337,22 +1117,4 @@ def _log_advanced_distribution(db: Database) -> None:
                 stddev=dist.stddev,
             )
 
-    # Check for NULL counts in advanced fields
-    null_fields = [
-        ("clip_aesthetic_score", "CLIP Aesthetic"),
-        ("aesthetic_score", "Aesthetic"),
-        ("keep_score", "Keep"),
-        ("curation_score", "Curation"),
-        ("semantic_relevance_score", "Semantic Relevance"),
-    ]
-
-    null_counts = {}
-    for col, name in null_fields:
-        row = db.fetchall(f"SELECT COUNT(*) FROM file_metrics WHERE {col} IS NULL")
-        if row and int(row[0][0]) > 0:
-            null_counts[name] = int(row[0][0])
-
-    if null_counts:
-        logger.info(
-            "  NULL counts: {nulls}", nulls=", ".join(f"{n}={c}" for n, c in null_counts.items())
-        )
+    _log_null_counts(null_counts, dict(fields))
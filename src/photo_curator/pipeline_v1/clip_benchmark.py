@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import torch
+from loguru import logger
+
+from photo_curator.aesthetics import (
+    ClipAestheticScorer,
+    ClipRuntimeOptions,
+    load_clip_aesthetic_scorer,
+)
+from photo_curator.clip_cache import ClipModelCache
+from photo_curator.db import Database
+from photo_curator.pipeline_v1.advanced_stage import _prepare_clip_candidate
+from photo_curator.pipeline_v1.proxy_cache import ProxyCache
+from photo_curator.pipeline_v1.rank_stats import spearman
+
+
+@dataclass
+class ClipBenchmarkRun:
+    label: str
+    images: int
+    seconds: float
+
+    @property
+    def images_per_second(self) -> float:
+        return self.images / self.seconds if self.seconds > 0 else 0.0
+
+
+@dataclass
+class ClipBenchmarkCandidate:
+    runtime: ClipRuntimeOptions
+    run: ClipBenchmarkRun
+    max_abs_drift: float
+    mean_abs_drift: float
+    spearman: float
+
+
+@dataclass
+class ClipBenchmarkReport:
+    baseline: ClipBenchmarkRun
+    candidates: list[ClipBenchmarkCandidate]
+
+
+def runtime_label(runtime: ClipRuntimeOptions) -> str:
+    if runtime.backend == "onnx":
+        return "onnx-int8" if runtime.onnx_quantize else "onnx-fp32"
+    label = f"torch-{runtime.precision}"
+    if runtime.channels_last:
+        label += "+cl"
+    if runtime.compile:
+        label += "+compile"
+    return label
+
+
+def compare_scores(baseline: list[float], candidate: list[float]) -> tuple[float, float, float]:
+    """Max and mean absolute drift plus Spearman rank correlation of two score lists."""
+    base = np.asarray(baseline, dtype=np.float64)
+    cand = np.asarray(candidate, dtype=np.float64)
+    if base.size == 0:
+        return 0.0, 0.0, 1.0
+    delta = np.abs(cand - base)
+    return float(delta.max()), float(delta.mean()), spearman(base, cand)
+
+
+def _timed_scores(
+    scorer: ClipAestheticScorer, tensors: list[torch.Tensor], batch_size: int
+) -> tuple[list[float], float]:
+    # One untimed batch so lazy allocations and oneDNN primitive caches are warm.
+    scorer.score_tensors(tensors[:batch_size])
+    scores: list[float] = []
+    started = time.perf_counter()
+    for start in range(0, len(tensors), batch_size):
+        scores.extend(scorer.score_tensors(tensors[start : start + batch_size]))
+    return scores, time.perf_counter() - started
+
+
+def benchmark_clip_runtime(
+    db: Database,
+    *,
+    runtimes: list[ClipRuntimeOptions],
+    clip_model: str | None = None,
+    clip_device: str = "auto",
+    sample_size: int = 64,
+    inference_batch_size: int = 16,
+    max_size: int = 1024,
+    proxy_cache: ProxyCache | None = None,
+    clip_model_cache: ClipModelCache | None = None,
+) -> ClipBenchmarkReport:
+    """Score a fixed library sample in plain torch fp32, then with each of `runtimes`.
+
+    The same preprocessed tensors feed every pass, so any score difference is numerical drift
+    from the execution mode/backend and not from decode/resize.
+    """
+    clip_scorer = load_clip_aesthetic_scorer(
+        clip_model, clip_device, clip_model_cache, ClipRuntimeOptions()
+    )
+    rows = db.fetchall(
+        """
+        SELECT f.id, f.source_root, f.relative_path, f.sha256,
+               fm.blur_score, fm.brightness_score, fm.contrast_score, fm.entropy_score, fm.technical_quality_score
+        FROM files f
+        LEFT JOIN file_metrics fm ON fm.file_id = f.id
+        ORDER BY f.id ASC
+        LIMIT %s
+        """,
+        (sample_size,),
+    )
+    tensors: list[torch.Tensor] = []
+    for row in rows:
+        candidate = _prepare_clip_candidate(
+            row, clip_scorer=clip_scorer, max_size=max_size, proxy_cache=proxy_cache
+        )
+        if candidate is not None:
+            tensors.append(candidate.image_tensor)
+    if not tensors:
+        raise RuntimeError("No images could be loaded for the CLIP benchmark sample")
+    return benchmark_tensors(clip_scorer, tensors, runtimes, inference_batch_size)
+
+
+def benchmark_tensors(
+    clip_scorer: ClipAestheticScorer,
+    tensors: list[torch.Tensor],
+    runtimes: list[ClipRuntimeOptions],
+    inference_batch_size: int = 16,
+) -> ClipBenchmarkReport:
+    batch_size = max(1, inference_batch_size)
+    clip_scorer.configure_runtime(ClipRuntimeOptions())
+    baseline_scores, baseline_seconds = _timed_scores(clip_scorer, tensors, batch_size)
+    candidates: list[ClipBenchmarkCandidate] = []
+    for runtime in runtimes:
+        clip_scorer.configure_runtime(runtime)
+        scores, seconds = _timed_scores(clip_scorer, tensors, batch_size)
+        max_drift, mean_drift, rho = compare_scores(baseline_scores, scores)
+        candidates.append(
+            ClipBenchmarkCandidate(
+                runtime=clip_scorer.runtime,
+                run=ClipBenchmarkRun(runtime_label(clip_scorer.runtime), len(tensors), seconds),
+                max_abs_drift=max_drift,
+                mean_abs_drift=mean_drift,
+                spearman=rho,
+            )
+        )
+    return ClipBenchmarkReport(
+        baseline=ClipBenchmarkRun("torch-fp32", len(tensors), baseline_seconds),
+        candidates=candidates,
+    )
+
+
+def log_clip_benchmark_report(report: ClipBenchmarkReport) -> None:
+    logger.info("=" * 80)
+    logger.info(
+        "CLIP benchmark: images={images} baseline={label} {rate:.1f} img/s",
+        images=report.baseline.images,
+        label=report.baseline.label,
+        rate=report.baseline.images_per_second,
+    )
+    logger.info("-" * 80)
+    for candidate in report.candidates:
+        logger.info(
+            "  {label:<18} {rate:>7.1f} img/s  speedup={speedup:.2f}x  max |drift|={max_drift:.5f}  mean |drift|={mean_drift:.5f}  spearman={rho:.4f}",
+            label=candidate.run.label,
+            rate=candidate.run.images_per_second,
+            speedup=report.baseline.seconds / candidate.run.seconds
+            if candidate.run.seconds > 0
+            else 0.0,
+            max_drift=candidate.max_abs_drift,
+            mean_drift=candidate.mean_abs_drift,
+            rho=candidate.spearman,
+        )
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+
+import numpy as np
+from loguru import logger
+
+from photo_curator.pipeline_v1.rank_stats import spearman, top_n_churn
+
+DEFAULT_CASCADE_SMALL_MODEL = "ViT-B-32"
+
+# Below this many escalated files the small->large offset is too noisy to apply.
+_MIN_CALIBRATION_FILES = 8
+
+
+@dataclass(frozen=True)
+class ClipCascadeOptions:
+    """Two-tier CLIP scoring: `small_model` pre-scores every candidate, the configured (large)
+    model re-scores only files whose small-model keep score is in the top `top_fraction` or
+    within `margin` below that cutoff."""
+
+    small_model: str = DEFAULT_CASCADE_SMALL_MODEL
+    top_fraction: float = 0.2
+    margin: float = 0.05
+
+
+@dataclass
+class ClipCascadeReport:
+    small_model: str
+    large_model: str
+    candidates: int
+    escalated: int
+    keep_cutoff: float
+    calibration_offset: float
+    small_seconds: float
+    large_seconds: float
+    spearman: float
+    top_n: int
+    top_n_churn: float
+
+    @property
+    def large_calls_saved(self) -> int:
+        return self.candidates - self.escalated
+
+    @property
+    def estimated_seconds_saved(self) -> float:
+        """Large-model encode time the skipped files would have cost, at the measured rate."""
+        if self.escalated == 0:
+            return 0.0
+        return self.large_calls_saved * (self.large_seconds / self.escalated)
+
+
+def select_cascade_candidates(
+    keep_scores: np.ndarray, *, top_fraction: float, margin: float
+) -> tuple[np.ndarray, float]:
+    """Mask of files to escalate and the keep-score cutoff of the top fraction.
+
+    A file is escalated when its small-model keep score is at or above the cutoff minus
+    `margin`, i.e. it is in the top fraction or close enough to the boundary that the large
+    model could move it across.
+    """
+    scores = np.asarray(keep_scores, dtype=np.float64)
+    if scores.size == 0:
+        return np.zeros(0, dtype=bool), 1.0
+    top_n = max(1, math.ceil(scores.size * top_fraction))
+    cutoff = float(np.partition(scores, scores.size - top_n)[scores.size - top_n])
+    return scores >= cutoff - margin, cutoff
+
+
+def calibration_offset(small_raw: np.ndarray, large_raw: np.ndarray) -> float:
+    """Median large-minus-small raw score over escalated files (0 when too few to trust)."""
+    if len(small_raw) < _MIN_CALIBRATION_FILES:
+        return 0.0
+    return float(np.median(np.asarray(large_raw) - np.asarray(small_raw)))
+
+
+def summarize_cascade(
+    small_keep: np.ndarray, final_keep: np.ndarray, *, top_fraction: float
+) -> tuple[float, int, float]:
+    """Spearman and top-fraction churn between small-only and final keep rankings."""
+    if small_keep.size == 0:
+        return 1.0, 0, 0.0
+    top_n = max(1, math.ceil(small_keep.size * top_fraction))
+    return (
+        spearman(small_keep, final_keep),
+        top_n,
+        top_n_churn(small_keep, final_keep, top_n),
+    )
+
+
+def log_clip_cascade_report(report: ClipCascadeReport) -> None:
+    logger.info("=" * 80)
+    logger.info(
+        "CLIP cascade: small={small} large={large} candidates={candidates} escalated={escalated} ({share:.1%}) keep_cutoff={cutoff:.4f} offset={offset:+.4f}",
+        small=report.small_model,
+        large=report.large_model,
+        candidates=report.candidates,
+        escalated=report.escalated,
+        share=report.escalated / report.candidates if report.candidates else 0.0,
+        cutoff=report.keep_cutoff,
+        offset=report.calibration_offset,
+    )
+    logger.info(
+        "  large-model calls saved={saved} est. time saved={saved_seconds:.1f}s (small pass {small_seconds:.1f}s, large pass {large_seconds:.1f}s)",
+        saved=report.large_calls_saved,
+        saved_seconds=report.estimated_seconds_saved,
+        small_seconds=report.small_seconds,
+        large_seconds=report.large_seconds,
+    )
+    logger.info(
+        "  keep ranking vs small-only: spearman={rho:.4f} top-{n} churn={churn:.1%}",
+        rho=report.spearman,
+        n=report.top_n,
+        churn=report.top_n_churn,
+    )
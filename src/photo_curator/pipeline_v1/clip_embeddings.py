@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import time
+from collections.abc import Iterator
+
+import numpy as np
+import torch
+from loguru import logger
+
+from photo_curator.aesthetics import load_clip_aesthetic_scorer
+from photo_curator.clip_cache import ClipModelCache
+from photo_curator.db import Database
+from photo_curator.pipeline_v1.models import StageStats
+from photo_curator.pipeline_v1.recompute_stage import recompute_scores
+from photo_curator.pipeline_v1.scoring import DEFAULT_WEIGHTS, ScoringWeights
+from photo_curator.text_vectorizer import vector_literal
+
+EMBEDDING_PRECISIONS = ("float16", "float32")
+
+_UPSERT_SQL = {
+    "float32": """
+        INSERT INTO file_clip_embeddings (file_id, clip_model_name, embedding, embedding_half)
+        VALUES (%s, %s, %s::vector, NULL)
+        ON CONFLICT (file_id, clip_model_name) DO UPDATE SET
+          embedding = EXCLUDED.embedding,
+          embedding_half = NULL,
+          created_at = now()
+    """,
+    "float16": """
+        INSERT INTO file_clip_embeddings (file_id, clip_model_name, embedding, embedding_half)
+        VALUES (%s, %s, NULL, %s::halfvec)
+        ON CONFLICT (file_id, clip_model_name) DO UPDATE SET
+          embedding = NULL,
+          embedding_half = EXCLUDED.embedding_half,
+          created_at = now()
+    """,
+}
+
+_RAW_SCORE_UPDATE_SQL = """
+UPDATE file_metrics AS fm
+SET clip_raw_score = v.clip_raw,
+    updated_at = now()
+FROM unnest(%s::bigint[], %s::float8[]) AS v(file_id, clip_raw)
+WHERE fm.file_id = v.file_id
+  AND fm.clip_raw_score IS DISTINCT FROM v.clip_raw
+"""
+
+
+def store_clip_embeddings(
+    db: Database,
+    clip_model_name: str,
+    file_ids: list[int],
+    embeddings: np.ndarray,
+    precision: str = "float16",
+) -> None:
+    """Upsert one normalised embedding per file for `clip_model_name` in a single transaction."""
+    if not file_ids:
+        return
+    if precision == "float16":
+        embeddings = embeddings.astype(np.float16)
+    params = [
+        (file_id, clip_model_name, vector_literal(vector.tolist()))
+        for file_id, vector in zip(file_ids, embeddings, strict=True)
+    ]
+    with db.connection() as conn:
+        with conn.cursor() as cur:
+            cur.executemany(_UPSERT_SQL[precision], params)
+        conn.commit()
+
+
+def iter_clip_embeddings(
+    db: Database, clip_model_name: str, page_size: int = 5000
+) -> Iterator[tuple[list[int], np.ndarray]]:
+    """Keyset-page stored embeddings for one model as `(file_ids, float32 matrix)`."""
+    last_id = 0
+    while True:
+        rows = db.fetchall(
+            """
+            SELECT file_id, COALESCE(embedding, embedding_half::vector)::real[]
+            FROM file_clip_embeddings
+            WHERE clip_model_name = %s AND file_id > %s
+            ORDER BY file_id ASC
+            LIMIT %s
+            """,
+            (clip_model_name, last_id, page_size),
+        )
+        if not rows:
+            return
+        last_id = int(rows[-1][0])
+        yield [int(row[0]) for row in rows], np.asarray([row[1] for row in rows], dtype=np.float32)
+
+
+def rescore_clip_from_embeddings(
+    db: Database,
+    *,
+    clip_model: str | None = None,
+    clip_device: str = "auto",
+    page_size: int = 5000,
+    weights: ScoringWeights = DEFAULT_WEIGHTS,
+    clip_model_cache: ClipModelCache | None = None,
+) -> StageStats:
+    """Recompute `clip_raw_score` from stored embeddings with the current prompts/temperature.
+
+    Only the text tower's prompt embeddings are evaluated; images are never decoded or encoded.
+    Composite scores are then re-derived by `recompute_scores`.
+    """
+    clip_scorer = load_clip_aesthetic_scorer(clip_model, clip_device, clip_model_cache)
+    clip_model_name = clip_scorer.embedding_model
+    started = time.perf_counter()
+    rescored = 0
+    with db.connection() as conn:
+        with conn.cursor() as cur:
+            for file_ids, embeddings in iter_clip_embeddings(db, clip_model_name, page_size):
+                scores = clip_scorer.score_embeddings(torch.from_numpy(embeddings))
+                cur.execute(
+                    _RAW_SCORE_UPDATE_SQL,
+                    (file_ids, [max(0.0, min(1.0, score)) for score in scores]),
+                )
+                rescored += len(file_ids)
+        conn.commit()
+    rescored_at = time.perf_counter()
+
+    missing = db.fetchall(
+        """
+        SELECT COUNT(*)
+        FROM file_metrics fm
+        WHERE fm.clip_raw_score IS NOT NULL
+          AND NOT EXISTS (
+            SELECT 1 FROM file_clip_embeddings e
+            WHERE e.file_id = fm.file_id AND e.clip_model_name = %s
+          )
+        """,
+        (clip_model_name,),
+    )[0][0]
+    if missing:
+        logger.warning(
+            "{count} CLIP-scored files have no stored {model} embedding and kept their old "
+            "clip_raw_score (rescore with score-clip-aesthetic --force-rescore-all to backfill)",
+            count=int(missing),
+            model=clip_model_name,
+        )
+    logger.info(
+        "CLIP rescore from embeddings: model={model} rescored={count} in {elapsed:.2f}s",
+        model=clip_model_name,
+        count=rescored,
+        elapsed=rescored_at - started,
+    )
+    stats = recompute_scores(db, weights=weights)
+    stats.processed = rescored
+    return stats
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import cv2
+import numpy as np
+
+
+def saliency_centroid(gray: np.ndarray) -> tuple[float, float]:
+    """Centroid `(cx, cy)` of the Sobel gradient magnitude, from its raw image moments."""
+    grad_x = cv2.Sobel(gray, cv2.CV_32F, 1, 0, ksize=3)
+    grad_y = cv2.Sobel(gray, cv2.CV_32F, 0, 1, ksize=3)
+    moments = cv2.moments(cv2.magnitude(grad_x, grad_y))
+    total = moments["m00"] + 1e-6
+    return moments["m10"] / total, moments["m01"] / total
+
+
+def composition_balance_score(gray: np.ndarray) -> float:
+    """1 when the gradient-saliency centroid sits on a rule-of-thirds point, falling off with
+    its distance to the nearest one (normalised by the image diagonal)."""
+    height, width = gray.shape[:2]
+    if height == 0 or width == 0:
+        return 0.0
+
+    cx, cy = saliency_centroid(gray)
+    thirds = [
+        (width / 3.0, height / 3.0),
+        (2.0 * width / 3.0, height / 3.0),
+        (width / 3.0, 2.0 * height / 3.0),
+        (2.0 * width / 3.0, 2.0 * height / 3.0),
+    ]
+    min_distance = min(np.hypot(cx - tx, cy - ty) for tx, ty in thirds)
+    max_distance = float(np.hypot(width, height))
+    return max(0.0, min(1.0, 1.0 - (min_distance / (max_distance + 1e-6))))
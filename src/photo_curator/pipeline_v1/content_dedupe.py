@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from collections.abc import Collection, Sequence
+from typing import Any
+
+from loguru import logger
+
+from photo_curator.db import Database
+
+
+class ContentGroups:
+    """Score-once-per-content bookkeeping for one stage run.
+
+    The first file seen for a `sha256` is its representative and is scored normally; later
+    files with the same hash are recorded as twins and receive a copy of the representative's
+    result once the stage has written it. Rows without a hash are never grouped.
+    """
+
+    def __init__(self) -> None:
+        self._representative: dict[str, int] = {}
+        self.twins: dict[int, list[int]] = {}
+
+    def claim(self, file_id: int, sha256: str | None) -> bool:
+        """True if `file_id` should be scored, False if it is a twin of an earlier file."""
+        if not sha256:
+            return True
+        representative = self._representative.setdefault(str(sha256), int(file_id))
+        if representative == int(file_id):
+            return True
+        self.twins.setdefault(representative, []).append(int(file_id))
+        return False
+
+    @property
+    def unique(self) -> int:
+        return len(self._representative)
+
+    @property
+    def twin_count(self) -> int:
+        return sum(len(twins) for twins in self.twins.values())
+
+    def pairs(self, scored: Collection[int]) -> tuple[list[int], list[int]]:
+        """`(twin_ids, source_ids)` for every twin whose representative was scored."""
+        twin_ids: list[int] = []
+        source_ids: list[int] = []
+        for representative, twins in self.twins.items():
+            if representative in scored:
+                twin_ids.extend(twins)
+                source_ids.extend([representative] * len(twins))
+        return twin_ids, source_ids
+
+    def log_summary(self, stage: str, copied: int) -> None:
+        if not self.twin_count:
+            return
+        logger.info(
+            "Content dedupe ({stage}): unique={unique} twins={twins} copied={copied}",
+            stage=stage,
+            unique=self.unique,
+            twins=self.twin_count,
+            copied=copied,
+        )
+
+
+def copy_file_results(
+    db: Database,
+    table: str,
+    columns: Sequence[str],
+    twin_ids: list[int],
+    source_ids: list[int],
+    *,
+    conflict_columns: Sequence[str] = ("file_id",),
+    touch_column: str | None = "updated_at",
+    returning: Sequence[str] = (),
+) -> list[tuple[Any, ...]]:
+    """Copy `columns` of `table` from each source file to its twin in one INSERT ... SELECT.
+
+    `table` and the column names come from module constants, never from user input.
+    """
+    if not twin_ids:
+        return []
+    updates = [f"{col} = EXCLUDED.{col}" for col in columns if col not in conflict_columns]
+    if touch_column:
+        updates.append(f"{touch_column} = now()")
+    select_columns = ", ".join(f"src.{col}" for col in columns)
+    sql = f"""
+        INSERT INTO {table} (file_id, {", ".join(columns)})
+        SELECT twin.file_id, {select_columns}
+        FROM unnest(%s::bigint[], %s::bigint[]) AS twin(file_id, source_id)
+        JOIN {table} src ON src.file_id = twin.source_id
+        ON CONFLICT ({", ".join(conflict_columns)}) DO UPDATE SET {", ".join(updates)}
+        """
+    if not returning:
+        db.execute(sql, (twin_ids, source_ids))
+        return []
+    return db.fetchall(f"{sql} RETURNING {', '.join(returning)}", (twin_ids, source_ids))
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import tempfile
+
+from photo_curator.db import Database
+
+# Characters per COPY write when streaming the spill file back to Postgres.
+_COPY_CHUNK_CHARS = 1 << 20
+
+_STAGING_COLUMNS = (
+    "file_id",
+    "clip_aesthetic_score",
+    "aesthetic_score",
+    "keep_score",
+    "clip_model_version",
+    "clip_raw_score",
+    "composition_balance_score",
+    "scoring_gate",
+)
+
+_CREATE_STAGING_SQL = """
+CREATE TEMP TABLE clip_update_staging (
+  seq BIGSERIAL,
+  file_id BIGINT NOT NULL,
+  clip_aesthetic_score DOUBLE PRECISION,
+  aesthetic_score DOUBLE PRECISION,
+  keep_score DOUBLE PRECISION,
+  clip_model_version TEXT,
+  clip_raw_score DOUBLE PRECISION,
+  composition_balance_score DOUBLE PRECISION,
+  scoring_gate TEXT
+) ON COMMIT DROP
+"""
+
+_MERGE_SQL = """
+INSERT INTO file_metrics (
+  file_id, clip_aesthetic_score, aesthetic_score, keep_score,
+  clip_model_version, clip_raw_score, composition_balance_score,
+  scoring_gate, advanced_metadata_updated_at
+)
+SELECT DISTINCT ON (file_id)
+       file_id, clip_aesthetic_score, aesthetic_score, keep_score,
+       clip_model_version, clip_raw_score, composition_balance_score,
+       scoring_gate, now()
+FROM clip_update_staging
+ORDER BY file_id, seq DESC
+ON CONFLICT (file_id) DO UPDATE SET
+  clip_aesthetic_score = EXCLUDED.clip_aesthetic_score,
+  aesthetic_score = EXCLUDED.aesthetic_score,
+  keep_score = EXCLUDED.keep_score,
+  clip_model_version = EXCLUDED.clip_model_version,
+  clip_raw_score = EXCLUDED.clip_raw_score,
+  composition_balance_score = EXCLUDED.composition_balance_score,
+  scoring_gate = EXCLUDED.scoring_gate,
+  advanced_metadata_updated_at = now(),
+  updated_at = now()
+"""
+
+
+def _copy_field(value: object) -> str:
+    if value is None:
+        return "\\N"
+    if isinstance(value, float):
+        return repr(value)
+    text = str(value)
+    return text.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+class DeferredClipUpdates:
+    """CLIP stage results held on disk until the stage finishes.
+
+    Rows are appended to a temporary file in COPY text format, so memory stays flat however
+    many files a rescore touches. `apply` streams the file into a temp table with COPY and
+    merges it into `file_metrics` with one INSERT ... ON CONFLICT in a single transaction:
+    readers see either the old scores or all of the new ones.
+
+    Gated rows carry `scoring_gate` and NULL raw/composition scores; scored rows carry the
+    raw scores and a NULL gate, matching the immediate-apply upserts. A file appended more
+    than once keeps its last row, since ON CONFLICT cannot update a row twice.
+    """
+
+    def __init__(self, spill_dir: str | None = None) -> None:
+        # Lives until apply()/close(); spans the whole stage, so no context manager.
+        self._buffer = tempfile.TemporaryFile(  # noqa: SIM115
+            "w+", encoding="utf-8", newline="\n", prefix="clip-deferred-", dir=spill_dir
+        )
+        self.count = 0
+
+    def append(
+        self,
+        file_id: int,
+        clip_aesthetic_score: float,
+        aesthetic_score: float,
+        keep_score: float,
+        clip_model_version: str,
+        clip_raw_score: float | None,
+        composition_balance_score: float | None,
+        scoring_gate: str | None,
+    ) -> None:
+        values = (
+            int(file_id),
+            float(clip_aesthetic_score),
+            float(aesthetic_score),
+            float(keep_score),
+            clip_model_version,
+            None if clip_raw_score is None else float(clip_raw_score),
+            None if composition_balance_score is None else float(composition_balance_score),
+            scoring_gate,
+        )
+        self._buffer.write("\t".join(_copy_field(value) for value in values) + "\n")
+        self.count += 1
+
+    def apply(self, db: Database) -> int:
+        """COPY the spilled rows into a staging table and merge them; returns rows merged."""
+        if self.count == 0:
+            return 0
+        self._buffer.flush()
+        self._buffer.seek(0)
+        with db.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(_CREATE_STAGING_SQL)
+                with cur.copy(
+                    f"COPY clip_update_staging ({', '.join(_STAGING_COLUMNS)}) FROM STDIN"
+                ) as copy:
+                    while chunk := self._buffer.read(_COPY_CHUNK_CHARS):
+                        copy.write(chunk)
+                cur.execute(_MERGE_SQL)
+                merged = max(cur.rowcount, 0)
+            conn.commit()
+        return merged
+
+    def close(self) -> None:
+        self._buffer.close()
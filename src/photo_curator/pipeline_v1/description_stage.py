@@ -1,20 +1,30 @@
 from __future__ import annotations
 
-import base64
+from collections.abc import Iterable
 import json
-import mimetypes
 from pathlib import Path
 import re
-from urllib import error, request
+from typing import Any
 
 from loguru import logger
 from tqdm import tqdm
 
 from photo_curator.db import Database
+from photo_curator.pipeline_v1.llm_image import image_data_url
+from photo_curator.pipeline_v1.lmstudio_client import LmStudioClient
 from photo_curator.pipeline_v1.models import DescriptionOptions, StageStats, is_vision_model
 from photo_curator.pipeline_v1.scoring import compute_curation_score
 
-_VISION_MODEL_PATTERNS_STR = ("llava", "moondream", "bakllava", "qwen3.5-vl", "qwen2.5-vl", "qwen3-vl", "qwen2-vl", "vision")
+_VISION_MODEL_PATTERNS_STR = (
+    "llava",
+    "moondream",
+    "bakllava",
+    "qwen3.5-vl",
+    "qwen2.5-vl",
+    "qwen3-vl",
+    "qwen2-vl",
+    "vision",
+)
 
 _CATEGORY_PATTERNS: dict[str, tuple[str, ...]] = {
     "people": (r"\b(person|people|portrait|family|child|children|man|woman|crowd|group)\b",),
@@ -38,13 +48,12 @@ def _extract_categories(description_text: str) -> list[str]:
 
 def _describe_with_lmstudio(
     path: Path,
-    filename: str,
     camera_make: str | None,
     camera_model: str | None,
     options: DescriptionOptions,
+    client: LmStudioClient | None = None,
+    sha256: str | None = None,
 ) -> str | None:
-    mime_type = mimetypes.guess_type(filename)[0] or "image/jpeg"
-    image_base64 = base64.b64encode(path.read_bytes()).decode("utf-8")
 
     prompt = (
         "Describe this personal photo in 1-2 neutral sentences suitable for search. "
@@ -63,16 +72,13 @@ def _describe_with_lmstudio(
                     {"type": "text", "text": prompt},
                     {
                         "type": "image_url",
-                        "image_url": {
-                            "url": f"data:{mime_type};base64,{image_base64}",
-                        },
+                        "image_url": {"url": image_data_url(path, sha256, options.image)},
                     },
                 ],
             }
         ],
         "temperature": 0.1,
     }
-    body = json.dumps(payload).encode("utf-8")
     if not is_vision_model(options.lmstudio_model):
         logger.warning(
             "Model '{model}' does not appear to be vision-capable (patterns: {patterns}). "
@@ -82,39 +88,13 @@ def _describe_with_lmstudio(
             patterns=_VISION_MODEL_PATTERNS_STR,
         )
 
-    endpoint = f"{options.lmstudio_base_url.rstrip('/')}/chat/completions"
-    req = request.Request(
-        endpoint,
-        data=body,
-        headers={"Content-Type": "application/json"},
-        method="POST",
-    )
-
-    try:
-        with request.urlopen(req, timeout=options.lmstudio_timeout_seconds) as response:
-            response_body = response.read()
-    except (TimeoutError, error.URLError, error.HTTPError) as exc:
-        if isinstance(exc, error.HTTPError):
-            body = None
-            try:
-                body = exc.read().decode("utf-8", errors="replace")
-            except Exception:
-                pass
-            logger.warning(
-                "LM Studio request failed for {path}: HTTP {code} {reason}: {body}",
-                path=path,
-                code=exc.code,
-                reason=exc.reason,
-                body=body or "(no body)",
-            )
-        else:
-            logger.warning("LM Studio request failed for {path}: {error}", path=path, error=exc)
+    client = client or _lmstudio_client(options)
+    parsed = client.chat(payload, label=path)
+    if parsed is None:
         return None
-
     try:
-        parsed = json.loads(response_body.decode("utf-8"))
         content = parsed["choices"][0]["message"]["content"]
-    except (KeyError, IndexError, json.JSONDecodeError, TypeError) as exc:
+    except (KeyError, IndexError, TypeError) as exc:
         logger.warning("LM Studio response parse failed for {path}: {error}", path=path, error=exc)
         return None
 
@@ -124,6 +104,37 @@ def _describe_with_lmstudio(
     return cleaned or None
 
 
+def _lmstudio_client(options: DescriptionOptions) -> LmStudioClient:
+    return LmStudioClient(
+        f"{options.lmstudio_base_url.rstrip('/')}/chat/completions",
+        timeout_seconds=options.lmstudio_timeout_seconds,
+        concurrency=options.concurrency,
+    )
+
+
+def _lmstudio_description(
+    row: tuple[Any, ...], options: DescriptionOptions, client: LmStudioClient
+) -> str | None:
+    file_id, _filename, source_root, relative_path, camera_make, camera_model = row[:6]
+    sha256 = row[-1]
+    photo_path = Path(source_root) / relative_path
+    if not photo_path.exists():
+        logger.warning(
+            "Source file not found for description, skipping LM Studio: file_id={id} path={path}",
+            id=file_id,
+            path=photo_path,
+        )
+        return None
+    return _describe_with_lmstudio(
+        photo_path,
+        camera_make=camera_make,
+        camera_model=camera_model,
+        options=options,
+        client=client,
+        sha256=sha256,
+    )
+
+
 def describe_images(
     db: Database,
     model_name: str = "basic-caption-v1",
@@ -145,7 +156,7 @@ def describe_images(
         """
         SELECT f.id, f.filename, f.source_root, f.relative_path, f.camera_make, f.camera_model, f.photo_taken_at,
                m.blur_score, m.brightness_score, m.contrast_score,
-               m.technical_quality_score, m.aesthetic_score, m.keep_score
+               m.technical_quality_score, m.aesthetic_score, m.keep_score, f.sha256
         FROM files f
         LEFT JOIN file_metrics m ON m.file_id = f.id
         ORDER BY f.id
@@ -153,12 +164,20 @@ def describe_images(
     )
 
     stats = StageStats()
-    for row in tqdm(rows, desc="Descriptions"):
+    client = _lmstudio_client(resolved_options) if resolved_options.provider == "lmstudio" else None
+    if client is None:
+        described: Iterable[tuple[tuple[Any, ...], str | None]] = ((row, None) for row in rows)
+    else:
+        # LM Studio calls run concurrently; rows are written here as their descriptions land.
+        described = client.map(
+            rows, lambda row: _lmstudio_description(row, resolved_options, client)
+        )
+    for row, lmstudio_description in tqdm(described, total=len(rows), desc="Descriptions"):
         (
             file_id,
             filename,
-            source_root,
-            relative_path,
+            _source_root,
+            _relative_path,
             camera_make,
             camera_model,
             photo_taken_at,
@@ -168,6 +187,7 @@ def describe_images(
             technical_quality_score,
             aesthetic_score,
             keep_score,
+            _sha256,
         ) = row
 
         quality_hint = "good"
@@ -183,25 +203,7 @@ def describe_images(
             + (f" with {camera_make} {camera_model}" if camera_make or camera_model else "")
             + f". Overall technical quality looks {quality_hint}."
         )
-        description_text = basic_description_text
-        if resolved_options.provider == "lmstudio":
-            photo_path = Path(source_root) / relative_path
-            if photo_path.exists():
-                lmstudio_description = _describe_with_lmstudio(
-                    photo_path,
-                    filename=filename,
-                    camera_make=camera_make,
-                    camera_model=camera_model,
-                    options=resolved_options,
-                )
-                if lmstudio_description:
-                    description_text = lmstudio_description
-            else:
-                logger.warning(
-                    "Source file not found for description, skipping LM Studio: file_id={id} path={path}",
-                    id=file_id,
-                    path=photo_path,
-                )
+        description_text = lmstudio_description or basic_description_text
 
         semantic_relevance_score = 0.0
         categories = _extract_categories(description_text)
@@ -291,6 +293,11 @@ def describe_images(
             logger.error(
                 "Description DB insert failed for file_id={id}: {error}", id=file_id, error=str(exc)
             )
+    if client is not None:
+        client.close()
+        client.log_summary("describe")
+        if resolved_options.image.proxy_cache is not None:
+            resolved_options.image.proxy_cache.log_summary("describe")
 
     logger.info(
         "Description stage complete: processed={count}, provider={provider}",
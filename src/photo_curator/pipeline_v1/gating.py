@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, field
+
+from loguru import logger
+
+
+@dataclass(frozen=True)
+class ScoringGates:
+    """Stored-metric thresholds that route hopeless photos past CLIP/LLM scoring.
+
+    A file is gated when its `technical_quality_score` or `brightness_score` is below the
+    minimum, or its `blur_score` is above the maximum. The defaults (0, 0, 1) disable every
+    gate. Files without stored metrics are never gated.
+    """
+
+    min_technical_quality: float = 0.0
+    min_brightness: float = 0.0
+    max_blur: float = 1.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.min_technical_quality > 0.0 or self.min_brightness > 0.0 or self.max_blur < 1.0
+
+    def reason(
+        self,
+        *,
+        blur_score: float | None,
+        brightness_score: float | None,
+        technical_quality_score: float | None,
+    ) -> str | None:
+        """Name of the first gate the file fails (stored in `file_metrics.scoring_gate`)."""
+        if (
+            technical_quality_score is not None
+            and technical_quality_score < self.min_technical_quality
+        ):
+            return "technical_quality"
+        if brightness_score is not None and brightness_score < self.min_brightness:
+            return "brightness"
+        if blur_score is not None and blur_score > self.max_blur:
+            return "blur"
+        return None
+
+
+@dataclass
+class GateTally:
+    """Gated counts per reason and the measured cost of the files that were scored."""
+
+    by_reason: Counter[str] = field(default_factory=Counter)
+    scored: int = 0
+    scored_seconds: float = 0.0
+
+    @property
+    def gated(self) -> int:
+        return sum(self.by_reason.values())
+
+    @property
+    def seconds_saved(self) -> float:
+        """Gated files times the mean per-file cost of this run's scored files."""
+        if self.scored == 0:
+            return 0.0
+        return self.gated * (self.scored_seconds / self.scored)
+
+    def log_summary(self, stage: str) -> None:
+        if not self.gated:
+            return
+        logger.info(
+            "Scoring gates ({stage}): gated={gated} ({reasons}) scored={scored} est. time saved={saved:.1f}s",
+            stage=stage,
+            gated=self.gated,
+            reasons=" ".join(f"{name}={count}" for name, count in sorted(self.by_reason.items())),
+            scored=self.scored,
+            saved=self.seconds_saved,
+        )
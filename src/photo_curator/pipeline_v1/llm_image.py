@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import base64
+import mimetypes
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from loguru import logger
+
+if TYPE_CHECKING:
+    from photo_curator.pipeline_v1.proxy_cache import ProxyCache
+
+
+@dataclass(frozen=True)
+class LlmImageOptions:
+    """How the image in an LM Studio vision request is prepared.
+
+    Images are downscaled to `max_side` and re-encoded as JPEG at `jpeg_quality`; vision
+    models resample to about one megapixel anyway, so the full-resolution original only
+    costs transfer and decode time. `max_side=0` sends the original file unchanged. The
+    source is, in order: a stored thumbnail at least `max_side` large, an existing analysis
+    proxy at least `max_side` large (never written here), or a reduced-resolution decode.
+    """
+
+    max_side: int = 1280
+    jpeg_quality: int = 85
+    proxy_cache: ProxyCache | None = None
+    thumbs_dir: str | None = None
+    thumbnail_format: str = "jpeg"
+
+
+def image_data_url(path: Path, sha256: str | None, options: LlmImageOptions) -> str:
+    """`data:` URL carrying the image for one request; see `LlmImageOptions`."""
+    encoded, mime_type, source = _payload_image(path, sha256, options)
+    logger.debug(
+        "LLM image payload for {path}: {size} bytes ({mime_type}, from {source})",
+        path=path,
+        size=len(encoded),
+        mime_type=mime_type,
+        source=source,
+    )
+    return f"data:{mime_type};base64,{base64.b64encode(encoded).decode('ascii')}"
+
+
+def _payload_image(
+    path: Path, sha256: str | None, options: LlmImageOptions
+) -> tuple[bytes, str, str]:
+    # Imported here: `models` imports this module, and `thumbnail_stage` imports `models`.
+    from photo_curator.pipeline_v1.thumbnail_stage import thumbnail_path
+
+    if options.max_side <= 0:
+        return _original(path)
+    image = None
+    source = "thumbnail"
+    if sha256 and options.thumbs_dir:
+        image = _thumbnail_image(
+            thumbnail_path(Path(options.thumbs_dir), sha256, options.thumbnail_format),
+            options.max_side,
+        )
+    if image is None and sha256 and options.proxy_cache is not None:
+        source = "proxy"
+        image = options.proxy_cache.existing_analysis_image(sha256, options.max_side)
+    if image is None:
+        source = "decode"
+        image = _decode_reduced(path, options.max_side)
+    if image is None:
+        # Leave formats OpenCV cannot read to LM Studio, as before.
+        return _original(path)
+    encoded = _encode_jpeg(image, options.max_side, options.jpeg_quality)
+    try:
+        if encoded is None or path.stat().st_size <= len(encoded):
+            return _original(path)
+    except OSError:
+        pass
+    return encoded, "image/jpeg", source
+
+
+def _original(path: Path) -> tuple[bytes, str, str]:
+    return path.read_bytes(), mimetypes.guess_type(path.name)[0] or "image/jpeg", "original"
+
+
+def _thumbnail_image(path: Path, max_side: int) -> Any:
+    """The stored thumbnail as BGR, if it exists and has at least `max_side` on its long side."""
+    import cv2
+
+    if not path.exists():
+        return None
+    image = cv2.imread(str(path), cv2.IMREAD_COLOR)
+    if image is None or max(image.shape[:2]) < max_side:
+        return None
+    return image
+
+
+def _decode_reduced(path: Path, max_side: int) -> Any:
+    """Decode `path` at the smallest JPEG DCT scale (1/2, 1/4, 1/8) still >= `max_side`."""
+    import cv2
+    from PIL import Image
+
+    try:
+        with Image.open(path) as probe:
+            long_side = max(probe.size)
+    except OSError:
+        return None
+    flags = cv2.IMREAD_COLOR
+    for factor, reduced in (
+        (8, cv2.IMREAD_REDUCED_COLOR_8),
+        (4, cv2.IMREAD_REDUCED_COLOR_4),
+        (2, cv2.IMREAD_REDUCED_COLOR_2),
+    ):
+        if long_side // factor >= max_side:
+            flags = reduced
+            break
+    return cv2.imread(str(path), flags)
+
+
+def _encode_jpeg(image: Any, max_side: int, quality: int) -> bytes | None:
+    import cv2
+
+    height, width = image.shape[:2]
+    if max(height, width) > max_side:
+        scale = max_side / max(height, width)
+        image = cv2.resize(
+            image,
+            (max(1, round(width * scale)), max(1, round(height * scale))),
+            interpolation=cv2.INTER_AREA,
+        )
+    ok, buffer = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return buffer.tobytes() if ok else None
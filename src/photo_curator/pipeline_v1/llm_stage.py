@@ -1,17 +1,22 @@
 from __future__ import annotations
 
-import base64
+from collections.abc import Iterable
+from datetime import datetime
 import json
-import mimetypes
 from pathlib import Path
 import time
-from urllib import error, request
+from typing import Any
 
 from loguru import logger
 from tqdm import tqdm
 
 from photo_curator.db import Database
+from photo_curator.pipeline_v1.content_dedupe import ContentGroups, copy_file_results
+from photo_curator.pipeline_v1.gating import GateTally, ScoringGates
+from photo_curator.pipeline_v1.llm_image import image_data_url
+from photo_curator.pipeline_v1.lmstudio_client import LmStudioClient
 from photo_curator.pipeline_v1.models import DescriptionOptions, StageStats, is_vision_model
+from photo_curator.pipeline_v1.work_queue import StageWorkQueue, WorkQueueOptions
 from photo_curator.text_vectorizer import embed_text, vector_literal
 
 PROMPT_VERSION = "llm_photo_v1"
@@ -27,10 +32,61 @@ _VISION_MODEL_PATTERNS_STR = (
     "qwen2-vl",
     "vision",
 )
-_LMSTUDIO_MAX_RETRIES = 3
-_LMSTUDIO_RETRY_BASE_SECONDS = 0.75
 _LMSTUDIO_RESPONSE_FORMAT_TYPE = "text"
 
+_GATE_UPSERT_SQL = """
+INSERT INTO file_metrics (file_id, scoring_gate)
+VALUES (%s, %s)
+ON CONFLICT (file_id) DO UPDATE SET
+  scoring_gate = EXCLUDED.scoring_gate,
+  updated_at = now()
+"""
+
+_SKIP_UPSERT_SQL = """
+INSERT INTO file_llm_skips (file_id, vision_model_name, prompt_version, content_sha256, reason)
+VALUES (%s, %s, %s, %s, %s)
+ON CONFLICT (file_id) DO UPDATE SET
+  vision_model_name = EXCLUDED.vision_model_name,
+  prompt_version = EXCLUDED.prompt_version,
+  content_sha256 = EXCLUDED.content_sha256,
+  reason = EXCLUDED.reason,
+  updated_at = now()
+"""
+_LLM_SKIP_COLUMNS = ("vision_model_name", "prompt_version", "content_sha256", "reason")
+
+# Copied from the described file to every file with the same sha256.
+_LLM_RESULT_COLUMNS = (
+    "llm_run_id",
+    "prompt_version",
+    "vision_model_name",
+    "embedding_model_name",
+    "description_text",
+    "tags",
+    "llm_payload_json",
+    "aesthetic_score",
+    "wall_art_score",
+    "description_embedding",
+    "content_sha256",
+    "processed_at",
+)
+_LLM_METRIC_COLUMNS = ("llm_aesthetic_score", "llm_wall_art_score", "scoring_gate")
+
+# A result is current when it was made by this model and prompt from the file's present
+# content. Results written before content_sha256 existed (NULL) count as current. Files
+# skipped (gated or missing) under the same model, prompt and content are not stale either.
+_LLM_STALE_SQL = """(
+  r.file_id IS NULL
+  OR r.vision_model_name <> %s
+  OR r.prompt_version <> %s
+  OR r.content_sha256 <> f.sha256
+) AND NOT EXISTS (
+  SELECT 1 FROM file_llm_skips s
+  WHERE s.file_id = f.id
+    AND s.vision_model_name = %s
+    AND s.prompt_version = %s
+    AND s.content_sha256 = f.sha256
+)"""
+
 
 def _chat_completions_endpoint(base_url: str) -> str:
     trimmed = base_url.rstrip("/")
@@ -71,9 +127,12 @@ def _safe_float(value: object) -> float | None:
     return None
 
 
-def _call_lmstudio(path: Path, options: DescriptionOptions) -> dict[str, object] | None:
-    mime_type = mimetypes.guess_type(path.name)[0] or "image/jpeg"
-    image_base64 = base64.b64encode(path.read_bytes()).decode("utf-8")
+def _call_lmstudio(
+    path: Path,
+    options: DescriptionOptions,
+    client: LmStudioClient | None = None,
+    sha256: str | None = None,
+) -> dict[str, object] | None:
     prompt = (
         "Return strict JSON only with shape: "
         '{"description":"one-paragraph neutral description",'
@@ -91,7 +150,7 @@ def _call_lmstudio(path: Path, options: DescriptionOptions) -> dict[str, object]
                     {"type": "text", "text": prompt},
                     {
                         "type": "image_url",
-                        "image_url": {"url": f"data:{mime_type};base64,{image_base64}"},
+                        "image_url": {"url": image_data_url(path, sha256, options.image)},
                     },
                 ],
             }
@@ -108,74 +167,175 @@ def _call_lmstudio(path: Path, options: DescriptionOptions) -> dict[str, object]
             patterns=_VISION_MODEL_PATTERNS_STR,
         )
 
-    endpoint = _chat_completions_endpoint(options.lmstudio_base_url)
-    req = request.Request(
-        endpoint,
-        data=json.dumps(payload).encode("utf-8"),
-        headers={"Content-Type": "application/json"},
-        method="POST",
-    )
-    for attempt in range(1, _LMSTUDIO_MAX_RETRIES + 1):
-        try:
-            with request.urlopen(req, timeout=options.lmstudio_timeout_seconds) as response:
-                raw = json.loads(response.read().decode("utf-8"))
-            content = _extract_content_text(raw["choices"][0]["message"]["content"])
-            if not content:
-                return None
-            parsed = json.loads(content)
-            if isinstance(parsed, dict):
-                return parsed
+    client = client or _lmstudio_client(options)
+    raw = client.chat(payload, label=path)
+    if raw is None:
+        return None
+    try:
+        content = _extract_content_text(raw["choices"][0]["message"]["content"])
+        if not content:
             return None
-        except (
-            TimeoutError,
-            error.URLError,
-            error.HTTPError,
-            KeyError,
-            IndexError,
-            json.JSONDecodeError,
-        ) as exc:
-            status_code = exc.code if isinstance(exc, error.HTTPError) else None
-            should_retry = isinstance(exc, (TimeoutError, error.URLError)) or status_code == 429
-            is_last_attempt = attempt == _LMSTUDIO_MAX_RETRIES
-
-            if isinstance(exc, error.HTTPError):
-                body = None
-                try:
-                    body = exc.read().decode("utf-8", errors="replace")
-                except Exception:
-                    pass
-                logger.warning(
-                    "LLM call failed for {path}: HTTP {code} {reason}: {body}",
-                    path=path,
-                    code=exc.code,
-                    reason=exc.reason,
-                    body=body or "(no body)",
-                )
-            else:
-                logger.warning("LLM call failed for {path}: {error}", path=path, error=exc)
-
-            if not should_retry or is_last_attempt:
-                break
-
-            delay = _LMSTUDIO_RETRY_BASE_SECONDS * (2 ** (attempt - 1))
-            logger.info(
-                "Retrying LLM call for {path} in {delay:.2f}s (attempt {attempt}/{max_attempts})",
-                path=path,
-                delay=delay,
-                attempt=(attempt + 1),
-                max_attempts=_LMSTUDIO_MAX_RETRIES,
-            )
-            time.sleep(delay)
+        parsed = json.loads(content)
+    except (KeyError, IndexError, TypeError, json.JSONDecodeError) as exc:
+        logger.warning("LLM response parse failed for {path}: {error}", path=path, error=exc)
+        return None
+    if isinstance(parsed, dict):
+        return parsed
     return None
 
 
+def _lmstudio_client(options: DescriptionOptions) -> LmStudioClient:
+    return LmStudioClient(
+        _chat_completions_endpoint(options.lmstudio_base_url),
+        timeout_seconds=options.lmstudio_timeout_seconds,
+        concurrency=options.concurrency,
+    )
+
+
+def _llm_candidates_filter(
+    *,
+    vision_model_name: str,
+    prompt_version: str,
+    force_rescore_all: bool,
+    since: datetime | None,
+) -> tuple[str, tuple[object, ...]]:
+    """WHERE clause (and params) selecting the files an LLM pass should send."""
+    conditions: list[str] = []
+    params: list[object] = []
+    if not force_rescore_all:
+        conditions.append(_LLM_STALE_SQL)
+        params.extend([vision_model_name, prompt_version, vision_model_name, prompt_version])
+    if since is not None:
+        conditions.append("f.created_at >= %s")
+        params.append(since)
+    if not conditions:
+        return "", ()
+    return "WHERE " + " AND ".join(conditions), tuple(params)
+
+
+def _store_llm_result(
+    db: Database,
+    file_id: int,
+    response: dict[str, object],
+    *,
+    sha256: str,
+    run_id: int | None,
+    options: DescriptionOptions,
+    prompt_version: str,
+    embedding_model: str,
+) -> bool:
+    """Write one LM Studio response to `file_llm_results` and `file_metrics`; False if empty."""
+    description = str(response.get("description", "")).strip()
+    tags_raw = response.get("tags", [])
+    tags = [
+        str(tag).strip().lower() for tag in tags_raw if isinstance(tag, str) and str(tag).strip()
+    ]
+    aesthetic_score = _safe_float(response.get("aesthetic_score"))
+    wall_art_score = _safe_float(response.get("wall_art_score"))
+    if not description:
+        return False
+    embedding = embed_text(f"{description} {' '.join(tags)}")
+    payload_json = {
+        "description": description,
+        "tags": tags,
+        "aesthetic_score": aesthetic_score,
+        "wall_art_score": wall_art_score,
+        "prompt_version": prompt_version,
+        "vision_model_name": options.lmstudio_model,
+        "embedding_model_name": embedding_model,
+    }
+    db.execute(
+        """
+        INSERT INTO file_llm_results (
+          file_id, llm_run_id, prompt_version, vision_model_name, embedding_model_name,
+          description_text, tags, llm_payload_json, aesthetic_score, wall_art_score, description_embedding,
+          content_sha256, processed_at
+        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s::jsonb, %s, %s, %s::vector, %s, now())
+        ON CONFLICT (file_id) DO UPDATE SET
+          llm_run_id = EXCLUDED.llm_run_id,
+          prompt_version = EXCLUDED.prompt_version,
+          vision_model_name = EXCLUDED.vision_model_name,
+          embedding_model_name = EXCLUDED.embedding_model_name,
+          description_text = EXCLUDED.description_text,
+          tags = EXCLUDED.tags,
+          llm_payload_json = EXCLUDED.llm_payload_json,
+          aesthetic_score = EXCLUDED.aesthetic_score,
+          wall_art_score = EXCLUDED.wall_art_score,
+          description_embedding = EXCLUDED.description_embedding,
+          content_sha256 = EXCLUDED.content_sha256,
+          processed_at = EXCLUDED.processed_at,
+          updated_at = now()
+        """,
+        (
+            file_id,
+            run_id,
+            prompt_version,
+            options.lmstudio_model,
+            embedding_model,
+            description,
+            tags,
+            json.dumps(payload_json),
+            aesthetic_score,
+            wall_art_score,
+            vector_literal(embedding),
+            sha256,
+        ),
+    )
+
+    # Also write normalized LLM scores to file_metrics for unified score access
+    db.execute(
+        """
+        INSERT INTO file_metrics (file_id, llm_aesthetic_score, llm_wall_art_score)
+        VALUES (%s, %s, %s)
+        ON CONFLICT (file_id) DO UPDATE SET
+          llm_aesthetic_score = EXCLUDED.llm_aesthetic_score,
+          llm_wall_art_score = EXCLUDED.llm_wall_art_score,
+          scoring_gate = NULL,
+          updated_at = now()
+        """,
+        (
+            file_id,
+            aesthetic_score / 100.0 if aesthetic_score is not None else None,
+            wall_art_score / 100.0 if wall_art_score is not None else None,
+        ),
+    )
+    return True
+
+
 def run_llm_descriptions(
     db: Database,
     *,
     options: DescriptionOptions,
     prompt_version: str = PROMPT_VERSION,
     embedding_model: str = EMBEDDING_MODEL,
+    gates: ScoringGates | None = None,
+    work_queue: WorkQueueOptions | None = None,
+    force_rescore_all: bool = False,
+    limit: int | None = None,
+    since: datetime | None = None,
 ) -> StageStats:
+    """Describe and score files with the LM Studio vision model.
+
+    Only files without a current result are sent: no row in `file_llm_results`, or one made
+    by another vision model or prompt version, or from different content (`sha256`).
+    `force_rescore_all` sends every file. `since` keeps files first discovered at or after
+    that time, and `limit` caps how many files the pass considers (lowest ids first).
+
+    With `gates`, files whose stored metrics fail a gate are not sent to LM Studio; their
+    `file_metrics.scoring_gate` is set instead and they keep no LLM scores. Gated files and
+    files missing on disk are recorded in `file_llm_skips` for this model, prompt and content,
+    so later incremental passes move on to other files.
+
+    Only the first file per `sha256` is sent; its description, scores or gate are copied to
+    the other files with the same content at the end of the stage.
+
+    With `work_queue`, files are claimed from `stage_work_queue` in leased pages so several
+    workers (each with its own LM Studio endpoint) can share one pass.
+
+    Requests run on an `LmStudioClient` pool with up to `options.concurrency.max_in_flight`
+    photos in flight (adapted to server latency and HTTP 429s); results are written on this
+    thread in completion order.
+    """
     run_row = db.fetchall(
         """
         INSERT INTO llm_runs (provider, endpoint, vision_model_name, embedding_model_name, prompt_version, prompt_text)
@@ -193,107 +353,164 @@ def run_llm_descriptions(
     )
     run_id = int(run_row[0][0]) if run_row else None
 
-    rows = db.fetchall(
-        """
-        SELECT id, source_root, relative_path
-        FROM files
-        ORDER BY id
+    rows_sql = """
+        SELECT f.id, f.source_root, f.relative_path, f.sha256,
+               fm.blur_score, fm.brightness_score, fm.technical_quality_score
+        FROM files f
+        LEFT JOIN file_metrics fm ON fm.file_id = f.id
+        LEFT JOIN file_llm_results r ON r.file_id = f.id
+        {where}
+        ORDER BY f.id
+        {limit}
         """
+    where_sql, where_params = _llm_candidates_filter(
+        vision_model_name=options.lmstudio_model,
+        prompt_version=prompt_version,
+        force_rescore_all=force_rescore_all,
+        since=since,
     )
+    limit_sql, limit_params = ("LIMIT %s", (limit,)) if limit else ("", ())
+    queue = StageWorkQueue(db, "llm", work_queue) if work_queue is not None else None
+    if queue is not None:
+        queue.enqueue(
+            f"""
+            SELECT f.id FROM files f
+            LEFT JOIN file_llm_results r ON r.file_id = f.id
+            {where_sql}
+            ORDER BY f.id
+            {limit_sql}
+            """,
+            where_params + limit_params,
+        )
+        rows: Iterable[tuple[Any, ...]] = queue.iter_rows(
+            lambda file_ids: db.fetchall(
+                rows_sql.format(where="WHERE f.id = ANY(%s)", limit=""), (file_ids,)
+            )
+        )
+        total: int | None = queue.pending()
+    else:
+        rows = db.fetchall(
+            rows_sql.format(where=where_sql, limit=limit_sql), where_params + limit_params
+        )
+        total = len(rows)
+    active_gates = gates if gates is not None and gates.enabled else None
+    gate_tally = GateTally()
+    groups = ContentGroups()
+    described_ids: set[int] = set()
+    gated_ids: set[int] = set()
     stats = StageStats()
     logger.info(
-        "Starting LLM stage: provider=lmstudio endpoint={endpoint} model={model} timeout={timeout}s response_format={response_format}",
+        "Starting LLM stage: provider=lmstudio endpoint={endpoint} model={model} timeout={timeout}s response_format={response_format} max_in_flight={max_in_flight} candidates={candidates} force_rescore_all={force} since={since} limit={limit}",
         endpoint=_chat_completions_endpoint(options.lmstudio_base_url),
         model=options.lmstudio_model,
         timeout=options.lmstudio_timeout_seconds,
         response_format=_LMSTUDIO_RESPONSE_FORMAT_TYPE,
+        max_in_flight=options.concurrency.max_in_flight,
+        candidates=total,
+        force=force_rescore_all,
+        since=since,
+        limit=limit,
     )
-    for file_id, source_root, relative_path in tqdm(rows, desc="LLM descriptions"):
-        path = Path(source_root) / str(relative_path)
-        if not path.exists():
-            logger.warning(
-                "Skipping missing source file for LLM: file_id={file_id} path={path}",
-                file_id=file_id,
-                path=path,
-            )
-            continue
-        response = _call_lmstudio(path, options)
-        if not response:
-            continue
-
-        description = str(response.get("description", "")).strip()
-        tags_raw = response.get("tags", [])
-        tags = [
-            str(tag).strip().lower()
-            for tag in tags_raw
-            if isinstance(tag, str) and str(tag).strip()
-        ]
-        aesthetic_score = _safe_float(response.get("aesthetic_score"))
-        wall_art_score = _safe_float(response.get("wall_art_score"))
-        if not description:
-            continue
-        embedding = embed_text(f"{description} {' '.join(tags)}")
-        payload_json = {
-            "description": description,
-            "tags": tags,
-            "aesthetic_score": aesthetic_score,
-            "wall_art_score": wall_art_score,
-            "prompt_version": prompt_version,
-            "vision_model_name": options.lmstudio_model,
-            "embedding_model_name": embedding_model,
-        }
-        db.execute(
-            """
-            INSERT INTO file_llm_results (
-              file_id, llm_run_id, prompt_version, vision_model_name, embedding_model_name,
-              description_text, tags, llm_payload_json, aesthetic_score, wall_art_score, description_embedding, processed_at
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s::jsonb, %s, %s, %s::vector, now())
-            ON CONFLICT (file_id) DO UPDATE SET
-              llm_run_id = EXCLUDED.llm_run_id,
-              prompt_version = EXCLUDED.prompt_version,
-              vision_model_name = EXCLUDED.vision_model_name,
-              embedding_model_name = EXCLUDED.embedding_model_name,
-              description_text = EXCLUDED.description_text,
-              tags = EXCLUDED.tags,
-              llm_payload_json = EXCLUDED.llm_payload_json,
-              aesthetic_score = EXCLUDED.aesthetic_score,
-              wall_art_score = EXCLUDED.wall_art_score,
-              description_embedding = EXCLUDED.description_embedding,
-              processed_at = EXCLUDED.processed_at,
-              updated_at = now()
-            """,
-            (
+
+    def requests_to_send() -> Iterable[tuple[int, Path, str]]:
+        # Pulled by `client.map` on this thread, so gate writes and queue claims stay here.
+        for (
+            file_id,
+            source_root,
+            relative_path,
+            sha256,
+            blur_score,
+            brightness_score,
+            technical_quality_score,
+        ) in tqdm(rows, total=total, desc="LLM descriptions"):
+            if not groups.claim(file_id, sha256):
+                continue
+            if active_gates is not None:
+                gate = active_gates.reason(
+                    blur_score=blur_score,
+                    brightness_score=brightness_score,
+                    technical_quality_score=technical_quality_score,
+                )
+                if gate is not None:
+                    db.execute(_GATE_UPSERT_SQL, (file_id, gate))
+                    db.execute(
+                        _SKIP_UPSERT_SQL,
+                        (file_id, options.lmstudio_model, prompt_version, sha256, gate),
+                    )
+                    gate_tally.by_reason[gate] += 1
+                    gated_ids.add(file_id)
+                    if queue is not None:
+                        queue.done([file_id])
+                    continue
+            path = Path(source_root) / str(relative_path)
+            if not path.exists():
+                logger.warning(
+                    "Skipping missing source file for LLM: file_id={file_id} path={path}",
+                    file_id=file_id,
+                    path=path,
+                )
+                db.execute(
+                    _SKIP_UPSERT_SQL,
+                    (file_id, options.lmstudio_model, prompt_version, sha256, "missing"),
+                )
+                if queue is not None:
+                    queue.done([file_id])
+                continue
+            yield file_id, path, str(sha256)
+
+    def describe(item: tuple[int, Path, str]) -> tuple[dict[str, object] | None, float]:
+        call_started = time.perf_counter()
+        _file_id, path, sha256 = item
+        response = _call_lmstudio(path, options, client, sha256)
+        return response, time.perf_counter() - call_started
+
+    client = _lmstudio_client(options)
+    with client:
+        for (file_id, _path, sha256), (response, call_seconds) in client.map(
+            requests_to_send(), describe
+        ):
+            gate_tally.scored += 1
+            gate_tally.scored_seconds += call_seconds
+            if not response or not _store_llm_result(
+                db,
                 file_id,
-                run_id,
-                prompt_version,
-                options.lmstudio_model,
-                embedding_model,
-                description,
-                tags,
-                json.dumps(payload_json),
-                aesthetic_score,
-                wall_art_score,
-                vector_literal(embedding),
-            ),
-        )
+                response,
+                sha256=sha256,
+                run_id=run_id,
+                options=options,
+                prompt_version=prompt_version,
+                embedding_model=embedding_model,
+            ):
+                continue
+            described_ids.add(file_id)
+            stats.processed += 1
+            if queue is not None:
+                queue.done([file_id])
+    client.log_summary("llm")
+    if options.image.proxy_cache is not None:
+        options.image.proxy_cache.log_summary("llm")
 
-        # Also write normalized LLM scores to file_metrics for unified score access
-        db.execute(
-            """
-            INSERT INTO file_metrics (file_id, llm_aesthetic_score, llm_wall_art_score)
-            VALUES (%s, %s, %s)
-            ON CONFLICT (file_id) DO UPDATE SET
-              llm_aesthetic_score = EXCLUDED.llm_aesthetic_score,
-              llm_wall_art_score = EXCLUDED.llm_wall_art_score,
-              updated_at = now()
-            """,
-            (file_id, aesthetic_score / 100.0 if aesthetic_score is not None else None, wall_art_score / 100.0 if wall_art_score is not None else None),
-        )
-        stats.processed += 1
+    twin_ids, source_ids = groups.pairs(described_ids)
+    copy_file_results(db, "file_llm_results", _LLM_RESULT_COLUMNS, twin_ids, source_ids)
+    metric_twin_ids, metric_source_ids = groups.pairs(described_ids | gated_ids)
+    copy_file_results(db, "file_metrics", _LLM_METRIC_COLUMNS, metric_twin_ids, metric_source_ids)
+    copy_file_results(db, "file_llm_skips", _LLM_SKIP_COLUMNS, *groups.pairs(gated_ids))
+    stats.processed += len(twin_ids)
+    groups.log_summary("llm", len(metric_twin_ids))
+    if queue is not None and client.deadline_reached:
+        # Leave the unsent rest of the current page leased; it is claimed again once the
+        # lease expires.
+        queue.flush()
+    elif queue is not None:
+        queue.finish()
 
+    gate_tally.log_summary("llm")
+    stats.gated = gate_tally.gated
+    stats.gated_seconds_saved = gate_tally.seconds_saved
     logger.info(
-        "LLM stage complete: processed={count} run_id={run_id}",
+        "LLM stage complete: processed={count} gated={gated} run_id={run_id}",
         count=stats.processed,
+        gated=stats.gated,
         run_id=run_id,
     )
     return stats
@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Self, TypeVar
+from urllib import error, request
+
+from loguru import logger
+
+from photo_curator.quantile_sketch import QuantileSketch
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+_RETRY_BASE_SECONDS = 0.75
+_MAX_ATTEMPTS = 3
+_END = object()
+
+
+@dataclass(frozen=True)
+class LmStudioConcurrency:
+    """How many LM Studio requests a stage keeps in flight.
+
+    The in-flight limit starts at 1 and adapts AIMD-style up to `max_in_flight`: +1 per
+    window of successful requests, halved on HTTP 429, on a timeout, or when a response
+    takes longer than `latency_tolerance` x the fastest recent one (the server is queueing
+    instead of running requests in parallel). After `stage_deadline_seconds` no new
+    requests are started; `None` means no stage deadline.
+    """
+
+    max_in_flight: int = 4
+    latency_tolerance: float = 2.0
+    stage_deadline_seconds: float | None = None
+
+
+class AdaptiveLimit:
+    """Thread-safe AIMD in-flight limit; see `LmStudioConcurrency`."""
+
+    def __init__(self, max_in_flight: int, latency_tolerance: float) -> None:
+        self.max_in_flight = max(1, max_in_flight)
+        self.latency_tolerance = latency_tolerance
+        self.limit = 1.0
+        self.baseline: float | None = None
+        self.decreases = 0
+        self._last_decrease = -float("inf")
+        self._lock = threading.Lock()
+
+    @property
+    def current(self) -> int:
+        return int(self.limit)
+
+    def on_success(self, latency: float) -> None:
+        with self._lock:
+            # Fastest recent latency, drifting up 1% per sample so one outlier does not pin it.
+            self.baseline = latency if self.baseline is None else min(latency, self.baseline * 1.01)
+            if latency > self.latency_tolerance * self.baseline:
+                self._decrease()
+            else:
+                self.limit = min(float(self.max_in_flight), self.limit + 1.0 / self.limit)
+
+    def on_overload(self) -> None:
+        with self._lock:
+            self._decrease()
+
+    def _decrease(self) -> None:
+        # At most one halving per round trip: a burst of responses from one overloaded
+        # window is a single congestion signal.
+        now = time.monotonic()
+        if now - self._last_decrease < (self.baseline or 0.0):
+            return
+        self._last_decrease = now
+        self.limit = max(1.0, self.limit / 2.0)
+        self.decreases += 1
+
+
+class LmStudioClient:
+    """Chat-completions client shared by every request of one LLM stage.
+
+    `chat` is safe to call from several threads. `map` runs a per-item call on a thread
+    pool with at most the adaptive limit in flight and yields results on the calling
+    thread, so database writes stay single-threaded.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        *,
+        timeout_seconds: float,
+        concurrency: LmStudioConcurrency | None = None,
+    ) -> None:
+        self.endpoint = endpoint
+        self.timeout_seconds = timeout_seconds
+        self.concurrency = concurrency or LmStudioConcurrency()
+        self.limit = AdaptiveLimit(
+            self.concurrency.max_in_flight, self.concurrency.latency_tolerance
+        )
+        self.started = time.monotonic()
+        self.deadline = (
+            self.started + self.concurrency.stage_deadline_seconds
+            if self.concurrency.stage_deadline_seconds
+            else None
+        )
+        self.latencies = QuantileSketch()
+        # Request body sizes in bytes, once per photo (retries resend the same body).
+        self.payload_sizes = QuantileSketch()
+        self.payload_bytes = 0
+        self.requests = 0
+        self.failures = 0
+        self.throttled = 0
+        self.timeouts = 0
+        self.deadline_reached = False
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+        self._executor: ThreadPoolExecutor | None = None
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def deadline_passed(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def chat(self, payload: dict[str, object], *, label: object) -> dict[str, object] | None:
+        """POST one chat completion; the parsed JSON response, or None after logging why.
+
+        Timeouts, connection errors and HTTP 429 are retried with exponential backoff, all
+        within one per-request deadline of `timeout_seconds` (cut short by the stage
+        deadline) that covers every attempt.
+        """
+        body = json.dumps(payload).encode("utf-8")
+        with self._lock:
+            self.payload_bytes += len(body)
+            self.payload_sizes.update(float(len(body)))
+        request_deadline = time.monotonic() + self.timeout_seconds
+        if self.deadline is not None:
+            request_deadline = min(request_deadline, self.deadline)
+        for attempt in range(1, _MAX_ATTEMPTS + 1):
+            remaining = request_deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            req = request.Request(
+                self.endpoint,
+                data=body,
+                headers={"Content-Type": "application/json"},
+                method="POST",
+            )
+            started = time.monotonic()
+            try:
+                with request.urlopen(req, timeout=remaining) as response:
+                    raw = json.loads(response.read().decode("utf-8"))
+            except (TimeoutError, error.URLError, json.JSONDecodeError) as exc:
+                status_code = exc.code if isinstance(exc, error.HTTPError) else None
+                timed_out = isinstance(exc, TimeoutError) or isinstance(
+                    getattr(exc, "reason", None), TimeoutError
+                )
+                should_retry = status_code == 429 or (
+                    status_code is None and not isinstance(exc, json.JSONDecodeError)
+                )
+                with self._lock:
+                    self.throttled += int(status_code == 429)
+                    self.timeouts += int(timed_out)
+                if status_code == 429 or timed_out:
+                    self.limit.on_overload()
+                self._log_failure(exc, label)
+                delay = _RETRY_BASE_SECONDS * (2 ** (attempt - 1))
+                if (
+                    not should_retry
+                    or attempt == _MAX_ATTEMPTS
+                    or time.monotonic() + delay >= request_deadline
+                ):
+                    break
+                logger.info(
+                    "Retrying LM Studio request for {label} in {delay:.2f}s (attempt {attempt}/{max_attempts})",
+                    label=label,
+                    delay=delay,
+                    attempt=(attempt + 1),
+                    max_attempts=_MAX_ATTEMPTS,
+                )
+                time.sleep(delay)
+                continue
+            latency = time.monotonic() - started
+            self.limit.on_success(latency)
+            with self._lock:
+                self.requests += 1
+                self.latencies.update(latency)
+            return raw if isinstance(raw, dict) else None
+        with self._lock:
+            self.failures += 1
+        return None
+
+    def _log_failure(self, exc: Exception, label: object) -> None:
+        if isinstance(exc, error.HTTPError):
+            body = None
+            try:
+                body = exc.read().decode("utf-8", errors="replace")
+            except Exception:  # noqa: BLE001, S110 - the body only decorates the log line
+                pass
+            logger.warning(
+                "LM Studio request failed for {label}: HTTP {code} {reason}: {body}",
+                label=label,
+                code=exc.code,
+                reason=exc.reason,
+                body=body or "(no body)",
+            )
+        else:
+            logger.warning("LM Studio request failed for {label}: {error}", label=label, error=exc)
+
+    def map(self, items: Iterable[T], call: Callable[[T], R]) -> Iterator[tuple[T, R]]:
+        """Yield `(item, call(item))` as calls finish, keeping at most the adaptive limit in
+        flight. Items are pulled lazily from `items` on the calling thread; once the stage
+        deadline passes no more are pulled, and in-flight calls finish within it."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.limit.max_in_flight, thread_name_prefix="lmstudio"
+            )
+        pending: dict[Future[R], T] = {}
+        source = iter(items)
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < self.limit.current:
+                if self.deadline_passed():
+                    self.deadline_reached = exhausted = True
+                    break
+                item = next(source, _END)
+                if item is _END:
+                    exhausted = True
+                    break
+                pending[self._executor.submit(call, item)] = item
+                self.peak_in_flight = max(self.peak_in_flight, len(pending))
+            if not pending:
+                return
+            done, _not_done = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future.result()
+
+    def log_summary(self, stage: str) -> None:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        if self.latencies.count:
+            percentiles = " ".join(
+                f"p{int(q * 100)}={self.latencies.quantile(q):.2f}s" for q in (0.5, 0.9, 0.99)
+            )
+        else:
+            percentiles = "p50=n/a"
+        if self.payload_sizes.count:
+            payload = " ".join(
+                f"p{int(q * 100)}={self.payload_sizes.quantile(q) / 1024:.0f}KB" for q in (0.5, 0.9)
+            )
+        else:
+            payload = "p50=n/a"
+        logger.info(
+            "LM Studio ({stage}): requests={requests} failed={failed} throughput={rate:.2f}/s latency {percentiles} payload_mb={payload_mb:.1f} payload {payload} in_flight limit={limit} peak={peak} max={max_in_flight} backoffs={backoffs} http_429={throttled} timeouts={timeouts} deadline_reached={deadline_reached}",
+            stage=stage,
+            requests=self.requests,
+            failed=self.failures,
+            rate=self.requests / elapsed,
+            percentiles=percentiles,
+            payload_mb=self.payload_bytes / 1_048_576,
+            payload=payload,
+            limit=self.limit.current,
+            peak=self.peak_in_flight,
+            max_in_flight=self.limit.max_in_flight,
+            backoffs=self.limit.decreases,
+            throttled=self.throttled,
+            timeouts=self.timeouts,
+            deadline_reached=self.deadline_reached,
+        )
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+from collections.abc import Iterable
 from pathlib import Path
+from typing import Any
 
 import cv2
 from loguru import logger
@@ -8,10 +10,24 @@ import numpy as np
 from tqdm import tqdm
 
 from photo_curator.db import Database
-from photo_curator.pipeline_run import _compute_distribution
+from photo_curator.pipeline_run import _log_null_counts, fetch_score_distributions
 
-from photo_curator.pipeline_v1.common import _load_image, _safe_norm
+from photo_curator.pipeline_v1.common import _safe_norm
+from photo_curator.pipeline_v1.content_dedupe import ContentGroups, copy_file_results
 from photo_curator.pipeline_v1.models import StageStats
+from photo_curator.pipeline_v1.proxy_cache import ProxyCache, load_analysis_image
+from photo_curator.pipeline_v1.scoring import compute_technical_quality
+from photo_curator.pipeline_v1.work_queue import StageWorkQueue, WorkQueueOptions
+from photo_curator.quantile_sketch import QuantileSketch
+
+METRIC_SCORE_COLUMNS = (
+    "blur_score",
+    "brightness_score",
+    "contrast_score",
+    "entropy_score",
+    "noise_score",
+    "technical_quality_score",
+)
 
 
 def _compute_metrics(
@@ -46,20 +62,8 @@ def _compute_metrics(
     # Use a wider normalization range since modern cameras produce very low noise values
     noise_score = 1.0 - _safe_norm(noise_proxy, 0.001, 0.08)
 
-    # Technical quality weights adjusted based on real dataset analysis:
-    # - entropy reduced from 0.15 to 0.08 (stddev=0.10, not discriminative in natural photos)
-    # - noise increased from 0.15 to 0.20 (stddev=0.24, more useful discriminator)
-    # - blur weight increased from 0.30 to 0.35 (dominant signal, stddev=0.40)
-    technical_quality_score = max(
-        0.0,
-        min(
-            1.0,
-            (0.35 * (1.0 - blur_score))
-            + (0.20 * contrast_score)
-            + (0.18 * brightness_score)
-            + (0.08 * entropy)
-            + (0.20 * noise_score),
-        ),
+    technical_quality_score = compute_technical_quality(
+        blur_score, brightness_score, contrast_score, entropy, noise_score
     )
 
     return (
@@ -72,15 +76,52 @@ def _compute_metrics(
     )
 
 
-def score_metrics(db: Database, max_size: int = 1024) -> StageStats:
-    rows = db.fetchall("SELECT id, source_root, relative_path FROM files ORDER BY id")
-    stats = StageStats()
+def score_metrics(
+    db: Database,
+    max_size: int = 1024,
+    proxy_cache: ProxyCache | None = None,
+    log_distribution: bool = True,
+    work_queue: WorkQueueOptions | None = None,
+) -> StageStats:
+    """Score technical metrics for every file.
+
+    With `work_queue`, files are claimed from `stage_work_queue` in small leased pages so
+    several workers can share the pass; each worker then only sees part of the library, so
+    the score sketches are rebuilt from the table instead of replaced.
+    """
+    queue = StageWorkQueue(db, "metrics", work_queue) if work_queue is not None else None
+    if queue is not None:
+        queue.enqueue("SELECT id FROM files")
+        rows: Iterable[tuple[Any, ...]] = queue.iter_rows(
+            lambda file_ids: db.fetchall(
+                """
+                SELECT id, source_root, relative_path, sha256 FROM files
+                WHERE id = ANY(%s) ORDER BY id
+                """,
+                (file_ids,),
+            )
+        )
+        total: int | None = queue.pending()
+    else:
+        rows = db.fetchall("SELECT id, source_root, relative_path, sha256 FROM files ORDER BY id")
+        total = len(rows)
+    # Every file is rescored, so the run's sketches replace the library-wide distribution,
+    # unless some file is skipped below (see the check after the loop).
+    stats = StageStats(
+        sketches={col: QuantileSketch() for col in METRIC_SCORE_COLUMNS},
+        sketch_mode="replace" if queue is None else "rebuild",
+    )
+    # Identical content gets identical metrics: decode one file per sha256, copy to the rest.
+    groups = ContentGroups()
+    scored_ids: set[int] = set()
 
-    for file_id, source_root, relative_path in tqdm(rows, desc="Metrics"):
+    for file_id, source_root, relative_path, sha256 in tqdm(rows, total=total, desc="Metrics"):
+        if not groups.claim(file_id, sha256):
+            continue
         path = Path(source_root) / Path(relative_path)
         logger.info("Scoring metrics: file_id={id} path={path}", id=file_id, path=path)
 
-        image = _load_image(path, max_size=max_size)
+        image = load_analysis_image(path, str(sha256), max_size, proxy_cache)
         if image is None:
             logger.warning("Could not load image for metrics, skipping: {path}", path=path)
             continue
@@ -127,14 +168,55 @@ def score_metrics(db: Database, max_size: int = 1024) -> StageStats:
                 bright=brightness_score,
                 contrast=contrast_score,
             )
+            for col, value in zip(
+                METRIC_SCORE_COLUMNS,
+                (
+                    blur_score,
+                    brightness_score,
+                    contrast_score,
+                    entropy_score,
+                    noise_score,
+                    technical_quality_score,
+                ),
+                strict=True,
+            ):
+                stats.sketches[col].update(value)
             stats.processed += 1
+            scored_ids.add(int(file_id))
+            if queue is not None:
+                queue.done([file_id])
         except Exception as exc:
             logger.error(
                 "Metrics DB insert failed for file_id={id}: {error}", id=file_id, error=str(exc)
             )
 
-    # Log score distribution summary after metrics stage
-    _log_metrics_distribution(db, stats.processed)
+    twin_ids, source_ids = groups.pairs(scored_ids)
+    copied = copy_file_results(
+        db,
+        "file_metrics",
+        METRIC_SCORE_COLUMNS,
+        twin_ids,
+        source_ids,
+        returning=METRIC_SCORE_COLUMNS,
+    )
+    for values in copied:
+        for col, value in zip(METRIC_SCORE_COLUMNS, values, strict=True):
+            stats.sketches[col].update(value)
+    stats.processed += len(copied)
+    if stats.sketch_mode == "replace" and stats.processed < (total or 0):
+        # Skipped files keep their old metrics, which the run's sketches do not contain.
+        stats.sketch_mode = "rebuild"
+    groups.log_summary("metrics", len(copied))
+    if queue is not None:
+        queue.finish()
+
+    if proxy_cache is not None:
+        proxy_cache.log_summary("metrics")
+
+    # Log score distribution summary after metrics stage. Tracked CLI runs skip this because
+    # PipelineRun.complete() logs every score column from one aggregate query.
+    if log_distribution:
+        _log_metrics_distribution(db, stats.processed)
 
     logger.info("Metric scoring complete: processed={count}", count=stats.processed)
     return stats
@@ -159,10 +241,9 @@ def _log_metrics_distribution(db: Database, processed_count: int) -> None:
     logger.info("Metrics score distribution (processed={count})", count=processed_count)
     logger.info("-" * 80)
 
+    distributions, null_counts = fetch_score_distributions(db, [col for col, _ in fields])
     for col, name in fields:
-        rows = db.fetchall(f"SELECT {col} FROM file_metrics WHERE {col} IS NOT NULL")
-        values = [float(r[0]) for r in rows if r[0] is not None]
-        dist = _compute_distribution(values)
+        dist = distributions[col]
 
         logger.info(
             "  {name}  n={count}  min={min_val:.4f}  p25={p25:.4f}  median={median:.4f}  p75={p75:.4f}  p90={p90:.4f}  max={max_val:.4f}  stddev={stddev:.4f}",
@@ -184,23 +265,4 @@ def _log_metrics_distribution(db: Database, processed_count: int) -> None:
                 stddev=dist.stddev,
             )
 
-    # Check for NULL counts in metrics fields
-    null_fields = [
-        ("blur_score", "Blur"),
-        ("brightness_score", "Brightness"),
-        ("contrast_score", "Contrast"),
-        ("entropy_score", "Entropy"),
-        ("noise_score", "Noise"),
-        ("technical_quality_score", "Technical Quality"),
-    ]
-
-    null_counts = {}
-    for col, name in null_fields:
-        row = db.fetchall(f"SELECT COUNT(*) FROM file_metrics WHERE {col} IS NULL")
-        if row and int(row[0][0]) > 0:
-            null_counts[name] = int(row[0][0])
-
-    if null_counts:
-        logger.info(
-            "  NULL counts: {nulls}", nulls=", ".join(f"{n}={c}" for n, c in null_counts.items())
-        )
+    _log_null_counts(null_counts, dict(fields))
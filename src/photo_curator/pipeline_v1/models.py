@@ -1,7 +1,11 @@
 from __future__ import annotations
 
 import re
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+
+from photo_curator.pipeline_v1.llm_image import LlmImageOptions
+from photo_curator.pipeline_v1.lmstudio_client import LmStudioConcurrency
+from photo_curator.quantile_sketch import QuantileSketch
 
 _VISION_MODEL_PATTERNS = (
     r"llava",
@@ -33,12 +37,38 @@ class DiscoverStats:
 @dataclass
 class StageStats:
     processed: int = 0
+    # Quantile sketches of the score columns this stage wrote, keyed by file_metrics column.
+    sketches: dict[str, QuantileSketch] = field(default_factory=dict)
+    sketch_mode: str = "merge"
+    # Files routed past the expensive scorer by `ScoringGates`, and the estimated time that saved.
+    gated: int = 0
+    gated_seconds_saved: float = 0.0
+    # NIMA results written from this stage's decodes (the CLIP stage can share them).
+    nima_processed: int = 0
+
+
+@dataclass
+class ThumbnailStats:
+    generated: int = 0
+    skipped_existing: int = 0
+    failed: int = 0
+    source_bytes: int = 0
+    thumbnail_bytes: int = 0
+
+    @property
+    def bytes_saved(self) -> int:
+        return max(0, self.source_bytes - self.thumbnail_bytes)
 
 
 @dataclass
 class AdvancedRunnerStats:
     clip_processed: int = 0
     described_processed: int = 0
+    clip_sketches: dict[str, QuantileSketch] = field(default_factory=dict)
+    clip_sketch_mode: str = "merge"
+    clip_gated: int = 0
+    clip_gated_seconds_saved: float = 0.0
+    nima_processed: int = 0
 
 
 @dataclass(frozen=True)
@@ -46,4 +76,7 @@ class DescriptionOptions:
     provider: str = "basic"
     lmstudio_base_url: str = "http://localhost:1234/v1"
     lmstudio_model: str = "qwen2.5-vl-7b-instruct"
+    # Per-photo deadline, covering every retry of that photo's request.
     lmstudio_timeout_seconds: float = 60.0
+    concurrency: LmStudioConcurrency = field(default_factory=LmStudioConcurrency)
+    image: LlmImageOptions = field(default_factory=LlmImageOptions)
@@ -0,0 +1,357 @@
+from __future__ import annotations
+
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import torch
+from loguru import logger
+from tqdm import tqdm
+
+from photo_curator.db import Database
+from photo_curator.nima.inference import (
+    get_model,
+    heuristic_inputs,
+    heuristic_scores,
+    nima_input,
+    score_inputs,
+)
+from photo_curator.pipeline_v1.content_dedupe import ContentGroups, copy_file_results
+from photo_curator.pipeline_v1.models import StageStats
+from photo_curator.pipeline_v1.prefetch import PrefetchLoader
+from photo_curator.pipeline_v1.proxy_cache import ProxyCache, load_analysis_image
+from photo_curator.quantile_sketch import QuantileSketch
+
+NIMA_MODEL_VERSION = "nima_vgg16_v1"
+# Written instead of NIMA_MODEL_VERSION when the weights are missing, so the real model
+# rescoring those rows later is an ordinary stale-version pass.
+NIMA_HEURISTIC_VERSION = "nima_heuristic_v1"
+NIMA_SCORE_COLUMNS = ("nima_mean", "nima_std")
+
+NIMA_RESULT_COLUMNS = ("nima_mean", "nima_std", "nima_model_version", "nima_updated_at")
+
+_NIMA_STALE_SQL = (
+    "(fm.nima_mean IS NULL OR fm.nima_model_version IS NULL OR fm.nima_model_version <> ALL(%s))"
+)
+
+# One statement per inference batch instead of one upsert per file.
+_NIMA_UPSERT_SQL = """
+INSERT INTO file_metrics (file_id, nima_mean, nima_std, nima_model_version, nima_updated_at)
+SELECT batch.file_id, batch.nima_mean, batch.nima_std, %s, now()
+FROM unnest(%s::bigint[], %s::double precision[], %s::double precision[])
+  AS batch(file_id, nima_mean, nima_std)
+ON CONFLICT (file_id) DO UPDATE SET
+  nima_mean = EXCLUDED.nima_mean,
+  nima_std = EXCLUDED.nima_std,
+  nima_model_version = EXCLUDED.nima_model_version,
+  nima_updated_at = now(),
+  updated_at = now()
+"""
+
+
+@dataclass(frozen=True)
+class NimaOptions:
+    """How the NIMA model is loaded; see `nima.inference.get_model`.
+
+    `precision="bf16"` halves weight memory and runs the VGG features in bf16 (CUDA, or CPUs
+    with native bf16). `mmap` maps the converted weights cache instead of reading it, so
+    worker processes on one host share the weight pages. With `heuristic_fallback`, missing
+    weights mean heuristic scores (`NIMA_HEURISTIC_VERSION`) instead of none.
+    """
+
+    precision: str = "fp32"
+    mmap: bool = True
+    heuristic_fallback: bool = True
+
+
+@dataclass
+class _NimaCandidate:
+    file_id: int
+    image_tensor: torch.Tensor
+
+
+@dataclass
+class _HeuristicCandidate:
+    """Heuristic inputs for one file: read from `file_metrics`, or computed from its image."""
+
+    file_id: int
+    technical_quality_score: float
+    composition_balance_score: float
+
+
+def load_nima_model(options: NimaOptions | None = None) -> torch.nn.Module | None:
+    """The shared NIMA model, or None (with a warning) when its weights are unavailable."""
+    options = options or NimaOptions()
+    try:
+        model = get_model(precision=options.precision, mmap=options.mmap)
+    except RuntimeError as exc:
+        logger.warning("NIMA scoring disabled: {error}", error=exc)
+        return None
+    if model is None:
+        logger.warning("NIMA scoring disabled: weights unavailable")
+    return model
+
+
+def store_nima_scores(
+    db: Database,
+    file_ids: Sequence[int],
+    means: np.ndarray,
+    stds: np.ndarray,
+    sketches: dict[str, QuantileSketch] | None = None,
+    model_version: str = NIMA_MODEL_VERSION,
+) -> int:
+    """Upsert one inference batch of NIMA results in a single statement; returns rows written."""
+    if not file_ids:
+        return 0
+    db.execute(
+        _NIMA_UPSERT_SQL,
+        (model_version, [int(file_id) for file_id in file_ids], means.tolist(), stds.tolist()),
+    )
+    if sketches is not None:
+        for col, values in zip(NIMA_SCORE_COLUMNS, (means, stds), strict=True):
+            sketch = sketches.setdefault(col, QuantileSketch())
+            for value in values.tolist():
+                sketch.update(value)
+    return len(file_ids)
+
+
+def store_heuristic_scores(
+    db: Database,
+    file_ids: Sequence[int],
+    technical_quality: Sequence[float],
+    composition_balance: Sequence[float],
+    sketches: dict[str, QuantileSketch] | None = None,
+) -> int:
+    """Score a batch with `heuristic_scores` and upsert it under `NIMA_HEURISTIC_VERSION`."""
+    means, stds = heuristic_scores(np.array(technical_quality), np.array(composition_balance))
+    return store_nima_scores(
+        db, file_ids, means, stds, sketches, model_version=NIMA_HEURISTIC_VERSION
+    )
+
+
+def _nima_filter(*, heuristic: bool, force_rescore_all: bool) -> tuple[str, tuple[object, ...]]:
+    """WHERE condition (and params) selecting the files a NIMA pass should score.
+
+    A heuristic pass never overwrites real NIMA scores, even with `force_rescore_all`.
+    """
+    if heuristic:
+        if force_rescore_all:
+            return "fm.nima_model_version IS DISTINCT FROM %s", (NIMA_MODEL_VERSION,)
+        return _NIMA_STALE_SQL, ([NIMA_MODEL_VERSION, NIMA_HEURISTIC_VERSION],)
+    if force_rescore_all:
+        return "TRUE", ()
+    return _NIMA_STALE_SQL, ([NIMA_MODEL_VERSION],)
+
+
+def _count_nima_candidates(db: Database, *, heuristic: bool, force_rescore_all: bool) -> int:
+    where_sql, where_params = _nima_filter(heuristic=heuristic, force_rescore_all=force_rescore_all)
+    rows = db.fetchall(
+        f"""
+        SELECT COUNT(*)
+        FROM files f
+        LEFT JOIN file_metrics fm ON fm.file_id = f.id
+        WHERE {where_sql}
+        """,
+        where_params,
+    )
+    if not rows:
+        return 0
+    return int(rows[0][0])
+
+
+def _nima_sketch_mode(db: Database, *, heuristic: bool, force_rescore_all: bool) -> str:
+    """Whether this NIMA pass only fills NULL scores (merge), overwrites some (rebuild) or all.
+
+    Only a model pass with `force_rescore_all` rescores every row (replace); a heuristic pass
+    leaves real NIMA scores alone, so its sketch cannot stand in for the library's.
+    """
+    if force_rescore_all:
+        return "rebuild" if heuristic else "replace"
+    where_sql, where_params = _nima_filter(heuristic=heuristic, force_rescore_all=False)
+    rows = db.fetchall(
+        f"""
+        SELECT EXISTS (
+          SELECT 1 FROM file_metrics fm
+          WHERE fm.nima_mean IS NOT NULL AND {where_sql}
+        )
+        """,
+        where_params,
+    )
+    return "rebuild" if rows and rows[0][0] else "merge"
+
+
+def _heuristic_candidate(
+    row: tuple[Any, ...], max_size: int, proxy_cache: ProxyCache | None
+) -> _HeuristicCandidate | None:
+    file_id, source_root, relative_path, sha256, technical_quality, composition_balance = row
+    if technical_quality is not None and composition_balance is not None:
+        return _HeuristicCandidate(
+            int(file_id), float(technical_quality), float(composition_balance)
+        )
+    path = Path(source_root) / Path(relative_path)
+    image = load_analysis_image(path, str(sha256), max_size, proxy_cache)
+    if image is None:
+        logger.warning("Could not load image for NIMA heuristic, skipping: {path}", path=path)
+        return None
+    computed_quality, computed_balance = heuristic_inputs(image)
+    return _HeuristicCandidate(
+        int(file_id),
+        computed_quality if technical_quality is None else float(technical_quality),
+        computed_balance if composition_balance is None else float(composition_balance),
+    )
+
+
+def score_nima(
+    db: Database,
+    *,
+    max_size: int = 1024,
+    batch_size: int = 500,
+    inference_batch_size: int = 16,
+    prefetch_workers: int = 4,
+    prefetch_depth: int = 64,
+    force_rescore_all: bool = False,
+    proxy_cache: ProxyCache | None = None,
+    options: NimaOptions | None = None,
+) -> StageStats:
+    """Write NIMA mean/std to `file_metrics` for files without a current NIMA score.
+
+    Same shape as the CLIP stage: keyset pages of `batch_size` files, decoded on
+    `prefetch_workers` threads into uint8 model inputs, then scored `inference_batch_size` at a
+    time with one device transfer, one forward pass and one upsert per batch. Files are grouped
+    by `sha256` and each content is scored once.
+
+    Without NIMA weights (and with `options.heuristic_fallback`) files get `heuristic_scores`
+    instead, tagged `NIMA_HEURISTIC_VERSION`. Its inputs come from `file_metrics` when the
+    metrics and CLIP stages already stored them; only files missing them are decoded, and
+    each page is written with one upsert.
+    """
+    options = options or NimaOptions()
+    stats = StageStats(sketches={col: QuantileSketch() for col in NIMA_SCORE_COLUMNS})
+    model = load_nima_model(options)
+    heuristic = model is None
+    if heuristic and not options.heuristic_fallback:
+        return stats
+    stats.sketch_mode = _nima_sketch_mode(
+        db, heuristic=heuristic, force_rescore_all=force_rescore_all
+    )
+    # Heuristic batches have no forward pass to size, so they are flushed a page at a time.
+    flush_size = max(1, batch_size if heuristic else inference_batch_size)
+    total_candidates = _count_nima_candidates(
+        db, heuristic=heuristic, force_rescore_all=force_rescore_all
+    )
+    logger.info(
+        "NIMA stage starting: total_candidates={total} batch_size={batch_size} inference_batch_size={inference_batch_size} heuristic={heuristic}",
+        total=total_candidates,
+        batch_size=batch_size,
+        inference_batch_size=flush_size,
+        heuristic=heuristic,
+    )
+    where_sql, where_params = _nima_filter(heuristic=heuristic, force_rescore_all=force_rescore_all)
+    page_columns = "f.id, f.source_root, f.relative_path, f.sha256"
+    if heuristic:
+        page_columns += ", fm.technical_quality_score, fm.composition_balance_score"
+
+    groups = ContentGroups()
+    scored_ids: set[int] = set()
+    inference_batches = 0
+    inference_seconds = 0.0
+    last_id = 0
+
+    def fetch_page() -> list[tuple[Any, ...]]:
+        nonlocal last_id
+        while True:
+            rows = db.fetchall(
+                f"""
+                SELECT {page_columns}
+                FROM files f
+                LEFT JOIN file_metrics fm ON fm.file_id = f.id
+                WHERE {where_sql} AND f.id > %s
+                ORDER BY f.id ASC
+                LIMIT %s
+                """,
+                (*where_params, last_id, batch_size),
+            )
+            if not rows:
+                return rows
+            last_id = int(rows[-1][0])
+            unique_rows = [row for row in rows if groups.claim(row[0], row[3])]
+            if unique_rows:
+                return unique_rows
+
+    def prepare(row: tuple[Any, ...]) -> _NimaCandidate | _HeuristicCandidate | None:
+        if heuristic:
+            return _heuristic_candidate(row, max_size, proxy_cache)
+        file_id, source_root, relative_path, sha256 = row
+        path = Path(source_root) / Path(relative_path)
+        image = load_analysis_image(path, str(sha256), max_size, proxy_cache)
+        if image is None:
+            logger.warning("Could not load image for NIMA score, skipping: {path}", path=path)
+            return None
+        return _NimaCandidate(file_id=int(file_id), image_tensor=nima_input(image))
+
+    def flush(batch: list[Any]) -> None:
+        nonlocal inference_batches, inference_seconds
+        if heuristic:
+            file_ids = [candidate.file_id for candidate in batch]
+            stats.processed += store_heuristic_scores(
+                db,
+                file_ids,
+                [candidate.technical_quality_score for candidate in batch],
+                [candidate.composition_balance_score for candidate in batch],
+                stats.sketches,
+            )
+            scored_ids.update(file_ids)
+            return
+        started = time.perf_counter()
+        means, stds = score_inputs(model, [candidate.image_tensor for candidate in batch])
+        inference_seconds += time.perf_counter() - started
+        inference_batches += 1
+        file_ids = [candidate.file_id for candidate in batch]
+        stats.processed += store_nima_scores(db, file_ids, means, stds, stats.sketches)
+        scored_ids.update(file_ids)
+
+    batch: list[Any] = []
+    with PrefetchLoader(
+        fetch_page, prepare, workers=prefetch_workers, depth=prefetch_depth
+    ) as loader:
+        for candidate in tqdm(loader, total=total_candidates, desc="NIMA"):
+            batch.append(candidate)
+            if len(batch) >= flush_size:
+                flush(batch)
+                batch = []
+    if batch:
+        flush(batch)
+    loader.log_summary("nima")
+
+    twin_ids, source_ids = groups.pairs(scored_ids)
+    copied = copy_file_results(
+        db,
+        "file_metrics",
+        NIMA_RESULT_COLUMNS,
+        twin_ids,
+        source_ids,
+        returning=NIMA_SCORE_COLUMNS,
+    )
+    for values in copied:
+        for col, value in zip(NIMA_SCORE_COLUMNS, values, strict=True):
+            if value is not None:
+                stats.sketches[col].update(value)
+    stats.processed += len(copied)
+    if stats.sketch_mode == "replace" and stats.processed < total_candidates:
+        # Files that could not be loaded keep their old scores, which the run sketch lacks.
+        stats.sketch_mode = "rebuild"
+    groups.log_summary("nima", len(copied))
+    if proxy_cache is not None:
+        proxy_cache.log_summary("nima")
+
+    logger.info(
+        "NIMA stage complete: processed={processed} heuristic={heuristic} inference_batches={batches} inference_seconds={seconds:.1f}",
+        processed=stats.processed,
+        heuristic=heuristic,
+        batches=inference_batches,
+        seconds=inference_seconds,
+    )
+    return stats
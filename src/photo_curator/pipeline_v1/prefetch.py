@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Generic, TypeVar
+
+from loguru import logger
+
+RowT = TypeVar("RowT")
+ItemT = TypeVar("ItemT")
+
+_DONE = object()
+
+
+@dataclass
+class PrefetchStats:
+    pages: int = 0
+    items: int = 0
+    max_queue_depth: int = 0
+    queue_depth_total: int = 0
+    page_fetch_seconds: float = 0.0
+    producer_blocked_seconds: float = 0.0
+    consumer_stall_seconds: float = 0.0
+
+    @property
+    def mean_queue_depth(self) -> float:
+        return self.queue_depth_total / self.items if self.items else 0.0
+
+
+class _ProducerError:
+    def __init__(self, exc: BaseException) -> None:
+        self.exc = exc
+
+
+class PrefetchLoader(Generic[RowT, ItemT]):
+    """Bounded producer/consumer loader that overlaps paging and preparation with the consumer.
+
+    A producer thread calls `fetch_page()` until it returns an empty list and submits every row
+    to `prepare` on a thread pool. At most `depth` prepared (or in-flight) rows are queued, so a
+    slow consumer applies backpressure instead of letting decoded images pile up in memory.
+    Items are yielded in row order; `prepare` may return None to drop a row.
+
+    Stats: `consumer_stall_seconds` is time the consumer waited for the next item (the loader
+    is the bottleneck); `producer_blocked_seconds` is time the producer waited on a full queue
+    (the consumer is the bottleneck).
+    """
+
+    def __init__(
+        self,
+        fetch_page: Callable[[], list[RowT]],
+        prepare: Callable[[RowT], ItemT | None],
+        *,
+        workers: int = 4,
+        depth: int = 64,
+    ) -> None:
+        self._fetch_page = fetch_page
+        self._prepare = prepare
+        self._workers = max(1, workers)
+        self._queue: queue.Queue[object] = queue.Queue(maxsize=max(1, depth))
+        self._stop = threading.Event()
+        self._executor: ThreadPoolExecutor | None = None
+        self._producer: threading.Thread | None = None
+        self.stats = PrefetchStats()
+
+    def __enter__(self) -> PrefetchLoader[RowT, ItemT]:
+        self._executor = ThreadPoolExecutor(
+            max_workers=self._workers, thread_name_prefix="prefetch"
+        )
+        self._producer = threading.Thread(
+            target=self._produce, name="prefetch-producer", daemon=True
+        )
+        self._producer.start()
+        return self
+
+    def __exit__(self, exc_type: object, exc: object, tb: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._stop.set()
+        # Drain so a producer blocked on put() can observe the stop flag.
+        while True:
+            try:
+                pending = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(pending, Future):
+                pending.cancel()
+        if self._producer is not None:
+            self._producer.join()
+            self._producer = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def _put(self, item: object) -> bool:
+        started = time.perf_counter()
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+            except queue.Full:
+                continue
+            self.stats.producer_blocked_seconds += time.perf_counter() - started
+            return True
+        return False
+
+    def _produce(self) -> None:
+        assert self._executor is not None
+        try:
+            while not self._stop.is_set():
+                started = time.perf_counter()
+                rows = self._fetch_page()
+                self.stats.page_fetch_seconds += time.perf_counter() - started
+                if not rows:
+                    break
+                self.stats.pages += 1
+                for row in rows:
+                    if not self._put(self._executor.submit(self._prepare, row)):
+                        return
+        except BaseException as exc:  # noqa: BLE001 - re-raised on the consumer thread
+            self._put(_ProducerError(exc))
+            return
+        self._put(_DONE)
+
+    def __iter__(self) -> Iterator[ItemT]:
+        if self._producer is None:
+            raise RuntimeError("PrefetchLoader must be used as a context manager")
+        while True:
+            depth = self._queue.qsize()
+            started = time.perf_counter()
+            entry = self._queue.get()
+            if entry is _DONE:
+                return
+            if isinstance(entry, _ProducerError):
+                raise entry.exc
+            assert isinstance(entry, Future)
+            item = entry.result()
+            self.stats.consumer_stall_seconds += time.perf_counter() - started
+            self.stats.items += 1
+            self.stats.queue_depth_total += depth
+            self.stats.max_queue_depth = max(self.stats.max_queue_depth, depth)
+            if item is not None:
+                yield item
+
+    def log_summary(self, stage: str) -> None:
+        logger.info(
+            "Prefetch ({stage}): pages={pages} items={items} workers={workers} queue_depth max={max_depth} mean={mean_depth:.1f} consumer_stall={stall:.2f}s producer_blocked={blocked:.2f}s page_fetch={fetch:.2f}s",
+            stage=stage,
+            pages=self.stats.pages,
+            items=self.stats.items,
+            workers=self._workers,
+            max_depth=self.stats.max_queue_depth,
+            mean_depth=self.stats.mean_queue_depth,
+            stall=self.stats.consumer_stall_seconds,
+            blocked=self.stats.producer_blocked_seconds,
+            fetch=self.stats.page_fetch_seconds,
+        )
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+
+import cv2
+import numpy as np
+from loguru import logger
+from PIL import Image
+
+from photo_curator.pipeline_v1.common import _load_image
+
+
+def _center_crop_rgb(rgb: np.ndarray, size: int) -> np.ndarray:
+    """Shortest-side bicubic resize + center crop, matching open_clip's PIL transforms."""
+    height, width = rgb.shape[:2]
+    short, long = (width, height) if width <= height else (height, width)
+    new_short, new_long = size, int(size * long / short)
+    new_width, new_height = (new_short, new_long) if width <= height else (new_long, new_short)
+    resized = Image.fromarray(rgb).resize((new_width, new_height), Image.Resampling.BICUBIC)
+    top = round((new_height - size) / 2.0)
+    left = round((new_width - size) / 2.0)
+    return np.asarray(resized.crop((left, top, left + size, top + size)))
+
+
+class ProxyCache:
+    """Local, memory-mappable copies of images at analysis resolution, keyed by sha256.
+
+    Each image is stored once per representation as an uncompressed `.npy` file:
+    - `bgr<max_size>`: the uint8 BGR array `_load_image` returns (metrics, composition).
+    - `clip<size>`: the uint8 RGB shortest-side-resized, center-cropped CLIP model input.
+
+    Reads use `np.load(mmap_mode="r")`, so rescoring pages in a few hundred KB from local disk
+    instead of decoding a multi-MB original from the NAS. Safe to share between prefetch
+    worker threads: writes go through per-thread temp files and `os.replace`.
+    """
+
+    def __init__(self, cache_dir: str | Path) -> None:
+        self.root = Path(cache_dir) / "proxies"
+        self.hits = 0
+        self.misses = 0
+        self._counter_lock = threading.Lock()
+
+    def _path(self, sha256: str, kind: str) -> Path:
+        return self.root / sha256[:2] / f"{sha256}.{kind}.npy"
+
+    def _read(self, path: Path) -> np.ndarray | None:
+        try:
+            return np.load(path, mmap_mode="r")
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as exc:
+            logger.warning("Discarding unreadable proxy {path}: {error}", path=path, error=exc)
+            path.unlink(missing_ok=True)
+            return None
+
+    def _write(self, path: Path, array: np.ndarray) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with tmp_path.open("wb") as handle:
+                np.save(handle, np.ascontiguousarray(array))
+            os.replace(tmp_path, path)
+        except OSError as exc:
+            tmp_path.unlink(missing_ok=True)
+            logger.warning("Could not write proxy {path}: {error}", path=path, error=exc)
+
+    def analysis_image(self, sha256: str, source: Path, max_size: int) -> np.ndarray | None:
+        path = self._path(sha256, f"bgr{max_size}")
+        cached = self._read(path)
+        with self._counter_lock:
+            if cached is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if cached is not None:
+            return cached
+        image = _load_image(source, max_size=max_size)
+        if image is not None:
+            self._write(path, image)
+        return image
+
+    def existing_analysis_image(self, sha256: str, min_size: int) -> np.ndarray | None:
+        """The smallest stored `bgr<max_size>` proxy with `max_size >= min_size`; never writes."""
+        sizes: list[int] = []
+        for path in self._path(sha256, "bgr").parent.glob(f"{sha256}.bgr*.npy"):
+            size = path.name.split(".")[1].removeprefix("bgr")
+            if size.isdigit() and int(size) >= min_size:
+                sizes.append(int(size))
+        cached = self._read(self._path(sha256, f"bgr{min(sizes)}")) if sizes else None
+        with self._counter_lock:
+            if cached is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return cached
+
+    def clip_input(self, sha256: str, bgr_image: np.ndarray, size: int) -> np.ndarray:
+        path = self._path(sha256, f"clip{size}")
+        cached = self._read(path)
+        if cached is not None:
+            return cached
+        crop = _center_crop_rgb(cv2.cvtColor(bgr_image, cv2.COLOR_BGR2RGB), size)
+        self._write(path, crop)
+        return crop
+
+    def log_summary(self, stage: str) -> None:
+        logger.info(
+            "Proxy cache ({stage}): hits={hits} misses={misses} root={root}",
+            stage=stage,
+            hits=self.hits,
+            misses=self.misses,
+            root=self.root,
+        )
+
+
+def load_analysis_image(
+    path: Path, sha256: str, max_size: int, proxy_cache: ProxyCache | None = None
+) -> np.ndarray | None:
+    if proxy_cache is None:
+        return _load_image(path, max_size=max_size)
+    return proxy_cache.analysis_image(sha256, path, max_size)
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import numpy as np
+
+
+def average_ranks(values: np.ndarray) -> np.ndarray:
+    """0-based ranks with ties sharing their average rank (`rankdata(method="average")` - 1)."""
+    _unique, inverse, counts = np.unique(values, return_inverse=True, return_counts=True)
+    ends = np.cumsum(counts)
+    return ((ends - counts + ends - 1) / 2.0)[inverse.reshape(-1)]
+
+
+def spearman(a: np.ndarray, b: np.ndarray) -> float:
+    """Spearman rank correlation of two equally long score arrays (1.0 if undefined)."""
+    if a.size < 2:
+        return 1.0
+    ra = average_ranks(a)
+    rb = average_ranks(b)
+    ra -= ra.mean()
+    rb -= rb.mean()
+    denom = float(np.sqrt(np.dot(ra, ra) * np.dot(rb, rb)))
+    return float(np.dot(ra, rb) / denom) if denom else 1.0
+
+
+def top_n_churn(current: np.ndarray, candidate: np.ndarray, top_n: int) -> float:
+    """Fraction of the `top_n` highest `current` scores that are not in `candidate`'s top N."""
+    if top_n <= 0 or current.size == 0:
+        return 0.0
+    n = min(top_n, current.size)
+    current_top = np.argpartition(-current, n - 1)[:n]
+    candidate_top = np.argpartition(-candidate, n - 1)[:n]
+    kept = np.intersect1d(current_top, candidate_top, assume_unique=True).size
+    return 1.0 - (kept / n)
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import time
+
+import numpy as np
+from loguru import logger
+
+from photo_curator.db import Database
+from photo_curator.pipeline_v1.models import StageStats
+from photo_curator.pipeline_v1.scoring import (
+    DEFAULT_WEIGHTS,
+    CompositeScores,
+    ScoreComponents,
+    ScoringWeights,
+    compute_composite_scores,
+)
+from photo_curator.quantile_sketch import QuantileSketch
+
+_COMPONENT_COLUMNS = (
+    "file_id",
+    "blur_score",
+    "brightness_score",
+    "contrast_score",
+    "entropy_score",
+    "noise_score",
+    "clip_raw_score",
+    "composition_balance_score",
+    "semantic_relevance_score",
+    "technical_quality_score",
+    "clip_aesthetic_score",
+    "aesthetic_score",
+    "keep_score",
+    "curation_score",
+)
+
+# Composite columns rewritten by recompute-scores, in the order of the UPDATE's unnest arrays.
+RECOMPUTED_COLUMNS = (
+    "technical_quality_score",
+    "clip_aesthetic_score",
+    "aesthetic_score",
+    "keep_score",
+    "curation_score",
+)
+
+_BULK_UPDATE_SQL = """
+UPDATE file_metrics AS fm
+SET technical_quality_score = v.technical_quality,
+    clip_aesthetic_score = v.clip_aesthetic,
+    aesthetic_score = v.aesthetic,
+    keep_score = v.keep,
+    curation_score = v.curation,
+    updated_at = now()
+FROM unnest(
+  %s::bigint[], %s::float8[], %s::float8[], %s::float8[], %s::float8[], %s::float8[]
+) AS v(file_id, technical_quality, clip_aesthetic, aesthetic, keep, curation)
+WHERE fm.file_id = v.file_id
+  AND (fm.technical_quality_score, fm.clip_aesthetic_score, fm.aesthetic_score,
+       fm.keep_score, fm.curation_score)
+      IS DISTINCT FROM (v.technical_quality, v.clip_aesthetic, v.aesthetic, v.keep, v.curation)
+"""
+
+
+def load_score_components(db: Database) -> ScoreComponents:
+    """Load every stored scoring input and composite from file_metrics into NumPy arrays."""
+    rows = db.fetchall(f"SELECT {', '.join(_COMPONENT_COLUMNS)} FROM file_metrics ORDER BY file_id")
+    matrix = np.array(rows, dtype=np.float64).reshape(-1, len(_COMPONENT_COLUMNS))
+    columns = matrix.T
+    return ScoreComponents(
+        file_ids=columns[0].astype(np.int64),
+        blur=columns[1],
+        brightness=columns[2],
+        contrast=columns[3],
+        entropy=columns[4],
+        noise=columns[5],
+        clip_raw=columns[6],
+        composition_balance=columns[7],
+        semantic_relevance=columns[8],
+        technical_quality=columns[9],
+        clip_aesthetic=columns[10],
+        aesthetic=columns[11],
+        keep=columns[12],
+        curation=columns[13],
+    )
+
+
+def _nullable(values: np.ndarray) -> list[float | None]:
+    return [None if np.isnan(value) else float(value) for value in values]
+
+
+def _write_composites(
+    db: Database, file_ids: np.ndarray, scores: CompositeScores, chunk_size: int
+) -> int:
+    updated = 0
+    with db.connection() as conn:
+        with conn.cursor() as cur:
+            for start in range(0, file_ids.size, chunk_size):
+                window = slice(start, start + chunk_size)
+                cur.execute(
+                    _BULK_UPDATE_SQL,
+                    (
+                        file_ids[window].tolist(),
+                        _nullable(scores.technical_quality[window]),
+                        _nullable(scores.clip_aesthetic[window]),
+                        _nullable(scores.aesthetic[window]),
+                        _nullable(scores.keep[window]),
+                        _nullable(scores.curation[window]),
+                    ),
+                )
+                updated += max(cur.rowcount, 0)
+        # One transaction: readers never see a half-recomputed library.
+        conn.commit()
+    return updated
+
+
+def recompute_scores(
+    db: Database,
+    *,
+    weights: ScoringWeights = DEFAULT_WEIGHTS,
+    chunk_size: int = 50_000,
+) -> StageStats:
+    """Re-derive every composite score from stored components without decoding or inference."""
+    started = time.perf_counter()
+    components = load_score_components(db)
+    loaded = time.perf_counter()
+    scores = compute_composite_scores(components, weights)
+    computed = time.perf_counter()
+    updated = _write_composites(db, components.file_ids, scores, chunk_size)
+    written = time.perf_counter()
+
+    stats = StageStats(processed=updated, sketch_mode="replace")
+    for col, values in zip(
+        RECOMPUTED_COLUMNS,
+        (
+            scores.technical_quality,
+            scores.clip_aesthetic,
+            scores.aesthetic,
+            scores.keep,
+            scores.curation,
+        ),
+        strict=True,
+    ):
+        sketch = QuantileSketch()
+        sketch.update_many(values[~np.isnan(values)].tolist())
+        stats.sketches[col] = sketch
+
+    missing_raw = int(
+        np.count_nonzero(np.isnan(components.clip_raw) & ~np.isnan(components.clip_aesthetic))
+    )
+    if missing_raw:
+        logger.warning(
+            "{count} files have CLIP scores but no stored clip_raw_score; their clip_aesthetic_score "
+            "was kept as-is (rescore with score-clip-aesthetic --force-rescore-all to backfill)",
+            count=missing_raw,
+        )
+    logger.info(
+        "Score recompute complete: rows={rows} updated={updated} load={load:.2f}s compute={compute:.3f}s write={write:.2f}s",
+        rows=len(components),
+        updated=updated,
+        load=loaded - started,
+        compute=computed - loaded,
+        write=written - computed,
+    )
+    return stats
@@ -1,5 +1,9 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
+
+import numpy as np
+
 # Tuned weights based on analysis documented in docs/score-data-analysis.md.
 CLIP_AESTHETIC_WEIGHT = 0.85
 COMPOSITION_BALANCE_WEIGHT = 0.15
@@ -13,17 +17,78 @@ CURATION_AESTHETIC_WEIGHT = 0.4
 CURATION_KEEP_WEIGHT = 0.3
 CURATION_TECHNICAL_WEIGHT = 0.2
 CURATION_SEMANTIC_WEIGHT = 0.1
+# Technical quality weights adjusted based on real dataset analysis:
+# - entropy reduced from 0.15 to 0.08 (stddev=0.10, not discriminative in natural photos)
+# - noise increased from 0.15 to 0.20 (stddev=0.24, more useful discriminator)
+# - sharpness (1 - blur) increased from 0.30 to 0.35 (dominant signal, stddev=0.40)
+TECHNICAL_SHARPNESS_WEIGHT = 0.35
+TECHNICAL_CONTRAST_WEIGHT = 0.20
+TECHNICAL_BRIGHTNESS_WEIGHT = 0.18
+TECHNICAL_ENTROPY_WEIGHT = 0.08
+TECHNICAL_NOISE_WEIGHT = 0.20
+
+# Defaults the description stage uses when upstream scores are missing.
+CURATION_DEFAULT_AESTHETIC = 0.5
+CURATION_DEFAULT_KEEP = 0.5
+CURATION_DEFAULT_TECHNICAL = 0.0
+
+
+@dataclass(frozen=True)
+class ScoringWeights:
+    """Every weight that turns stored components into composite scores."""
+
+    technical_sharpness: float = TECHNICAL_SHARPNESS_WEIGHT
+    technical_contrast: float = TECHNICAL_CONTRAST_WEIGHT
+    technical_brightness: float = TECHNICAL_BRIGHTNESS_WEIGHT
+    technical_entropy: float = TECHNICAL_ENTROPY_WEIGHT
+    technical_noise: float = TECHNICAL_NOISE_WEIGHT
+    clip_aesthetic: float = CLIP_AESTHETIC_WEIGHT
+    composition_balance: float = COMPOSITION_BALANCE_WEIGHT
+    aesthetic_clip: float = AESTHETIC_CLIP_WEIGHT
+    aesthetic_blur_resistance: float = AESTHETIC_BLUR_RESISTANCE_WEIGHT
+    aesthetic_power_curve: float = AESTHETIC_POWER_CURVE
+    keep_technical: float = KEEP_TECHNICAL_WEIGHT
+    keep_aesthetic: float = KEEP_AESTHETIC_WEIGHT
+    keep_power_curve: float = KEEP_POWER_CURVE
+    curation_aesthetic: float = CURATION_AESTHETIC_WEIGHT
+    curation_keep: float = CURATION_KEEP_WEIGHT
+    curation_technical: float = CURATION_TECHNICAL_WEIGHT
+    curation_semantic: float = CURATION_SEMANTIC_WEIGHT
+
+
+DEFAULT_WEIGHTS = ScoringWeights()
 
 
 def _clamp01(value: float) -> float:
     return max(0.0, min(1.0, float(value)))
 
 
-def compute_keep_score(technical_quality: float, aesthetic_spread: float) -> float:
-    keep_raw = (KEEP_TECHNICAL_WEIGHT * technical_quality) + (
-        KEEP_AESTHETIC_WEIGHT * aesthetic_spread
+def compute_technical_quality(
+    blur_score: float,
+    brightness_score: float,
+    contrast_score: float,
+    entropy_score: float,
+    noise_score: float,
+    weights: ScoringWeights = DEFAULT_WEIGHTS,
+) -> float:
+    return _clamp01(
+        (weights.technical_sharpness * (1.0 - blur_score))
+        + (weights.technical_contrast * contrast_score)
+        + (weights.technical_brightness * brightness_score)
+        + (weights.technical_entropy * entropy_score)
+        + (weights.technical_noise * noise_score)
+    )
+
+
+def compute_keep_score(
+    technical_quality: float,
+    aesthetic_spread: float,
+    weights: ScoringWeights = DEFAULT_WEIGHTS,
+) -> float:
+    keep_raw = (weights.keep_technical * technical_quality) + (
+        weights.keep_aesthetic * aesthetic_spread
     )
-    return _clamp01(keep_raw**KEEP_POWER_CURVE)
+    return _clamp01(max(0.0, keep_raw) ** weights.keep_power_curve)
 
 
 def compute_clip_aesthetic(
@@ -31,27 +96,130 @@ def compute_clip_aesthetic(
     composition_balance_score: float,
     blur_score: float,
     technical_quality_score: float,
+    weights: ScoringWeights = DEFAULT_WEIGHTS,
 ) -> tuple[float, float, float]:
     clip_aesthetic_score = _clamp01(
-        (CLIP_AESTHETIC_WEIGHT * clip_score)
-        + (COMPOSITION_BALANCE_WEIGHT * composition_balance_score)
+        (weights.clip_aesthetic * clip_score)
+        + (weights.composition_balance * composition_balance_score)
     )
     blur_resistance = 1.0 - blur_score
-    aesthetic_raw = (AESTHETIC_CLIP_WEIGHT * clip_aesthetic_score) + (
-        AESTHETIC_BLUR_RESISTANCE_WEIGHT * blur_resistance
+    aesthetic_raw = (weights.aesthetic_clip * clip_aesthetic_score) + (
+        weights.aesthetic_blur_resistance * blur_resistance
     )
-    aesthetic_spread = _clamp01(aesthetic_raw**AESTHETIC_POWER_CURVE)
-    keep_spread = compute_keep_score(technical_quality_score, aesthetic_spread)
+    aesthetic_spread = _clamp01(max(0.0, aesthetic_raw) ** weights.aesthetic_power_curve)
+    keep_spread = compute_keep_score(technical_quality_score, aesthetic_spread, weights)
     return clip_aesthetic_score, aesthetic_spread, keep_spread
 
 
 def compute_curation_score(
-    aesthetic: float, keep: float, tech_quality: float, semantic_relevance: float
+    aesthetic: float,
+    keep: float,
+    tech_quality: float,
+    semantic_relevance: float,
+    weights: ScoringWeights = DEFAULT_WEIGHTS,
 ) -> float:
     curation = (
-        (CURATION_AESTHETIC_WEIGHT * aesthetic)
-        + (CURATION_KEEP_WEIGHT * keep)
-        + (CURATION_TECHNICAL_WEIGHT * tech_quality)
-        + (CURATION_SEMANTIC_WEIGHT * semantic_relevance)
+        (weights.curation_aesthetic * aesthetic)
+        + (weights.curation_keep * keep)
+        + (weights.curation_technical * tech_quality)
+        + (weights.curation_semantic * semantic_relevance)
     )
     return _clamp01(curation)
+
+
+@dataclass
+class ScoreComponents:
+    """Stored per-file scoring inputs as aligned float64 arrays (NaN where NULL).
+
+    The stored composites are kept so rows missing a raw input (e.g. CLIP scored before
+    `clip_raw_score` existed) fall back to their current value instead of being dropped.
+    """
+
+    file_ids: np.ndarray
+    blur: np.ndarray
+    brightness: np.ndarray
+    contrast: np.ndarray
+    entropy: np.ndarray
+    noise: np.ndarray
+    clip_raw: np.ndarray
+    composition_balance: np.ndarray
+    semantic_relevance: np.ndarray
+    technical_quality: np.ndarray
+    clip_aesthetic: np.ndarray
+    aesthetic: np.ndarray
+    keep: np.ndarray
+    curation: np.ndarray
+
+    def __len__(self) -> int:
+        return int(self.file_ids.size)
+
+
+@dataclass
+class CompositeScores:
+    technical_quality: np.ndarray
+    clip_aesthetic: np.ndarray
+    aesthetic: np.ndarray
+    keep: np.ndarray
+    curation: np.ndarray
+
+
+def _fill(computed: np.ndarray, stored: np.ndarray) -> np.ndarray:
+    return np.where(np.isnan(computed), stored, computed)
+
+
+def _clip01(values: np.ndarray) -> np.ndarray:
+    return np.clip(values, 0.0, 1.0)
+
+
+def compute_composite_scores(
+    components: ScoreComponents, weights: ScoringWeights = DEFAULT_WEIGHTS
+) -> CompositeScores:
+    """Vectorised equivalent of the scalar scoring functions over a whole library.
+
+    Each composite is derived from the (recomputed or stored) composite upstream of it, so a
+    row only stays NaN when neither the raw inputs nor a stored value exist.
+    """
+    c = components
+    technical_quality = _fill(
+        _clip01(
+            (weights.technical_sharpness * (1.0 - c.blur))
+            + (weights.technical_contrast * c.contrast)
+            + (weights.technical_brightness * c.brightness)
+            + (weights.technical_entropy * c.entropy)
+            + (weights.technical_noise * c.noise)
+        ),
+        c.technical_quality,
+    )
+    clip_aesthetic = _fill(
+        _clip01(
+            (weights.clip_aesthetic * c.clip_raw)
+            + (weights.composition_balance * c.composition_balance)
+        ),
+        c.clip_aesthetic,
+    )
+    aesthetic_raw = (weights.aesthetic_clip * clip_aesthetic) + (
+        weights.aesthetic_blur_resistance * (1.0 - c.blur)
+    )
+    aesthetic = _fill(
+        _clip01(np.maximum(aesthetic_raw, 0.0) ** weights.aesthetic_power_curve), c.aesthetic
+    )
+    keep_raw = (weights.keep_technical * technical_quality) + (weights.keep_aesthetic * aesthetic)
+    keep = _fill(_clip01(np.maximum(keep_raw, 0.0) ** weights.keep_power_curve), c.keep)
+    curation = _clip01(
+        (weights.curation_aesthetic * np.nan_to_num(aesthetic, nan=CURATION_DEFAULT_AESTHETIC))
+        + (weights.curation_keep * np.nan_to_num(keep, nan=CURATION_DEFAULT_KEEP))
+        + (
+            weights.curation_technical
+            * np.nan_to_num(technical_quality, nan=CURATION_DEFAULT_TECHNICAL)
+        )
+        + (weights.curation_semantic * c.semantic_relevance)
+    )
+    # Curation only exists for described files (semantic_relevance set by the description stage).
+    curation = _fill(curation, c.curation)
+    return CompositeScores(
+        technical_quality=technical_quality,
+        clip_aesthetic=clip_aesthetic,
+        aesthetic=aesthetic,
+        keep=keep,
+        curation=curation,
+    )
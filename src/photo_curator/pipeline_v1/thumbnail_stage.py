@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from loguru import logger
+from PIL import Image, ImageOps
+from tqdm import tqdm
+
+from photo_curator.db import Database
+from photo_curator.pipeline_v1.models import ThumbnailStats
+
+# File suffix per output format. The app server looks up `<thumbs_dir>/<sha256>.<suffix>`.
+THUMBNAIL_SUFFIXES = {"jpeg": "jpg", "webp": "webp"}
+
+
+def thumbnail_path(thumbs_dir: Path, sha256: str, thumbnail_format: str = "jpeg") -> Path:
+    return thumbs_dir / f"{sha256}.{THUMBNAIL_SUFFIXES[thumbnail_format]}"
+
+
+def _write_thumbnail(
+    source: Path,
+    destination: Path,
+    *,
+    size: int,
+    thumbnail_format: str = "jpeg",
+    quality: int = 85,
+) -> int:
+    """Render one thumbnail and return the number of bytes written."""
+    with Image.open(source) as image:
+        # JPEG draft mode lets libjpeg decode at 1/2, 1/4 or 1/8 scale, so a 24 MP original
+        # never gets fully decoded just to produce a 512 px preview. It is a no-op for
+        # formats without reduced-resolution decode (PNG, WebP).
+        image.draft("RGB", (size, size))
+        oriented = ImageOps.exif_transpose(image)
+        if oriented.mode != "RGB":
+            oriented = oriented.convert("RGB")
+        oriented.thumbnail((size, size), Image.Resampling.LANCZOS)
+
+        # Write to a temp name first so the app server never serves a half-written file.
+        tmp_path = destination.with_name(f".{destination.name}.tmp")
+        save_kwargs: dict[str, object] = {"quality": quality}
+        if thumbnail_format == "jpeg":
+            save_kwargs.update(optimize=True, progressive=True)
+        else:
+            save_kwargs.update(method=4)
+        try:
+            oriented.save(tmp_path, format=thumbnail_format.upper(), **save_kwargs)
+            os.replace(tmp_path, destination)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+    return destination.stat().st_size
+
+
+def generate_thumbnails(
+    db: Database,
+    *,
+    thumbs_dir: str,
+    size: int = 512,
+    thumbnail_format: str = "jpeg",
+    quality: int = 85,
+    workers: int = 4,
+    force: bool = False,
+) -> ThumbnailStats:
+    output_dir = Path(thumbs_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    # Thumbnails are keyed by content hash, so render each distinct sha256 only once.
+    rows = db.fetchall(
+        """
+        SELECT DISTINCT ON (sha256) sha256, source_root, relative_path, file_size_bytes
+        FROM files
+        ORDER BY sha256, id
+        """
+    )
+
+    stats = ThumbnailStats()
+    pending: list[tuple[str, Path, Path, int]] = []
+    for sha256, source_root, relative_path, file_size_bytes in rows:
+        destination = thumbnail_path(output_dir, str(sha256), thumbnail_format)
+        if not force and destination.exists():
+            stats.skipped_existing += 1
+            continue
+        source = Path(source_root) / Path(relative_path)
+        pending.append((str(sha256), source, destination, int(file_size_bytes or 0)))
+
+    logger.info(
+        "Thumbnail stage starting: distinct_hashes={total} pending={pending} skipped_existing={skipped} size={size} format={fmt} workers={workers}",
+        total=len(rows),
+        pending=len(pending),
+        skipped=stats.skipped_existing,
+        size=size,
+        fmt=thumbnail_format,
+        workers=workers,
+    )
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {
+            executor.submit(
+                _write_thumbnail,
+                source,
+                destination,
+                size=size,
+                thumbnail_format=thumbnail_format,
+                quality=quality,
+            ): (sha256, source, source_bytes)
+            for sha256, source, destination, source_bytes in pending
+        }
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Thumbnails"):
+            sha256, source, source_bytes = futures[future]
+            try:
+                written = future.result()
+            except Exception as exc:  # noqa: BLE001
+                logger.warning(
+                    "Thumbnail generation failed for {path} (sha256={sha}): {error}",
+                    path=source,
+                    sha=sha256,
+                    error=exc,
+                )
+                stats.failed += 1
+                continue
+            stats.generated += 1
+            stats.source_bytes += source_bytes
+            stats.thumbnail_bytes += written
+
+    logger.info(
+        "Thumbnail stage complete: generated={generated} skipped_existing={skipped} failed={failed} source_mb={source_mb:.1f} thumbnail_mb={thumb_mb:.1f} saved_mb={saved_mb:.1f}",
+        generated=stats.generated,
+        skipped=stats.skipped_existing,
+        failed=stats.failed,
+        source_mb=stats.source_bytes / 1_048_576,
+        thumb_mb=stats.thumbnail_bytes / 1_048_576,
+        saved_mb=stats.bytes_saved / 1_048_576,
+    )
+    return stats
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, fields, replace
+
+import numpy as np
+from loguru import logger
+
+from photo_curator.pipeline_v1.rank_stats import spearman, top_n_churn
+from photo_curator.pipeline_v1.scoring import (
+    DEFAULT_WEIGHTS,
+    CompositeScores,
+    ScoreComponents,
+    ScoringWeights,
+    compute_composite_scores,
+)
+
+WHAT_IF_METRICS = ("technical_quality", "clip_aesthetic", "aesthetic", "keep", "curation")
+_PERCENTILES = (10.0, 25.0, 50.0, 75.0, 90.0)
+
+
+@dataclass
+class WhatIfReport:
+    metric: str
+    weights: ScoringWeights
+    compared: int
+    current_percentiles: dict[float, float]
+    candidate_percentiles: dict[float, float]
+    current_stddev: float
+    candidate_stddev: float
+    top_n: int
+    top_n_churn: float
+    spearman: float
+    mean_abs_delta: float
+    elapsed_ms: float
+
+
+def parse_weight_overrides(
+    overrides: list[str], base: ScoringWeights = DEFAULT_WEIGHTS
+) -> ScoringWeights:
+    """Apply `name=value` overrides (field names of `ScoringWeights`) to `base`."""
+    valid = {f.name for f in fields(ScoringWeights)}
+    changes: dict[str, float] = {}
+    for override in overrides:
+        name, sep, raw_value = override.partition("=")
+        name = name.strip()
+        if not sep or name not in valid:
+            raise ValueError(
+                f"Invalid weight override {override!r}; expected NAME=VALUE with NAME in: "
+                + ", ".join(sorted(valid))
+            )
+        try:
+            changes[name] = float(raw_value)
+        except ValueError as exc:
+            raise ValueError(f"Weight {name} must be a number, got {raw_value!r}") from exc
+    return replace(base, **changes)
+
+
+def evaluate_weights(
+    components: ScoreComponents,
+    weights: ScoringWeights,
+    *,
+    metric: str = "curation",
+    top_n: int = 1000,
+    current: CompositeScores | None = None,
+) -> WhatIfReport:
+    """Score `components` with `weights` and compare `metric` against the current scores.
+
+    `current` defaults to the stored composites, i.e. what the UI ranks by today.
+    """
+    if metric not in WHAT_IF_METRICS:
+        raise ValueError(f"metric must be one of {WHAT_IF_METRICS}")
+    started = time.perf_counter()
+    candidate_scores = compute_composite_scores(components, weights)
+    baseline = getattr(current, metric) if current is not None else getattr(components, metric)
+    candidate = getattr(candidate_scores, metric)
+
+    mask = ~(np.isnan(baseline) | np.isnan(candidate))
+    baseline = baseline[mask]
+    candidate = candidate[mask]
+    if baseline.size:
+        current_pct = np.percentile(baseline, _PERCENTILES)
+        candidate_pct = np.percentile(candidate, _PERCENTILES)
+    else:
+        current_pct = candidate_pct = np.full(len(_PERCENTILES), np.nan)
+
+    return WhatIfReport(
+        metric=metric,
+        weights=weights,
+        compared=int(baseline.size),
+        current_percentiles=dict(zip(_PERCENTILES, current_pct.tolist(), strict=True)),
+        candidate_percentiles=dict(zip(_PERCENTILES, candidate_pct.tolist(), strict=True)),
+        current_stddev=float(baseline.std(ddof=1)) if baseline.size > 1 else 0.0,
+        candidate_stddev=float(candidate.std(ddof=1)) if candidate.size > 1 else 0.0,
+        top_n=min(top_n, int(baseline.size)),
+        top_n_churn=top_n_churn(baseline, candidate, top_n),
+        spearman=spearman(baseline, candidate),
+        mean_abs_delta=float(np.abs(candidate - baseline).mean()) if baseline.size else 0.0,
+        elapsed_ms=(time.perf_counter() - started) * 1000.0,
+    )
+
+
+def log_what_if_report(report: WhatIfReport) -> None:
+    changed = {
+        f.name: getattr(report.weights, f.name)
+        for f in fields(ScoringWeights)
+        if getattr(report.weights, f.name) != getattr(DEFAULT_WEIGHTS, f.name)
+    }
+    logger.info("=" * 80)
+    logger.info(
+        "What-if {metric}: overrides={changed} compared={count} evaluated in {ms:.1f} ms",
+        metric=report.metric,
+        changed=changed or "(none)",
+        count=report.compared,
+        ms=report.elapsed_ms,
+    )
+    logger.info("-" * 80)
+    for label, pct, stddev in (
+        ("current  ", report.current_percentiles, report.current_stddev),
+        ("candidate", report.candidate_percentiles, report.candidate_stddev),
+    ):
+        logger.info(
+            "  {label}  p10={p10:.4f}  p25={p25:.4f}  median={p50:.4f}  p75={p75:.4f}  p90={p90:.4f}  stddev={stddev:.4f}",
+            label=label,
+            p10=pct[10.0],
+            p25=pct[25.0],
+            p50=pct[50.0],
+            p75=pct[75.0],
+            p90=pct[90.0],
+            stddev=stddev,
+        )
+    logger.info(
+        "  top-{n} churn={churn:.1%}  spearman={rho:.4f}  mean |delta|={delta:.4f}",
+        n=report.top_n,
+        churn=report.top_n_churn,
+        rho=report.spearman,
+        delta=report.mean_abs_delta,
+    )
@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import os
+import socket
+import uuid
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass, field
+from typing import Any
+
+from loguru import logger
+
+from photo_curator.db import Database
+
+# Files whose claims keep expiring (a worker crashed or hung on them) are skipped after this
+# many leases until the stage is enqueued again.
+DEFAULT_MAX_ATTEMPTS = 3
+
+_ENQUEUE_LOCK_SQL = "SELECT pg_advisory_xact_lock(hashtext('stage_work_queue:' || %s))"
+
+_CLAIMABLE_SQL = """
+SELECT EXISTS (
+  SELECT 1 FROM stage_work_queue
+  WHERE stage = %s AND attempts < %s
+)
+"""
+
+_CLAIM_SQL = """
+WITH next AS (
+  SELECT stage, file_id
+  FROM stage_work_queue
+  WHERE stage = %s
+    AND attempts < %s
+    AND (lease_expires_at IS NULL OR lease_expires_at < now())
+    AND leased_by IS DISTINCT FROM %s
+  ORDER BY file_id
+  LIMIT %s
+  FOR UPDATE SKIP LOCKED
+)
+UPDATE stage_work_queue q
+SET leased_by = %s,
+    lease_expires_at = now() + make_interval(secs => %s),
+    attempts = q.attempts + 1
+FROM next
+WHERE q.stage = next.stage AND q.file_id = next.file_id
+RETURNING q.file_id
+"""
+
+_RENEW_SQL = """
+UPDATE stage_work_queue
+SET lease_expires_at = now() + make_interval(secs => %s)
+WHERE stage = %s AND leased_by = %s
+"""
+
+
+# Containers restart with the same hostname and PID 1, so a per-process token keeps a
+# restarted worker from renewing (and finishing) the leases of the one that died.
+_PROCESS_TOKEN = uuid.uuid4().hex[:8]
+
+
+def _default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}-{_PROCESS_TOKEN}"
+
+
+@dataclass(frozen=True)
+class WorkQueueOptions:
+    """Drain stages from the shared `stage_work_queue` table instead of scanning `files`.
+
+    Any number of workers can run the same stage: each claims `claim_size` files at a time
+    with `FOR UPDATE SKIP LOCKED` and holds them for `lease_seconds`. Finished files are
+    deleted from the queue; claims of crashed workers expire and are picked up by others.
+    Every claim renews the leases this worker still holds, so stages that keep files until
+    they end (deferred apply, cascade) do not lose them to the expiry.
+    """
+
+    worker_id: str = field(default_factory=_default_worker_id)
+    lease_seconds: int = 900
+    claim_size: int = 64
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS
+
+
+class StageWorkQueue:
+    """One stage's view of `stage_work_queue` for this worker."""
+
+    def __init__(self, db: Database, stage: str, options: WorkQueueOptions) -> None:
+        self.db = db
+        self.stage = stage
+        self.options = options
+        self.claimed = 0
+        self._done: list[int] = []
+
+    def enqueue(self, candidate_sql: str, params: tuple[Any, ...] = ()) -> int:
+        """Queue `candidate_sql`'s file ids unless the stage already has claimable work.
+
+        The first worker to start a stage fills the queue; workers that join later just drain
+        it. Serialised with an advisory lock so concurrent starts enqueue once. Re-enqueueing
+        resets the attempts of rows nobody holds a live lease on.
+        """
+        with self.db.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(_ENQUEUE_LOCK_SQL, (self.stage,))
+                cur.execute(_CLAIMABLE_SQL, (self.stage, self.options.max_attempts))
+                row = cur.fetchone()
+                if row and row[0]:
+                    conn.commit()
+                    logger.info(
+                        "Work queue ({stage}): joining existing queue as worker={worker}",
+                        stage=self.stage,
+                        worker=self.options.worker_id,
+                    )
+                    return 0
+                cur.execute(
+                    f"""
+                    INSERT INTO stage_work_queue (stage, file_id)
+                    SELECT %s, candidates.id FROM ({candidate_sql}) AS candidates
+                    ON CONFLICT (stage, file_id) DO UPDATE SET
+                      attempts = 0,
+                      leased_by = NULL,
+                      lease_expires_at = NULL,
+                      enqueued_at = now()
+                    WHERE stage_work_queue.lease_expires_at IS NULL
+                       OR stage_work_queue.lease_expires_at < now()
+                    """,
+                    (self.stage, *params),
+                )
+                queued = max(cur.rowcount, 0)
+            conn.commit()
+        logger.info(
+            "Work queue ({stage}): enqueued={queued} worker={worker}",
+            stage=self.stage,
+            queued=queued,
+            worker=self.options.worker_id,
+        )
+        return queued
+
+    def pending(self) -> int:
+        rows = self.db.fetchall(
+            "SELECT COUNT(*) FROM stage_work_queue WHERE stage = %s AND attempts < %s",
+            (self.stage, self.options.max_attempts),
+        )
+        return int(rows[0][0]) if rows else 0
+
+    def renew(self) -> None:
+        """Extend the lease on every file this worker still holds."""
+        self.db.execute(
+            _RENEW_SQL, (self.options.lease_seconds, self.stage, self.options.worker_id)
+        )
+
+    def claim(self, limit: int | None = None) -> list[int]:
+        """Lease up to `limit` unclaimed (or expired) files to this worker, lowest id first.
+
+        Files this worker already holds are renewed rather than claimed again, even if their
+        lease ran out, so a stage never sees the same file twice.
+        """
+        self.renew()
+        rows = self.db.fetchall(
+            _CLAIM_SQL,
+            (
+                self.stage,
+                self.options.max_attempts,
+                self.options.worker_id,
+                limit or self.options.claim_size,
+                self.options.worker_id,
+                self.options.lease_seconds,
+            ),
+        )
+        file_ids = sorted(int(row[0]) for row in rows)
+        self.claimed += len(file_ids)
+        return file_ids
+
+    def complete(self, file_ids: Iterable[int]) -> None:
+        """Drop finished files from the queue (only while this worker still holds the lease)."""
+        ids = [int(file_id) for file_id in file_ids]
+        if not ids:
+            return
+        self.db.execute(
+            """
+            DELETE FROM stage_work_queue
+            WHERE stage = %s AND leased_by = %s AND file_id = ANY(%s)
+            """,
+            (self.stage, self.options.worker_id, ids),
+        )
+
+    def done(self, file_ids: Iterable[int]) -> None:
+        """Mark files whose results are stored; they are completed in claim-sized batches."""
+        self._done.extend(int(file_id) for file_id in file_ids)
+        if len(self._done) >= self.options.claim_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Complete every file marked `done` so far."""
+        self.complete(self._done)
+        self._done.clear()
+
+    def finish(self) -> None:
+        """Release every file this worker still holds; the stage is done with them."""
+        self._done.clear()
+        self.db.execute(
+            "DELETE FROM stage_work_queue WHERE stage = %s AND leased_by = %s",
+            (self.stage, self.options.worker_id),
+        )
+        logger.info(
+            "Work queue ({stage}): worker={worker} claimed={claimed} remaining={remaining}",
+            stage=self.stage,
+            worker=self.options.worker_id,
+            claimed=self.claimed,
+            remaining=self.pending(),
+        )
+
+    def iter_rows(
+        self, rows_for_ids: Callable[[list[int]], list[tuple[Any, ...]]]
+    ) -> Iterator[tuple[Any, ...]]:
+        """Yield the rows of each claimed page.
+
+        Pages are not completed here: the consumer may still be working on rows it has pulled
+        (the LLM stage keeps several in flight), so stages mark files `done` once their results
+        are stored, and `finish` releases the rest.
+        """
+        while file_ids := self.claim():
+            yield from rows_for_ids(file_ids)
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import math
+from collections.abc import Iterable
+from typing import Any
+
+
+class QuantileSketch:
+    """Mergeable KLL-style quantile sketch for bounded score columns.
+
+    Level `h` holds items of weight `2**h`. When a level reaches its capacity it is sorted and
+    every other item is promoted to the next level; the kept offset alternates per level, so
+    compaction is deterministic and two runs over the same scores produce the same sketch.
+    Min, max, count, sum and sum of squares are tracked exactly. Until the first compaction
+    quantiles are exact and match Postgres `percentile_cont`.
+    """
+
+    def __init__(self, k: int = 200) -> None:
+        if k < 8:
+            raise ValueError("k must be >= 8")
+        self.k = k
+        self.levels: list[list[float]] = [[]]
+        self.offsets: list[int] = [0]
+        self.count = 0
+        self.min_val = math.inf
+        self.max_val = -math.inf
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, math.ceil(self.k * (2.0 / 3.0) ** depth))
+
+    def _compress(self) -> None:
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) >= self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append([])
+                    self.offsets.append(0)
+                items.sort()
+                leftover = [items.pop()] if len(items) % 2 else []
+                offset = self.offsets[level]
+                self.offsets[level] ^= 1
+                self.levels[level + 1].extend(items[offset::2])
+                self.levels[level] = leftover
+            level += 1
+
+    def update(self, value: float) -> None:
+        value = float(value)
+        self.levels[0].append(value)
+        self.count += 1
+        self.min_val = min(self.min_val, value)
+        self.max_val = max(self.max_val, value)
+        self.total += value
+        self.total_sq += value * value
+        if len(self.levels[0]) >= self._capacity(0):
+            self._compress()
+
+    def update_many(self, values: Iterable[float]) -> None:
+        """Bulk `update`; produces the same sketch as updating one value at a time."""
+        values = [float(value) for value in values]
+        if not values:
+            return
+        self.count += len(values)
+        self.min_val = min(self.min_val, min(values))
+        self.max_val = max(self.max_val, max(values))
+        self.total += sum(values)
+        self.total_sq += sum(value * value for value in values)
+        start = 0
+        while start < len(values):
+            room = max(1, self._capacity(0) - len(self.levels[0]))
+            self.levels[0].extend(values[start : start + room])
+            start += room
+            if len(self.levels[0]) >= self._capacity(0):
+                self._compress()
+
+    def merge(self, other: QuantileSketch) -> None:
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+            self.offsets.append(0)
+        for level, items in enumerate(other.levels):
+            self.levels[level].extend(items)
+        self.count += other.count
+        self.min_val = min(self.min_val, other.min_val)
+        self.max_val = max(self.max_val, other.max_val)
+        self.total += other.total
+        self.total_sq += other.total_sq
+        self._compress()
+
+    def quantile(self, q: float) -> float:
+        if self.count == 0:
+            raise ValueError("quantile of empty sketch")
+        if len(self.levels) == 1:
+            values = sorted(self.levels[0])
+            position = q * (len(values) - 1)
+            low = math.floor(position)
+            high = math.ceil(position)
+            return values[low] + (values[high] - values[low]) * (position - low)
+
+        weighted = sorted(
+            (value, 1 << level) for level, items in enumerate(self.levels) for value in items
+        )
+        target = q * sum(weight for _, weight in weighted)
+        cumulative = 0
+        for value, weight in weighted:
+            cumulative += weight
+            if cumulative >= target:
+                return min(max(value, self.min_val), self.max_val)
+        return self.max_val
+
+    @property
+    def stddev(self) -> float:
+        if self.count < 2:
+            return 0.0
+        variance = (self.total_sq - self.total * self.total / self.count) / (self.count - 1)
+        return math.sqrt(max(variance, 0.0))
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "k": self.k,
+            "count": self.count,
+            "min": self.min_val if self.count else None,
+            "max": self.max_val if self.count else None,
+            "sum": self.total,
+            "sum_sq": self.total_sq,
+            "levels": self.levels,
+            "offsets": self.offsets,
+        }
+
+    @classmethod
+    def from_dict(cls, payload: dict[str, Any]) -> QuantileSketch:
+        sketch = cls(k=int(payload["k"]))
+        sketch.count = int(payload["count"])
+        if sketch.count:
+            sketch.min_val = float(payload["min"])
+            sketch.max_val = float(payload["max"])
+        sketch.total = float(payload["sum"])
+        sketch.total_sq = float(payload["sum_sq"])
+        sketch.levels = [[float(v) for v in items] for items in payload["levels"]]
+        sketch.offsets = [int(v) for v in payload["offsets"]]
+        return sketch
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import unittest
+from unittest import mock
+
+import numpy as np
+import torch
+
+from photo_curator.pipeline_v1 import advanced_stage
+from photo_curator.pipeline_v1.advanced_stage import (
+    CLIP_SCORE_COLUMNS,
+    _ClipCandidate,
+    _ClipPages,
+    _ClipSink,
+    score_clip_aesthetic,
+)
+from photo_curator.pipeline_v1.content_dedupe import ContentGroups
+from photo_curator.pipeline_v1.gating import GateTally, ScoringGates
+from photo_curator.pipeline_v1.models import StageStats
+from photo_curator.pipeline_v1.nima_stage import NimaOptions
+from photo_curator.pipeline_v1.work_queue import StageWorkQueue, WorkQueueOptions
+from photo_curator.quantile_sketch import QuantileSketch
+
+
+class _RecordingDb:
+    def __init__(self) -> None:
+        self.statements: list[tuple[str, tuple[object, ...]]] = []
+
+    def execute(self, sql: str, params: tuple[object, ...] = ()) -> None:
+        self.statements.append((sql, params))
+
+    def deletes(self) -> list[list[int]]:
+        return [list(params[2]) for sql, params in self.statements if "DELETE" in sql]
+
+
+class _QueueDb(_RecordingDb):
+    """Serves claims from a queue of `file_ids` and pages of stale `files` rows."""
+
+    def __init__(self, file_ids: list[int]) -> None:
+        super().__init__()
+        self.queued = sorted(file_ids)
+
+    def fetchall(self, sql: str, params: tuple[object, ...] = ()) -> list[tuple[object, ...]]:
+        self.statements.append((sql, params))
+        if "FOR UPDATE SKIP LOCKED" in sql:
+            limit = int(params[3])
+            claimed, self.queued = self.queued[:limit], self.queued[limit:]
+            return [(file_id,) for file_id in claimed]
+        if "f.id = ANY(%s)" in sql:
+            *_stale, file_ids, limit = params
+            rows = [
+                (file_id, "/r", f"{file_id}.jpg", f"h{file_id}", *[0.5] * 5) for file_id in file_ids
+            ]
+            return rows[: int(limit)]
+        return []
+
+
+class _FilesDb(_RecordingDb):
+    """Every file is a CLIP candidate; pages come from a keyset scan over `rows`."""
+
+    def __init__(self, file_ids: list[int]) -> None:
+        super().__init__()
+        self.rows = [
+            (file_id, "/r", f"{file_id}.jpg", f"h{file_id}", *[0.5] * 5) for file_id in file_ids
+        ]
+
+    def fetchall(self, sql: str, params: tuple[object, ...] = ()) -> list[tuple[object, ...]]:
+        if "COUNT(*)" in sql:
+            return [(len(self.rows),)]
+        if "f.id > %s" in sql:
+            last_id, limit = params[-2:]
+            return [row for row in self.rows if row[0] > last_id][: int(limit)]
+        return []
+
+
+class _FakeScorer:
+    embedding_model = "fake"
+    input_size = 8
+
+    def preprocess_rgb(self, rgb: np.ndarray) -> torch.Tensor:
+        return torch.tensor(float(rgb.mean()))
+
+    def embed_tensors(self, tensors: list[torch.Tensor]) -> torch.Tensor:
+        return torch.stack([tensor.reshape(1) for tensor in tensors])
+
+    def score_embeddings(self, embeddings: torch.Tensor) -> list[float]:
+        return [float(value) / 255.0 for value in embeddings[:, 0]]
+
+
+def _candidate(file_id: int, gate: str | None = None) -> _ClipCandidate:
+    return _ClipCandidate(
+        file_id=file_id,
+        blur_score=0.2,
+        technical_quality_score=0.6,
+        composition_balance_score=0.5,
+        image_tensor=None,
+        scoring_gate=gate,
+    )
+
+
+class ClipSinkTests(unittest.TestCase):
+    def _sink(self, db: _RecordingDb, *, deferred: bool) -> tuple[_ClipSink, StageStats]:
+        stats = StageStats(sketches={col: QuantileSketch() for col in CLIP_SCORE_COLUMNS})
+        queue = StageWorkQueue(db, "clip_aesthetic", WorkQueueOptions(worker_id="w", claim_size=2))
+        sink = _ClipSink(
+            db,
+            stats,
+            clip_model_version="clip_aesthetic_v1",
+            deferred=deferred,
+            queue=queue,
+            gate_tally=GateTally(),
+        )
+        return sink, stats
+
+    def test_immediate_writes_hand_files_back_in_claim_sized_chunks(self) -> None:
+        db = _RecordingDb()
+        sink, stats = self._sink(db, deferred=False)
+        sink.scored(_candidate(1), 0.7)
+        sink.gated(_candidate(2, gate="blur"))
+        sink.scored(_candidate(3), 0.4)
+
+        self.assertEqual(stats.processed, 3)
+        self.assertEqual(stats.sketches["keep_score"].count, 3)
+        self.assertEqual(sink.gate_tally.by_reason["blur"], 1)
+        self.assertEqual(db.deletes(), [[1, 2]])
+        self.assertEqual(sink.scored_ids, {1, 2, 3})
+
+    def test_deferred_writes_touch_nothing_until_close(self) -> None:
+        db = _RecordingDb()
+        sink, stats = self._sink(db, deferred=True)
+        sink.scored(_candidate(1), 0.7)
+        sink.gated(_candidate(2, gate="blur"))
+
+        self.assertEqual(stats.processed, 2)
+        self.assertEqual(db.statements, [])
+        self.assertEqual(sink.deferred.count, 2)
+        sink.deferred.close()
+
+
+class ClipPagesTests(unittest.TestCase):
+    def test_queue_pages_smaller_than_claim_size_score_every_claimed_file(self) -> None:
+        db = _QueueDb(list(range(1, 11)))
+        queue = StageWorkQueue(db, "clip_aesthetic", WorkQueueOptions(worker_id="w", claim_size=64))
+        pages = _ClipPages(
+            db,
+            queue=queue,
+            groups=ContentGroups(),
+            force_rescore_all=False,
+            clip_model_version="clip_aesthetic_v1",
+            batch_size=3,
+            total_batches=4,
+        )
+
+        fetched: list[int] = []
+        while page := pages():
+            self.assertLessEqual(len(page), 3)
+            fetched.extend(int(row[0]) for row in page)
+
+        self.assertEqual(fetched, list(range(1, 11)))
+        self.assertEqual(db.deletes(), [])
+
+
+class ScoreClipAestheticSketchModeTests(unittest.TestCase):
+    def _run(self, loaded: list[np.ndarray | None], **kwargs: object) -> str:
+        db = _FilesDb([1, 2])
+        with (
+            mock.patch.object(
+                advanced_stage, "load_clip_aesthetic_scorer", return_value=_FakeScorer()
+            ),
+            mock.patch.object(advanced_stage, "load_analysis_image", side_effect=loaded),
+            mock.patch.object(advanced_stage, "load_nima_model", return_value=None),
+        ):
+            stats = score_clip_aesthetic(
+                db, force_rescore_all=True, store_embeddings=False, prefetch_workers=1, **kwargs
+            )
+        return stats.sketch_mode
+
+    def test_full_force_pass_replaces_the_library_sketch(self) -> None:
+        image = np.full((16, 16, 3), 128, dtype=np.uint8)
+        self.assertEqual(self._run([image, image]), "replace")
+        self.assertEqual(self._run([image, image], nima=NimaOptions()), "replace")
+
+    def test_unloadable_file_forces_a_rebuild(self) -> None:
+        image = np.full((16, 16, 3), 128, dtype=np.uint8)
+        self.assertEqual(self._run([image, None]), "rebuild")
+        self.assertEqual(self._run([image, None], nima=NimaOptions()), "rebuild")
+
+    def test_gated_files_force_a_rebuild_of_the_nima_sketches(self) -> None:
+        gates = ScoringGates(min_technical_quality=0.9)
+        self.assertEqual(self._run([], gates=gates), "replace")
+        self.assertEqual(self._run([], gates=gates, nima=NimaOptions()), "rebuild")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import importlib.util
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import torch
+
+from photo_curator.aesthetics import ClipAestheticScorer, ClipRuntimeOptions
+from photo_curator.image_tensors import TensorPreprocess
+from photo_curator.pipeline_v1.clip_benchmark import benchmark_tensors, compare_scores
+
+
+class _LinearEncoder(torch.nn.Module):
+    def __init__(self) -> None:
+        super().__init__()
+        generator = torch.Generator().manual_seed(0)
+        self.visual = torch.nn.Linear(3 * 8 * 8, 16)
+        self.visual.image_size = 8
+        with torch.no_grad():
+            self.visual.weight.copy_(torch.randn(16, 3 * 8 * 8, generator=generator))
+
+    def encode_image(self, images: torch.Tensor) -> torch.Tensor:
+        return self.visual(images.reshape(images.shape[0], -1))
+
+
+def _scorer() -> ClipAestheticScorer:
+    generator = torch.Generator().manual_seed(1)
+    return ClipAestheticScorer(
+        model=_LinearEncoder().eval(),
+        preprocess=lambda image: (
+            torch.from_numpy(np.asarray(image, dtype=np.float32) / 255.0)
+            .permute(2, 0, 1)
+            .contiguous()
+        ),
+        pos_mean=torch.nn.functional.normalize(torch.randn(16, generator=generator), dim=0),
+        neg_mean=torch.nn.functional.normalize(torch.randn(16, generator=generator), dim=0),
+        device="cpu",
+        embedding_model="linear/random-init",
+    )
+
+
+class ClipBatchScoringTests(unittest.TestCase):
+    def test_batched_scores_match_single_image_scores(self) -> None:
+        scorer = _scorer()
+        rng = np.random.default_rng(2)
+        tensors = [
+            scorer.preprocess_rgb(rng.integers(0, 256, size=(8, 8, 3), dtype=np.uint8))
+            for _ in range(5)
+        ]
+        batched = scorer.score_tensors(tensors)
+        single = [scorer.score_tensors([tensor])[0] for tensor in tensors]
+        self.assertEqual(len(batched), 5)
+        np.testing.assert_allclose(batched, single, atol=1e-6)
+
+    def test_empty_batch_returns_no_scores(self) -> None:
+        self.assertEqual(_scorer().score_tensors([]), [])
+
+    def test_stored_half_precision_embeddings_reproduce_scores(self) -> None:
+        scorer = _scorer()
+        rng = np.random.default_rng(3)
+        tensors = [
+            scorer.preprocess_rgb(rng.integers(0, 256, size=(8, 8, 3), dtype=np.uint8))
+            for _ in range(4)
+        ]
+        embeddings = scorer.embed_tensors(tensors)
+        stored = embeddings.numpy().astype(np.float16).astype(np.float32)
+        rescored = scorer.score_embeddings(torch.from_numpy(stored))
+        np.testing.assert_allclose(rescored, scorer.score_tensors(tensors), atol=1e-3)
+
+    def test_uint8_tensor_preprocess_scores_like_float_path(self) -> None:
+        scorer = _scorer()
+        rng = np.random.default_rng(4)
+        images = [rng.integers(0, 256, size=(8, 8, 3), dtype=np.uint8) for _ in range(3)]
+        float_scores = scorer.score_tensors([scorer.preprocess_rgb(image) for image in images])
+
+        scorer._tensor_preprocess = TensorPreprocess(size=8, mean=(0.0,) * 3, std=(1.0,) * 3)
+        uint8_inputs = [scorer.preprocess_rgb(image) for image in images]
+        self.assertEqual(uint8_inputs[0].dtype, torch.uint8)
+        np.testing.assert_allclose(scorer.score_tensors(uint8_inputs), float_scores, atol=1e-5)
+
+
+def _sample_tensors(scorer: ClipAestheticScorer, count: int, seed: int) -> list[torch.Tensor]:
+    rng = np.random.default_rng(seed)
+    return [
+        scorer.preprocess_rgb(rng.integers(0, 256, size=(8, 8, 3), dtype=np.uint8))
+        for _ in range(count)
+    ]
+
+
+class ClipRuntimeOptionsTests(unittest.TestCase):
+    def test_channels_last_does_not_change_scores(self) -> None:
+        scorer = _scorer()
+        tensors = _sample_tensors(scorer, 6, seed=4)
+        baseline = scorer.score_tensors(tensors)
+        scorer.configure_runtime(ClipRuntimeOptions(channels_last=True))
+        np.testing.assert_allclose(scorer.score_tensors(tensors), baseline, atol=1e-6)
+
+    def test_bf16_autocast_drift_is_small(self) -> None:
+        scorer = _scorer()
+        tensors = _sample_tensors(scorer, 8, seed=5)
+        baseline = scorer.score_tensors(tensors)
+        with mock.patch("photo_curator.aesthetics._cpu_supports_bf16", return_value=True):
+            scorer.configure_runtime(ClipRuntimeOptions(precision="bf16"))
+        self.assertEqual(scorer.runtime.precision, "bf16")
+        max_drift, _mean_drift, spearman = compare_scores(baseline, scorer.score_tensors(tensors))
+        self.assertLess(max_drift, 0.05)
+        self.assertGreater(spearman, 0.9)
+
+    def test_bf16_falls_back_to_fp32_without_cpu_support(self) -> None:
+        scorer = _scorer()
+        with mock.patch("photo_curator.aesthetics._cpu_supports_bf16", return_value=False):
+            scorer.configure_runtime(ClipRuntimeOptions(precision="bf16"))
+        self.assertEqual(scorer.runtime.precision, "fp32")
+
+    def test_compare_scores_reports_drift_and_rank_agreement(self) -> None:
+        max_drift, mean_drift, spearman = compare_scores([0.1, 0.5, 0.9], [0.1, 0.52, 0.88])
+        self.assertAlmostEqual(max_drift, 0.02)
+        self.assertAlmostEqual(mean_drift, 0.04 / 3)
+        self.assertAlmostEqual(spearman, 1.0)
+
+
+@unittest.skipUnless(importlib.util.find_spec("onnxruntime"), "onnxruntime not installed")
+class ClipOnnxBackendTests(unittest.TestCase):
+    def test_onnx_backends_track_torch_scores(self) -> None:
+        scorer = _scorer()
+        tensors = _sample_tensors(scorer, 8, seed=6)
+        with tempfile.TemporaryDirectory() as onnx_dir:
+            report = benchmark_tensors(
+                scorer,
+                tensors,
+                [
+                    ClipRuntimeOptions(backend="onnx", onnx_dir=onnx_dir),
+                    ClipRuntimeOptions(backend="onnx", onnx_quantize=True, onnx_dir=onnx_dir),
+                ],
+                inference_batch_size=3,
+            )
+        fp32, int8 = report.candidates
+        self.assertEqual([fp32.run.label, int8.run.label], ["onnx-fp32", "onnx-int8"])
+        self.assertLess(fp32.max_abs_drift, 1e-5)
+        self.assertLess(int8.max_abs_drift, 0.05)
+        self.assertGreater(int8.spearman, 0.9)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import tempfile
+import unittest
+from pathlib import Path
+
+import torch
+
+from photo_curator.clip_cache import NO_PRETRAINED, ClipModelCache
+
+
+class ClipModelCacheTests(unittest.TestCase):
+    def test_model_round_trip_restores_weights_and_buffers(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            model = torch.nn.Linear(4, 2)
+            model.register_buffer("mask", torch.ones(2), persistent=False)
+            ClipModelCache(temp_dir).save_model("ViT-B-32", "openai", model)
+
+            loaded = ClipModelCache(temp_dir).load_model("ViT-B-32", "openai")
+
+            self.assertIsNotNone(loaded)
+            torch.testing.assert_close(loaded.weight, model.weight)
+            torch.testing.assert_close(loaded.mask, model.mask)
+            self.assertIsNone(ClipModelCache(temp_dir).load_model("ViT-B-32", "laion2b"))
+
+    def test_prompt_means_are_keyed_by_prompt_list(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = ClipModelCache(temp_dir)
+            digest = cache.prompts_digest(["a beautiful photo"], ["a blurry photo"])
+            cache.save_prompt_means("ViT-B-32", "openai", digest, torch.ones(3), torch.zeros(3))
+
+            pos_mean, neg_mean = cache.load_prompt_means("ViT-B-32", "openai", digest)
+
+            torch.testing.assert_close(pos_mean, torch.ones(3))
+            torch.testing.assert_close(neg_mean, torch.zeros(3))
+            other = cache.prompts_digest(["a beautiful photo"], ["an overexposed photo"])
+            self.assertNotEqual(digest, other)
+            self.assertIsNone(cache.load_prompt_means("ViT-B-32", "openai", other))
+
+    def test_pretrained_tags_distinguish_unknown_from_none(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = ClipModelCache(temp_dir)
+            self.assertIsNone(cache.pretrained_tag("ViT-B-32"))
+            cache.save_pretrained_tag("ViT-B-32", "openai")
+            cache.save_pretrained_tag("custom-arch", NO_PRETRAINED)
+
+            self.assertEqual(cache.pretrained_tag("ViT-B-32"), "openai")
+            self.assertEqual(cache.pretrained_tag("custom-arch"), NO_PRETRAINED)
+
+    def test_artifacts_from_other_library_versions_are_ignored(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            ClipModelCache(temp_dir).save_model("ViT-B-32", "openai", torch.nn.Linear(2, 2))
+            ClipModelCache(temp_dir).save_pretrained_tag("ViT-B-32", "openai")
+
+            upgraded = ClipModelCache(temp_dir)
+            upgraded._versions = "open_clip=99,torch=99"
+
+            self.assertIsNone(upgraded.load_model("ViT-B-32", "openai"))
+            self.assertIsNone(upgraded.pretrained_tag("ViT-B-32"))
+            self.assertTrue((Path(temp_dir) / "clip" / "ViT-B-32--openai.model.pt").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
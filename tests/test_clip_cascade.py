@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import unittest
+
+import numpy as np
+
+from photo_curator.pipeline_v1.clip_cascade import (
+    ClipCascadeReport,
+    calibration_offset,
+    select_cascade_candidates,
+    summarize_cascade,
+)
+
+
+class CascadeSelectionTests(unittest.TestCase):
+    def test_selects_top_fraction_plus_margin_below_cutoff(self) -> None:
+        keep = np.array([0.10, 0.20, 0.30, 0.40, 0.50, 0.55, 0.60, 0.70, 0.80, 0.90])
+        mask, cutoff = select_cascade_candidates(keep, top_fraction=0.2, margin=0.12)
+        self.assertAlmostEqual(cutoff, 0.80)
+        np.testing.assert_array_equal(np.flatnonzero(mask), [7, 8, 9])
+
+    def test_zero_margin_selects_exactly_the_top_fraction(self) -> None:
+        keep = np.random.default_rng(3).random(100)
+        mask, _cutoff = select_cascade_candidates(keep, top_fraction=0.1, margin=0.0)
+        self.assertEqual(int(mask.sum()), 10)
+        self.assertTrue(np.all(keep[mask] >= np.sort(keep)[-10]))
+
+    def test_empty_candidates(self) -> None:
+        mask, _cutoff = select_cascade_candidates(np.array([]), top_fraction=0.2, margin=0.05)
+        self.assertEqual(mask.size, 0)
+
+
+class CascadeCalibrationTests(unittest.TestCase):
+    def test_offset_is_median_large_minus_small(self) -> None:
+        small = np.linspace(0.2, 0.8, 9)
+        self.assertAlmostEqual(calibration_offset(small, small - 0.05), -0.05)
+
+    def test_too_few_escalated_files_keep_small_scale(self) -> None:
+        self.assertEqual(calibration_offset(np.array([0.1, 0.2]), np.array([0.5, 0.6])), 0.0)
+
+
+class CascadeReportTests(unittest.TestCase):
+    def test_summary_and_savings(self) -> None:
+        small_keep = np.array([0.1, 0.2, 0.3, 0.4])
+        final_keep = np.array([0.1, 0.2, 0.45, 0.4])
+        spearman, top_n, churn = summarize_cascade(small_keep, final_keep, top_fraction=0.25)
+        self.assertEqual(top_n, 1)
+        self.assertAlmostEqual(churn, 1.0)
+        self.assertAlmostEqual(spearman, 0.8)
+
+        report = ClipCascadeReport(
+            small_model="ViT-B-32/openai",
+            large_model="ViT-H-14/laion2b_s32b_b79k",
+            candidates=100,
+            escalated=25,
+            keep_cutoff=0.7,
+            calibration_offset=0.0,
+            small_seconds=5.0,
+            large_seconds=50.0,
+            spearman=spearman,
+            top_n=top_n,
+            top_n_churn=churn,
+        )
+        self.assertEqual(report.large_calls_saved, 75)
+        self.assertAlmostEqual(report.estimated_seconds_saved, 150.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import importlib.util
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+
+from photo_curator.clip_onnx import quantize_image_encoder
+
+HAS_ONNX = all(importlib.util.find_spec(name) for name in ("onnx", "onnxruntime"))
+
+
+def _write_matmul_model(path: Path) -> None:
+    import onnx
+    from onnx import TensorProto, helper, numpy_helper
+
+    weight = np.random.default_rng(0).standard_normal((64, 32)).astype(np.float32)
+    graph = helper.make_graph(
+        [helper.make_node("MatMul", ["image", "weight"], ["embedding"])],
+        "tower",
+        [helper.make_tensor_value_info("image", TensorProto.FLOAT, ["batch", 64])],
+        [helper.make_tensor_value_info("embedding", TensorProto.FLOAT, ["batch", 32])],
+        [numpy_helper.from_array(weight, "weight")],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)], ir_version=9)
+    onnx.save(model, path)
+
+
+@unittest.skipUnless(HAS_ONNX, "needs the optional onnx extra")
+class QuantizeImageEncoderTests(unittest.TestCase):
+    def test_external_data_file_is_named_after_the_final_model(self) -> None:
+        import onnxruntime as ort
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            source = root / "tower.fp32.onnx"
+            _write_matmul_model(source)
+            target = root / "tower.int8.onnx"
+
+            with mock.patch("photo_curator.clip_onnx._EXTERNAL_DATA_BYTES", 0):
+                quantize_image_encoder(source, target)
+
+            self.assertEqual(
+                sorted(item.name for item in root.iterdir()),
+                ["tower.fp32.onnx", "tower.int8.onnx", "tower.int8.onnx.data"],
+            )
+            session = ort.InferenceSession(str(target), providers=["CPUExecutionProvider"])
+            (embedding,) = session.run(None, {"image": np.ones((2, 64), dtype=np.float32)})
+            self.assertEqual(embedding.shape, (2, 32))
+
+
+if __name__ == "__main__":
+    unittest.main()
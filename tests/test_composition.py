@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import unittest
+
+import cv2
+import numpy as np
+
+from photo_curator.pipeline_v1.composition import composition_balance_score, saliency_centroid
+
+
+class CompositionBalanceTests(unittest.TestCase):
+    def test_centroid_matches_index_grid_reference(self) -> None:
+        gray = np.random.default_rng(5).integers(0, 256, (90, 120), dtype=np.uint8)
+        saliency = cv2.magnitude(
+            cv2.Sobel(gray, cv2.CV_32F, 1, 0, ksize=3), cv2.Sobel(gray, cv2.CV_32F, 0, 1, ksize=3)
+        )
+        yy, xx = np.indices(gray.shape, dtype=np.float64)
+        expected = (
+            float(np.sum(xx * saliency) / saliency.sum()),
+            float(np.sum(yy * saliency) / saliency.sum()),
+        )
+        np.testing.assert_allclose(saliency_centroid(gray), expected, rtol=1e-6)
+
+    def test_subject_on_thirds_point_scores_higher_than_centred(self) -> None:
+        on_thirds = np.zeros((300, 300), dtype=np.uint8)
+        cv2.circle(on_thirds, (100, 100), 20, 255, -1)
+        centred = np.zeros((300, 300), dtype=np.uint8)
+        cv2.circle(centred, (150, 150), 20, 255, -1)
+        self.assertGreater(composition_balance_score(on_thirds), 0.99)
+        self.assertLess(composition_balance_score(centred), composition_balance_score(on_thirds))
+
+    def test_empty_image_scores_zero(self) -> None:
+        self.assertEqual(composition_balance_score(np.zeros((0, 10), dtype=np.uint8)), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import unittest
+
+from photo_curator.pipeline_v1.content_dedupe import ContentGroups, copy_file_results
+
+
+class ContentGroupsTests(unittest.TestCase):
+    def test_first_file_per_hash_is_scored(self) -> None:
+        groups = ContentGroups()
+        claims = [
+            groups.claim(file_id, sha)
+            for file_id, sha in [(1, "aa"), (2, "bb"), (3, "aa"), (4, None), (5, "aa"), (6, None)]
+        ]
+        self.assertEqual(claims, [True, True, False, True, False, True])
+        self.assertEqual((groups.unique, groups.twin_count), (2, 2))
+
+    def test_pairs_only_cover_scored_representatives(self) -> None:
+        groups = ContentGroups()
+        for file_id, sha in [(1, "aa"), (2, "bb"), (3, "aa"), (4, "bb"), (5, "aa")]:
+            groups.claim(file_id, sha)
+        self.assertEqual(groups.pairs({1}), ([3, 5], [1, 1]))
+        self.assertEqual(groups.pairs(set()), ([], []))
+
+
+class _FakeDb:
+    def __init__(self) -> None:
+        self.executed: list[tuple[str, tuple[object, ...]]] = []
+        self.fetched: list[tuple[str, tuple[object, ...]]] = []
+
+    def execute(self, sql: str, params: tuple[object, ...] = ()) -> None:
+        self.executed.append((sql, params))
+
+    def fetchall(self, sql: str, params: tuple[object, ...] = ()) -> list[tuple[object, ...]]:
+        self.fetched.append((sql, params))
+        return [(0.5,)]
+
+
+class CopyFileResultsTests(unittest.TestCase):
+    def test_no_twins_issues_no_query(self) -> None:
+        db = _FakeDb()
+        self.assertEqual(copy_file_results(db, "file_metrics", ("blur_score",), [], []), [])
+        self.assertEqual((db.executed, db.fetched), ([], []))
+
+    def test_single_insert_select_for_all_twins(self) -> None:
+        db = _FakeDb()
+        copy_file_results(
+            db,
+            "file_clip_embeddings",
+            ("clip_model_name", "embedding"),
+            [3, 5],
+            [1, 1],
+            conflict_columns=("file_id", "clip_model_name"),
+            touch_column=None,
+        )
+        ((sql, params),) = db.executed
+        self.assertEqual(params, ([3, 5], [1, 1]))
+        self.assertIn("ON CONFLICT (file_id, clip_model_name)", sql)
+        self.assertIn("embedding = EXCLUDED.embedding", sql)
+        self.assertNotIn("clip_model_name = EXCLUDED", sql)
+        self.assertNotIn("now()", sql)
+
+    def test_returning_goes_through_fetchall(self) -> None:
+        db = _FakeDb()
+        rows = copy_file_results(
+            db, "file_metrics", ("blur_score",), [2], [1], returning=("blur_score",)
+        )
+        self.assertEqual(rows, [(0.5,)])
+        ((sql, _params),) = db.fetched
+        self.assertTrue(sql.rstrip().endswith("RETURNING blur_score"))
+        self.assertIn("updated_at = now()", sql)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import unittest
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Self
+
+from photo_curator.pipeline_v1.deferred_apply import DeferredClipUpdates
+
+
+class _FakeCopy:
+    def __init__(self) -> None:
+        self.chunks: list[str] = []
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        return None
+
+    def write(self, chunk: str) -> None:
+        self.chunks.append(chunk)
+
+
+class _FakeCursor:
+    def __init__(self, conn: _FakeConnection) -> None:
+        self.conn = conn
+        self.rowcount = -1
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        return None
+
+    def execute(self, sql: str) -> None:
+        self.conn.statements.append(sql)
+        if "INSERT INTO file_metrics" in sql:
+            self.rowcount = "".join(self.conn.copy.chunks).count("\n")
+
+    def copy(self, sql: str) -> _FakeCopy:
+        self.conn.statements.append(sql)
+        return self.conn.copy
+
+
+class _FakeConnection:
+    def __init__(self) -> None:
+        self.statements: list[str] = []
+        self.copy = _FakeCopy()
+        self.commits = 0
+
+    def cursor(self) -> _FakeCursor:
+        return _FakeCursor(self)
+
+    def commit(self) -> None:
+        self.commits += 1
+
+
+class _FakeDb:
+    def __init__(self) -> None:
+        self.conn = _FakeConnection()
+
+    @contextmanager
+    def connection(self) -> Iterator[_FakeConnection]:
+        yield self.conn
+
+
+class DeferredClipUpdatesTests(unittest.TestCase):
+    def test_rows_are_copied_and_merged_in_one_transaction(self) -> None:
+        deferred = DeferredClipUpdates()
+        deferred.append(1, 0.5, 0.25, 0.75, "ViT-B-32/openai", 0.6, 0.4, None)
+        deferred.append(2, 0.1, 0.0, 0.05, "ViT-B-32/openai", None, None, "brightness")
+        db = _FakeDb()
+
+        self.assertEqual(deferred.apply(db), 2)
+        deferred.close()
+
+        self.assertEqual(
+            "".join(db.conn.copy.chunks),
+            "1\t0.5\t0.25\t0.75\tViT-B-32/openai\t0.6\t0.4\t\\N\n"
+            "2\t0.1\t0.0\t0.05\tViT-B-32/openai\t\\N\t\\N\tbrightness\n",
+        )
+        create, copy, merge = db.conn.statements
+        self.assertIn("CREATE TEMP TABLE clip_update_staging", create)
+        self.assertTrue(copy.startswith("COPY clip_update_staging"))
+        self.assertIn("ON CONFLICT (file_id)", merge)
+        self.assertEqual(db.conn.commits, 1)
+
+    def test_repeated_file_keeps_its_last_row(self) -> None:
+        deferred = DeferredClipUpdates()
+        deferred.append(1, 0.5, 0.25, 0.75, "ViT-B-32/openai", 0.6, 0.4, None)
+        deferred.append(1, 0.7, 0.35, 0.85, "ViT-B-32/openai", 0.8, 0.4, None)
+        db = _FakeDb()
+        deferred.apply(db)
+        deferred.close()
+        create, _copy, merge = db.conn.statements
+        self.assertIn("seq BIGSERIAL", create)
+        self.assertIn("DISTINCT ON (file_id)", merge)
+        self.assertIn("ORDER BY file_id, seq DESC", merge)
+
+    def test_text_fields_are_escaped(self) -> None:
+        deferred = DeferredClipUpdates()
+        deferred.append(1, 0.5, 0.5, 0.5, "model\twith\\tab", 0.5, 0.5, None)
+        db = _FakeDb()
+        deferred.apply(db)
+        deferred.close()
+        self.assertIn("model\\twith\\\\tab", "".join(db.conn.copy.chunks))
+
+    def test_empty_buffer_does_not_touch_the_database(self) -> None:
+        deferred = DeferredClipUpdates()
+        db = _FakeDb()
+        self.assertEqual(deferred.apply(db), 0)
+        deferred.close()
+        self.assertEqual(db.conn.statements, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
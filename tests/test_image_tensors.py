@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import unittest
+
+import numpy as np
+import open_clip
+import torch
+from PIL import Image
+
+from photo_curator.image_tensors import TensorPreprocess, resize_for_model
+
+
+def _gradient(height: int, width: int) -> np.ndarray:
+    rows = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    cols = np.linspace(0, 255, width, dtype=np.float32)[None, :]
+    return np.stack([rows + 0 * cols, 0 * rows + cols, (rows + cols) / 2], axis=2).astype(np.uint8)
+
+
+class ResizeForModelTests(unittest.TestCase):
+    def test_shortest_side_resize_center_crops(self) -> None:
+        image = np.zeros((300, 600, 3), dtype=np.uint8)
+        image[:, 250:350] = 255
+        resized = resize_for_model(image, 100)
+        self.assertEqual(resized.shape, (100, 100, 3))
+        # The bright band sits in the middle of the crop, not at its edges.
+        self.assertGreater(int(resized[50, 50, 0]), 200)
+        self.assertEqual(int(resized[50, 0, 0]), 0)
+
+    def test_squash_ignores_aspect_ratio(self) -> None:
+        resized = resize_for_model(np.zeros((300, 600, 3), dtype=np.uint8), 64, "squash")
+        self.assertEqual(resized.shape, (64, 64, 3))
+
+    def test_small_images_are_upscaled(self) -> None:
+        self.assertEqual(resize_for_model(_gradient(20, 30), 64).shape, (64, 64, 3))
+
+
+class TensorPreprocessTests(unittest.TestCase):
+    def test_normalize_matches_mean_std_formula(self) -> None:
+        preprocess = TensorPreprocess(size=4, mean=(0.5, 0.4, 0.3), std=(0.2, 0.25, 0.3))
+        batch = torch.randint(0, 256, (2, 3, 4, 4), dtype=torch.uint8)
+        expected = (batch.float() / 255.0 - torch.tensor([0.5, 0.4, 0.3]).view(1, 3, 1, 1)) / (
+            torch.tensor([0.2, 0.25, 0.3]).view(1, 3, 1, 1)
+        )
+        torch.testing.assert_close(preprocess.normalize(batch), expected)
+
+    def test_bgr_input_is_flipped_to_rgb(self) -> None:
+        preprocess = TensorPreprocess(size=2, mean=(0.0,) * 3, std=(1.0,) * 3)
+        bgr = np.zeros((2, 2, 3), dtype=np.uint8)
+        bgr[..., 0] = 255
+        tensor = preprocess.to_uint8(bgr, bgr=True)
+        self.assertEqual(tensor.dtype, torch.uint8)
+        self.assertEqual(int(tensor[2].min()), 255)
+        self.assertEqual(int(tensor[0].max()), 0)
+
+    def test_close_to_open_clip_pil_transform(self) -> None:
+        image = _gradient(480, 640)
+        pil_transform = open_clip.image_transform(224, is_train=False)
+        expected = pil_transform(Image.fromarray(image))
+        preprocess = TensorPreprocess(
+            size=224,
+            mean=open_clip.OPENAI_DATASET_MEAN,
+            std=open_clip.OPENAI_DATASET_STD,
+        )
+        actual = preprocess.batch([image])[0]
+        self.assertEqual(actual.shape, expected.shape)
+        self.assertLess(float((actual - expected).abs().mean()), 0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import base64
+import tempfile
+import unittest
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from photo_curator.pipeline_v1.llm_image import LlmImageOptions, _decode_reduced, image_data_url
+from photo_curator.pipeline_v1.proxy_cache import ProxyCache
+
+
+def _noise(height: int, width: int, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+
+
+def _decode(data_url: str) -> tuple[str, bytes]:
+    header, payload = data_url.split(",", 1)
+    return header, base64.b64decode(payload)
+
+
+class LlmImageTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = Path(self.tmp.name)
+
+    def _write(self, name: str, image: np.ndarray) -> Path:
+        path = self.root / name
+        cv2.imwrite(str(path), image, [cv2.IMWRITE_JPEG_QUALITY, 98])
+        return path
+
+    def test_large_original_is_downscaled_and_reencoded(self) -> None:
+        path = self._write("big.jpg", _noise(1200, 1800))
+        header, payload = _decode(image_data_url(path, None, LlmImageOptions(max_side=600)))
+        self.assertEqual(header, "data:image/jpeg;base64")
+        decoded = cv2.imdecode(np.frombuffer(payload, np.uint8), cv2.IMREAD_COLOR)
+        self.assertEqual(decoded.shape[:2], (400, 600))
+        self.assertLess(len(payload), path.stat().st_size)
+
+    def test_zero_max_side_and_small_originals_are_sent_unchanged(self) -> None:
+        png = self.root / "small.png"
+        cv2.imwrite(str(png), np.zeros((40, 60, 3), dtype=np.uint8))
+        for options in (LlmImageOptions(max_side=0), LlmImageOptions(max_side=600)):
+            header, payload = _decode(image_data_url(png, None, options))
+            self.assertEqual(header, "data:image/png;base64")
+            self.assertEqual(payload, png.read_bytes())
+
+    def test_large_enough_thumbnail_is_used_without_reading_the_original(self) -> None:
+        thumbs = self.root / "thumbs"
+        thumbs.mkdir()
+        self._write("thumbs/abc.jpg", _noise(300, 400, seed=1))
+        missing = self.root / "nas" / "gone.jpg"
+        options = LlmImageOptions(max_side=200, thumbs_dir=str(thumbs))
+        _header, payload = _decode(image_data_url(missing, "abc", options))
+        decoded = cv2.imdecode(np.frombuffer(payload, np.uint8), cv2.IMREAD_COLOR)
+        self.assertEqual(decoded.shape[:2], (150, 200))
+
+    def test_large_enough_proxy_is_reused_and_misses_write_nothing(self) -> None:
+        thumbs = self.root / "thumbs"
+        thumbs.mkdir()
+        self._write("thumbs/abc.jpg", _noise(60, 80))
+        source = self._write("photo.jpg", _noise(900, 1200, seed=2))
+        cache = ProxyCache(self.root / "cache")
+        options = LlmImageOptions(max_side=300, proxy_cache=cache, thumbs_dir=str(thumbs))
+
+        image_data_url(source, "abc", options)
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+        self.assertFalse(cache.root.exists())
+
+        cache.analysis_image("abc", source, 200)
+        cache.analysis_image("abc", source, 400)
+        missing = self.root / "nas" / "gone.jpg"
+        _header, payload = _decode(image_data_url(missing, "abc", options))
+        decoded = cv2.imdecode(np.frombuffer(payload, np.uint8), cv2.IMREAD_COLOR)
+        self.assertEqual(decoded.shape[:2], (225, 300))
+
+    def test_reduced_decode_keeps_at_least_max_side(self) -> None:
+        path = self._write("big.jpg", _noise(1000, 1600))
+        self.assertEqual(_decode_reduced(path, 400).shape[:2], (250, 400))
+        self.assertEqual(_decode_reduced(path, 700).shape[:2], (500, 800))
+        self.assertEqual(_decode_reduced(path, 100).shape[:2], (125, 200))
+        self.assertEqual(_decode_reduced(path, 1200).shape[:2], (1000, 1600))
+
+
+if __name__ == "__main__":
+    unittest.main()
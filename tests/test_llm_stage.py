@@ -1,4 +1,60 @@
-from photo_curator.pipeline_v1.llm_stage import _chat_completions_endpoint, _extract_content_text
+from datetime import datetime
+from pathlib import Path
+from unittest import mock
+
+from photo_curator.pipeline_v1.gating import ScoringGates
+from photo_curator.pipeline_v1.llm_stage import (
+    PROMPT_VERSION,
+    _chat_completions_endpoint,
+    _extract_content_text,
+    _llm_candidates_filter,
+    run_llm_descriptions,
+)
+from photo_curator.pipeline_v1.models import DescriptionOptions
+
+
+class _RecordingDb:
+    def __init__(self, rows: list[tuple[object, ...]]) -> None:
+        self.rows = rows
+        self.queries: list[tuple[str, tuple[object, ...]]] = []
+        self.executed: list[tuple[str, tuple[object, ...]]] = []
+
+    def fetchall(self, sql: str, params: tuple[object, ...] = ()) -> list[tuple[object, ...]]:
+        if "INSERT INTO llm_runs" in sql:
+            return [(1,)]
+        self.queries.append((sql, params))
+        return self.rows
+
+    def execute(self, sql: str, params: tuple[object, ...] = ()) -> None:
+        self.executed.append((sql, params))
+
+
+class _LibraryDb(_RecordingDb):
+    """Answers the candidate query like Postgres would, from recorded results and skips."""
+
+    def __init__(self, rows: list[tuple[object, ...]]) -> None:
+        super().__init__(rows)
+        self.described: set[object] = set()
+
+    def fetchall(self, sql: str, params: tuple[object, ...] = ()) -> list[tuple[object, ...]]:
+        if "INSERT INTO llm_runs" in sql:
+            return [(1,)]
+        self.queries.append((sql, params))
+        skips_checked = "file_llm_skips" in sql
+        candidates = [
+            row
+            for row in self.rows
+            if row[0] not in self.described and not (skips_checked and self._skipped(row[0]))
+        ]
+        return candidates[: int(params[-1])] if "LIMIT" in sql else candidates
+
+    def execute(self, sql: str, params: tuple[object, ...] = ()) -> None:
+        super().execute(sql, params)
+        if "INTO file_llm_results" in sql:
+            self.described.add(params[0])
+
+    def _skipped(self, file_id: object) -> bool:
+        return any("INTO file_llm_skips" in sql and p[0] == file_id for sql, p in self.executed)
 
 
 def test_chat_completions_endpoint_accepts_base_with_v1() -> None:
@@ -21,3 +77,77 @@ def test_extract_content_text_handles_openai_list_format() -> None:
         {"type": "image", "image_url": {"url": "data:image/jpeg;base64,abc"}},
     ]
     assert _extract_content_text(content) == '{"description":"hello"}'
+
+
+def test_candidates_filter_selects_missing_or_stale_results() -> None:
+    where, params = _llm_candidates_filter(
+        vision_model_name="qwen", prompt_version="v2", force_rescore_all=False, since=None
+    )
+    assert "r.file_id IS NULL" in where
+    assert "r.content_sha256 <> f.sha256" in where
+    assert "NOT EXISTS" in where and "file_llm_skips s" in where
+    assert params == ("qwen", "v2", "qwen", "v2")
+
+
+def test_candidates_filter_force_and_since() -> None:
+    since = datetime(2026, 10, 1)
+    assert _llm_candidates_filter(
+        vision_model_name="qwen", prompt_version="v2", force_rescore_all=True, since=None
+    ) == ("", ())
+    assert _llm_candidates_filter(
+        vision_model_name="qwen", prompt_version="v2", force_rescore_all=True, since=since
+    ) == ("WHERE f.created_at >= %s", (since,))
+
+
+def test_incremental_run_selects_candidates_and_records_content(tmp_path: Path) -> None:
+    since = datetime(2026, 10, 1)
+    (tmp_path / "new.jpg").write_bytes(b"")
+    db = _RecordingDb([(7, str(tmp_path), "new.jpg", "cafe", 0.4, 0.6, 0.5)])
+    response = {"description": "a harbour at dusk", "tags": ["harbour"]}
+    with mock.patch("photo_curator.pipeline_v1.llm_stage._call_lmstudio", return_value=response):
+        stats = run_llm_descriptions(
+            db,
+            options=DescriptionOptions(provider="lmstudio", lmstudio_model="qwen"),
+            limit=50,
+            since=since,
+        )
+
+    assert stats.processed == 1
+    ((sql, params),) = db.queries
+    assert "LEFT JOIN file_llm_results r" in sql
+    assert "LIMIT %s" in sql
+    assert params == ("qwen", PROMPT_VERSION, "qwen", PROMPT_VERSION, since, 50)
+    (insert,) = [params for sql, params in db.executed if "INTO file_llm_results" in sql]
+    assert insert[0] == 7
+    assert insert[-1] == "cafe"
+
+
+def test_limit_runs_move_past_gated_and_missing_files(tmp_path: Path) -> None:
+    for name in ("4.jpg", "5.jpg"):
+        (tmp_path / name).write_bytes(b"")
+    db = _LibraryDb(
+        [
+            (1, str(tmp_path), "1.jpg", "a1", 0.1, 0.5, 0.1),
+            (2, str(tmp_path), "2.jpg", "a2", 0.1, 0.5, 0.1),
+            (3, str(tmp_path), "gone.jpg", "a3", 0.1, 0.5, 0.9),
+            (4, str(tmp_path), "4.jpg", "a4", 0.1, 0.5, 0.9),
+            (5, str(tmp_path), "5.jpg", "a5", 0.1, 0.5, 0.9),
+        ]
+    )
+    options = DescriptionOptions(provider="lmstudio", lmstudio_model="qwen")
+    response = {"description": "a harbour at dusk", "tags": ["harbour"]}
+    with mock.patch(
+        "photo_curator.pipeline_v1.llm_stage._call_lmstudio", return_value=response
+    ) as call:
+        for _run in range(2):
+            run_llm_descriptions(
+                db, options=options, gates=ScoringGates(min_technical_quality=0.5), limit=3
+            )
+
+    assert [args[0].name for args, _kwargs in call.call_args_list] == ["4.jpg", "5.jpg"]
+    skips = [params for sql, params in db.executed if "INTO file_llm_skips" in sql]
+    assert [(params[0], params[-1]) for params in skips] == [
+        (1, "technical_quality"),
+        (2, "technical_quality"),
+        (3, "missing"),
+    ]
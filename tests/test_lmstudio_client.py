@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import io
+import json
+import threading
+import time
+import unittest
+from typing import Self
+from unittest import mock
+from urllib import error
+
+from photo_curator.pipeline_v1.lmstudio_client import (
+    AdaptiveLimit,
+    LmStudioClient,
+    LmStudioConcurrency,
+)
+
+
+class _Response(io.BytesIO):
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def _ok(content: str = "ok") -> _Response:
+    body = {"choices": [{"message": {"content": content}}]}
+    return _Response(json.dumps(body).encode("utf-8"))
+
+
+def _http_error(code: int) -> error.HTTPError:
+    return error.HTTPError("http://lmstudio", code, "busy", {}, io.BytesIO(b"slow down"))
+
+
+class AdaptiveLimitTests(unittest.TestCase):
+    def test_limit_grows_one_per_window_up_to_the_cap(self) -> None:
+        limit = AdaptiveLimit(max_in_flight=3, latency_tolerance=2.0)
+        self.assertEqual(limit.current, 1)
+        limit.on_success(1.0)
+        self.assertEqual(limit.current, 2)
+        for _ in range(20):
+            limit.on_success(1.0)
+        self.assertEqual(limit.current, 3)
+
+    def test_slow_response_and_overload_halve_the_limit(self) -> None:
+        limit = AdaptiveLimit(max_in_flight=8, latency_tolerance=2.0)
+        for _ in range(60):
+            limit.on_success(0.0)
+        self.assertEqual(limit.current, 8)
+        limit.on_success(5.0)
+        self.assertEqual(limit.current, 4)
+        limit.on_overload()
+        self.assertEqual(limit.current, 2)
+        self.assertEqual(limit.decreases, 2)
+
+    def test_one_halving_per_round_trip(self) -> None:
+        limit = AdaptiveLimit(max_in_flight=8, latency_tolerance=2.0)
+        for _ in range(60):
+            limit.on_success(10.0)
+        limit.on_overload()
+        limit.on_overload()
+        self.assertEqual(limit.current, 4)
+        self.assertEqual(limit.decreases, 1)
+
+
+class LmStudioClientMapTests(unittest.TestCase):
+    def test_yields_every_item_and_never_exceeds_the_cap(self) -> None:
+        client = LmStudioClient("http://lmstudio", timeout_seconds=5.0)
+        client.limit.limit = float(client.limit.max_in_flight)
+        active = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def call(item: int) -> int:
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.01)
+            with lock:
+                active -= 1
+            return item * 2
+
+        with client:
+            results = dict(client.map(range(20), call))
+        self.assertEqual(results, {item: item * 2 for item in range(20)})
+        self.assertLessEqual(peak, 4)
+        self.assertEqual(client.peak_in_flight, 4)
+
+    def test_starts_with_one_request_in_flight(self) -> None:
+        client = LmStudioClient("http://lmstudio", timeout_seconds=5.0)
+        pulled: list[int] = []
+
+        def items():
+            for item in range(3):
+                pulled.append(item)
+                yield item
+
+        with client:
+            iterator = client.map(items(), lambda item: item)
+            next(iterator)
+            self.assertEqual(pulled, [0])
+            list(iterator)
+
+    def test_stage_deadline_stops_pulling_items(self) -> None:
+        client = LmStudioClient(
+            "http://lmstudio",
+            timeout_seconds=5.0,
+            concurrency=LmStudioConcurrency(stage_deadline_seconds=0.05),
+        )
+        pulled: list[int] = []
+
+        def items():
+            for item in range(1000):
+                pulled.append(item)
+                yield item
+
+        def call(item: int) -> int:
+            time.sleep(0.02)
+            return item
+
+        with client:
+            done = [item for item, _result in client.map(items(), call)]
+        self.assertTrue(client.deadline_reached)
+        self.assertEqual(done, pulled)
+        self.assertLess(len(pulled), 1000)
+
+
+class LmStudioClientChatTests(unittest.TestCase):
+    def test_429_is_retried_and_backs_off(self) -> None:
+        client = LmStudioClient("http://lmstudio", timeout_seconds=30.0)
+        client.limit.limit = 4.0
+        with (
+            mock.patch(
+                "photo_curator.pipeline_v1.lmstudio_client.request.urlopen",
+                side_effect=[_http_error(429), _ok("hello")],
+            ) as urlopen,
+            mock.patch("photo_curator.pipeline_v1.lmstudio_client.time.sleep") as sleep,
+        ):
+            raw = client.chat({"model": "m"}, label="a.jpg")
+        self.assertEqual(raw["choices"][0]["message"]["content"], "hello")
+        self.assertEqual(urlopen.call_count, 2)
+        sleep.assert_called_once()
+        self.assertEqual(client.throttled, 1)
+        self.assertEqual(client.requests, 1)
+        self.assertEqual(client.limit.decreases, 1)
+
+    def test_other_http_errors_are_not_retried(self) -> None:
+        client = LmStudioClient("http://lmstudio", timeout_seconds=30.0)
+        with mock.patch(
+            "photo_curator.pipeline_v1.lmstudio_client.request.urlopen",
+            side_effect=[_http_error(400)],
+        ) as urlopen:
+            self.assertIsNone(client.chat({"model": "m"}, label="a.jpg"))
+        self.assertEqual(urlopen.call_count, 1)
+        self.assertEqual(client.failures, 1)
+
+    def test_retries_stop_at_the_per_request_deadline(self) -> None:
+        client = LmStudioClient("http://lmstudio", timeout_seconds=0.5)
+        with (
+            mock.patch(
+                "photo_curator.pipeline_v1.lmstudio_client.request.urlopen",
+                side_effect=TimeoutError("timed out"),
+            ) as urlopen,
+            mock.patch("photo_curator.pipeline_v1.lmstudio_client.time.sleep") as sleep,
+        ):
+            self.assertIsNone(client.chat({"model": "m"}, label="a.jpg"))
+        # The first backoff (0.75s) would already run past the 0.5s deadline.
+        self.assertEqual(urlopen.call_count, 1)
+        sleep.assert_not_called()
+        self.assertEqual(client.timeouts, 1)
+        self.assertLessEqual(urlopen.call_args.kwargs["timeout"], 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from photo_curator.pipeline_v1.metrics_stage import score_metrics
+
+
+class _FilesDb:
+    def __init__(self, rows: list[tuple[object, ...]]) -> None:
+        self.rows = rows
+        self.statements: list[tuple[str, tuple[object, ...]]] = []
+
+    def fetchall(self, sql: str, params: tuple[object, ...] = ()) -> list[tuple[object, ...]]:
+        return self.rows
+
+    def execute(self, sql: str, params: tuple[object, ...] = ()) -> None:
+        self.statements.append((sql, params))
+
+
+class ScoreMetricsSketchModeTests(unittest.TestCase):
+    def _run(self, loaded: list[np.ndarray | None]) -> str:
+        db = _FilesDb([(1, "/r", "a.jpg", "h1"), (2, "/r", "b.jpg", "h2")])
+        with mock.patch(
+            "photo_curator.pipeline_v1.metrics_stage.load_analysis_image", side_effect=loaded
+        ):
+            stats = score_metrics(db, log_distribution=False)
+        return stats.sketch_mode
+
+    def test_full_pass_replaces_the_library_sketch(self) -> None:
+        image = np.full((32, 32, 3), 128, dtype=np.uint8)
+        self.assertEqual(self._run([image, image]), "replace")
+
+    def test_skipped_file_forces_a_rebuild(self) -> None:
+        image = np.full((32, 32, 3), 128, dtype=np.uint8)
+        self.assertEqual(self._run([image, None]), "rebuild")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+import torch
+
+from photo_curator.nima.inference import (
+    _load_state_dict,
+    distribution_stats,
+    heuristic_inputs,
+    heuristic_score,
+    heuristic_scores,
+    nima_input,
+    score_inputs,
+)
+from photo_curator.pipeline_run import SKETCH_COLUMNS, PipelineRun
+from photo_curator.pipeline_v1.nima_stage import (
+    NIMA_HEURISTIC_VERSION,
+    NIMA_MODEL_VERSION,
+    NimaOptions,
+    score_nima,
+    store_nima_scores,
+)
+from photo_curator.pipeline_v1.scoring import compute_clip_aesthetic
+from photo_curator.quantile_sketch import QuantileSketch
+
+
+class _CountingNima(torch.nn.Module):
+    """Stands in for NIMA: a softmax over 10 classes from the mean of each channel."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.head = torch.nn.Linear(3, 10)
+        self.calls = 0
+
+    def forward(self, images: torch.Tensor) -> torch.Tensor:
+        self.calls += 1
+        return torch.softmax(self.head(images.mean(dim=(2, 3))), dim=-1)
+
+
+class _RecordingDb:
+    def __init__(self) -> None:
+        self.statements: list[tuple[str, tuple[object, ...]]] = []
+
+    def execute(self, sql: str, params: tuple[object, ...] = ()) -> None:
+        self.statements.append((sql, params))
+
+
+class _PagedDb(_RecordingDb):
+    """Serves `rows` (id, root, path, sha256, technical_quality, composition) by keyset page."""
+
+    def __init__(self, rows: list[tuple[object, ...]]) -> None:
+        super().__init__()
+        self.rows = rows
+        self.queries: list[tuple[str, tuple[object, ...]]] = []
+
+    def fetchall(self, sql: str, params: tuple[object, ...] = ()) -> list[tuple[object, ...]]:
+        self.queries.append((sql, params))
+        if "COUNT(*)" in sql:
+            return [(len(self.rows),)]
+        if "SELECT EXISTS" in sql:
+            return [(False,)]
+        *_filter, last_id, limit = params
+        return [row for row in self.rows if int(row[0]) > int(last_id)][: int(limit)]
+
+    def upserts(self) -> list[tuple[object, ...]]:
+        return [params for sql, params in self.statements if "unnest" in sql]
+
+
+class _RunDb(_PagedDb):
+    """`_PagedDb` that also answers the `PipelineRun` bookkeeping queries."""
+
+    def fetchall(self, sql: str, params: tuple[object, ...] = ()) -> list[tuple[object, ...]]:
+        if "FROM score_sketches" in sql:
+            return [(col, QuantileSketch().to_dict()) for col in SKETCH_COLUMNS]
+        if "percentile_cont" in sql:
+            return [(0, None, None, None, None, 0) * sql.count("percentile_cont")]
+        return super().fetchall(sql, params)
+
+
+class NimaInferenceTests(unittest.TestCase):
+    def test_distribution_stats_match_per_row_formula(self) -> None:
+        dists = torch.softmax(torch.randn(5, 10, generator=torch.Generator().manual_seed(0)), 1)
+        means, stds = distribution_stats(dists)
+        classes = np.arange(1, 11, dtype=np.float64)
+        for row, mean, std in zip(dists.double().numpy(), means, stds, strict=True):
+            expected_mean = float(row @ classes)
+            expected_std = float(np.sqrt(row @ (classes - expected_mean) ** 2))
+            self.assertAlmostEqual(mean, expected_mean / 10.0, places=5)
+            self.assertAlmostEqual(std, expected_std, places=5)
+
+    def test_nima_input_accepts_bgr_bgra_and_grayscale(self) -> None:
+        for image in (
+            np.zeros((40, 60, 3), dtype=np.uint8),
+            np.zeros((40, 60, 4), dtype=np.uint8),
+            np.zeros((40, 60), dtype=np.uint8),
+        ):
+            tensor = nima_input(image)
+            self.assertEqual(tuple(tensor.shape), (3, 224, 224))
+            self.assertEqual(tensor.dtype, torch.uint8)
+
+    def test_nima_input_converts_bgr_to_rgb(self) -> None:
+        bgr = np.zeros((10, 10, 3), dtype=np.uint8)
+        bgr[..., 2] = 255
+        tensor = nima_input(bgr)
+        self.assertEqual(int(tensor[0].min()), 255)
+        self.assertEqual(int(tensor[2].max()), 0)
+
+    def test_score_inputs_runs_one_forward_pass_per_batch(self) -> None:
+        model = _CountingNima().eval()
+        rng = np.random.default_rng(1)
+        inputs = [
+            nima_input(rng.integers(0, 256, size=(32, 48, 3), dtype=np.uint8)) for _ in range(6)
+        ]
+        means, stds = score_inputs(model, inputs)
+        self.assertEqual(model.calls, 1)
+        self.assertEqual(means.shape, (6,))
+        self.assertTrue(np.all((means >= 0.1) & (means <= 1.0)))
+        self.assertTrue(np.all(stds >= 0.0))
+        single_means, _single_stds = score_inputs(model, inputs[:1])
+        self.assertAlmostEqual(float(single_means[0]), float(means[0]), places=5)
+
+
+class NimaWeightsCacheTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        env = mock.patch.dict(os.environ, {"PHOTO_CURATOR_CACHE_DIR": self.tmp.name})
+        env.start()
+        self.addCleanup(env.stop)
+        self.weights = Path(self.tmp.name) / "weights.pth"
+        self.state = {
+            "features.0.weight": torch.randn(4, 3, 3, 3),
+            "classifier.1.bias": torch.randn(10),
+            "steps": torch.tensor(7),
+        }
+        torch.save(self.state, self.weights)
+
+    def _cache_files(self) -> list[str]:
+        return sorted(path.name for path in (Path(self.tmp.name) / "nima").glob("*.pt"))
+
+    def test_first_load_writes_converted_cache_and_later_loads_reuse_it(self) -> None:
+        first = _load_state_dict(self.weights, "bf16", mmap=True)
+        self.assertEqual(first["features.0.weight"].dtype, torch.bfloat16)
+        self.assertEqual(first["steps"].dtype, torch.int64)
+        cache_files = self._cache_files()
+        self.assertEqual(len(cache_files), 1)
+        self.assertTrue(cache_files[0].startswith("nima-bf16-"))
+        cache_file = Path(self.tmp.name) / "nima" / cache_files[0]
+        written_at = cache_file.stat().st_mtime_ns
+
+        with mock.patch("photo_curator.nima.inference.torch.save") as save:
+            again = _load_state_dict(self.weights, "bf16", mmap=True)
+        save.assert_not_called()
+        self.assertEqual(cache_file.stat().st_mtime_ns, written_at)
+        torch.testing.assert_close(again["classifier.1.bias"], first["classifier.1.bias"])
+
+    def test_fp32_cache_matches_source_and_changed_source_gets_new_entry(self) -> None:
+        loaded = _load_state_dict(self.weights, "fp32", mmap=True)
+        torch.testing.assert_close(loaded["features.0.weight"], self.state["features.0.weight"])
+
+        torch.save({**self.state, "classifier.1.bias": torch.zeros(10)}, self.weights)
+        os.utime(self.weights, ns=(0, 1_000_000_000))
+        reloaded = _load_state_dict(self.weights, "fp32", mmap=True)
+        self.assertEqual(float(reloaded["classifier.1.bias"].abs().sum()), 0.0)
+        self.assertEqual(len(self._cache_files()), 2)
+
+
+class HeuristicScoreTests(unittest.TestCase):
+    def test_heuristic_scores_match_scalar_clip_aesthetic_blend(self) -> None:
+        quality = np.array([0.0, 0.3, 0.9, 1.0])
+        balance = np.array([1.0, 0.5, 0.2, 1.0])
+        means, stds = heuristic_scores(quality, balance)
+        for q, b, mean, std in zip(quality, balance, means, stds, strict=True):
+            expected, _aesthetic, _keep = compute_clip_aesthetic(q, b, 0.0, q)
+            self.assertAlmostEqual(mean, expected)
+            self.assertAlmostEqual(std, 0.1 + (1.0 - expected) * 0.05)
+
+    def test_single_image_score_uses_the_stored_metric_inputs(self) -> None:
+        rng = np.random.default_rng(3)
+        image = rng.integers(0, 256, size=(60, 80, 3), dtype=np.uint8)
+        quality, balance = heuristic_inputs(image)
+        means, stds = heuristic_scores(np.array([quality]), np.array([balance]))
+        # OpenCV's threaded reductions may sum in a different order under load.
+        np.testing.assert_allclose(heuristic_score(image), (means[0], stds[0]), rtol=1e-9)
+        np.testing.assert_allclose(
+            heuristic_score(image[..., 0]),
+            heuristic_score(np.dstack([image[..., 0]] * 3)),
+            rtol=1e-9,
+        )
+
+
+class HeuristicStageTests(unittest.TestCase):
+    def _run(self, db: _PagedDb, **kwargs: object) -> tuple[object, mock.MagicMock]:
+        image = np.random.default_rng(5).integers(0, 256, size=(40, 40, 3), dtype=np.uint8)
+        with (
+            mock.patch("photo_curator.pipeline_v1.nima_stage.load_nima_model", return_value=None),
+            mock.patch(
+                "photo_curator.pipeline_v1.nima_stage.load_analysis_image", return_value=image
+            ) as load,
+        ):
+            stats = score_nima(db, batch_size=10, prefetch_workers=1, **kwargs)
+        return stats, load
+
+    def test_stored_metrics_are_reused_and_only_missing_ones_decoded(self) -> None:
+        db = _PagedDb(
+            [
+                (1, "/r", "a.jpg", "h1", 0.6, 0.4),
+                (2, "/r", "b.jpg", "h2", None, None),
+                (3, "/r", "c.jpg", "h3", 0.2, 0.9),
+            ]
+        )
+        stats, load = self._run(db)
+        self.assertEqual(load.call_count, 1)
+        self.assertEqual(stats.processed, 3)
+        (upsert,) = db.upserts()
+        version, file_ids, means, _stds = upsert
+        self.assertEqual(version, NIMA_HEURISTIC_VERSION)
+        self.assertEqual(file_ids, [1, 2, 3])
+        expected, _ = heuristic_scores(np.array([0.6, 0.2]), np.array([0.4, 0.9]))
+        self.assertAlmostEqual(means[0], expected[0])
+        self.assertAlmostEqual(means[2], expected[1])
+
+    def test_heuristic_pass_never_selects_real_nima_rows(self) -> None:
+        db = _PagedDb([])
+        stats, _load = self._run(db, force_rescore_all=True)
+        for sql, params in db.queries:
+            self.assertIn("nima_model_version IS DISTINCT FROM", sql)
+            self.assertEqual(params[0], NIMA_MODEL_VERSION)
+        # Real NIMA rows are not in the run's sketch, so it cannot replace the library's.
+        self.assertEqual(stats.sketch_mode, "rebuild")
+
+    def test_incremental_pass_merges_when_nothing_is_overwritten(self) -> None:
+        db = _PagedDb([(1, "/r", "a.jpg", "h1", 0.6, 0.4)])
+        stats, _load = self._run(db)
+        self.assertEqual(stats.sketch_mode, "merge")
+
+    def test_run_with_nima_sketches_completes(self) -> None:
+        db = _RunDb([(1, "/r", "a.jpg", "h1", 0.6, 0.4), (2, "/r", "b.jpg", "h2", 0.2, 0.9)])
+        run = PipelineRun(db)
+        run.start()
+        stats, _load = self._run(db)
+        run.update_stage(
+            nima_scored=stats.processed, sketches=stats.sketches, sketch_mode=stats.sketch_mode
+        )
+        run.complete()
+
+        self.assertEqual(run.stats.score_distributions["nima_mean"].count, 2)
+        stored = {
+            params[0]: params[1] for sql, params in db.statements if "INTO score_sketches" in sql
+        }
+        self.assertEqual(stored, {"nima_mean": 2, "nima_std": 2})
+        status_sql, status_params = db.statements[-1]
+        self.assertIn("status = 'completed'", status_sql)
+        self.assertEqual(status_params[-2:], (2, run.run_id))
+
+    def test_fallback_can_be_disabled(self) -> None:
+        db = _PagedDb([(1, "/r", "a.jpg", "h1", 0.6, 0.4)])
+        stats, _load = self._run(db, options=NimaOptions(heuristic_fallback=False))
+        self.assertEqual(stats.processed, 0)
+        self.assertEqual(db.queries, [])
+
+
+class StoreNimaScoresTests(unittest.TestCase):
+    def test_batch_is_written_in_one_statement(self) -> None:
+        db = _RecordingDb()
+        sketches: dict = {}
+        written = store_nima_scores(
+            db, [3, 1], np.array([0.55, 0.61]), np.array([1.4, 1.2]), sketches
+        )
+        self.assertEqual(written, 2)
+        self.assertEqual(len(db.statements), 1)
+        sql, params = db.statements[0]
+        self.assertIn("unnest", sql)
+        self.assertEqual(params, (NIMA_MODEL_VERSION, [3, 1], [0.55, 0.61], [1.4, 1.2]))
+        self.assertEqual(sketches["nima_mean"].count, 2)
+
+    def test_empty_batch_is_not_written(self) -> None:
+        db = _RecordingDb()
+        self.assertEqual(store_nima_scores(db, [], np.array([]), np.array([])), 0)
+        self.assertEqual(db.statements, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import threading
+import time
+import unittest
+
+from photo_curator.pipeline_v1.prefetch import PrefetchLoader
+
+
+def _pager(pages: list[list[int]]):
+    remaining = list(pages)
+
+    def fetch_page() -> list[int]:
+        return remaining.pop(0) if remaining else []
+
+    return fetch_page
+
+
+class PrefetchLoaderTests(unittest.TestCase):
+    def test_yields_prepared_items_in_row_order_and_drops_none(self) -> None:
+        def prepare(row: int) -> int | None:
+            time.sleep(0.001 * (row % 3))
+            return None if row == 4 else row * 10
+
+        with PrefetchLoader(
+            _pager([[1, 2, 3], [4, 5], [6]]), prepare, workers=3, depth=2
+        ) as loader:
+            items = list(loader)
+
+        self.assertEqual(items, [10, 20, 30, 50, 60])
+        self.assertEqual(loader.stats.pages, 3)
+        self.assertEqual(loader.stats.items, 6)
+        self.assertLessEqual(loader.stats.max_queue_depth, 2)
+
+    def test_next_page_is_fetched_while_consumer_is_busy(self) -> None:
+        fetched = threading.Event()
+        pages = [[1, 2], [3, 4]]
+
+        def fetch_page() -> list[int]:
+            if not pages:
+                return []
+            page = pages.pop(0)
+            if not pages:
+                fetched.set()
+            return page
+
+        with PrefetchLoader(fetch_page, lambda row: row, workers=1, depth=8) as loader:
+            iterator = iter(loader)
+            self.assertEqual(next(iterator), 1)
+            self.assertTrue(fetched.wait(timeout=2.0))
+            self.assertEqual(list(iterator), [2, 3, 4])
+
+    def test_prepare_errors_reach_the_consumer(self) -> None:
+        def prepare(row: int) -> int:
+            if row == 2:
+                raise ValueError("bad row")
+            return row
+
+        with PrefetchLoader(_pager([[1, 2, 3]]), prepare, workers=2, depth=4) as loader:
+            iterator = iter(loader)
+            self.assertEqual(next(iterator), 1)
+            with self.assertRaises(ValueError):
+                next(iterator)
+
+    def test_page_errors_reach_the_consumer(self) -> None:
+        def fetch_page() -> list[int]:
+            raise RuntimeError("db down")
+
+        with (
+            PrefetchLoader(fetch_page, lambda row: row) as loader,
+            self.assertRaises(RuntimeError),
+        ):
+            list(loader)
+
+
+if __name__ == "__main__":
+    unittest.main()
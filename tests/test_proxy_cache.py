@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import tempfile
+import unittest
+from pathlib import Path
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from photo_curator.pipeline_v1.proxy_cache import ProxyCache, _center_crop_rgb
+
+
+class ProxyCacheTests(unittest.TestCase):
+    def test_analysis_image_is_cached_and_memory_mapped(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            source = root / "photo.png"
+            rng = np.random.default_rng(3)
+            cv2.imwrite(str(source), rng.integers(0, 255, (300, 500, 3), dtype=np.uint8))
+
+            cache = ProxyCache(root / "cache")
+            first = cache.analysis_image("ab" * 32, source, max_size=200)
+            source.unlink()
+            second = cache.analysis_image("ab" * 32, source, max_size=200)
+
+            self.assertEqual((cache.misses, cache.hits), (1, 1))
+            self.assertIsInstance(second, np.memmap)
+            self.assertEqual(second.shape, (120, 200, 3))
+            np.testing.assert_array_equal(np.asarray(second), first)
+
+    def test_center_crop_matches_open_clip_resize_and_crop(self) -> None:
+        from torchvision import transforms
+
+        rng = np.random.default_rng(5)
+        rgb = rng.integers(0, 255, (375, 500, 3), dtype=np.uint8)
+        reference = transforms.Compose(
+            [
+                transforms.Resize(224, interpolation=transforms.InterpolationMode.BICUBIC),
+                transforms.CenterCrop(224),
+            ]
+        )(Image.fromarray(rgb))
+
+        np.testing.assert_array_equal(_center_crop_rgb(rgb, 224), np.asarray(reference))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import json
+import unittest
+
+import numpy as np
+
+from photo_curator.quantile_sketch import QuantileSketch
+
+
+def _sketch(values: np.ndarray, k: int = 200) -> QuantileSketch:
+    sketch = QuantileSketch(k=k)
+    for value in values:
+        sketch.update(value)
+    return sketch
+
+
+class QuantileSketchTests(unittest.TestCase):
+    def test_small_sketch_matches_percentile_cont(self) -> None:
+        values = np.random.default_rng(1).random(57)
+        sketch = _sketch(values)
+
+        for q in (0.25, 0.5, 0.75, 0.9):
+            self.assertAlmostEqual(sketch.quantile(q), float(np.quantile(values, q)))
+        self.assertAlmostEqual(sketch.stddev, float(np.std(values, ddof=1)))
+
+    def test_merged_sketches_stay_within_rank_error(self) -> None:
+        values = np.random.default_rng(2).beta(2.0, 5.0, 50_000)
+        merged = _sketch(values[:30_000])
+        merged.merge(_sketch(values[30_000:]))
+        ordered = np.sort(values)
+
+        self.assertEqual(merged.count, values.size)
+        self.assertEqual((merged.min_val, merged.max_val), (ordered[0], ordered[-1]))
+        for q in (0.1, 0.25, 0.5, 0.75, 0.9):
+            rank = np.searchsorted(ordered, merged.quantile(q)) / values.size
+            self.assertLess(abs(rank - q), 0.02)
+
+    def test_json_roundtrip_is_lossless_and_deterministic(self) -> None:
+        values = np.random.default_rng(3).random(5_000)
+        sketch = _sketch(values)
+
+        restored = QuantileSketch.from_dict(json.loads(json.dumps(sketch.to_dict())))
+
+        self.assertEqual(restored.to_dict(), _sketch(values).to_dict())
+        self.assertEqual(restored.quantile(0.5), sketch.quantile(0.5))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import unittest
+
+import numpy as np
+
+from photo_curator.pipeline_v1.rank_stats import average_ranks, spearman, top_n_churn
+
+
+class RankStatsTests(unittest.TestCase):
+    def test_ties_share_their_average_rank(self) -> None:
+        clamped = np.array([0.0, 0.0, 1.0, 1.0])
+        self.assertAlmostEqual(spearman(clamped, np.array([0.1, 0.9, 0.2, 0.8])), 0.0)
+        self.assertAlmostEqual(spearman(clamped, np.array([0.1, 0.2, 0.8, 0.9])), 2 / 5**0.5)
+
+    def test_result_does_not_depend_on_row_order(self) -> None:
+        rng = np.random.default_rng(4)
+        a = rng.integers(0, 3, size=200).astype(np.float64)
+        b = a + rng.integers(0, 2, size=200)
+        order = rng.permutation(200)
+        self.assertAlmostEqual(spearman(a, b), spearman(a[order], b[order]))
+
+    def test_average_ranks_match_rankdata(self) -> None:
+        ranks = average_ranks(np.array([3.0, 1.0, 3.0, 2.0, 3.0]))
+        np.testing.assert_array_equal(ranks, [3.0, 0.0, 3.0, 1.0, 3.0])
+
+    def test_top_n_churn_counts_files_leaving_the_top(self) -> None:
+        current = np.array([0.9, 0.8, 0.1, 0.2])
+        self.assertEqual(top_n_churn(current, current, 2), 0.0)
+        self.assertEqual(top_n_churn(current, np.array([0.9, 0.1, 0.8, 0.2]), 2), 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import unittest
+
+from photo_curator.pipeline_run import (
+    ScoreDistribution,
+    _parse_distribution_row,
+    _score_distribution_sql,
+)
+
+
+class ScoreDistributionSqlTests(unittest.TestCase):
+    def test_query_aggregates_every_column_in_one_statement(self) -> None:
+        sql = _score_distribution_sql(["blur_score", "keep_score"])
+
+        self.assertEqual(sql.count("FROM file_metrics"), 1)
+        self.assertEqual(sql.count("percentile_cont(ARRAY[0.25, 0.5, 0.75, 0.9])"), 2)
+        self.assertIn("count(*) FILTER (WHERE keep_score IS NULL)", sql)
+
+    def test_parse_row_handles_values_and_empty_columns(self) -> None:
+        row = (
+            4, 0.1, 0.9, [0.2, 0.5, 0.7, 0.85], 0.3, 1,
+            0, None, None, None, None, 5,
+        )  # fmt: skip
+
+        distributions, null_counts = _parse_distribution_row(row, ["blur_score", "keep_score"])
+
+        self.assertEqual(
+            distributions["blur_score"],
+            ScoreDistribution(
+                min_val=0.1,
+                max_val=0.9,
+                median=0.5,
+                p25=0.2,
+                p75=0.7,
+                p90=0.85,
+                stddev=0.3,
+                count=4,
+            ),
+        )
+        self.assertEqual(distributions["keep_score"], ScoreDistribution())
+        self.assertEqual(null_counts, {"blur_score": 1, "keep_score": 5})
+
+
+if __name__ == "__main__":
+    unittest.main()
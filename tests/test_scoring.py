@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import unittest
+
+import numpy as np
+
+from photo_curator.pipeline_v1.scoring import (
+    ScoreComponents,
+    ScoringWeights,
+    compute_clip_aesthetic,
+    compute_composite_scores,
+    compute_curation_score,
+    compute_technical_quality,
+)
+
+
+def _components(rng: np.random.Generator, n: int) -> ScoreComponents:
+    def col() -> np.ndarray:
+        return rng.random(n)
+
+    nan = np.full(n, np.nan)
+    return ScoreComponents(
+        file_ids=np.arange(1, n + 1),
+        blur=col(),
+        brightness=col(),
+        contrast=col(),
+        entropy=col(),
+        noise=col(),
+        clip_raw=col(),
+        composition_balance=col(),
+        semantic_relevance=col(),
+        technical_quality=nan.copy(),
+        clip_aesthetic=nan.copy(),
+        aesthetic=nan.copy(),
+        keep=nan.copy(),
+        curation=nan.copy(),
+    )
+
+
+class CompositeScoreTests(unittest.TestCase):
+    def test_vectorised_scores_match_scalar_functions(self) -> None:
+        weights = ScoringWeights(keep_power_curve=1.1, technical_noise=0.3)
+        c = _components(np.random.default_rng(7), 200)
+
+        scores = compute_composite_scores(c, weights)
+
+        for i in range(len(c)):
+            tq = compute_technical_quality(
+                c.blur[i], c.brightness[i], c.contrast[i], c.entropy[i], c.noise[i], weights
+            )
+            clip_aesthetic, aesthetic, keep = compute_clip_aesthetic(
+                c.clip_raw[i], c.composition_balance[i], c.blur[i], tq, weights
+            )
+            curation = compute_curation_score(aesthetic, keep, tq, c.semantic_relevance[i], weights)
+            np.testing.assert_allclose(
+                [
+                    scores.technical_quality[i],
+                    scores.clip_aesthetic[i],
+                    scores.aesthetic[i],
+                    scores.keep[i],
+                    scores.curation[i],
+                ],
+                [tq, clip_aesthetic, aesthetic, keep, curation],
+                atol=1e-12,
+            )
+
+    def test_missing_raw_inputs_fall_back_to_stored_composites(self) -> None:
+        c = _components(np.random.default_rng(8), 3)
+        c.clip_raw[0] = np.nan
+        c.clip_aesthetic[0] = 0.6
+        c.semantic_relevance[1] = np.nan
+
+        scores = compute_composite_scores(c)
+
+        self.assertEqual(scores.clip_aesthetic[0], 0.6)
+        self.assertFalse(np.isnan(scores.keep[0]))
+        self.assertTrue(np.isnan(scores.curation[1]))
+
+
+if __name__ == "__main__":
+    unittest.main()
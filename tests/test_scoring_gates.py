@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from photo_curator.pipeline_v1.gating import GateTally, ScoringGates
+from photo_curator.pipeline_v1.llm_stage import run_llm_descriptions
+from photo_curator.pipeline_v1.models import DescriptionOptions
+
+
+class ScoringGatesTests(unittest.TestCase):
+    def test_defaults_disable_every_gate(self) -> None:
+        gates = ScoringGates()
+        self.assertFalse(gates.enabled)
+        self.assertIsNone(
+            gates.reason(blur_score=1.0, brightness_score=0.0, technical_quality_score=0.0)
+        )
+
+    def test_reasons_in_priority_order(self) -> None:
+        gates = ScoringGates(min_technical_quality=0.2, min_brightness=0.05, max_blur=0.95)
+        self.assertEqual(
+            gates.reason(blur_score=0.99, brightness_score=0.0, technical_quality_score=0.1),
+            "technical_quality",
+        )
+        self.assertEqual(
+            gates.reason(blur_score=0.99, brightness_score=0.0, technical_quality_score=0.5),
+            "brightness",
+        )
+        self.assertEqual(
+            gates.reason(blur_score=0.99, brightness_score=0.5, technical_quality_score=0.5),
+            "blur",
+        )
+        self.assertIsNone(
+            gates.reason(blur_score=0.5, brightness_score=0.5, technical_quality_score=0.5)
+        )
+
+    def test_missing_metrics_are_never_gated(self) -> None:
+        gates = ScoringGates(min_technical_quality=0.9, min_brightness=0.9, max_blur=0.1)
+        self.assertIsNone(
+            gates.reason(blur_score=None, brightness_score=None, technical_quality_score=None)
+        )
+
+    def test_time_saved_uses_mean_cost_of_scored_files(self) -> None:
+        tally = GateTally(scored=4, scored_seconds=10.0)
+        tally.by_reason["brightness"] += 3
+        self.assertEqual(tally.gated, 3)
+        self.assertAlmostEqual(tally.seconds_saved, 7.5)
+
+
+class _FakeDb:
+    def __init__(self, rows: list[tuple[object, ...]]) -> None:
+        self.rows = rows
+        self.executed: list[tuple[str, tuple[object, ...]]] = []
+
+    def fetchall(self, sql: str, params: tuple[object, ...] = ()) -> list[tuple[object, ...]]:
+        if "INSERT INTO llm_runs" in sql:
+            return [(1,)]
+        return self.rows
+
+    def execute(self, sql: str, params: tuple[object, ...] = ()) -> None:
+        self.executed.append((sql, params))
+
+
+class LlmGatingTests(unittest.TestCase):
+    def test_gated_files_skip_lmstudio(self) -> None:
+        with tempfile.TemporaryDirectory() as root:
+            for name in ("dark.jpg", "good.jpg"):
+                Path(root, name).write_bytes(b"")
+            db = _FakeDb(
+                [
+                    (1, root, "dark.jpg", "aa", 0.4, 0.01, 0.5),
+                    (2, root, "good.jpg", "bb", 0.4, 0.6, 0.5),
+                ]
+            )
+            response = {"description": "a photo", "tags": [], "aesthetic_score": 70}
+            with mock.patch(
+                "photo_curator.pipeline_v1.llm_stage._call_lmstudio", return_value=response
+            ) as call:
+                stats = run_llm_descriptions(
+                    db,
+                    options=DescriptionOptions(provider="lmstudio"),
+                    gates=ScoringGates(min_brightness=0.05),
+                )
+
+        self.assertEqual([c.args[0].name for c in call.call_args_list], ["good.jpg"])
+        self.assertEqual((stats.processed, stats.gated), (1, 1))
+        gate_writes = [params for sql, params in db.executed if "scoring_gate)" in sql]
+        self.assertEqual(gate_writes, [(1, "brightness")])
+
+
+if __name__ == "__main__":
+    unittest.main()
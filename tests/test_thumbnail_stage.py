@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from PIL import Image
+
+from photo_curator.pipeline_v1.thumbnail_stage import _write_thumbnail, thumbnail_path
+
+
+class ThumbnailStageTests(unittest.TestCase):
+    def test_thumbnail_is_downscaled_and_honours_exif_orientation(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            source = root / "landscape.jpg"
+            exif = Image.Exif()
+            exif[0x0112] = 6  # rotate 90 degrees clockwise on display
+            Image.new("RGB", (800, 400), (200, 40, 40)).save(source, exif=exif, quality=95)
+
+            destination = thumbnail_path(root, "abc123")
+            written = _write_thumbnail(source, destination, size=100)
+
+            self.assertEqual(destination.name, "abc123.jpg")
+            self.assertEqual(written, destination.stat().st_size)
+            with Image.open(destination) as thumb:
+                self.assertEqual(thumb.size, (50, 100))
+            self.assertEqual(list(root.glob(".*.tmp")), [])
+
+    def test_webp_thumbnail_uses_webp_suffix(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            source = root / "square.png"
+            Image.new("RGBA", (300, 300), (10, 20, 30, 255)).save(source)
+
+            destination = thumbnail_path(root, "def456", "webp")
+            _write_thumbnail(source, destination, size=64, thumbnail_format="webp", quality=80)
+
+            self.assertEqual(destination.suffix, ".webp")
+            with Image.open(destination) as thumb:
+                self.assertEqual(thumb.format, "WEBP")
+                self.assertEqual(thumb.size, (64, 64))
+
+    def test_failed_save_leaves_no_temp_file(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            source = root / "photo.jpg"
+            Image.new("RGB", (200, 100)).save(source)
+            destination = thumbnail_path(root, "abc123")
+
+            with (
+                mock.patch(
+                    "photo_curator.pipeline_v1.thumbnail_stage.os.replace",
+                    side_effect=OSError("disk full"),
+                ),
+                self.assertRaises(OSError),
+            ):
+                _write_thumbnail(source, destination, size=64)
+
+            self.assertEqual(list(root.glob(".*.tmp")), [])
+            self.assertFalse(destination.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
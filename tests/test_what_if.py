@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import unittest
+
+import numpy as np
+
+from photo_curator.pipeline_v1.scoring import (
+    DEFAULT_WEIGHTS,
+    ScoreComponents,
+    compute_composite_scores,
+)
+from photo_curator.pipeline_v1.what_if import evaluate_weights, parse_weight_overrides
+
+
+def _components(n: int) -> ScoreComponents:
+    rng = np.random.default_rng(11)
+    columns = {
+        name: rng.random(n)
+        for name in (
+            "blur",
+            "brightness",
+            "contrast",
+            "entropy",
+            "noise",
+            "clip_raw",
+            "composition_balance",
+            "semantic_relevance",
+        )
+    }
+    nan = np.full(n, np.nan)
+    components = ScoreComponents(
+        file_ids=np.arange(n),
+        technical_quality=nan,
+        clip_aesthetic=nan,
+        aesthetic=nan,
+        keep=nan,
+        curation=nan,
+        **columns,
+    )
+    # Stored composites = what the current default weights produce.
+    current = compute_composite_scores(components, DEFAULT_WEIGHTS)
+    components.technical_quality = current.technical_quality
+    components.clip_aesthetic = current.clip_aesthetic
+    components.aesthetic = current.aesthetic
+    components.keep = current.keep
+    components.curation = current.curation
+    return components
+
+
+class WhatIfTests(unittest.TestCase):
+    def test_parse_overrides_validates_names_and_values(self) -> None:
+        weights = parse_weight_overrides(["keep_power_curve=1.2", "curation_semantic=0.3"])
+
+        self.assertEqual(weights.keep_power_curve, 1.2)
+        self.assertEqual(weights.curation_semantic, 0.3)
+        self.assertEqual(weights.curation_keep, DEFAULT_WEIGHTS.curation_keep)
+        with self.assertRaises(ValueError):
+            parse_weight_overrides(["not_a_weight=1"])
+        with self.assertRaises(ValueError):
+            parse_weight_overrides(["keep_power_curve=high"])
+
+    def test_default_weights_reproduce_current_ranking(self) -> None:
+        report = evaluate_weights(_components(5_000), DEFAULT_WEIGHTS, top_n=100)
+
+        self.assertEqual(report.compared, 5_000)
+        self.assertEqual(report.top_n_churn, 0.0)
+        self.assertAlmostEqual(report.spearman, 1.0)
+        self.assertEqual(report.mean_abs_delta, 0.0)
+
+    def test_changed_weights_report_churn(self) -> None:
+        weights = parse_weight_overrides(["curation_semantic=0.9", "curation_aesthetic=0.0"])
+
+        report = evaluate_weights(_components(5_000), weights, top_n=100)
+
+        self.assertGreater(report.top_n_churn, 0.0)
+        self.assertLess(report.spearman, 1.0)
+        self.assertLess(report.candidate_percentiles[10.0], report.candidate_percentiles[90.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import os
+import unittest
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Self
+from unittest import mock
+
+from photo_curator.pipeline_v1.work_queue import StageWorkQueue, WorkQueueOptions
+
+
+class _FakeCursor:
+    def __init__(self, db: _FakeDb) -> None:
+        self.db = db
+        self.rowcount = -1
+        self._row: tuple[object, ...] | None = None
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        return None
+
+    def execute(self, sql: str, params: tuple[object, ...] = ()) -> None:
+        self.db.statements.append((sql, params))
+        if "SELECT EXISTS" in sql:
+            self._row = (bool(self.db.pages),)
+        elif "INSERT INTO stage_work_queue" in sql:
+            self.rowcount = 3
+
+    def fetchone(self) -> tuple[object, ...] | None:
+        return self._row
+
+
+class _FakeConnection:
+    def __init__(self, db: _FakeDb) -> None:
+        self.db = db
+
+    def cursor(self) -> _FakeCursor:
+        return _FakeCursor(self.db)
+
+    def commit(self) -> None:
+        self.db.commits += 1
+
+
+class _FakeDb:
+    """Hands out `pages` of file ids to successive claims."""
+
+    def __init__(self, pages: list[list[int]]) -> None:
+        self.pages = pages
+        self.statements: list[tuple[str, tuple[object, ...]]] = []
+        self.commits = 0
+
+    @contextmanager
+    def connection(self) -> Iterator[_FakeConnection]:
+        yield _FakeConnection(self)
+
+    def fetchall(self, sql: str, params: tuple[object, ...] = ()) -> list[tuple[object, ...]]:
+        self.statements.append((sql, params))
+        if "FOR UPDATE SKIP LOCKED" in sql:
+            return [(file_id,) for file_id in self.pages.pop(0)] if self.pages else []
+        if "COUNT(*)" in sql:
+            return [(sum(len(page) for page in self.pages),)]
+        return []
+
+    def execute(self, sql: str, params: tuple[object, ...] = ()) -> None:
+        self.statements.append((sql, params))
+
+    def deletes(self) -> list[tuple[object, ...]]:
+        return [params for sql, params in self.statements if sql.lstrip().startswith("DELETE")]
+
+
+class StageWorkQueueTests(unittest.TestCase):
+    def test_default_worker_id_is_unique_per_process(self) -> None:
+        worker_id = WorkQueueOptions().worker_id
+        self.assertEqual(WorkQueueOptions().worker_id, worker_id)
+        self.assertRegex(worker_id, rf"-{os.getpid()}-[0-9a-f]{{8}}$")
+        with mock.patch("photo_curator.pipeline_v1.work_queue._PROCESS_TOKEN", "0123abcd"):
+            self.assertNotEqual(WorkQueueOptions().worker_id, worker_id)
+
+    def test_claim_leases_with_worker_and_expiry(self) -> None:
+        db = _FakeDb([[7, 3, 5]])
+        queue = StageWorkQueue(db, "clip_aesthetic", WorkQueueOptions(worker_id="w1"))
+        self.assertEqual(queue.claim(10), [3, 5, 7])
+        _sql, params = db.statements[-1]
+        self.assertEqual(params, ("clip_aesthetic", 3, "w1", 10, "w1", 900))
+        self.assertEqual(queue.claim(), [])
+
+    def test_claim_after_lease_expiry_renews_held_files_instead_of_reclaiming(self) -> None:
+        db = _FakeDb([[1, 2], [3]])
+        queue = StageWorkQueue(
+            db, "clip_aesthetic", WorkQueueOptions(worker_id="w1", lease_seconds=60)
+        )
+        queue.claim()
+        # Files 1 and 2 are still held (deferred apply) when the next claim runs.
+        db.statements.clear()
+        self.assertEqual(queue.claim(), [3])
+        (renew_sql, renew_params), (claim_sql, claim_params) = db.statements
+        self.assertTrue(renew_sql.lstrip().startswith("UPDATE stage_work_queue"))
+        self.assertEqual(renew_params, (60, "clip_aesthetic", "w1"))
+        self.assertIn("leased_by IS DISTINCT FROM %s", claim_sql)
+        self.assertEqual(claim_params[2], "w1")
+
+    def test_iter_rows_leaves_completion_to_the_stage(self) -> None:
+        db = _FakeDb([[1, 2], [3]])
+        queue = StageWorkQueue(db, "metrics", WorkQueueOptions(worker_id="w1", claim_size=2))
+        rows = queue.iter_rows(lambda file_ids: [(file_id, "row") for file_id in file_ids])
+
+        self.assertEqual(list(rows), [(1, "row"), (2, "row"), (3, "row")])
+        self.assertEqual(db.deletes(), [])
+
+    def test_done_files_are_completed_in_claim_sized_batches(self) -> None:
+        db = _FakeDb([])
+        queue = StageWorkQueue(db, "llm", WorkQueueOptions(worker_id="w1", claim_size=2))
+        queue.done([1])
+        self.assertEqual(db.deletes(), [])
+        queue.done([2])
+        self.assertEqual(db.deletes(), [("llm", "w1", [1, 2])])
+        queue.done([3])
+        queue.flush()
+        self.assertEqual(db.deletes(), [("llm", "w1", [1, 2]), ("llm", "w1", [3])])
+
+    def test_enqueue_joins_existing_queue(self) -> None:
+        db = _FakeDb([[1]])
+        queue = StageWorkQueue(db, "llm", WorkQueueOptions(worker_id="w2"))
+        self.assertEqual(queue.enqueue("SELECT id FROM files"), 0)
+        self.assertFalse(any("INSERT" in sql for sql, _params in db.statements))
+
+    def test_enqueue_fills_empty_queue_under_advisory_lock(self) -> None:
+        db = _FakeDb([])
+        queue = StageWorkQueue(db, "llm", WorkQueueOptions(worker_id="w2"))
+        self.assertEqual(queue.enqueue("SELECT id FROM files WHERE id > %s", (10,)), 3)
+        lock_sql, _params = db.statements[0]
+        self.assertIn("pg_advisory_xact_lock", lock_sql)
+        insert_sql, insert_params = db.statements[-1]
+        self.assertIn("SELECT id FROM files WHERE id > %s", insert_sql)
+        self.assertEqual(insert_params, ("llm", 10))
+        self.assertEqual(db.commits, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()